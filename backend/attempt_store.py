@@ -0,0 +1,295 @@
+"""
+Persistent history of analysis attempts with incrementally maintained aggregates.
+
+Requests only append attempts to an in-memory buffer; a background task writes
+them to SQLite (WAL mode) in batches, updating per-user and per-topic counters
+in the same transaction. The dashboard then reads a handful of aggregate rows
+instead of scanning the history.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from feedback_cache import normalize_code
+
+logger = logging.getLogger(__name__)
+
+# Aggregates for every user together are stored under this user id
+ALL_USERS = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    problem_id TEXT,
+    code_hash TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    cached INTEGER NOT NULL,
+    verdict TEXT,
+    feedback TEXT,
+    duration_ms REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_user_created ON attempts (user_id, created_at);
+CREATE TABLE IF NOT EXISTS topic_stats (
+    user_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    judged INTEGER NOT NULL,
+    accepted INTEGER NOT NULL,
+    total_duration_ms REAL NOT NULL,
+    last_attempt_at REAL NOT NULL,
+    PRIMARY KEY (user_id, topic)
+);
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL,
+    solved INTEGER NOT NULL,
+    first_attempt_at REAL NOT NULL,
+    last_attempt_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS solved_problems (
+    user_id TEXT NOT NULL,
+    problem_id TEXT NOT NULL,
+    PRIMARY KEY (user_id, problem_id)
+);
+"""
+
+_UPSERT_TOPIC = """
+INSERT INTO topic_stats (user_id, topic, attempts, judged, accepted, total_duration_ms, last_attempt_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(user_id, topic) DO UPDATE SET
+    attempts = attempts + excluded.attempts,
+    judged = judged + excluded.judged,
+    accepted = accepted + excluded.accepted,
+    total_duration_ms = total_duration_ms + excluded.total_duration_ms,
+    last_attempt_at = max(last_attempt_at, excluded.last_attempt_at)
+"""
+
+_UPSERT_USER = """
+INSERT INTO user_stats (user_id, attempts, solved, first_attempt_at, last_attempt_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(user_id) DO UPDATE SET
+    attempts = attempts + excluded.attempts,
+    solved = solved + excluded.solved,
+    first_attempt_at = min(first_attempt_at, excluded.first_attempt_at),
+    last_attempt_at = max(last_attempt_at, excluded.last_attempt_at)
+"""
+
+
+class AttemptStore:
+    """
+    Batched attempt log plus per-user/per-topic aggregates in SQLite.
+
+    record() never touches the database. Pending attempts are flushed every
+    flush_interval seconds, or as soon as batch_size are waiting; if the
+    writer falls behind by more than max_pending, the oldest unwritten
+    attempts are dropped (and counted) rather than growing memory.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        accepted_verdict: str = "accepted"
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.accepted_verdict = accepted_verdict
+        self.written = 0
+        self.dropped = 0
+        self._pending: deque[dict] = deque(maxlen=max_pending)
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def record(
+        self,
+        user_id: str | None,
+        topic: str,
+        code: str,
+        *,
+        problem_id: str | None = None,
+        mode: str = "full",
+        cached: bool = False,
+        verdict: str | None = None,
+        feedback: dict | None = None,
+        duration_ms: float = 0.0
+    ) -> None:
+        """Queue an attempt for the next batch write. Cheap enough for the request path."""
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append({
+            "user_id": user_id or ALL_USERS,
+            "topic": topic,
+            "code": code,
+            "problem_id": problem_id,
+            "mode": mode,
+            "cached": cached,
+            "verdict": verdict,
+            "feedback": feedback,
+            "duration_ms": duration_ms,
+            "created_at": time.time(),
+        })
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start the background writer on the running event loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the background writer and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = self._wakeup = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write all pending attempts now. Returns how many were written."""
+        count = 0
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            await asyncio.to_thread(self._write, batch)
+            count += len(batch)
+        return count
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Failed to write attempts: %s: %s", type(e).__name__, e)
+
+    def _write(self, batch: list[dict]) -> None:
+        """Insert a batch of attempts and fold it into the aggregates, in one transaction."""
+        rows = []
+        topics: dict[tuple[str, str], list[float]] = {}
+        users: dict[str, list[float]] = {}
+        solved = set()
+        for attempt in batch:
+            user, topic, created_at = attempt["user_id"], attempt["topic"], attempt["created_at"]
+            code_hash = hashlib.sha256(normalize_code(attempt["code"]).encode("utf-8")).hexdigest()
+            rows.append((
+                user, topic, attempt["problem_id"], code_hash, attempt["mode"], int(attempt["cached"]),
+                attempt["verdict"], json.dumps(attempt["feedback"]) if attempt["feedback"] else None,
+                attempt["duration_ms"], created_at,
+            ))
+            judged = attempt["verdict"] is not None
+            accepted = attempt["verdict"] == self.accepted_verdict
+            owners = (user, ALL_USERS) if user != ALL_USERS else (ALL_USERS,)
+            for owner in owners:
+                t = topics.setdefault((owner, topic), [0, 0, 0, 0.0, 0.0])
+                t[0] += 1
+                t[1] += judged
+                t[2] += accepted
+                t[3] += attempt["duration_ms"]
+                t[4] = max(t[4], created_at)
+                u = users.setdefault(owner, [0, 0, created_at, created_at])
+                u[0] += 1
+                u[2] = min(u[2], created_at)
+                u[3] = max(u[3], created_at)
+                if accepted and attempt["problem_id"]:
+                    solved.add((owner, attempt["problem_id"]))
+
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO attempts (user_id, topic, problem_id, code_hash, mode, cached, verdict, "
+                "feedback, duration_ms, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            for owner, problem_id in solved:
+                # Only the first accepted submission of a problem counts towards "solved"
+                if self._db.execute(
+                    "INSERT OR IGNORE INTO solved_problems (user_id, problem_id) VALUES (?, ?)",
+                    (owner, problem_id)
+                ).rowcount:
+                    users[owner][1] += 1
+            self._db.executemany(_UPSERT_TOPIC, [(*key, *values) for key, values in topics.items()])
+            self._db.executemany(_UPSERT_USER, [(owner, *values) for owner, values in users.items()])
+        self.written += len(batch)
+
+    def summary(self, user_id: str | None = None) -> dict:
+        """
+        Aggregates for one user (or everyone when user_id is None).
+
+        Reads one user_stats row and at most one topic_stats row per topic,
+        independent of how many attempts have been recorded.
+
+        Returns:
+            dict with attempts, solved, first/last_attempt_at and a "topics"
+            list of per-topic counters
+        """
+        owner = user_id or ALL_USERS
+        with self._lock:
+            user = self._db.execute(
+                "SELECT attempts, solved, first_attempt_at, last_attempt_at FROM user_stats WHERE user_id = ?",
+                (owner,)
+            ).fetchone()
+            topic_rows = self._db.execute(
+                "SELECT topic, attempts, judged, accepted, total_duration_ms, last_attempt_at "
+                "FROM topic_stats WHERE user_id = ? ORDER BY topic",
+                (owner,)
+            ).fetchall()
+
+        attempts, solved, first_at, last_at = user or (0, 0, None, None)
+        return {
+            "attempts": attempts,
+            "solved": solved,
+            "first_attempt_at": first_at,
+            "last_attempt_at": last_at,
+            "topics": [
+                {
+                    "topic": topic,
+                    "attempts": count,
+                    "judged": judged,
+                    "accepted": accepted,
+                    "avg_duration_ms": total_ms / count,
+                    "last_attempt_at": topic_last_at,
+                }
+                for topic, count, judged, accepted, total_ms, topic_last_at in topic_rows
+            ],
+        }
+
+    def clear(self) -> None:
+        """Drop all attempts, aggregates and pending writes."""
+        self._pending.clear()
+        with self._lock, self._db:
+            for table in ("attempts", "topic_stats", "user_stats", "solved_problems"):
+                self._db.execute(f"DELETE FROM {table}")
+        self.written = self.dropped = 0
+
+    def stats(self) -> dict:
+        """Snapshot of writer counters for the health endpoint."""
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
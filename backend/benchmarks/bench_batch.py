@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bulk grading (POST /analyze/batch).
+Drives the app in-process against a simulated model with configurable latency,
+and reports wall time, throughput and time to first result for each batch
+concurrency level.
+
+Run with: python benchmarks/bench_batch.py [--items N] [--latency-ms MS] [--concurrency 1,4,8]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+COMPLETION = """1. **Time Complexity**: O(n * k) because each window is re-summed.
+2. **Space Complexity**: O(k) for the slice.
+3. **Edge Cases**: Empty array and k > len(arr).
+4. **Code Quality**: Clear names, no docstring.
+5. **3-Step Improvement Plan**:
+   - Step 1: Validate k
+   - Step 2: Use a running window sum
+   - Step 3: Add tests
+"""
+
+
+class SimulatedCompletions:
+    """Model stand-in that sleeps for latency +/- jitter before answering."""
+
+    def __init__(self, latency: float, jitter: float):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        message = SimpleNamespace(content=COMPLETION)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def make_items(count: int, duplicate_ratio: float) -> list[dict]:
+    """Distinct submissions plus a share of resubmitted duplicates, shuffled."""
+    unique = max(1, int(count * (1 - duplicate_ratio)))
+    sources = [
+        f"def max_sum(arr, k):\n    best = {i}\n"
+        f"    for i in range(len(arr) - k + 1):\n        best = max(best, sum(arr[i:i + k]))\n    return best"
+        for i in range(unique)
+    ]
+    codes = sources + [random.choice(sources) for _ in range(count - unique)]
+    random.shuffle(codes)
+    return [{"id": f"student-{i}", "code": code, "topic": "sliding_window"} for i, code in enumerate(codes)]
+
+
+async def post_streaming(path: str, payload: dict) -> tuple[int, list[tuple[float, bytes]]]:
+    """
+    Call the ASGI app directly and timestamp every body chunk as it is sent.
+
+    httpx's ASGITransport buffers the whole response, which would hide the
+    time to the first streamed result.
+    """
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+    }
+    finished = asyncio.Event()
+    sent_body = False
+    status = 0
+    chunks = []
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append((time.perf_counter(), message.get("body", b"")))
+            if not message.get("more_body", False):
+                finished.set()
+
+    await main.app(scope, receive, send)
+    return status, chunks
+
+
+async def run_batch(items: list[dict], concurrency: int, latency: float, jitter: float) -> dict:
+    completions = SimulatedCompletions(latency, jitter)
+    main.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    main.BATCH_CONCURRENCY = concurrency
+    main.feedback_cache.clear()
+
+    start = time.perf_counter()
+    status, chunks = await post_streaming("/analyze/batch", {"items": items})
+    elapsed = time.perf_counter() - start
+    if status != 200:
+        raise RuntimeError(f"/analyze/batch returned {status}")
+
+    lines = [json.loads(line) for _, chunk in chunks for line in chunk.splitlines() if line]
+    first = next((at for at, chunk in chunks if chunk), start) - start
+    return {
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "first": first,
+        "lines": len(lines),
+        "failed": sum(not line["success"] for line in lines),
+        "model_calls": completions.calls,
+    }
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=600, help="submissions per batch")
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of resubmitted duplicates")
+    parser.add_argument("--latency-ms", type=float, default=50, help="simulated model latency")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="simulated latency jitter")
+    parser.add_argument("--concurrency", default="1,4,8", help="comma-separated BATCH_CONCURRENCY values")
+    args = parser.parse_args()
+
+    main.limiter.enabled = False
+    logging.disable(logging.WARNING)
+    random.seed(0)
+    items = make_items(args.items, args.duplicates)
+
+    print(f"{args.items} submissions, model latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms")
+    print(f"{'concurrency':>11} {'model calls':>11} {'first (ms)':>10} {'total (s)':>9} {'items/s':>8} {'failed':>6}")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        result = asyncio.run(run_batch(items, concurrency, args.latency_ms / 1000, args.jitter_ms / 1000))
+        print(
+            f"{result['concurrency']:>11} {result['model_calls']:>11} {result['first'] * 1000:>10.1f} "
+            f"{result['elapsed']:>9.2f} {result['lines'] / result['elapsed']:>8.0f} {result['failed']:>6}"
+        )
+        if result["lines"] != len(items):
+            print(f"expected {len(items)} result lines, got {result['lines']}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
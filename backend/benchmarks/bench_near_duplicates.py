@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the near-duplicate submission index.
+Fills a NearDuplicateIndex with random fingerprints spread over the DSA topics,
+then times lookups for near matches and misses, and reports memory per entry.
+
+Run with: python benchmarks/bench_near_duplicates.py [--entries 1000000] [--lookups 10000]
+          [--max-p99-ms MS]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from near_duplicates import MAX_DISTANCE, NearDuplicateIndex, fingerprint  # noqa: E402
+
+TOPICS = ["array", "string", "linked_list", "tree", "graph", "dynamic_programming", "sliding_window", "two_pointers"]
+
+SOLUTION = """def max_sum(arr, k):
+    window = sum(arr[:k])
+    best = window
+    for i in range(k, len(arr)):
+        window += arr[i] - arr[i - k]
+        best = max(best, window)
+    return best
+"""
+
+
+def flip_bits(value: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def time_lookups(index: NearDuplicateIndex, queries: list[tuple[str, int]]) -> list[float]:
+    timings = []
+    for topic, value in queries:
+        start = time.perf_counter()
+        index.find(topic, value)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Exit 1 if lookup p99 exceeds this")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    index = NearDuplicateIndex(max_entries=2 * args.entries)
+    stored = []
+    start = time.perf_counter()
+    for i in range(args.entries):
+        topic, value = rng.choice(TOPICS), rng.getrandbits(64)
+        index.add(topic, value, f"{i:064x}")
+        if i % max(1, args.entries // args.lookups) == 0:
+            stored.append((topic, value))
+    build_seconds = time.perf_counter() - start
+    memory = index.nbytes
+    print(f"Indexed {len(index):,} entries in {build_seconds:.1f}s, "
+          f"{memory / 1e6:.1f} MB ({memory / max(1, len(index)):.0f} bytes/entry)")
+
+    near = [(topic, flip_bits(value, rng.randint(0, MAX_DISTANCE), rng)) for topic, value in stored]
+    misses = [(rng.choice(TOPICS), rng.getrandbits(64)) for _ in range(len(stored))]
+    worst = 0.0
+    for name, queries in (("near match", near), ("miss", misses)):
+        timings = time_lookups(index, queries)
+        p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+        worst = max(worst, p99)
+        print(f"{name:<11} p50 {p50 * 1000:7.1f}us  p99 {p99 * 1000:7.1f}us  max {timings[-1] * 1000:7.1f}us")
+    found = sum(index.find(topic, value) is not None for topic, value in near)
+    print(f"Recall within {MAX_DISTANCE} bits: {found / len(near):.1%}")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        fingerprint.cache_clear()
+        fingerprint(SOLUTION + f"# {i}\n")
+    print(f"fingerprint() of a {len(SOLUTION.splitlines())}-line solution: "
+          f"{(time.perf_counter() - start) * 1000:.0f}us")
+
+    if args.max_p99_ms is not None and worst > args.max_p99_ms:
+        print(f"FAIL: lookup p99 {worst:.3f}ms exceeds {args.max_p99_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the feedback parser.
+Runs parse_sections over realistic and adversarial completions and reports
+throughput plus the worst-case time per document.
+
+Run with: python benchmarks/bench_parser.py [--iterations N] [--max-worst-ms MS]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from feedback_parser import parse_sections  # noqa: E402
+
+REAL_COMPLETIONS = {
+    "prompt_format": """1. **Time Complexity**: O(n * k) because `sum(arr[i:i+k])` is recomputed for each window.
+The optimal approach is a sliding window in O(n).
+
+2. **Space Complexity**: O(k) for the slice created on every iteration; O(1) is achievable.
+
+3. **Edge Cases**: Empty array, k == 0, k > len(arr) and all-negative inputs are not handled.
+
+4. **Code Quality**: Names are clear but the function lacks a docstring and input validation.
+
+5. **3-Step Improvement Plan**:
+   - Step 1: Validate k against the array length and return early for empty input
+   - Step 2: Replace the repeated slice sum with a running window sum
+   - Step 3: Add tests for negative numbers and k == len(arr)
+""",
+    "markdown_headings": """### Time Complexity:
+O(n log n) due to sorting.
+
+### Space Complexity:
+O(n) for the sorted copy.
+
+### Edge Cases:
+- Duplicate values
+- Single element
+
+### Code Quality:
+Readable; prefer descriptive names over `a` and `b`.
+
+### 3-Step Improvement Plan:
+1. Avoid the sorted copy
+2. Handle duplicates explicitly
+3. Add unit tests
+""",
+    "plain_lines": """Time Complexity: O(n)
+Space Complexity: O(1)
+Edge Cases: k larger than the array
+Code Quality: Good
+Improvement Plan: Step 1: check k Step 2: add tests
+""",
+    "missing_sections": "The solution looks correct. Consider the case where the array is empty.\n",
+}
+
+
+def adversarial_completions(size: int) -> dict:
+    """Inputs that trigger heavy backtracking in naive DOTALL/lookahead regexes."""
+    return {
+        "long_single_line": "Time Complexity: " + "x" * size,
+        "only_newlines": "\n" * size,
+        "asterisks": "*" * size,
+        "bold_lines": "**\n" * (size // 3),
+        "headers_without_colon": "Time Complexity " * (size // 16),
+        "numbered_lines": "1.\n" * (size // 3),
+        "step_spam": "Improvement Plan:\n" + "- Step 1: a\n" * (size // 12),
+        "open_plan_newlines": "Improvement Plan:" + "\n" * size,
+        "whitespace_line": " " * size + "Time Complexity:",
+        "repeated_sections": ("**Time Complexity**: O(n)\n\n" * (size // 28)),
+    }
+
+
+def bench(corpus: dict, iterations: int) -> list[tuple[str, int, float]]:
+    """Return (name, size, best seconds) for each document."""
+    results = []
+    for name, text in corpus.items():
+        best = float("inf")
+        for _ in range(iterations):
+            start = time.perf_counter()
+            parse_sections(text)
+            best = min(best, time.perf_counter() - start)
+        results.append((name, len(text), best))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20, help="runs per document (best is kept)")
+    parser.add_argument("--adversarial-size", type=int, default=200_000, help="size of adversarial inputs in chars")
+    parser.add_argument("--max-worst-ms", type=float, default=None, help="exit non-zero if any document is slower")
+    args = parser.parse_args()
+
+    corpus = dict(REAL_COMPLETIONS)
+    corpus.update(adversarial_completions(args.adversarial_size))
+    results = bench(corpus, args.iterations)
+
+    print(f"{'document':<24} {'chars':>10} {'best ms':>10} {'MB/s':>10}")
+    for name, size, seconds in results:
+        print(f"{name:<24} {size:>10} {seconds * 1000:>10.3f} {size / seconds / 1e6:>10.1f}")
+
+    total_chars = sum(size for _, size, _ in results)
+    total_seconds = sum(seconds for _, _, seconds in results)
+    worst_name, _, worst = max(results, key=lambda r: r[2])
+    real_seconds = sum(seconds for name, _, seconds in results if name in REAL_COMPLETIONS)
+
+    print()
+    print(f"Throughput (all):       {total_chars / total_seconds / 1e6:.1f} MB/s")
+    print(f"Throughput (real):      {len(REAL_COMPLETIONS) / real_seconds:,.0f} completions/s")
+    print(f"Worst case:             {worst * 1000:.3f} ms ({worst_name})")
+
+    if args.max_worst_ms is not None and worst * 1000 > args.max_worst_ms:
+        print(f"❌ Worst case exceeds {args.max_worst_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark for cold start: importing main and warming up until GET /ready passes.
+
+Every run is a fresh interpreter, so nothing is already imported or cached.
+It reports how long `import main` took (the time before the process can
+answer anything) and how long until the warm-up finished (when /ready turns
+200), with the duration of each warm-up phase. A dummy GITHUB_TOKEN is set
+so the model SDK is imported and its client built as in production; upstream
+connection warm-up and the judge pool are off, so nothing touches the network.
+
+Results can be saved as JSON and compared against a saved baseline; the
+script exits with status 1 when a median grows by more than --tolerance or
+passes --max-import-ms / --max-ready-ms.
+
+Run with: python benchmarks/bench_startup.py [--runs 5] [--max-import-ms MS] [--max-ready-ms MS]
+          [--save startup.json] [--baseline startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+RESULT_PREFIX = "STARTUP "
+
+# Runs in the child interpreter: import, run the startup hooks, wait for the warm-up
+CHILD = f"""
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def serve():
+    for handler in main.app.router.on_startup:
+        await handler()
+    await main.app.state.warmup
+    ready = time.perf_counter()
+    for handler in main.app.router.on_shutdown:
+        await handler()
+    return ready
+
+ready = asyncio.run(serve())
+print({RESULT_PREFIX!r} + json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+    "phases_ms": main.readiness.stats()["phases_ms"],
+    "failed": main.readiness.stats()["failed"],
+}}), flush=True)
+"""
+
+
+def run_once(workdir: str) -> dict:
+    env = {
+        **os.environ,
+        "GITHUB_TOKEN": os.environ.get("GITHUB_TOKEN") or "bench-startup-token",
+        "LLM_WARMUP_CONNECTIONS": "0",
+        "JUDGE_WORKERS": "0",
+        "LOG_LEVEL": "WARNING",
+        "LOG_FILE": str(Path(workdir) / "api.log"),
+        "ATTEMPTS_DB": ":memory:",
+        "JOBS_DB": ":memory:",
+    }
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"Startup run failed (exit {completed.returncode}):\n{completed.stderr[-2000:]}")
+
+
+def summarize(runs: list[dict]) -> dict:
+    phases = sorted({phase for run in runs for phase in run["phases_ms"]})
+    return {
+        "runs": len(runs),
+        "import_ms": statistics.median(run["import_ms"] for run in runs),
+        "ready_ms": statistics.median(run["ready_ms"] for run in runs),
+        "phases_ms": {
+            phase: statistics.median(run["phases_ms"].get(phase, 0.0) for run in runs) for phase in phases
+        },
+    }
+
+
+def compare(summary: dict, baseline_path: str, tolerance: float) -> list[str]:
+    """Describe every median that grew beyond baseline * (1 + tolerance)."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for metric in ("import_ms", "ready_ms"):
+        previous = baseline.get(metric)
+        if previous and summary[metric] > previous * (1 + tolerance):
+            regressions.append(
+                f"{metric}: {summary[metric]:.0f}ms (baseline {previous:.0f}ms, "
+                f"+{(summary[metric] / previous - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="exit 1 if the median import is slower")
+    parser.add_argument("--max-ready-ms", type=float, default=None,
+                        help="exit 1 if the median time to ready is slower")
+    parser.add_argument("--save", help="write the medians as JSON to this path")
+    parser.add_argument("--baseline", help="compare with medians saved by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed growth against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'run':>3} {'import (ms)':>11} {'ready (ms)':>10}  phases (ms)")
+        for i in range(args.runs):
+            run = run_once(workdir)
+            runs.append(run)
+            phases = ", ".join(f"{phase} {ms:.0f}" for phase, ms in run["phases_ms"].items())
+            print(f"{i + 1:>3} {run['import_ms']:>11.0f} {run['ready_ms']:>10.0f}  {phases}")
+            for phase, error in run["failed"].items():
+                print(f"    {phase} failed: {error}")
+    summary = summarize(runs)
+    print(f"median import {summary['import_ms']:.0f}ms, ready {summary['ready_ms']:.0f}ms")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    failures = []
+    if args.max_import_ms is not None and summary["import_ms"] > args.max_import_ms:
+        failures.append(f"import_ms: {summary['import_ms']:.0f}ms exceeds {args.max_import_ms:.0f}ms")
+    if args.max_ready_ms is not None and summary["ready_ms"] > args.max_ready_ms:
+        failures.append(f"ready_ms: {summary['ready_ms']:.0f}ms exceeds {args.max_ready_ms:.0f}ms")
+    if args.baseline:
+        failures += compare(summary, args.baseline, args.tolerance)
+    for line in failures:
+        print(f"REGRESSION {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for GET /problem and POST /analyze.
+
+Starts the stub model server (benchmarks/stub_llm.py) and the API under
+uvicorn, points the API at the stub with LLM_BASE_URL, then drives each
+endpoint over real HTTP at every concurrency level and reports throughput
+and p50/p95/p99 latency. Everything runs on localhost, so it works offline.
+
+Results can be saved as JSON and compared against a saved baseline; the
+script exits with status 1 when throughput drops by more than --tolerance.
+
+Run with: python benchmarks/load_test.py [--concurrency 1,8,32] [--requests 200]
+          [--stub-latency-ms 300] [--save results.json] [--baseline results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+STUB = Path(__file__).resolve().parent / "stub_llm.py"
+
+SUBMISSION = """def max_sum(arr, k):
+    best = {seed}
+    window = sum(arr[:k])
+    for i in range(k, len(arr)):
+        window += arr[i] - arr[i - k]
+        best = max(best, window)
+    return max(best, window)
+"""
+
+
+@dataclass
+class LevelResult:
+    """Outcome of driving one endpoint at one concurrency level."""
+    endpoint: str
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    statuses: dict[str, int] = field(default_factory=dict)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    """Poll url until it answers, failing early if the server process exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server for {url} exited with status {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start within {timeout:.0f}s")
+
+
+def start_servers(args, workdir: str) -> tuple[str, list[subprocess.Popen]]:
+    """Launch the stub and the API; returns the API base URL and the processes."""
+    stub_port, api_port = free_port(), free_port()
+    stub = subprocess.Popen([
+        sys.executable, str(STUB), "--port", str(stub_port),
+        "--latency-ms", str(args.stub_latency_ms), "--jitter-ms", str(args.stub_jitter_ms),
+        "--error-rate", str(args.stub_error_rate), "--seed", "1",
+    ])
+    processes = [stub]
+    wait_until_up(f"http://127.0.0.1:{stub_port}/stats", stub)
+
+    env = {
+        **os.environ,
+        "GITHUB_TOKEN": "stub-token",
+        "LLM_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        # Measure the service, not the per-client quotas
+        "RATE_LIMIT_ENABLED": "false",
+        # Submissions differ by one constant; every one of them should reach the model
+        "NEAR_DUPLICATE_THRESHOLD": "0",
+        "ATTEMPTS_DB": os.path.join(workdir, "attempts.db"),
+        "LOG_FILE": os.path.join(workdir, "api.log"),
+        "PROBLEMS_RELOAD_INTERVAL": "0",
+    }
+    # Console logging from the API would interleave with the report
+    api_output = open(os.path.join(workdir, "api.out"), "wb")
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=api_output,
+        stderr=subprocess.STDOUT,
+    )
+    api_output.close()
+    processes.append(api)
+    base_url = f"http://127.0.0.1:{api_port}"
+    try:
+        wait_until_up(base_url + "/", api)
+    except RuntimeError:
+        for process in processes:
+            process.terminate()
+        print(Path(workdir, "api.out").read_text(errors="replace")[-4000:], file=sys.stderr)
+        raise
+    return base_url, processes
+
+
+def make_request(endpoint: str, index: int, unique_ratio: float) -> tuple[str, str, dict | None]:
+    """Method, path and JSON body for the index-th request to an endpoint."""
+    if endpoint == "problem":
+        return "GET", "/problem", None
+    # A (1 - unique_ratio) share of submissions repeat earlier ones and hit the feedback cache
+    distinct = max(1, round(1 / max(unique_ratio, 1e-9)))
+    seed = index if index % distinct == 0 else index - index % distinct
+    return "POST", "/analyze", {"code": SUBMISSION.format(seed=seed), "topic": "sliding_window"}
+
+
+async def drive(client: httpx.AsyncClient, endpoint: str, concurrency: int, total: int,
+                unique_ratio: float, offset: int) -> LevelResult:
+    """Send `total` requests to an endpoint from `concurrency` concurrent workers."""
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    next_index = iter(range(total))
+
+    async def worker():
+        for index in next_index:
+            method, path, body = make_request(endpoint, offset + index, unique_ratio)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return LevelResult(
+        endpoint=endpoint,
+        concurrency=concurrency,
+        requests=total,
+        errors=total - statuses.get("200", 0),
+        seconds=round(seconds, 3),
+        rps=round(total / seconds, 2),
+        p50_ms=round(percentile(latencies, 50) * 1000, 2),
+        p95_ms=round(percentile(latencies, 95) * 1000, 2),
+        p99_ms=round(percentile(latencies, 99) * 1000, 2),
+        statuses=statuses,
+    )
+
+
+async def run_benchmark(base_url: str, args) -> list[LevelResult]:
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    results = []
+    offset = 0
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        for endpoint in args.endpoints:
+            # Warm up connections, caches and the judge pool before measuring
+            await drive(client, endpoint, min(4, max(args.concurrency)), 8, 1.0, offset=10**9)
+            for concurrency in args.concurrency:
+                result = await drive(client, endpoint, concurrency, args.requests, args.unique_ratio, offset)
+                offset += args.requests
+                results.append(result)
+                print(format_row(result), flush=True)
+    return results
+
+
+def format_row(result: LevelResult) -> str:
+    return (
+        f"{result.endpoint:<8} {result.concurrency:>5} {result.requests:>6} {result.errors:>6} "
+        f"{result.rps:>9.1f} {result.p50_ms:>9.1f} {result.p95_ms:>9.1f} {result.p99_ms:>9.1f}"
+    )
+
+
+def compare(results: list[LevelResult], baseline_path: str, tolerance: float) -> list[str]:
+    """Describe every (endpoint, concurrency) whose throughput fell below baseline * (1 - tolerance)."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result.endpoint, result.concurrency))
+        if previous and result.rps < previous["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{result.endpoint} @ {result.concurrency}: {result.rps:.1f} req/s "
+                f"(baseline {previous['rps']:.1f} req/s, -{(1 - result.rps / previous['rps']) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end load test against a local stub model server")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and level")
+    parser.add_argument("--endpoints", default="problem,analyze", help="Any of: problem,analyze")
+    parser.add_argument("--unique-ratio", type=float, default=1.0,
+                        help="Share of /analyze submissions that are distinct (the rest hit the cache)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the API")
+    parser.add_argument("--stub-latency-ms", type=float, default=300)
+    parser.add_argument("--stub-jitter-ms", type=float, default=50)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--api-url", help="Benchmark an already running API instead of starting one")
+    parser.add_argument("--save", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare throughput with results saved by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed throughput drop against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    args.endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(args.endpoints) - {"problem", "analyze"}
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main():
+    args = parse_args()
+    processes = []
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if args.api_url:
+                base_url = args.api_url.rstrip("/")
+            else:
+                base_url, processes = start_servers(args, workdir)
+
+            print(f"Stub latency {args.stub_latency_ms:.0f}ms +/- {args.stub_jitter_ms:.0f}ms, "
+                  f"error rate {args.stub_error_rate:.1%}, {args.workers} API worker(s)")
+            print(f"{'endpoint':<8} {'conc':>5} {'reqs':>6} {'errors':>6} "
+                  f"{'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+            results = asyncio.run(run_benchmark(base_url, args))
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": {
+                    "requests": args.requests,
+                    "workers": args.workers,
+                    "stub_latency_ms": args.stub_latency_ms,
+                    "stub_jitter_ms": args.stub_jitter_ms,
+                    "stub_error_rate": args.stub_error_rate,
+                    "unique_ratio": args.unique_ratio,
+                },
+                "results": [asdict(r) for r in results],
+            }, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No throughput regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible chat completions API.
+
+Answers POST /chat/completions (and /v1/chat/completions) with canned
+feedback after a configurable latency, with jitter and an error rate, so the
+backend can be load tested end to end without network access or a token.
+Both plain and streamed (stream=true) completions are supported, and requests
+with a JSON response_format get a JSON reply matching the Feedback schema.
+
+Point the backend at it with LLM_BASE_URL=http://127.0.0.1:PORT/v1 and any
+GITHUB_TOKEN value.
+
+Run with: python benchmarks/stub_llm.py [--port 9100] [--latency-ms 800] [--jitter-ms 200]
+          [--error-rate 0.01] [--outputs canned.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+DEFAULT_OUTPUTS = [
+    """1. **Time Complexity**: O(n) - each element enters and leaves the window once.
+2. **Space Complexity**: O(1) extra space.
+3. **Edge Cases**: Empty array, k <= 0 and k larger than the array.
+4. **Code Quality**: Clear names; add a docstring describing the window.
+5. **3-Step Improvement Plan**:
+   - Step 1: Validate k against the array length
+   - Step 2: Return early for empty input
+   - Step 3: Add tests for negative numbers
+""",
+    """1. **Time Complexity**: O(n * k) because every window is summed from scratch.
+2. **Space Complexity**: O(k) for the slice taken on each iteration.
+3. **Edge Cases**: k larger than the array raises no error but returns a wrong result.
+4. **Code Quality**: Readable, but the slice hides the quadratic cost.
+5. **3-Step Improvement Plan**:
+   - Step 1: Keep a running window sum
+   - Step 2: Subtract the element leaving the window
+   - Step 3: Compare the result against the brute force on random inputs
+""",
+]
+
+# Replies to requests with a JSON response_format (STRUCTURED_OUTPUT=true)
+DEFAULT_JSON_OUTPUTS = [
+    json.dumps({
+        "time_complexity": "O(n) - each element enters and leaves the window once.",
+        "space_complexity": "O(1) extra space.",
+        "edge_cases": "Empty array, k <= 0 and k larger than the array.",
+        "code_quality": "Clear names; add a docstring describing the window.",
+        "improvement_plan": [
+            "Validate k against the array length",
+            "Return early for empty input",
+            "Add tests for negative numbers",
+        ],
+    }),
+]
+
+# Streamed completions are sent in chunks of roughly this many characters
+STREAM_CHUNK_CHARS = 24
+
+
+class StubConfig:
+    """Behaviour of the stub, adjustable at runtime (e.g. between benchmark phases)."""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, error_rate: float = 0.0,
+                 outputs: list[str] | None = None, seed: int | None = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.outputs = outputs or DEFAULT_OUTPUTS
+        self.json_outputs = DEFAULT_JSON_OUTPUTS
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+
+def _usage(body: dict, content: str) -> dict:
+    prompt = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+    completion = len(content) // 4
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def create_app(config: StubConfig) -> Starlette:
+    """Build the stub ASGI app serving completions according to config."""
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        config.requests += 1
+        await asyncio.sleep(config.delay())
+
+        if config.random.random() < config.error_rate:
+            config.errors += 1
+            status = config.random.choice((429, 500, 503))
+            return JSONResponse(
+                {"error": {"message": "Simulated upstream failure", "type": "stub_error", "code": status}},
+                status_code=status
+            )
+
+        wants_json = (body.get("response_format") or {}).get("type") in ("json_object", "json_schema")
+        content = config.random.choice(config.json_outputs if wants_json else config.outputs)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "stub")
+
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": _usage(body, content),
+            })
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def events():
+            def chunk(delta: dict, finish_reason=None, usage=None, choices=True) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if choices else [],
+                }
+                if usage is not None:
+                    payload["usage"] = usage
+                return f"data: {json.dumps(payload)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for start in range(0, len(content), STREAM_CHUNK_CHARS):
+                yield chunk({"content": content[start:start + STREAM_CHUNK_CHARS]})
+                await asyncio.sleep(0)
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                yield chunk({}, usage=_usage(body, content), choices=False)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def stats(request: Request):
+        return JSONResponse({"requests": config.requests, "errors": config.errors})
+
+    return Starlette(routes=[
+        Route("/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/stats", stats),
+    ])
+
+
+def load_outputs(path: str | None) -> list[str] | None:
+    """Read canned completions from a JSON list of strings."""
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as f:
+        outputs = json.load(f)
+    if not isinstance(outputs, list) or not all(isinstance(o, str) for o in outputs) or not outputs:
+        raise ValueError(f"{path} must contain a non-empty JSON list of strings")
+    return outputs
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--outputs", help="JSON file with a list of canned completions")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        outputs=load_outputs(args.outputs),
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Static time/space complexity estimation from the submitted Python AST.
+
+The estimator is a set of heuristics, not a proof: it looks at loop nesting,
+recursion, hidden costs such as slicing and `sum(arr[:k])`, and container
+growth, and reports the dominant term in terms of the input size n. It runs
+in well under a millisecond, so it can answer "fast mode" requests directly
+and seed the model prompt with a hint in normal mode.
+"""
+
+import ast
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+
+class Cost(NamedTuple):
+    """Asymptotic cost n^degree * (log n)^log, or exponential growth."""
+    degree: int = 0
+    log: int = 0
+    exponential: bool = False
+
+    def __mul__(self, other: "Cost") -> "Cost":
+        return Cost(self.degree + other.degree, self.log + other.log, self.exponential or other.exponential)
+
+    def __or__(self, other: "Cost") -> "Cost":
+        """Dominant of two costs."""
+        return max(self, other, key=lambda c: (c.exponential, c.degree, c.log))
+
+    def __str__(self) -> str:
+        if self.exponential:
+            return "O(2^n)"
+        parts = []
+        if self.degree == 1:
+            parts.append("n")
+        elif self.degree > 1:
+            parts.append(f"n^{self.degree}")
+        if self.log == 1:
+            parts.append("log n")
+        elif self.log > 1:
+            parts.append(f"log^{self.log} n")
+        return f"O({' '.join(parts) or '1'})"
+
+
+CONSTANT = Cost()
+LOG = Cost(log=1)
+LINEAR = Cost(degree=1)
+N_LOG_N = Cost(degree=1, log=1)
+EXPONENTIAL = Cost(exponential=True)
+
+
+@dataclass
+class ComplexityEstimate:
+    """Result of static analysis."""
+    time: str
+    space: str
+    notes: list[str] = field(default_factory=list)
+
+    def as_hint(self) -> str:
+        """One-line summary suitable for injecting into the model prompt."""
+        hint = f"time {self.time}, space {self.space}"
+        if self.notes:
+            hint += "; " + "; ".join(self.notes)
+        return hint
+
+
+# Builtins that walk their whole (collection) argument
+_LINEAR_BUILTINS = {"sum", "max", "min", "any", "all", "list", "tuple", "set", "dict", "frozenset",
+                    "Counter", "deque", "bytes", "str"}
+_REDUCERS = {"sum", "max", "min", "any", "all"}
+_SORTING_BUILTINS = {"sorted"}
+_LINEAR_METHODS = {"index", "count", "remove", "copy", "extend", "join", "split", "replace",
+                   "find", "reverse", "heapify", "strip", "lower", "upper"}
+_LOG_FUNCTIONS = {"heappush", "heappop", "heappushpop", "heapreplace", "bisect", "bisect_left",
+                  "bisect_right", "insort", "insort_left", "insort_right"}
+_GROWTH_METHODS = {"append", "appendleft", "add", "extend", "insert", "update", "setdefault"}
+_HASH_CONSTRUCTORS = {"set", "dict", "defaultdict", "Counter", "frozenset", "OrderedDict"}
+_MEMO_DECORATORS = {"lru_cache", "cache"}
+
+
+def _call_name(node: ast.Call) -> str | None:
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+def _is_constant(node: ast.AST) -> bool:
+    return all(not isinstance(child, (ast.Name, ast.Attribute, ast.Call, ast.Subscript)) for child in ast.walk(node))
+
+
+def _is_halving(node: ast.AST, names: set[str] = frozenset()) -> bool:
+    """True if an expression halves its operand, e.g. n // 2, x >> 1, or uses a midpoint."""
+    for child in ast.walk(node):
+        if isinstance(child, ast.BinOp) and isinstance(child.op, (ast.FloorDiv, ast.RShift, ast.Div)):
+            return True
+        if isinstance(child, ast.Name) and (child.id in names or "mid" in child.id.lower()):
+            return True
+    return False
+
+
+class _FunctionAnalyzer:
+    """Estimate cost for a single function body."""
+
+    def __init__(self, func: ast.FunctionDef | ast.AsyncFunctionDef | None, body: list[ast.stmt]):
+        self.func = func
+        self.name = func.name if func is not None else None
+        self.body = body
+        self.notes: list[str] = []
+        self.hash_names: set[str] = set()
+        self.midpoints: set[str] = set()
+        self.space = CONSTANT
+        self._transient: set[int] = set()
+        self._collect_names()
+
+    def _collect_names(self) -> None:
+        """Remember which locals are hash containers and which hold midpoints."""
+        for node in ast.walk(ast.Module(body=self.body, type_ignores=[])):
+            if not isinstance(node, ast.Assign):
+                continue
+            targets = [t.id for t in node.targets if isinstance(t, ast.Name)]
+            value = node.value
+            if isinstance(value, (ast.Dict, ast.Set, ast.DictComp, ast.SetComp)) or (
+                isinstance(value, ast.Call) and _call_name(value) in _HASH_CONSTRUCTORS
+            ):
+                self.hash_names.update(targets)
+            if any(isinstance(c, ast.BinOp) and isinstance(c.op, (ast.FloorDiv, ast.RShift)) for c in ast.walk(value)):
+                self.midpoints.update(targets)
+
+    # ------------------------------------------------------------------ time
+
+    def run(self) -> tuple[Cost, Cost]:
+        time = self._block(self.body, CONSTANT)
+        time, depth = self._recursion(time)
+        return time, self.space | depth
+
+    def _block(self, body: list[ast.stmt], loop: Cost) -> Cost:
+        cost = CONSTANT
+        for stmt in body:
+            cost = cost | self._stmt(stmt, loop)
+        return cost
+
+    def _stmt(self, node: ast.stmt, loop: Cost) -> Cost:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            return CONSTANT
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            iterations = self._iterations(node.iter)
+            inner = loop * iterations
+            body = self._block(node.body, inner) | self._block(node.orelse, loop)
+            return self._expr(node.iter, loop) | (iterations * body)
+        if isinstance(node, ast.While):
+            iterations = LOG if self._while_halves(node) else LINEAR
+            inner = loop * iterations
+            body = self._expr(node.test, inner) | self._block(node.body, inner)
+            return iterations * body
+        if isinstance(node, ast.If):
+            return self._expr(node.test, loop) | self._block(node.body, loop) | self._block(node.orelse, loop)
+        if isinstance(node, (ast.With, ast.AsyncWith)):
+            return self._block(node.body, loop)
+        if isinstance(node, ast.Try):
+            blocks = [node.body, node.orelse, node.finalbody] + [h.body for h in node.handlers]
+            cost = CONSTANT
+            for block in blocks:
+                cost = cost | self._block(block, loop)
+            return cost
+
+        self._track_growth(node, loop)
+        cost = CONSTANT
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.expr):
+                cost = cost | self._expr(child, loop)
+        return cost
+
+    def _iterations(self, node: ast.expr) -> Cost:
+        """How many times a for loop over this iterable runs."""
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)) and _is_constant(node):
+            return CONSTANT
+        if isinstance(node, ast.Call) and _call_name(node) == "range":
+            if all(_is_constant(arg) for arg in node.args):
+                return CONSTANT
+            return LINEAR
+        return LINEAR
+
+    def _while_halves(self, node: ast.While) -> bool:
+        """Detect binary-search style loops that shrink by half each iteration."""
+        for child in ast.walk(node):
+            if isinstance(child, ast.AugAssign) and isinstance(child.op, (ast.FloorDiv, ast.RShift, ast.Div)):
+                return True
+            if isinstance(child, ast.Assign) and _is_halving(child.value, self.midpoints):
+                return True
+        return False
+
+    def _expr(self, node: ast.expr, loop: Cost) -> Cost:
+        """Hidden cost of evaluating an expression once."""
+        if isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)):
+            iterations = CONSTANT
+            cost = CONSTANT
+            for generator in node.generators:
+                cost = cost | (iterations * self._expr(generator.iter, loop))
+                iterations = iterations * self._iterations(generator.iter)
+            elements = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+            element_cost = CONSTANT
+            for element in elements:
+                element_cost = element_cost | self._expr(element, loop * iterations)
+            if not isinstance(node, ast.GeneratorExp):
+                self._grow(loop * iterations)
+            return cost | (iterations * element_cost)
+        if isinstance(node, ast.Lambda):
+            return CONSTANT
+
+        cost = CONSTANT
+        if isinstance(node, ast.Call):
+            cost = self._call(node, loop)
+        elif isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice):
+            cost = LINEAR
+            if id(node) not in self._transient:
+                self._grow(LINEAR)
+            if loop != CONSTANT:
+                self._note(f"slice {ast.unparse(node)} inside a loop copies O(len) elements per iteration")
+        elif isinstance(node, ast.Compare):
+            for op, right in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)) and not self._is_hash(right):
+                    cost = LINEAR
+                    if loop != CONSTANT:
+                        self._note(f"membership test on {ast.unparse(right)} is O(n); a set gives O(1)")
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult):
+            if isinstance(node.left, ast.List) or isinstance(node.right, ast.List):
+                cost = LINEAR
+                self._grow(loop * LINEAR)
+
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.expr):
+                cost = cost | self._expr(child, loop)
+        return cost
+
+    def _call(self, node: ast.Call, loop: Cost) -> Cost:
+        name = _call_name(node)
+        is_method = isinstance(node.func, ast.Attribute)
+        if name == self.name or (is_method and name == self.name):
+            return CONSTANT  # handled by _recursion
+        if name in _SORTING_BUILTINS or (is_method and name == "sort"):
+            self._grow(LINEAR)
+            return N_LOG_N
+        if name in _LOG_FUNCTIONS:
+            return LOG
+        if name in _LINEAR_BUILTINS and not is_method:
+            if name in ("max", "min") and len(node.args) > 1:
+                return CONSTANT
+            if node.args and not _is_constant(node.args[0]):
+                if name in ("list", "tuple", "set", "dict", "Counter", "deque", "frozenset"):
+                    self._grow(LINEAR)
+                if name in _REDUCERS:
+                    # A slice consumed by a reducer is a short-lived temporary, not retained space
+                    self._transient.update(id(arg) for arg in node.args if isinstance(arg, ast.Subscript))
+                if loop != CONSTANT and name in _REDUCERS:
+                    self._note(f"{ast.unparse(node)} inside a loop is O(n) per iteration")
+                return LINEAR
+            return CONSTANT
+        if is_method and (name in _LINEAR_METHODS or (name == "pop" and node.args) or name == "insert"):
+            if name == "pop" and node.args and _is_constant(node.args[0]) and ast.unparse(node.args[0]) == "-1":
+                return CONSTANT
+            return LINEAR
+        return CONSTANT
+
+    def _is_hash(self, node: ast.expr) -> bool:
+        if isinstance(node, (ast.Set, ast.Dict, ast.SetComp, ast.DictComp)):
+            return True
+        if isinstance(node, ast.Name):
+            return node.id in self.hash_names
+        if isinstance(node, ast.Call):
+            return _call_name(node) in _HASH_CONSTRUCTORS | {"keys"}
+        return False
+
+    # ----------------------------------------------------------------- space
+
+    def _grow(self, cost: Cost) -> None:
+        self.space = self.space | cost
+
+    def _track_growth(self, node: ast.stmt, loop: Cost) -> None:
+        """Containers that gain an element per loop iteration grow with the loop."""
+        if loop == CONSTANT:
+            return
+        for child in ast.walk(node):
+            if isinstance(child, ast.Call) and isinstance(child.func, ast.Attribute) and child.func.attr in _GROWTH_METHODS:
+                self._grow(loop)
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Subscript) and isinstance(t.value, ast.Name) and t.value.id in self.hash_names
+            for t in node.targets
+        ):
+            self._grow(loop)
+        if isinstance(node, ast.AugAssign) and isinstance(node.value, (ast.List, ast.ListComp)):
+            self._grow(loop)
+
+    # ------------------------------------------------------------- recursion
+
+    def _recursion(self, body_cost: Cost) -> tuple[Cost, Cost]:
+        """Combine per-call cost with the shape of the recursion tree."""
+        if self.func is None:
+            return body_cost, CONSTANT
+        calls = [
+            node for node in ast.walk(ast.Module(body=self.body, type_ignores=[]))
+            if isinstance(node, ast.Call) and _call_name(node) == self.name
+        ]
+        if not calls:
+            return body_cost, CONSTANT
+
+        halving = all(any(_is_halving(arg, self.midpoints) for arg in call.args) for call in calls)
+        memoized = any(
+            (isinstance(d, ast.Name) and d.id in _MEMO_DECORATORS)
+            or (isinstance(d, ast.Call) and _call_name(d) in _MEMO_DECORATORS)
+            or (isinstance(d, ast.Attribute) and d.attr in _MEMO_DECORATORS)
+            for d in self.func.decorator_list
+        ) or any("memo" in name.lower() or name in ("dp", "cache") for name in self._names())
+
+        depth = LOG if halving else LINEAR
+        if len(calls) == 1:
+            return depth * body_cost, depth
+        if memoized:
+            states = Cost(degree=max(1, self._varying_params(calls)))
+            return states * body_cost, states
+        if halving:
+            # Divide and conquer: log n levels, each doing the body's work across all calls
+            return (LOG * body_cost) | LINEAR, depth
+        self._note(f"{self.name} makes {len(calls)} recursive calls without memoization")
+        return EXPONENTIAL, depth
+
+    def _names(self) -> set[str]:
+        return {n.id for n in ast.walk(ast.Module(body=self.body, type_ignores=[])) if isinstance(n, ast.Name)}
+
+    def _varying_params(self, calls: list[ast.Call]) -> int:
+        """Number of parameters that change between recursive calls (the DP dimensions)."""
+        params = [a.arg for a in self.func.args.args if a.arg != "self"]
+        varying = set()
+        for call in calls:
+            for param, arg in zip(params, call.args):
+                if not (isinstance(arg, ast.Name) and arg.id == param):
+                    varying.add(param)
+        return len(varying)
+
+    def _note(self, note: str) -> None:
+        if note not in self.notes:
+            self.notes.append(note)
+
+
+def _functions(tree: ast.Module) -> list:
+    functions = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions.append(node)
+        elif isinstance(node, ast.ClassDef):
+            functions.extend(n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
+    return functions
+
+
+def estimate_complexity(code: str) -> ComplexityEstimate | None:
+    """
+    Estimate the time and space complexity of submitted code.
+
+    The most expensive top-level function (or method of a class such as
+    `Solution`) determines the result. Module-level code is analyzed when
+    there are no functions.
+
+    Args:
+        code: Submitted Python source
+
+    Returns:
+        ComplexityEstimate, or None if the code does not parse or nests too deeply to analyze
+    """
+    try:
+        tree = ast.parse(code)
+        return _estimate(tree)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return None
+
+
+def _estimate(tree: ast.Module) -> ComplexityEstimate:
+    analyzers = [_FunctionAnalyzer(func, func.body) for func in _functions(tree)]
+    if not analyzers:
+        analyzers = [_FunctionAnalyzer(None, tree.body)]
+
+    time, space, notes = CONSTANT, CONSTANT, []
+    for analyzer in analyzers:
+        func_time, func_space = analyzer.run()
+        time = time | func_time
+        space = space | func_space
+        notes.extend(note for note in analyzer.notes if note not in notes)
+
+    return ComplexityEstimate(time=str(time), space=str(space), notes=notes)
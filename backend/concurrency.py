@@ -0,0 +1,179 @@
+"""
+Concurrency controls for upstream AI model calls.
+Caps the number of in-flight completions, bounds how many requests may wait for a slot,
+coalesces identical concurrent requests into a single upstream call, and fans batches
+out with bounded parallelism.
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Sequence, TypeVar
+
+T = TypeVar("T")
+K = TypeVar("K")
+
+
+class UpstreamBusyError(Exception):
+    """Raised when the wait queue is full or a queued request waited too long."""
+
+
+class UpstreamLimiter:
+    """
+    Bounded in-flight limiter for upstream model calls.
+
+    At most `max_concurrency` calls run at once. Up to `max_queue` further
+    callers may wait for a slot; anything beyond that is rejected immediately
+    so the worker keeps serving cheap routes instead of piling up requests.
+
+    Usage:
+        async with limiter:
+            response = await client.chat.completions.create(...)
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float | None = None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue cannot be negative")
+
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of upstream calls currently running."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a free slot."""
+        return self._waiting
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new caller would be rejected immediately."""
+        return self._semaphore.locked() and self._waiting >= self.max_queue
+
+    def stats(self) -> dict:
+        """Snapshot of limiter state for health/metrics endpoints."""
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
+
+    async def acquire(self) -> None:
+        """Wait for a free slot, or raise UpstreamBusyError if the queue is full."""
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                raise UpstreamBusyError("Upstream wait queue is full")
+
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise UpstreamBusyError("Timed out waiting for an upstream slot") from None
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self._in_flight += 1
+
+    async def try_acquire(self) -> bool:
+        """Take a slot only if one is free and nobody is queued for it; never waits."""
+        if self._semaphore.locked() or self._waiting:
+            return False
+        await self._semaphore.acquire()  # Returns at once while a slot is free
+        self._in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Release a slot acquired with acquire()."""
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    async def __aenter__(self) -> "UpstreamLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and receive its result or exception.
+    The task is shielded so a disconnecting caller does not cancel the work
+    for everyone else.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being computed."""
+        return len(self._flights)
+
+    def stats(self) -> dict:
+        """Snapshot of coalescing counters for health/metrics endpoints."""
+        return {
+            "in_flight_keys": len(self._flights),
+            "coalesced": self.coalesced,
+        }
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() once per key at a time and share its outcome with duplicates."""
+        task = self._flights.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        return await asyncio.shield(task)
+
+
+async def map_unordered(
+    fn: Callable[[K], Awaitable[T]],
+    items: Sequence[K],
+    limit: int,
+) -> AsyncIterator[tuple[K, T | None, Exception | None]]:
+    """
+    Run fn(item) for every item with at most `limit` calls in flight.
+
+    Yields (item, result, error) in completion order; exactly one of result
+    and error is meaningful. A failing item does not stop the others. Closing
+    the iterator early (e.g. the client disconnected) cancels outstanding work.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+
+    pending = iter(items)
+    completed: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        # Workers pull from a shared iterator, so a huge batch never creates
+        # more than `limit` tasks at once
+        for item in pending:
+            try:
+                completed.put_nowait((item, await fn(item), None))
+            except Exception as e:
+                completed.put_nowait((item, None, e))
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(min(limit, len(items)))]
+    try:
+        for _ in range(len(items)):
+            yield await completed.get()
+    finally:
+        for task in workers:
+            task.cancel()
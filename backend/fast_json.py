@@ -0,0 +1,64 @@
+"""
+Fast JSON encoding and cacheable JSON responses.
+
+Models are encoded straight to bytes by pydantic-core's serializer and plain
+data by orjson when it is installed (the standard library otherwise). Static
+payloads such as problems are encoded once and served with a strong ETag, so
+a client that already has the current version gets an empty 304 instead.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+import pydantic_core
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Plain data falls back to the standard library encoder
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a pydantic model or JSON-compatible data as compact UTF-8 JSON."""
+    if isinstance(obj, BaseModel):
+        return pydantic_core.to_json(obj)
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag derived from the encoded body."""
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True if an If-None-Match header lists this ETag (compared weakly, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def json_response(obj: Any, status_code: int = 200, headers: dict | None = None) -> Response:
+    """
+    JSON response encoded with dumps().
+
+    Returning a Response directly also skips FastAPI's re-validation of the
+    route's response_model, which is still used for the OpenAPI schema.
+    """
+    return Response(dumps(obj), status_code=status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def cached_json_response(request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    """Serve a pre-encoded body, or an empty 304 if the client's If-None-Match already has it."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=JSON_MEDIA_TYPE, headers=headers)
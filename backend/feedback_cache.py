@@ -0,0 +1,264 @@
+"""
+Content-addressed cache for AI-generated feedback.
+Keys are derived from the topic and an AST-normalized form of the submitted code,
+so resubmissions that only differ in whitespace, comments or docstrings hit the cache.
+"""
+
+import ast
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _strip_docstring(body: list) -> list:
+    """Drop a leading docstring from a statement list, keeping the body valid."""
+    if (
+        body
+        and isinstance(body[0], ast.Expr)
+        and isinstance(body[0].value, ast.Constant)
+        and isinstance(body[0].value.value, str)
+    ):
+        body = body[1:] or [ast.Pass()]
+    return body
+
+
+@lru_cache(maxsize=256)
+def normalize_code(code: str) -> str:
+    """
+    Canonicalize Python source for cache keying.
+
+    Parses the code and unparses the AST, which drops comments and normalizes
+    formatting, after removing module/class/function docstrings. Code that does
+    not parse, or nests too deeply for the parser or unparser, falls back to
+    stripping trailing whitespace and blank lines. Results are memoized, since
+    the cache key and the near-duplicate fingerprint both normalize the same
+    submission.
+
+    Args:
+        code: Submitted source code
+
+    Returns:
+        str: Normalized source
+    """
+    try:
+        tree = ast.parse(code)
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                node.body = _strip_docstring(node.body)
+        return ast.unparse(tree)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        lines = (line.rstrip() for line in code.strip().splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def cache_key(topic: str, code: str) -> str:
+    """Build a stable cache key from a topic and submitted code."""
+    normalized = normalize_code(code)
+    return hashlib.sha256(f"{topic}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+class FeedbackCache:
+    """
+    Two-tier feedback cache.
+
+    Tier 1 is an in-memory LRU with a per-entry TTL. Tier 2 is an optional
+    SQLite database that survives restarts; entries found there are promoted
+    back into memory. Values are JSON-serializable dicts.
+
+    The request path never waits on SQLite: lookup() reads the disk tier in a
+    worker thread, and set() only queues the write for a background task that
+    stores pending entries in batches.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 86400,
+        db_path: str | None = None,
+        flush_interval: float = 1.0,
+        batch_size: int = 100
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path or None
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        # Disk writes not stored yet: key -> (value, wall-clock expiry)
+        self._pending: dict[str, tuple[dict, float]] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+
+        if self.db_path:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS feedback_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> dict | None:
+        """
+        Return the cached value for key, or None on a miss or expired entry.
+
+        Reads the disk tier on the calling thread; use lookup() on the event loop.
+        """
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = self._promote(key, *self._disk_get(key))
+        if value is None:
+            self.misses += 1
+        return value
+
+    async def lookup(self, key: str) -> dict | None:
+        """Like get(), but reads the disk tier in a worker thread."""
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = self._promote(key, *await asyncio.to_thread(self._disk_get, key))
+        if value is None:
+            self.misses += 1
+        return value
+
+    def set(self, key: str, value: dict) -> None:
+        """Store value in memory and queue it for the disk tier, if there is one."""
+        with self._lock:
+            self._memory_set(key, value, time.monotonic())
+            if self._db is not None:
+                self._pending[key] = (value, time.time() + self.ttl)
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self.hits = self.misses = self.disk_hits = 0
+        if self._db is not None:
+            with self._db_lock, self._db:
+                self._db.execute("DELETE FROM feedback_cache")
+
+    def stats(self) -> dict:
+        """Snapshot of cache counters for health/metrics endpoints."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "persistent": self._db is not None,
+            "pending_writes": len(self._pending),
+        }
+
+    async def start(self) -> None:
+        """Start the background disk writer on the running event loop."""
+        if self._db is not None and self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the background writer and store whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = self._wakeup = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write all pending entries to the disk tier now. Returns how many were written."""
+        count = 0
+        while self._pending:
+            with self._lock:
+                keys = list(self._pending)[:self.batch_size]
+                batch = [(key, *self._pending.pop(key)) for key in keys]
+            await asyncio.to_thread(self._write, batch)
+            count += len(batch)
+        return count
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Failed to write cached feedback: %s: %s", type(e).__name__, e)
+
+    def _write(self, batch: list[tuple[str, dict, float]]) -> None:
+        with self._db_lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO feedback_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), expires_at) for key, value, expires_at in batch],
+            )
+
+    def _memory_get(self, key: str) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _promote(self, key: str, value: dict | None, remaining: float) -> dict | None:
+        """Count a disk-tier hit and copy it back into memory."""
+        if value is None:
+            return None
+        with self._lock:
+            self._memory_set(key, value, time.monotonic(), remaining)
+            self.hits += 1
+            self.disk_hits += 1
+        return value
+
+    def _memory_set(self, key: str, value: dict, now: float, ttl: float | None = None) -> None:
+        self._entries[key] = (now + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str) -> tuple[dict | None, float]:
+        """Look up key in pending writes, then SQLite, returning the value and its remaining TTL."""
+        pending = self._pending.get(key)
+        if pending is not None:
+            value, expires_at = pending
+            remaining = expires_at - time.time()
+            return (value, remaining) if remaining > 0 else (None, 0.0)
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM feedback_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, 0.0
+            value, expires_at = row
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                with self._db:
+                    self._db.execute("DELETE FROM feedback_cache WHERE key = ?", (key,))
+                return None, 0.0
+        return json.loads(value), remaining
@@ -0,0 +1,287 @@
+"""
+Parsing of AI-generated feedback text into structured sections.
+
+A single line-oriented state machine splits the completion into every Feedback
+field in one linear pass. The same machine backs the incremental parser that
+emits each section as soon as it closes while a completion streams in.
+"""
+
+import re
+
+# Feedback field -> section header used in DSA_FEEDBACK_PROMPT
+SECTION_TITLES = {
+    "time_complexity": "Time Complexity",
+    "space_complexity": "Space Complexity",
+    "edge_cases": "Edge Cases",
+    "code_quality": "Code Quality",
+}
+
+DEFAULT_IMPROVEMENT_PLAN = [
+    "Review the code for any inefficiencies",
+    "Test with edge cases",
+    "Optimize for better time/space complexity"
+]
+
+PLAN_FIELD = "improvement_plan"
+FEEDBACK_FIELDS = tuple(SECTION_TITLES) + (PLAN_FIELD,)
+
+_FIELD_BY_TITLE = {title.lower(): field for field, title in SECTION_TITLES.items()}
+
+# Headers only ever appear near the start of a line; matching a bounded prefix
+# keeps the cost per line constant no matter how long the line is.
+_HEADER_SCAN_LIMIT = 120
+
+# Section header such as "1. **Time Complexity**:" or "**3-Step Improvement Plan**:"
+_HEADER_RE = re.compile(
+    r"(?:\d{1,3}[.)] ?\s{0,3})?(?:[-•] ?\s{0,3})?(?:#{1,6} ?\s{0,3})?\*{0,2}"
+    r"(?:(?P<title>time complexity|space complexity|edge cases|code quality)"
+    r"|(?:\d-step )?(?P<plan>improvement plan))"
+    r"\*{0,2}(?P<colon>:)?\*{0,2}",
+    re.IGNORECASE,
+)
+
+# Cheap pre-filter so most lines never reach the full header pattern
+_KEYWORD_RE = re.compile(r"complexity|edge cases|code quality|improvement plan", re.IGNORECASE)
+
+# A numbered list item at the very start of a line, e.g. "2."
+_NUMBERED_RE = re.compile(r"\d+\.")
+
+# Improvement plan items: "Step 1: ...", "- Step 1: ...", "- ...", "• ...", "1. ..."
+_STEP_RE = re.compile(r"(?:[-•*] ?)?\*{0,2}step \d{1,3}\*{0,2} ?:\*{0,2} ?", re.IGNORECASE)
+_BULLET_RE = re.compile(r"(?:[-•*]|\d{1,3}[.)]) ")
+
+
+def is_section_break(line: str) -> bool:
+    """True if a line ends a free-text section: a bold line or a numbered item."""
+    return line.startswith("**") or (line[:1].isdigit() and _NUMBERED_RE.match(line) is not None)
+
+
+def _match_header(stripped: str) -> tuple[str, str] | None:
+    """Return (field, remainder) if the line opens a known section."""
+    head = stripped[:_HEADER_SCAN_LIMIT]
+    if _KEYWORD_RE.search(head) is None:
+        return None
+
+    match = _HEADER_RE.match(head)
+    if match is None:
+        return None
+    if match.group("plan"):
+        return PLAN_FIELD, stripped[match.end():].strip()
+    # Free-text sections need the colon, otherwise "Time complexity is fine" would match
+    if not match.group("colon"):
+        return None
+    return _FIELD_BY_TITLE[match.group("title").lower()], stripped[match.end():].strip()
+
+
+def parse_plan_steps(lines: list[str]) -> list[str]:
+    """
+    Split the body of an improvement plan section into individual steps.
+
+    "Step N:" items win over plain bullets; lines that start neither continue
+    the previous item.
+    """
+    steps: list[list[str]] = []
+    bullets: list[list[str]] = []
+    current = None
+
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        step = _STEP_RE.match(stripped)
+        if step:
+            current = [stripped[step.end():]]
+            steps.append(current)
+            continue
+        bullet = _BULLET_RE.match(stripped)
+        if bullet:
+            current = [stripped[bullet.end():]]
+            bullets.append(current)
+        elif current is not None:
+            current.append(stripped)
+
+    items = steps or bullets
+    return [text for text in ("\n".join(item).strip() for item in items) if text]
+
+
+class FeedbackTokenizer:
+    """
+    Line-by-line state machine that assigns feedback text to Feedback fields.
+
+    feed_line() consumes one complete line and returns any fields it closed.
+    A free-text section ends at the next header, bold line or numbered item;
+    the improvement plan ends at the first blank line after its content. The
+    first occurrence of each section wins.
+    """
+
+    def __init__(self):
+        self.sections: dict = {}
+        self._field = None
+        self._lines: list[str] = []
+        self._has_content = False
+
+    @property
+    def pending(self) -> list[str]:
+        """Fields not closed yet, in Feedback order."""
+        return [field for field in FEEDBACK_FIELDS if field not in self.sections]
+
+    def feed_line(self, line: str) -> list[tuple[str, object]]:
+        """Consume one line (without its newline) and return closed fields."""
+        closed = []
+        stripped = line.strip()
+        header = _match_header(stripped) if stripped else None
+
+        if header is not None:
+            self._close(closed)
+            field, rest = header
+            if field not in self.sections:
+                self._field = field
+                self._lines = [rest] if rest else []
+                self._has_content = bool(rest)
+            return closed
+
+        if self._field is None:
+            return closed
+
+        if self._field == PLAN_FIELD:
+            if stripped:
+                self._lines.append(line)
+                self._has_content = True
+            elif self._has_content:
+                self._close(closed)
+        elif is_section_break(line):
+            self._close(closed)
+        else:
+            self._lines.append(line)
+        return closed
+
+    def peek_break(self, partial_line: str) -> list[tuple[str, object]]:
+        """
+        Close the current free-text section early if an incomplete line already
+        shows it is a section break, so streamed sections are emitted promptly.
+        """
+        closed = []
+        if self._field is not None and self._field != PLAN_FIELD and is_section_break(partial_line):
+            self._close(closed)
+        return closed
+
+    def finish(self) -> list[tuple[str, object]]:
+        """Close the open section and fill every missing field with its fallback."""
+        closed = []
+        self._close(closed)
+        for field in self.pending:
+            if field == PLAN_FIELD:
+                value = list(DEFAULT_IMPROVEMENT_PLAN)
+            else:
+                value = f"No {SECTION_TITLES[field]} analysis provided."
+            self.sections[field] = value
+            closed.append((field, value))
+        return closed
+
+    def _close(self, closed: list) -> None:
+        field, lines = self._field, self._lines
+        self._field, self._lines = None, []
+        if field is None:
+            return
+
+        if field == PLAN_FIELD:
+            steps = parse_plan_steps(lines)
+            if not steps:
+                # Leave the plan open to a later occurrence, else finish() defaults it
+                return
+            value = steps
+        else:
+            value = "\n".join(lines).strip()
+        self.sections[field] = value
+        closed.append((field, value))
+
+
+def parse_sections(feedback_text: str) -> dict:
+    """
+    Split feedback text into a dict of Feedback fields in a single pass.
+
+    Args:
+        feedback_text: Raw feedback text from the model
+
+    Returns:
+        dict: time_complexity, space_complexity, edge_cases, code_quality and improvement_plan
+    """
+    tokenizer = FeedbackTokenizer()
+    for line in feedback_text.split("\n"):
+        tokenizer.feed_line(line)
+    tokenizer.finish()
+    return {field: tokenizer.sections[field] for field in FEEDBACK_FIELDS}
+
+
+def fallback_fields(sections: dict) -> list[str]:
+    """Fields of parsed sections that hold the placeholder rather than model output."""
+    fallbacks = []
+    for field, value in sections.items():
+        if field == PLAN_FIELD:
+            if value == DEFAULT_IMPROVEMENT_PLAN:
+                fallbacks.append(field)
+        elif field in SECTION_TITLES and value == f"No {SECTION_TITLES[field]} analysis provided.":
+            fallbacks.append(field)
+    return fallbacks
+
+
+def strip_code_fence(text: str) -> str:
+    """Remove a ``` or ```json fence that some models wrap around JSON replies."""
+    stripped = text.strip()
+    if len(stripped) < 6 or not (stripped.startswith("```") and stripped.endswith("```")):
+        return text
+    body = stripped[3:-3]
+    return body[4:] if body.startswith("json") else body
+
+
+def extract_section(text: str, section_name: str) -> str:
+    """Extract a single free-text section from feedback text."""
+    field = _FIELD_BY_TITLE.get(section_name.lower())
+    if field is None:
+        return f"No {section_name} analysis provided."
+    return parse_sections(text)[field]
+
+
+def extract_improvement_plan(text: str) -> list[str]:
+    """Extract improvement plan steps from feedback text."""
+    return parse_sections(text)[PLAN_FIELD]
+
+
+class IncrementalFeedbackParser:
+    """
+    Incremental counterpart of parse_sections for streamed completions.
+
+    Feed text chunks as they arrive; feed() returns (field, value) pairs for
+    sections that have closed. finish() flushes the remaining fields, so the
+    union of everything emitted matches parsing the full text at once.
+    """
+
+    def __init__(self):
+        self._chunks: list[str] = []
+        self._partial = ""
+        self._tokenizer = FeedbackTokenizer()
+
+    @property
+    def text(self) -> str:
+        """Full text received so far."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        """Add a chunk of streamed text and return newly closed sections."""
+        if not chunk:
+            return []
+        self._chunks.append(chunk)
+
+        closed = []
+        *lines, self._partial = (self._partial + chunk).split("\n")
+        for line in lines:
+            closed.extend(self._tokenizer.feed_line(line))
+        if self._partial:
+            closed.extend(self._tokenizer.peek_break(self._partial))
+        return closed
+
+    def finish(self) -> list[tuple[str, object]]:
+        """Emit every section not yet closed, parsed from the complete text."""
+        closed = self._tokenizer.feed_line(self._partial)
+        self._partial = ""
+        return closed + self._tokenizer.finish()
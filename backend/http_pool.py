@@ -0,0 +1,152 @@
+"""
+HTTP connection pool for the model client.
+
+The pool is sized from the upstream concurrency limit, keeps connections alive
+long enough to be reused between requests, optionally speaks HTTP/2 (when the
+h2 package is installed), and can be warmed at startup so the first requests
+after a deploy do not pay for DNS, TCP and TLS setup.
+
+The openai SDK and its httpx are imported when the client is built, not when
+this module is, so importing the app stays fast.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from types import ModuleType
+from typing import TYPE_CHECKING, NamedTuple, Sequence
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import httpx
+
+try:
+    import h2  # noqa: F401  (only needed for HTTP/2)
+except ImportError:
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+
+def sdk_httpx() -> ModuleType:
+    """The httpx module the openai SDK uses (newer releases ship their own fork)."""
+    try:
+        import httpx2
+        return httpx2
+    except ImportError:
+        import httpx
+        return httpx
+
+
+class PoolSettings(NamedTuple):
+    """Connection pool and timeout settings for the model client."""
+    max_connections: int
+    max_keepalive: int
+    keepalive_expiry: float = 60.0
+    http2: bool = False
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+
+    @classmethod
+    def for_concurrency(cls, max_concurrency: int, **overrides) -> "PoolSettings":
+        """
+        Size the pool from the upstream concurrency limit.
+
+        Every in-flight call can hold a connection, and hedged or streamed
+        calls may briefly need a second one, so the pool allows twice the
+        concurrency and keeps one idle connection per concurrent call.
+        """
+        settings = {"max_connections": 2 * max_concurrency, "max_keepalive": max_concurrency}
+        settings.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**settings)
+
+
+def build_http_client(settings: PoolSettings, **kwargs) -> httpx.AsyncClient:
+    """
+    Create the HTTP client passed to AsyncOpenAI(http_client=...).
+
+    HTTP/2 multiplexes every call over one connection; if it is requested but
+    h2 is not installed, the client falls back to HTTP/1.1 with a warning.
+    """
+    http2 = settings.http2
+    if http2 and h2 is None:
+        logger.warning("HTTP/2 requested for the model client but the h2 package is not installed; using HTTP/1.1")
+        http2 = False
+    import openai
+    httpx = sdk_httpx()
+    return openai.DefaultAsyncHttpxClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            settings.read_timeout,
+            connect=settings.connect_timeout,
+            pool=settings.connect_timeout,
+        ),
+        **kwargs
+    )
+
+
+class WarmupResult(NamedTuple):
+    """Outcome of pre-establishing upstream connections."""
+    requested: int
+    established: int
+    duration_ms: float
+
+
+async def warm_up(http_client: httpx.AsyncClient, urls: Sequence[str], connections: int, timeout: float = 5.0) -> WarmupResult:
+    """
+    Open `connections` pooled connections, spread across the upstream hosts.
+
+    Concurrent HEAD requests force the pool to open one connection each; the
+    status code does not matter (an auth error still completes the TCP and TLS
+    handshakes), and the connections stay in the pool for keepalive_expiry
+    seconds. URLs on the same scheme, host and port share connections and are
+    warmed once. Every host gets at least one connection; the total is not
+    raised further, since the pool's connection limit spans all hosts and
+    opening more would close warm ones. Failures are logged and never raised,
+    so an unreachable upstream only delays startup by `timeout`.
+
+    Args:
+        http_client: Client from build_http_client
+        urls: Upstream base URLs (the default endpoint and any per-backend ones)
+        connections: How many connections to open in total (HTTP/2 needs one per host)
+        timeout: Upper bound for the whole warm-up, in seconds
+
+    Returns:
+        WarmupResult with how many connections were established and how long it took
+    """
+    started = time.perf_counter()
+    origins: dict[tuple[str, str], str] = {}
+    for url in urls:
+        parts = urlsplit(url)
+        origins.setdefault((parts.scheme, parts.netloc), url)
+    if connections <= 0 or not origins:
+        return WarmupResult(0, 0, 0.0)
+    httpx = sdk_httpx()
+    share, extra = divmod(connections, len(origins))
+    targets = [
+        url
+        for index, url in enumerate(origins.values())
+        for _ in range(max(1, share + (index < extra)))
+    ]
+
+    async def touch(url: str) -> bool:
+        try:
+            await http_client.head(url)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning("Upstream warm-up request to %s failed: %s: %s", url, type(e).__name__, e)
+            return False
+
+    try:
+        results = await asyncio.wait_for(asyncio.gather(*map(touch, targets)), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Upstream warm-up did not finish within %.1fs", timeout)
+        results = []
+    return WarmupResult(len(targets), sum(results), (time.perf_counter() - started) * 1000)
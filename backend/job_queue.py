@@ -0,0 +1,327 @@
+"""
+Persistent priority queue of analysis jobs in SQLite.
+
+The API enqueues a job and answers at once; workers in the API process or in
+a separate one (job_worker.py) claim jobs atomically, run them and store the
+result, which clients poll or receive over a WebSocket. A claim is a lease:
+if a worker dies mid-job, the lease expires and the job is queued again.
+Submissions carrying an idempotency key are stored once, so client retries
+get the existing job back instead of queueing the same work twice.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    payload_hash TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, created_at);
+"""
+
+_COLUMNS = "id, status, priority, payload, result, error, attempts, created_at, started_at, finished_at"
+
+# Highest priority first, oldest first within a priority
+_CLAIM = f"""
+UPDATE jobs SET status = '{RUNNING}', attempts = attempts + 1, started_at = ?, lease_until = ?
+WHERE id = (
+    SELECT id FROM jobs
+    WHERE status = '{QUEUED}' AND available_at <= ?
+    ORDER BY priority DESC, created_at
+    LIMIT 1
+)
+RETURNING {_COLUMNS}
+"""
+
+
+class Job(NamedTuple):
+    """A queued, running or finished job."""
+    id: str
+    status: str
+    priority: int
+    payload: dict
+    result: dict | None
+    error: str | None
+    attempts: int
+    created_at: float
+    started_at: float | None
+    finished_at: float | None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Job":
+        id, status, priority, payload, result, error, attempts, created_at, started_at, finished_at = row
+        return cls(
+            id, status, priority, json.loads(payload), json.loads(result) if result else None,
+            error, attempts, created_at, started_at, finished_at
+        )
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when an idempotency key is reused with a different payload."""
+
+
+def payload_hash(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue shared by every process that opens the same file.
+
+    Jobs run at most `max_attempts` times; a job whose lease expires, or whose
+    handler asks for a retry, goes back to the queue until then. Finished jobs
+    are kept for `retention` seconds so clients can still fetch the result.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 120.0, max_attempts: int = 3, retention: float = 86400):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def submit(self, payload: dict, priority: int = 0, idempotency_key: str | None = None) -> tuple[Job, bool]:
+        """
+        Enqueue a job, or return the existing one for a known idempotency key.
+
+        Returns:
+            tuple: (job, created), where created is False for a replayed submission
+
+        Raises:
+            IdempotencyConflictError: The key was already used for a different payload
+        """
+        digest = payload_hash(payload)
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "INSERT INTO jobs (id, idempotency_key, payload_hash, priority, status, payload, available_at, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(idempotency_key) DO NOTHING"
+                f" RETURNING {_COLUMNS}",
+                (uuid.uuid4().hex, idempotency_key, digest, priority, QUEUED, json.dumps(payload), now, now)
+            ).fetchone()
+            if row is not None:
+                return Job.from_row(row), True
+            existing = self._db.execute(
+                f"SELECT payload_hash, {_COLUMNS} FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+        if existing[0] != digest:
+            raise IdempotencyConflictError("Idempotency key was already used for a different request")
+        return Job.from_row(existing[1:]), False
+
+    def claim(self) -> Job | None:
+        """Atomically take the next ready job and lease it to the caller, or return None."""
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(_CLAIM, (now, now + self.lease_seconds, now)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def complete(self, job_id: str, result: dict) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ?, lease_until = NULL WHERE id = ?",
+                (DONE, json.dumps(result), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str, retry_in: float | None = None) -> str:
+        """
+        Record a failed run: requeue it after `retry_in` seconds if attempts remain, else mark it failed.
+
+        Returns:
+            str: The job's new status
+        """
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return FAILED
+            if retry_in is not None and row[0] < self.max_attempts:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_until = NULL WHERE id = ?",
+                    (QUEUED, error, now + retry_in, job_id)
+                )
+                return QUEUED
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, lease_until = NULL WHERE id = ?",
+                (FAILED, error, now, job_id)
+            )
+            return FAILED
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def recover_expired(self) -> int:
+        """Requeue running jobs whose lease expired (their worker died), failing those out of attempts."""
+        now = time.time()
+        with self._lock, self._db:
+            failed = self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, lease_until = NULL"
+                " WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, "The analysis did not finish in time.", now, RUNNING, now, self.max_attempts)
+            ).rowcount
+            requeued = self._db.execute(
+                "UPDATE jobs SET status = ?, lease_until = NULL WHERE status = ? AND lease_until < ?",
+                (QUEUED, RUNNING, now)
+            ).rowcount
+        if failed or requeued:
+            logger.warning("Recovered expired job leases: %d requeued, %d failed", requeued, failed)
+        return failed + requeued
+
+    def prune(self) -> int:
+        """Delete finished jobs older than the retention period."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (*FINISHED, time.time() - self.retention)
+            ).rowcount
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM jobs")
+
+    def stats(self) -> dict:
+        """Job counts by status for health endpoints."""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys((QUEUED, RUNNING, DONE, FAILED), 0)
+        counts.update(rows)
+        return counts
+
+
+class JobWorkers:
+    """
+    `concurrency` asyncio workers that claim jobs from a JobQueue and run `handler(payload)`.
+
+    The handler returns the result dict or raises. `retry_delay(error)` says
+    how long to wait before retrying (while attempts remain), or None if a
+    retry would not help; `describe_error(error)` is the message stored on the
+    job. Idle workers poll every `poll_interval` seconds, or wake at once when
+    notify() is called after an in-process submit.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[dict], Awaitable[dict]],
+        concurrency: int = 2,
+        retry_delay: Callable[[Exception], float | None] = lambda error: None,
+        describe_error: Callable[[Exception], str] = str,
+        poll_interval: float = 0.5,
+        maintenance_interval: float = 30.0
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.retry_delay = retry_delay
+        self.describe_error = describe_error
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.maintenance_interval = maintenance_interval
+        self.processed = self.failed = self.retried = 0
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+        logger.info("Started %d job workers", self.concurrency)
+
+    async def stop(self) -> None:
+        """Cancel the workers; jobs they were running are picked up again when their lease expires."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers, e.g. right after a job was submitted in this process."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run_once(self) -> bool:
+        """Claim and run one job. Returns False if the queue had nothing ready."""
+        job = await asyncio.to_thread(self.queue.claim)
+        if job is None:
+            return False
+        try:
+            result = await self.handler(job.payload)
+        except Exception as e:
+            status = await asyncio.to_thread(self.queue.fail, job.id, self.describe_error(e), self.retry_delay(e))
+            if status == FAILED:
+                self.failed += 1
+            else:
+                self.retried += 1
+            logger.warning("Job %s attempt %d failed (%s): %s: %s", job.id, job.attempts, status, type(e).__name__, e)
+        else:
+            self.processed += 1
+            await asyncio.to_thread(self.queue.complete, job.id, result)
+        return True
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+            except Exception as e:
+                logger.error("Job worker error: %s", e)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(self.maintenance_interval)
+            try:
+                await asyncio.to_thread(self.queue.recover_expired)
+                await asyncio.to_thread(self.queue.prune)
+            except Exception as e:
+                logger.error("Job queue maintenance failed: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.concurrency if self._tasks else 0,
+            "processed": self.processed,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+
+def scoped_idempotency_key(scope: str, idempotency_key: str) -> str:
+    """Namespace a client's idempotency key so different clients can never collide."""
+    return f"{scope}:{idempotency_key}"
+
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Standalone worker process for queued analysis jobs.
+
+Runs the same job workers the API can run in-process, against the same
+JOBS_DB, so analysis load can be moved off the web workers: start the API with
+JOB_WORKERS=0 and run one or more of these next to it. The app's startup hooks
+are reused, so the worker shares the API's configuration (model client, judge
+pool, attempt history). SIGINT/SIGTERM stop it; jobs it was running are
+retried once their lease expires.
+
+Run with: python job_worker.py [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+
+
+async def serve(app) -> None:
+    for handler in app.router.on_startup:
+        await handler()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        for handler in app.router.on_shutdown:
+            await handler()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_WORKER_CONCURRENCY", "4")),
+                        help="Jobs processed at once")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    # main reads JOB_WORKERS at import time
+    os.environ["JOB_WORKERS"] = str(args.concurrency)
+    from main import app, logger
+
+    logger.info("Job worker process starting with %d workers", args.concurrency)
+    asyncio.run(serve(app))
+
+
+if __name__ == "__main__":
+    main()
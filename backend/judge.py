@@ -0,0 +1,569 @@
+"""
+Local judge that runs submitted code against per-problem test cases.
+
+Submissions execute in a pool of pre-forked worker processes so no request pays
+interpreter startup. On Linux each worker first confines itself with the
+kernel: a new network namespace with no interfaces, a chroot into an empty
+directory and, when started as root, the unprivileged "nobody" user with no
+further processes allowed. It then runs with resource limits (CPU time, address
+space, no file writes) and a wall-clock deadline enforced by the parent.
+
+Inside the worker, submissions see restricted builtins, and `import` hands out
+stand-in modules holding only allowlisted functions and classes, so modules the
+real ones import (such as `sys` or `os`) are out of reach. Code that touches
+dunder or frame attributes (the usual way out through
+`().__class__.__base__.__subclasses__()`) is rejected before it runs. These
+in-process checks are defence in depth; the kernel isolation is the boundary,
+and `require_isolation` makes the pool refuse to start without it. Workers that
+time out, run out of memory, crash or are lost mid-job are killed and replaced.
+"""
+
+import ast
+import asyncio
+import builtins
+import functools
+import importlib
+import logging
+import math
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; limits fall back to wall-clock only
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Modules submissions may import and the only names each one exposes. Modules that
+# re-export sys or os as public attributes (typing, dataclasses, random, re, ...) are not offered.
+SAFE_MODULES = {
+    "bisect": ("bisect", "bisect_left", "bisect_right", "insort", "insort_left", "insort_right"),
+    "collections": ("ChainMap", "Counter", "OrderedDict", "defaultdict", "deque", "namedtuple"),
+    "copy": ("copy", "deepcopy"),
+    "functools": ("cache", "cached_property", "cmp_to_key", "lru_cache", "partial", "reduce", "total_ordering"),
+    "heapq": ("heapify", "heappop", "heappush", "heappushpop", "heapreplace", "merge", "nlargest", "nsmallest"),
+    "itertools": (
+        "accumulate", "chain", "combinations", "combinations_with_replacement", "compress", "count",
+        "cycle", "dropwhile", "filterfalse", "groupby", "islice", "pairwise", "permutations",
+        "product", "repeat", "starmap", "takewhile", "tee", "zip_longest",
+    ),
+    "math": (
+        "ceil", "comb", "copysign", "e", "exp", "fabs", "factorial", "floor", "fmod", "fsum", "gcd",
+        "hypot", "inf", "isclose", "isfinite", "isinf", "isnan", "isqrt", "lcm", "log", "log10",
+        "log2", "nan", "perm", "pi", "pow", "prod", "sqrt", "tau", "trunc",
+        "acos", "asin", "atan", "atan2", "cos", "sin", "tan", "degrees", "radians", "dist",
+    ),
+    # No attrgetter/methodcaller: they turn strings into attribute access
+    "operator": (
+        "abs", "add", "and_", "concat", "contains", "eq", "floordiv", "ge", "getitem", "gt",
+        "index", "inv", "invert", "itemgetter", "le", "lshift", "lt", "mod", "mul", "ne", "neg",
+        "not_", "or_", "pos", "pow", "rshift", "sub", "truediv", "truth", "xor",
+    ),
+    "string": (
+        "ascii_letters", "ascii_lowercase", "ascii_uppercase", "digits", "hexdigits", "octdigits",
+        "printable", "punctuation", "whitespace",
+    ),
+}
+
+# Results of the kernel isolation steps, reported by each worker when it starts
+ISOLATION_STEPS = ("network", "filesystem", "unprivileged")
+
+# No getattr, setattr or type: they reach attributes the source check below cannot see.
+# `object` stays for LeetCode-style `class Solution(object)`; its dunders are rejected like any other.
+SAFE_BUILTINS = (
+    "abs", "all", "any", "bin", "bool", "bytes", "callable", "chr", "classmethod", "dict",
+    "divmod", "enumerate", "filter", "float", "format", "frozenset", "hasattr",
+    "hash", "hex", "id", "int", "isinstance", "issubclass", "iter", "len", "list", "map",
+    "max", "min", "next", "object", "oct", "ord", "pow", "property", "range", "repr",
+    "reversed", "round", "set", "slice", "sorted", "staticmethod", "str", "sum",
+    "super", "tuple", "zip", "__build_class__",
+    "ArithmeticError", "AssertionError", "AttributeError", "Exception", "IndexError",
+    "KeyError", "LookupError", "NotImplementedError", "RecursionError", "RuntimeError",
+    "StopIteration", "TypeError", "ValueError", "ZeroDivisionError",
+    "NotImplemented", "Ellipsis",
+)
+
+# Case statuses, in the order they take precedence for the overall verdict
+COMPILE_ERROR = "compile_error"
+TIME_LIMIT_EXCEEDED = "time_limit_exceeded"
+MEMORY_LIMIT_EXCEEDED = "memory_limit_exceeded"
+RUNTIME_ERROR = "runtime_error"
+WRONG_ANSWER = "wrong_answer"
+PASSED = "passed"
+SKIPPED = "skipped"
+ACCEPTED = "accepted"
+
+_VERDICT_ORDER = (COMPILE_ERROR, TIME_LIMIT_EXCEEDED, MEMORY_LIMIT_EXCEEDED, RUNTIME_ERROR, WRONG_ANSWER)
+
+# Attributes that expose frames, globals or code objects of the running interpreter
+_BLOCKED_ATTRIBUTES = frozenset({
+    "ag_frame", "cr_frame", "f_back", "f_builtins", "f_code", "f_globals", "f_locals",
+    "gi_code", "gi_frame", "tb_frame", "tb_next",
+})
+
+_SIGNATURE_RE = re.compile(r"def\s+([A-Za-z_]\w*)\s*\(")
+_MAX_REPR = 200
+
+
+def entry_point_from_signature(function_signature: str) -> str | None:
+    """Return the function name declared in a problem's function signature."""
+    match = _SIGNATURE_RE.search(function_signature)
+    return match.group(1) if match else None
+
+
+def overall_verdict(cases: list[dict]) -> str:
+    """Collapse per-case statuses into a single verdict."""
+    statuses = {case["status"] for case in cases}
+    for status in _VERDICT_ORDER:
+        if status in statuses:
+            return status
+    return ACCEPTED
+
+
+# ============================================================================
+# WORKER PROCESS
+# ============================================================================
+
+class _CpuLimitExceeded(BaseException):
+    """Raised inside a worker when the per-job CPU budget runs out."""
+
+
+def _on_sigxcpu(signum, frame):
+    raise _CpuLimitExceeded()
+
+
+def _blocked(*args, **kwargs):
+    raise PermissionError("Network access is disabled in the judge")
+
+
+# Stand-in modules handed to submissions, built by _apply_sandbox in each worker
+_stand_ins: dict[str, types.ModuleType] = {}
+
+
+def _stand_in(name: str) -> types.ModuleType:
+    """A module holding only the allowlisted names of the real one."""
+    module = importlib.import_module(name)
+    # A name that is not in sys.modules, so `from x import y` cannot fall back to real submodules
+    stand_in = types.ModuleType(f"{name} (judge)")
+    for attr in SAFE_MODULES[name]:
+        setattr(stand_in, attr, getattr(module, attr))
+    return stand_in
+
+
+def _safe_import(name, globals=None, locals=None, fromlist=(), level=0):
+    stand_in = _stand_ins.get(name)
+    if level or stand_in is None:
+        raise ImportError(f"Import of '{name}' is not allowed")
+    return stand_in
+
+
+_CLONE_NEWUSER = 0x10000000
+_CLONE_NEWNET = 0x40000000
+_PR_SET_NO_NEW_PRIVS = 38
+_NOBODY = 65534
+
+
+def _isolate(root: str) -> list[str]:
+    """
+    Confine this process with the kernel (Linux only) and return the ISOLATION_STEPS that took effect.
+
+    Root drops to "nobody" after entering a network namespace and chrooting into
+    `root`; other users get both through an unprivileged user namespace.
+    """
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+    except (ImportError, OSError):
+        return []
+    applied = []
+    was_root = os.geteuid() == 0
+    if libc.unshare(_CLONE_NEWNET if was_root else _CLONE_NEWUSER | _CLONE_NEWNET) == 0:
+        applied.append("network")
+    try:
+        os.chroot(root)
+        os.chdir("/")
+        applied.append("filesystem")
+    except OSError:
+        pass
+    if was_root:
+        try:
+            os.setgroups([])
+            os.setgid(_NOBODY)
+            os.setuid(_NOBODY)
+            if resource is not None:
+                resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+        except OSError:
+            pass
+    if os.geteuid() != 0:
+        applied.append("unprivileged")
+    libc.prctl(_PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0)
+    return applied
+
+
+def _apply_sandbox(memory_mb: int) -> list[str]:
+    """Lock down the current worker process before it accepts jobs; returns the isolation applied."""
+    import signal
+    import socket
+
+    # Everything a job needs is imported now: after the chroot nothing else can be
+    _stand_ins.update((name, _stand_in(name)) for name in SAFE_MODULES)
+
+    os.environ.clear()
+    isolation = _isolate(tempfile.mkdtemp(prefix="judge-"))
+    for name in ("socket", "create_connection", "create_server", "socketpair", "fromfd"):
+        setattr(socket, name, _blocked)
+
+    if resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+    return isolation
+
+
+def _set_cpu_budget(cpu_seconds: float) -> None:
+    """Allow this job cpu_seconds more CPU time; SIGXCPU fires when it runs out."""
+    if resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _normalize(value):
+    """Make tuples and lists compare equal, recursively."""
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+
+def _short_repr(value) -> str:
+    text = repr(value)
+    return text if len(text) <= _MAX_REPR else text[:_MAX_REPR] + "..."
+
+
+def _resolve_entry_point(namespace: dict, entry_point: str):
+    """Find the function to call, supporting LeetCode-style `class Solution`."""
+    func = namespace.get(entry_point)
+    if callable(func):
+        return func
+    solution = namespace.get("Solution")
+    if isinstance(solution, type) and hasattr(solution, entry_point):
+        return getattr(solution(), entry_point)
+    return None
+
+
+def _check_attributes(tree: ast.AST) -> None:
+    """Reject dunder and frame attribute access, the routes out of the restricted namespace."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and (node.attr.startswith("__") or node.attr in _BLOCKED_ATTRIBUTES):
+            raise ValueError(f"Access to attribute '{node.attr}' is not allowed (line {node.lineno})")
+
+
+def _run_job(job: dict) -> dict:
+    """Execute one submission against its test cases inside a worker."""
+    cases = job["test_cases"]
+    try:
+        tree = ast.parse(job["code"], "<submission>")
+        _check_attributes(tree)
+        code = compile(tree, "<submission>", "exec")
+    except (SyntaxError, ValueError) as e:
+        error = f"{type(e).__name__}: {e}"
+        return {"cases": [{"status": COMPILE_ERROR, "error": error} for _ in cases], "recycle": False}
+
+    safe_builtins = {name: getattr(builtins, name) for name in SAFE_BUILTINS if hasattr(builtins, name)}
+    safe_builtins["__import__"] = _safe_import
+    safe_builtins["print"] = lambda *args, **kwargs: None
+    namespace = {"__builtins__": safe_builtins, "__name__": "submission"}
+
+    results = []
+    recycle = False
+    _set_cpu_budget(job["cpu_seconds"])
+    try:
+        try:
+            exec(code, namespace)
+        except MemoryError:
+            raise
+        except Exception as e:
+            # Module-level code failed, so no case can run
+            error = f"{type(e).__name__}: {e}"
+            return {"cases": [{"status": RUNTIME_ERROR, "error": error} for _ in cases], "recycle": False}
+
+        func = _resolve_entry_point(namespace, job["entry_point"])
+        if func is None:
+            error = f"Function '{job['entry_point']}' is not defined"
+            return {"cases": [{"status": RUNTIME_ERROR, "error": error} for _ in cases], "recycle": False}
+
+        for case in cases:
+            start = time.perf_counter()
+            try:
+                actual = func(*case.get("args", []), **case.get("kwargs", {}))
+            except MemoryError:
+                raise
+            except Exception as e:
+                results.append({"status": RUNTIME_ERROR, "error": f"{type(e).__name__}: {e}"})
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            passed = _normalize(actual) == _normalize(case.get("expected"))
+            result = {"status": PASSED if passed else WRONG_ANSWER, "time_ms": round(elapsed_ms, 3)}
+            if not case.get("hidden", False):
+                result["expected"] = _short_repr(case.get("expected"))
+                result["actual"] = _short_repr(actual)
+            results.append(result)
+    except _CpuLimitExceeded:
+        results.append({"status": TIME_LIMIT_EXCEEDED, "error": "CPU time limit exceeded"})
+        recycle = True
+    except MemoryError:
+        results.append({"status": MEMORY_LIMIT_EXCEEDED, "error": "Memory limit exceeded"})
+        recycle = True
+
+    results.extend({"status": SKIPPED} for _ in range(len(cases) - len(results)))
+    return {"cases": results, "recycle": recycle}
+
+
+def _worker_main(conn, memory_mb: int) -> None:
+    """Worker loop: report the isolation applied, then receive jobs, run them and send results back."""
+    conn.send(_apply_sandbox(memory_mb))
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        result = _run_job(job)
+        conn.send(result)
+        if result["recycle"]:
+            return
+
+
+# ============================================================================
+# POOL
+# ============================================================================
+
+class _Worker:
+    """Handle on one pre-forked worker process."""
+
+    def __init__(self, context, memory_mb: int, start_timeout: float = 30.0):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        try:
+            if not self.conn.poll(start_timeout):
+                raise EOFError
+            self.isolation: list[str] = self.conn.recv()
+        except (EOFError, OSError):
+            self.kill()
+            raise RuntimeError(f"Judge worker failed to start (exit code {self.process.exitcode})") from None
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class JudgePool:
+    """
+    Pool of sandboxed worker processes that judge submissions.
+
+    With `require_isolation`, workers that could not apply every ISOLATION_STEPS
+    entry are refused, so the pool fails to start rather than run untrusted code
+    without the kernel boundary.
+
+    Usage:
+        pool = JudgePool(workers=4)
+        await pool.start()
+        result = await pool.run(code, "maxSumSubarray", test_cases)
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        cpu_seconds: float = 2.0,
+        memory_mb: int = 256,
+        wall_seconds: float = 5.0,
+        max_jobs_per_worker: int = 500,
+        require_isolation: bool = False,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_seconds = wall_seconds
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.require_isolation = require_isolation
+        self.isolation: list[str] | None = None
+        self.jobs_run = 0
+        self.workers_replaced = 0
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(method)
+        self._executor = None
+        self._idle = None
+        self._all: set[_Worker] = set()
+
+    @property
+    def started(self) -> bool:
+        return self._idle is not None
+
+    def stats(self) -> dict:
+        """Snapshot of pool state for health/metrics endpoints."""
+        return {
+            "workers": self.workers if self.started else 0,
+            "idle": self._idle.qsize() if self.started else 0,
+            "jobs_run": self.jobs_run,
+            "workers_replaced": self.workers_replaced,
+            "isolation": self.isolation,
+        }
+
+    async def start(self) -> None:
+        """
+        Fork the worker processes. Safe to call more than once.
+
+        Raises:
+            RuntimeError: A worker failed to start, or could not isolate itself under require_isolation
+        """
+        if self.started:
+            return
+        self._idle = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="judge")
+        loop = asyncio.get_running_loop()
+        try:
+            spawned = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, self._spawn) for _ in range(self.workers)
+            ))
+        except Exception:
+            await self.close()
+            raise
+        for worker in spawned:
+            self._idle.put_nowait(worker)
+        logger.info("Judge pool started with %d workers", self.workers)
+
+    async def close(self) -> None:
+        """Stop all workers."""
+        if not self.started:
+            return
+        for worker in list(self._all):
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.kill()
+        self._all.clear()
+        self._executor.shutdown(wait=False)
+        self._idle = None
+
+    async def run(self, code: str, entry_point: str, test_cases: list[dict]) -> dict:
+        """
+        Judge a submission.
+
+        Args:
+            code: Submitted source code
+            entry_point: Name of the function to call
+            test_cases: Dicts with "args" (list), optional "kwargs", "expected" and "hidden"
+
+        Returns:
+            dict: verdict, passed, total, duration_ms and per-case results
+        """
+        await self.start()
+        job = {
+            "code": code,
+            "entry_point": entry_point,
+            "test_cases": test_cases,
+            "cpu_seconds": self.cpu_seconds,
+        }
+        loop = asyncio.get_running_loop()
+        worker = await self._idle.get()
+        start = time.perf_counter()
+        future = loop.run_in_executor(self._executor, self._execute, worker, job)
+        # Hand the worker back once the job finishes, even if our caller gives up
+        future.add_done_callback(functools.partial(self._release, worker))
+        result, _ = await asyncio.shield(future)
+
+        cases = [dict(case, index=i, passed=case["status"] == PASSED) for i, case in enumerate(result["cases"])]
+        return {
+            "verdict": overall_verdict(cases),
+            "passed": sum(case["passed"] for case in cases),
+            "total": len(cases),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            "cases": cases,
+        }
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context, self.memory_mb)
+        missing = [step for step in ISOLATION_STEPS if step not in worker.isolation]
+        if missing and self.require_isolation:
+            worker.kill()
+            raise RuntimeError(f"Judge worker could not isolate itself ({', '.join(missing)}); refusing to run it")
+        if missing and self.isolation is None:
+            logger.warning("Judge workers run without kernel isolation (%s)", ", ".join(missing))
+        self.isolation = worker.isolation
+        self._all.add(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        self._all.discard(worker)
+        self.workers_replaced += 1
+        return self._spawn()
+
+    def _release(self, worker: _Worker, future) -> None:
+        if self._idle is None:
+            return
+        if future.cancelled() or future.exception() is not None:
+            # The job failed outside the worker protocol, so the worker's state is unknown
+            logger.error("Judge worker lost mid-job; replacing it")
+            replacement = asyncio.get_running_loop().run_in_executor(self._executor, self._replace, worker)
+            replacement.add_done_callback(self._requeue)
+            return
+        _, worker = future.result()
+        self._idle.put_nowait(worker)
+
+    def _requeue(self, future) -> None:
+        if self._idle is None:
+            return
+        if future.cancelled() or future.exception() is not None:
+            logger.error("Could not replace judge worker; pool capacity reduced: %s",
+                         None if future.cancelled() else future.exception())
+            return
+        self._idle.put_nowait(future.result())
+
+    def _execute(self, worker: _Worker, job: dict) -> tuple[dict, _Worker]:
+        """Blocking: send a job to a worker and wait for its verdict (runs in the executor)."""
+        self.jobs_run += 1
+        worker.jobs += 1
+        total = len(job["test_cases"])
+        try:
+            worker.conn.send(job)
+            if worker.conn.poll(self.wall_seconds):
+                result = worker.conn.recv()
+            else:
+                result = {
+                    "cases": [{"status": TIME_LIMIT_EXCEEDED, "error": "Wall-clock limit exceeded"}] * total,
+                    "recycle": True,
+                }
+        except (EOFError, OSError):
+            # The worker died mid-job: hard CPU/memory kill or interpreter crash
+            worker.process.join(timeout=1)
+            result = {
+                "cases": [{"status": RUNTIME_ERROR, "error": f"Worker exited with code {worker.process.exitcode}"}] * total,
+                "recycle": True,
+            }
+
+        if result["recycle"] or worker.jobs >= self.max_jobs_per_worker or not worker.process.is_alive():
+            worker = self._replace(worker)
+        return result, worker
@@ -0,0 +1,188 @@
+"""
+Incremental checks for live interview sessions.
+
+While a candidate types, the client sends debounced snapshots of the whole
+editor. Each snapshot is parsed once; every function is reduced to its
+normalized source (ast.unparse drops comments and formatting) and a 64-bit
+digest of it. Only functions whose digest changed since the previous
+snapshot are re-estimated, and estimates are shared across sessions through
+an LRU cache, so a snapshot that only touches one function costs one
+estimate. Judge tests are re-run only when some function changed.
+
+A session keeps just the digests, the fingerprint of the code the model last
+saw and a few counters, so a worker can hold thousands of idle sessions. The
+model is asked again only when the code drifts far enough from that
+fingerprint (a structural change), and at most every `model_interval`
+seconds; explicit submits are handled by the caller.
+"""
+
+import ast
+import hashlib
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+from complexity import ComplexityEstimate, estimate_complexity
+from near_duplicates import fingerprint, similarity
+
+MODULE_SCOPE = "<module>"
+
+
+class FunctionCheck(NamedTuple):
+    """Static checks for one function in a snapshot."""
+    name: str
+    changed: bool
+    estimate: ComplexityEstimate | None
+
+
+class Snapshot(NamedTuple):
+    """Result of checking one snapshot against the session's previous one."""
+    syntax_error: SyntaxError | None
+    functions: list[FunctionCheck]
+    removed: list[str]
+    # Whether the judge should run again: the code parses and some function changed
+    rejudge: bool
+    # Whether the code moved far enough from what the model last saw to ask it again
+    structural: bool
+    # SimHash of the code (near_duplicates.fingerprint), None if it does not parse
+    code_fingerprint: int | None
+
+
+class LiveSession:
+    """Per-connection state; deliberately small, since most sessions sit idle."""
+
+    __slots__ = ("topic", "problem_id", "user_id", "digests", "analyzed", "model_called_at", "judged", "snapshots")
+
+    def __init__(self, topic: str, problem_id: str | None = None, user_id: str | None = None):
+        self.topic = topic
+        self.problem_id = problem_id
+        self.user_id = user_id
+        # Function name -> digest of its normalized source in the last parsed snapshot
+        self.digests: dict[str, int] = {}
+        # Fingerprint of the code the model last analyzed (or of the first snapshot)
+        self.analyzed: int | None = None
+        self.model_called_at: float | None = None
+        self.judged = False
+        self.snapshots = 0
+
+
+def _digest(source: str) -> int:
+    return int.from_bytes(hashlib.blake2b(source.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def function_sources(tree: ast.Module) -> dict[str, str]:
+    """
+    Normalized source of each top-level function and class method, by name.
+
+    Methods are named "Class.method". Code without any function is checked
+    as a whole under MODULE_SCOPE.
+    """
+    sources = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            sources[node.name] = ast.unparse(node)
+        elif isinstance(node, ast.ClassDef):
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    sources[f"{node.name}.{item.name}"] = ast.unparse(item)
+    if not sources:
+        sources[MODULE_SCOPE] = ast.unparse(tree)
+    return sources
+
+
+@lru_cache(maxsize=4096)
+def check_function(source: str) -> ComplexityEstimate | None:
+    """Static complexity of one function's normalized source, shared by every session."""
+    return estimate_complexity(source)
+
+
+class LiveSessions:
+    """
+    Opens live sessions and checks their snapshots.
+
+    `structural_threshold` is the similarity() to the last analyzed code below
+    which a snapshot counts as a structural change, and `model_interval` the
+    minimum number of seconds between model calls triggered that way.
+    """
+
+    def __init__(self, max_sessions: int = 5000, structural_threshold: float = 0.8, model_interval: float = 30.0):
+        self.max_sessions = max_sessions
+        self.structural_threshold = structural_threshold
+        self.model_interval = model_interval
+        self.active = 0
+        self.opened = self.rejected = 0
+        self.snapshots = self.syntax_errors = 0
+        self.functions_checked = self.functions_reused = 0
+        self.structural_changes = 0
+
+    def open(self, topic: str, problem_id: str | None = None, user_id: str | None = None) -> LiveSession | None:
+        """Start a session, or return None if max_sessions are already open."""
+        if self.active >= self.max_sessions:
+            self.rejected += 1
+            return None
+        self.active += 1
+        self.opened += 1
+        return LiveSession(topic, problem_id, user_id)
+
+    def close(self, session: LiveSession) -> None:
+        self.active -= 1
+
+    def snapshot(self, session: LiveSession, code: str) -> Snapshot:
+        """Check a snapshot, re-estimating only the functions that changed since the last one."""
+        session.snapshots += 1
+        self.snapshots += 1
+        try:
+            sources = function_sources(ast.parse(code))
+        except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+            self.syntax_errors += 1
+            if isinstance(e, RecursionError):
+                e = SyntaxError("code is nested too deeply to parse")
+            elif not isinstance(e, SyntaxError):
+                e = SyntaxError(str(e) or type(e).__name__)
+            # Keep the last good digests, so only real edits show as changed once it parses again
+            return Snapshot(e, [], [], False, False, None)
+
+        digests = {}
+        functions = []
+        for name, source in sources.items():
+            digest = _digest(source)
+            digests[name] = digest
+            changed = session.digests.get(name) != digest
+            if changed:
+                self.functions_checked += 1
+            else:
+                self.functions_reused += 1
+            functions.append(FunctionCheck(name, changed, check_function(source)))
+        removed = [name for name in session.digests if name not in digests]
+        rejudge = not session.judged or any(f.changed for f in functions) or bool(removed)
+        session.digests = digests
+        session.judged = True
+
+        code_fingerprint = fingerprint(code)
+        if session.analyzed is None:
+            session.analyzed = code_fingerprint
+        structural = similarity(session.analyzed, code_fingerprint) < self.structural_threshold and (
+            session.model_called_at is None or time.monotonic() - session.model_called_at >= self.model_interval
+        )
+        if structural:
+            self.structural_changes += 1
+        return Snapshot(None, functions, removed, rejudge, structural, code_fingerprint)
+
+    def analyzed(self, session: LiveSession, code_fingerprint: int) -> None:
+        """Record that the model analyzed this code, making it the new baseline for structural changes."""
+        session.analyzed = code_fingerprint
+        session.model_called_at = time.monotonic()
+
+    def stats(self) -> dict:
+        """Session counts and how much checking was skipped, for health endpoints."""
+        checked = self.functions_checked + self.functions_reused
+        return {
+            "active": self.active,
+            "max_sessions": self.max_sessions,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "snapshots": self.snapshots,
+            "syntax_errors": self.syntax_errors,
+            "functions_reused_rate": round(self.functions_reused / checked, 3) if checked else 0.0,
+            "structural_changes": self.structural_changes,
+        }
@@ -4,36 +4,113 @@ Backend API for DSA interview coaching with comprehensive logging and validation
 """
 
 import os
+import asyncio
+import hmac
 import json
 import logging
+import time
 from datetime import datetime, timedelta
-from functools import lru_cache
-from fastapi import FastAPI, HTTPException, Request
+from pathlib import Path
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, field_validator, Field
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import TYPE_CHECKING, Any, Literal
+from pydantic import BaseModel, ValidationError, field_validator, Field
 from dotenv import load_dotenv
-from openai import OpenAI
-from prompts import DSA_FEEDBACK_PROMPT
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from prompts import COMPACTED_CODE_NOTE, COMPLEXITY_HINT_TEMPLATE, DSA_FEEDBACK_JSON_PROMPT, DSA_FEEDBACK_PROMPT
+from prompt_budget import CompactCode, PromptPlan, choose_max_tokens, compact_code, estimate_tokens
+from concurrency import SingleFlight, UpstreamLimiter, UpstreamBusyError, map_unordered
+from http_pool import PoolSettings, WarmupResult, build_http_client, warm_up
+from resilience import (
+    CircuitBreaker,
+    ResilientCaller,
+    RetryPolicy,
+    UpstreamTimeoutError,
+    UpstreamUnavailableError,
+    is_retryable,
+    is_upstream_failure,
+    loaded_openai,
+)
+from model_router import Backend, ModelRouter, parse_backends, parse_routes
+from feedback_cache import FeedbackCache, cache_key
+from near_duplicates import NearDuplicateIndex, fingerprint
+from fast_json import cached_json_response, dumps, etag_for, json_response
+from attempt_store import AttemptStore
+from live_session import LiveSession, LiveSessions, Snapshot
+from job_queue import FINISHED, IdempotencyConflictError, Job, JobQueue, JobWorkers, scoped_idempotency_key
+from problem_store import Payload, ProblemStore
+from readiness import Readiness
+from judge import JudgePool, entry_point_from_signature
+from complexity import estimate_complexity
+from feedback_parser import (
+    DEFAULT_IMPROVEMENT_PLAN,
+    PLAN_FIELD,
+    IncrementalFeedbackParser,
+    extract_improvement_plan,
+    extract_section,
+    fallback_fields,
+    parse_sections,
+    strip_code_fence,
+)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, PARSE_BUCKETS, UPSTREAM_BUCKETS, MetricsMiddleware, MetricsRegistry
+from structured_logging import RequestContextMiddleware, configure_logging, parse_sample_rates, request_id_var
+from tracing import SpanExporter, TracedRoute, Tracer, TracingMiddleware, current_traceparent, span
+from profiler import ProfilingMiddleware, SamplingProfiler
+from limits import parse as parse_limit
+from rate_limit import SharedTokenBuckets, TokenBucketLimiter, client_key_func, parse_api_key_quotas, store_from_uri
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('api.log')
-    ]
+# Configure logging: records are queued and written by a background thread
+log_listener = configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    log_file=os.getenv("LOG_FILE", "api.log"),
+    json_format=os.getenv("LOG_FORMAT", "json").lower() == "json",
+    max_bytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+    backup_count=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+    rotate_when=os.getenv("LOG_ROTATE_WHEN") or None,
+    sample_rates=parse_sample_rates(os.getenv("LOG_SAMPLE", "Health check requested:0.01,GET / 200:0.01")),
 )
 logger = logging.getLogger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Initialize rate limiter: token buckets in RATE_LIMIT_STORAGE (memory:// is per
+# worker; sqlite:///path or redis://... share the counters between workers,
+# each worker settling its spending with the store every RATE_LIMIT_SYNC_INTERVAL seconds).
+# Clients sending a key listed in API_KEY_QUOTAS get that key's analysis quota.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "memory://")
+RATE_LIMIT_SYNC_INTERVAL = float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", "0.2"))
+API_KEY_QUOTAS = parse_api_key_quotas(os.getenv("API_KEY_QUOTAS", ""))
+ANALYSIS_RATE_LIMIT = "10/minute"
+client_key = client_key_func(API_KEY_QUOTAS)
+limiter = TokenBucketLimiter(
+    store_from_uri(RATE_LIMIT_STORAGE, RATE_LIMIT_SYNC_INTERVAL),
+    key_func=client_key,
+    enabled=RATE_LIMIT_ENABLED
+)
+
+def analysis_limit(key: str) -> str:
+    """Analysis quota for a rate-limit key: the API key's own quota, else the per-IP default."""
+    return API_KEY_QUOTAS.get(key, ANALYSIS_RATE_LIMIT)
+
+def take_analysis_quota(key: str, scope: str, cost: int = 1) -> bool:
+    """
+    Charge `cost` model calls to a client's analysis quota from inside a handler.
+    
+    For requests that stand for several model calls (live sessions, batches),
+    where the route decorators can only charge once per request.
+    """
+    if not limiter.enabled:
+        return True
+    return limiter.limiter.hit(parse_limit(analysis_limit(key)), key, scope, cost=cost)
+
+RATE_LIMITED_MESSAGE = "Analysis rate limit exceeded. Please wait a minute and try again."
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -41,10 +118,36 @@ app = FastAPI(
     description="DSA Interview Coach API with AI-powered feedback",
     version="0.1.0"
 )
+# Async endpoints record validate/handler spans when the request is traced
+app.router.route_class = TracedRoute
+
+# Metrics served at /metrics
+metrics = MetricsRegistry()
+http_requests = metrics.counter("http_requests_total", "HTTP requests by route and status", ["method", "route", "status"])
+http_latency = metrics.histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+rate_limit_rejections = metrics.counter("rate_limit_rejections_total", "Requests rejected by the rate limiter", ["route"])
+upstream_latency = metrics.histogram(
+    "upstream_request_duration_seconds", "Model call latency", ["model", "outcome"], buckets=UPSTREAM_BUCKETS
+)
+upstream_tokens = metrics.counter("upstream_tokens_total", "Tokens reported by the model API", ["model", "kind"])
+parse_latency = metrics.histogram("feedback_parse_duration_seconds", "parse_feedback duration", buckets=PARSE_BUCKETS)
+parse_count = metrics.counter("feedback_parses_total", "Completions parsed into Feedback")
+parse_fallbacks = metrics.counter(
+    "feedback_section_fallbacks_total", "Parsed completions where a section fell back to its default", ["field"]
+)
+structured_decodes = metrics.counter(
+    "feedback_structured_decodes_total", "JSON completions by decode outcome (ok or fallback)", ["outcome"]
+)
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> Response:
+    """Count slowapi rejections per route, then return its usual 429 response."""
+    route = request.scope.get("route")
+    rate_limit_rejections.inc(getattr(route, "path", request.url.path))
+    return _rate_limit_exceeded_handler(request, exc)
 
 # Add rate limiter to app
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
 # Configure CORS
 app.add_middleware(
@@ -53,12 +156,141 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "traceparent"],
 )
 
+# Per-route request counts and latency
+app.add_middleware(MetricsMiddleware, requests=http_requests, latency=http_latency)
+
+# Request tracing: spans are exported as OTLP/JSON to TRACE_FILE (appended
+# lines) and/or TRACE_OTLP_ENDPOINT (an OTLP/HTTP collector, e.g.
+# http://localhost:4318/v1/traces); with neither set tracing is off. Requests
+# are sampled at TRACE_SAMPLE_RATE unless the caller's traceparent says otherwise
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "interview-flow-api")
+span_exporter = SpanExporter(TRACE_SERVICE_NAME, path=TRACE_FILE, endpoint=TRACE_OTLP_ENDPOINT)
+span_exporter.start()
+tracer = Tracer(span_exporter, sample_rate=TRACE_SAMPLE_RATE)
+
+# Bearer token for the /admin routes; unset, they answer 404
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Sampling profiler, off until switched on through PUT /admin/profiler
+profiler = SamplingProfiler()
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+app.add_middleware(TracingMiddleware, tracer=tracer, request_id=request_id_var)
+
+# Request ids and access logging (outermost, so timings cover the whole stack)
+app.add_middleware(RequestContextMiddleware)
+
 # Environment variable validation at startup
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")  # development or production
 
+# Models used for feedback as "[name=]model:tier[@base_url]" (tier 1 is the fastest and cheapest;
+# entries without a base URL use LLM_BASE_URL). Each call goes to the fastest healthy backend in
+# the lowest tier the submission needs, see model_router.py.
+LLM_MODELS = parse_backends(os.getenv("LLM_MODELS", "gpt-4o-mini:1,gpt-4o:2"))
+# Pin routes to a backend by name, e.g. "stream=gpt-4o,batch=gpt-4o-mini"
+# (routes: analyze, stream, batch, jobs, live)
+LLM_ROUTES = parse_routes(os.getenv("LLM_ROUTES", ""))
+# Submissions up to this many characters (outside hard topics) use the lowest tier
+LLM_ROUTE_SMALL_CHARS = int(os.getenv("LLM_ROUTE_SMALL_CHARS", "1500"))
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+# Any OpenAI-compatible endpoint; benchmarks point this at benchmarks/stub_llm.py
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://models.inference.ai.azure.com")
+
+# Completion budget bounds; max_tokens is chosen per request from code size and topic
+LLM_MIN_TOKENS = int(os.getenv("LLM_MIN_TOKENS", "400"))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "1000"))
+# Minify submitted code (AST round-trip) before inlining it in the prompt
+PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "true").lower() == "true"
+# Ask the model for JSON matching the Feedback schema and decode it in one pass; the text
+# parser is only a fallback. Streamed analysis keeps the text format so sections arrive early.
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "false").lower() == "true"
+
+# Upstream concurrency limits (per worker process)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+
+# Upstream failure handling: overall deadline and per-attempt timeout (seconds),
+# attempts including the first, circuit breaker threshold/cool-down, and hedging
+# (send a duplicate call once this latency percentile is exceeded; 0 disables)
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "45"))
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "30"))
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+
+# Model client connection pool; sizes default to values derived from LLM_MAX_CONCURRENCY.
+# HTTP/2 needs the h2 package. Warm-up opens connections before the app starts serving.
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "0")) or None
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "0")) or None
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "false").lower() == "true"
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_WARMUP_CONNECTIONS = int(os.getenv("LLM_WARMUP_CONNECTIONS", str(1 if LLM_HTTP2 else LLM_MAX_CONCURRENCY)))
+LLM_WARMUP_TIMEOUT = float(os.getenv("LLM_WARMUP_TIMEOUT", "5"))
+
+# Feedback cache (in-memory LRU, optional SQLite tier that survives restarts)
+FEEDBACK_CACHE_SIZE = int(os.getenv("FEEDBACK_CACHE_SIZE", "1024"))
+FEEDBACK_CACHE_TTL = float(os.getenv("FEEDBACK_CACHE_TTL", "86400"))
+FEEDBACK_CACHE_DB = os.getenv("FEEDBACK_CACHE_DB", "")
+# Reuse feedback for near-duplicate submissions on the same topic, e.g. the same solution with
+# different variable names (SimHash similarity >= threshold, above 0.9375). Off (0) by default:
+# small bugs such as an off-by-one index also fall within the match distance
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0"))
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "1000000"))
+
+# Problem bank directory and how often (seconds) to check it for changes
+PROBLEMS_DIR = os.getenv("PROBLEMS_DIR", str(Path(__file__).parent / "problems"))
+PROBLEMS_RELOAD_INTERVAL = float(os.getenv("PROBLEMS_RELOAD_INTERVAL", "5"))
+DEFAULT_PROBLEM_ID = os.getenv("DEFAULT_PROBLEM_ID", "sliding_window_1")
+# How long (seconds) clients may reuse a problem before revalidating it with its ETag
+PROBLEM_CACHE_MAX_AGE = int(os.getenv("PROBLEM_CACHE_MAX_AGE", "60"))
+
+# Local judge worker pool. It runs untrusted code, so it only starts when explicitly enabled
+JUDGE_ENABLED = os.getenv("JUDGE_ENABLED", "false").lower() == "true"
+# Refuse to start the judge unless workers get a network namespace, a chroot and an unprivileged user
+JUDGE_REQUIRE_ISOLATION = os.getenv("JUDGE_REQUIRE_ISOLATION", "true").lower() == "true"
+JUDGE_WORKERS = int(os.getenv("JUDGE_WORKERS", "2"))
+JUDGE_CPU_SECONDS = float(os.getenv("JUDGE_CPU_SECONDS", "2"))
+JUDGE_MEMORY_MB = int(os.getenv("JUDGE_MEMORY_MB", "256"))
+JUDGE_WALL_SECONDS = float(os.getenv("JUDGE_WALL_SECONDS", "5"))
+
+# Bulk grading: max submissions per batch and how many are analyzed at once
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+# Seed the model prompt with the static complexity estimate
+COMPLEXITY_HINTS = os.getenv("COMPLEXITY_HINTS", "true").lower() == "true"
+
+# Attempt history for the dashboard (SQLite), written in batches off the request path
+ATTEMPTS_DB = os.getenv("ATTEMPTS_DB", "attempts.db")
+ATTEMPTS_FLUSH_INTERVAL = float(os.getenv("ATTEMPTS_FLUSH_INTERVAL", "1"))
+
+# Background analysis jobs (SQLite queue). JOB_WORKERS run inside each API process; set it
+# to 0 and run `python job_worker.py` to process jobs in a separate process instead.
+JOBS_DB = os.getenv("JOBS_DB", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "86400"))
+# How often a job status WebSocket checks for changes
+JOB_WATCH_INTERVAL = float(os.getenv("JOB_WATCH_INTERVAL", "0.25"))
+
+# Live interview sessions (/session WebSocket): open sessions per process, the similarity to the
+# code the model last saw below which a snapshot is re-analyzed, and the minimum seconds between
+# those model calls
+LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS", "5000"))
+LIVE_STRUCTURAL_THRESHOLD = float(os.getenv("LIVE_STRUCTURAL_THRESHOLD", "0.8"))
+LIVE_MODEL_INTERVAL = float(os.getenv("LIVE_MODEL_INTERVAL", "30"))
+
 # Validate environment variables
 @app.on_event("startup")
 async def validate_environment():
@@ -70,32 +302,152 @@ async def validate_environment():
         logger.info("✅ GitHub Models client configured successfully")
     
     # Log environment
-    logger.info(f"Running in {ENVIRONMENT} mode")
+    logger.info("Running in %s mode", ENVIRONMENT)
     
     # Warn if running in production without HTTPS
     if ENVIRONMENT == "production":
         logger.info("🔒 Production mode - ensure HTTPS is configured at reverse proxy level")
         logger.info("   Recommended: Use nginx or similar with SSL/TLS certificates")
 
-# Initialize GitHub Models client
+# GitHub Models client on a pool sized for the upstream concurrency limit. It is
+# built by the warm-up (see warm_up_app), not at import: the openai SDK alone
+# takes about half a second to import.
 client = None
+# Clients for backends on their own endpoint, by backend name; they share the pool
+backend_clients: dict[str, "AsyncOpenAI"] = {}
+http_client = None
+http_pool_settings = PoolSettings.for_concurrency(
+    LLM_MAX_CONCURRENCY,
+    max_connections=LLM_POOL_MAX_CONNECTIONS,
+    max_keepalive=LLM_POOL_MAX_KEEPALIVE,
+    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    http2=LLM_HTTP2,
+    connect_timeout=LLM_CONNECT_TIMEOUT,
+    read_timeout=LLM_ATTEMPT_TIMEOUT
+)
+http_warmup: WarmupResult | None = None
 
-if GITHUB_TOKEN:
+# Startup work done in the background after the app starts (see warm_up_app);
+# GET /ready reports 503 until every phase has finished
+readiness = Readiness(["problems", "parsers", "model_clients", "upstream_connections"])
+# The warm-up's build_model_clients call; analyses arriving before it finishes wait for it
+model_clients_build: asyncio.Task | None = None
+
+def build_model_clients() -> None:
+    """Import the openai SDK and create the model clients, unless a client is already set."""
+    global client, backend_clients, http_client
+    if client is not None:
+        return
+    if not GITHUB_TOKEN:
+        logger.warning("⚠️  Warning: GitHub token not set. Set GITHUB_TOKEN environment variable.")
+        return
     try:
-        client = OpenAI(
+        from openai import AsyncOpenAI
+
+        http_client = build_http_client(http_pool_settings)
+        client = AsyncOpenAI(
             api_key=GITHUB_TOKEN,
-            base_url="https://models.inference.ai.azure.com"
+            base_url=LLM_BASE_URL,
+            http_client=http_client,
+            # Retries are handled by upstream_callers, which also know about the breaker and deadline
+            max_retries=0
         )
+        backend_clients = {
+            backend.name: AsyncOpenAI(
+                api_key=GITHUB_TOKEN, base_url=backend.base_url, http_client=http_client, max_retries=0
+            )
+            for backend in LLM_MODELS if backend.base_url
+        }
         logger.info("✅ GitHub Models client initialized successfully")
     except Exception as e:
-        logger.error(f"⚠️  Failed to initialize GitHub Models client: {e}")
-else:
-    logger.warning("⚠️  Warning: GitHub token not set. Set GITHUB_TOKEN environment variable.")
+        logger.error("⚠️  Failed to initialize GitHub Models client: %s", e)
+
+# Bound concurrent model calls so slow completions never starve cheap routes
+upstream_limiter = UpstreamLimiter(
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    max_queue=LLM_MAX_QUEUE,
+    queue_timeout=LLM_QUEUE_TIMEOUT
+)
+
+# Deadlines, retries, circuit breaker and hedging around every model call.
+# Each backend has its own breaker, so one failing model does not stop calls to the others.
+upstream_callers = {
+    backend.name: ResilientCaller(
+        breaker=CircuitBreaker(failure_threshold=LLM_BREAKER_FAILURES, reset_timeout=LLM_BREAKER_RESET),
+        retry=RetryPolicy(attempts=LLM_RETRY_ATTEMPTS, base_delay=LLM_RETRY_BASE_DELAY),
+        deadline=LLM_DEADLINE,
+        attempt_timeout=LLM_ATTEMPT_TIMEOUT,
+        hedge_percentile=LLM_HEDGE_PERCENTILE,
+        limiter=upstream_limiter
+    )
+    for backend in LLM_MODELS
+}
+
+# Picks the model backend for each call from submission size, topic, detail and backend health,
+# routing around backends whose circuit is open
+model_router = ModelRouter(
+    LLM_MODELS,
+    routes=LLM_ROUTES,
+    small_code_chars=LLM_ROUTE_SMALL_CHARS,
+    available=lambda name: not upstream_callers[name].breaker.is_open
+)
+
+# Concurrent duplicate analyses await a single upstream completion
+analysis_flights = SingleFlight()
+
+# Resubmissions of the same (topic, normalized code) reuse earlier feedback
+feedback_cache = FeedbackCache(
+    max_entries=FEEDBACK_CACHE_SIZE,
+    ttl=FEEDBACK_CACHE_TTL,
+    db_path=FEEDBACK_CACHE_DB or None
+)
+
+# Fingerprints of analyzed submissions, pointing at their feedback cache entries
+near_duplicates = NearDuplicateIndex(
+    threshold=NEAR_DUPLICATE_THRESHOLD,
+    max_entries=NEAR_DUPLICATE_MAX_ENTRIES
+) if NEAR_DUPLICATE_THRESHOLD > 0 else None
+
+# Every analysis is recorded for the dashboard
+attempt_store = AttemptStore(ATTEMPTS_DB, flush_interval=ATTEMPTS_FLUSH_INTERVAL)
+
+# Live interview sessions and their incremental local checks
+live_sessions = LiveSessions(
+    max_sessions=LIVE_MAX_SESSIONS,
+    structural_threshold=LIVE_STRUCTURAL_THRESHOLD,
+    model_interval=LIVE_MODEL_INTERVAL
+)
+
+# Analysis jobs, shared with job_worker.py processes through the database file
+job_queue = JobQueue(JOBS_DB, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS, retention=JOB_RETENTION)
 
 # ============================================================================
 # CONSTANTS
 # ============================================================================
 
+UPSTREAM_BUSY_MESSAGE = "The AI service is busy. Please try again in a few seconds."
+UPSTREAM_UNAVAILABLE_MESSAGE = "The AI service is temporarily unavailable. Please try again shortly."
+UPSTREAM_TIMEOUT_MESSAGE = "The AI service timed out. Please try again with a shorter code snippet."
+FAST_MODE_SKIPPED = "Not analyzed in fast mode. Request a full analysis for this section."
+
+# Sample submission and completion run through the parsers during warm-up (see warm_parsers)
+WARMUP_SOLUTION = """def maxSumSubarray(arr, k):
+    window = best = sum(arr[:k])
+    for i in range(k, len(arr)):
+        window += arr[i] - arr[i - k]
+        best = max(best, window)
+    return best
+"""
+WARMUP_FEEDBACK = """1. **Time Complexity**: O(n), one pass over the array.
+2. **Space Complexity**: O(1) extra space.
+3. **Edge Cases**: k larger than the array.
+4. **Code Quality**: Clear names.
+5. **3-Step Improvement Plan**:
+   1. Validate k
+   2. Add tests
+   3. Document the window invariant
+"""
+
 # Allowed DSA topics for validation
 ALLOWED_TOPICS = [
     'sliding_window', 'two_pointers', 'dynamic_programming',
@@ -107,6 +459,13 @@ ALLOWED_TOPICS = [
 # DATA MODELS WITH VALIDATORS
 # ============================================================================
 
+class JudgeTestCase(BaseModel):
+    """A single judge test case: positional args, optional kwargs and the expected return value."""
+    args: list[Any] = Field(default_factory=list)
+    kwargs: dict[str, Any] = Field(default_factory=dict)
+    expected: Any = None
+    hidden: bool = False
+
 class Problem(BaseModel):
     """Data model for a DSA problem."""
     id: str
@@ -116,11 +475,18 @@ class Problem(BaseModel):
     example: str
     topic: str
     function_signature: str
+    difficulty: str = "medium"
+    # Never sent to clients; used by the local judge
+    test_cases: list[JudgeTestCase] = Field(default_factory=list, exclude=True)
 
-class AnalysisRequest(BaseModel):
-    """Data model for code analysis request with validation."""
+class ProblemPage(BaseModel):
+    """One page of problems from the problem bank."""
+    problems: list[Problem]
+    next_cursor: str | None = None
+
+class CodeSubmission(BaseModel):
+    """Base model for requests carrying user code, with validation."""
     code: str = Field(..., min_length=1, max_length=10000)
-    topic: str = Field(..., min_length=1, max_length=100)
     
     @field_validator('code')
     @classmethod
@@ -137,6 +503,18 @@ class AnalysisRequest(BaseModel):
             raise ValueError('Code is too short - please write a meaningful solution')
         
         return v
+
+class AnalysisRequest(CodeSubmission):
+    """Data model for code analysis request with validation."""
+    topic: str = Field(..., min_length=1, max_length=100)
+    # When set, the submission is also judged against this problem's test cases
+    problem_id: str | None = Field(None, max_length=100)
+    # "fast" answers from static analysis alone, without calling the model
+    mode: Literal["full", "fast"] = "full"
+    # Opaque id chosen by the client; attempts are aggregated per user on the dashboard
+    user_id: str | None = Field(None, max_length=64, pattern=r"^[A-Za-z0-9_-]+$")
+    # "brief" is happy with the fastest model tier, "deep" always gets the strongest one
+    detail: Literal["brief", "standard", "deep"] = "standard"
     
     @field_validator('topic')
     @classmethod
@@ -150,7 +528,7 @@ class AnalysisRequest(BaseModel):
         
         # Validate against allowed topics
         if v not in ALLOWED_TOPICS:
-            logger.warning(f"Topic '{v}' not in standard list, allowing anyway")
+            logger.warning("Topic '%s' not in standard list, allowing anyway", v)
         
         return v
 
@@ -162,26 +540,231 @@ class Feedback(BaseModel):
     code_quality: str
     improvement_plan: list[str]
 
+# response_format for STRUCTURED_OUTPUT; strict mode needs every field required and no extras
+FEEDBACK_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "feedback",
+        "strict": True,
+        "schema": {**Feedback.model_json_schema(), "additionalProperties": False}
+    }
+}
+
+class BatchItem(AnalysisRequest):
+    """One submission in a bulk grading request, tagged with a client-chosen id."""
+    id: str = Field(..., min_length=1, max_length=100)
+
+class BatchAnalysisRequest(BaseModel):
+    """Data model for a bulk grading request."""
+    items: list[BatchItem] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    
+    @field_validator('items')
+    @classmethod
+    def validate_unique_ids(cls, v):
+        """Item ids tag streamed results, so they must be unique."""
+        ids = set()
+        for item in v:
+            if item.id in ids:
+                raise ValueError(f"Duplicate item id '{item.id}'")
+            ids.add(item.id)
+        return v
+
+class JudgeRequest(CodeSubmission):
+    """Data model for a judge-only request."""
+    problem_id: str = Field(..., min_length=1, max_length=100)
+
+class JudgeCaseResult(BaseModel):
+    """Outcome of one judge test case."""
+    index: int
+    passed: bool
+    status: str
+    time_ms: float | None = None
+    error: str | None = None
+    expected: str | None = None
+    actual: str | None = None
+
+class JudgeResult(BaseModel):
+    """Deterministic verdict from running the submission against test cases."""
+    verdict: str
+    passed: int
+    total: int
+    duration_ms: float
+    cases: list[JudgeCaseResult]
+
+class TopicProgress(BaseModel):
+    """Per-topic counters on the dashboard."""
+    topic: str
+    attempts: int
+    judged: int
+    accepted: int
+    acceptance_rate: float | None = None
+    avg_duration_ms: float
+    last_attempt_at: datetime
+
+class DashboardResponse(BaseModel):
+    """Progress summary for one user, or for everyone when user_id is None."""
+    user_id: str | None = None
+    total_attempts: int
+    problems_solved: int
+    readiness: str
+    weak_topics: list[str]
+    topics: list[TopicProgress]
+    last_attempt_at: datetime | None = None
+
 class AnalysisResponse(BaseModel):
     """Data model for analysis endpoint response."""
     success: bool
     feedback: Feedback = None
+    judge: JudgeResult | None = None
     error: str = None
 
+class JobRequest(AnalysisRequest):
+    """Analysis submitted to the background job queue."""
+    # Higher-priority jobs are picked up first
+    priority: int = Field(0, ge=0, le=9)
+
+class JobStatus(BaseModel):
+    """State of a queued analysis job; result is set once it is done, error once it failed."""
+    id: str
+    status: Literal["queued", "running", "done", "failed"]
+    priority: int
+    attempts: int
+    created_at: datetime
+    finished_at: datetime | None = None
+    result: AnalysisResponse | None = None
+    error: str | None = None
+
+class ProfilerSettings(BaseModel):
+    """Sampling profiler switch; a sample_rate of 0 turns it off."""
+    sample_rate: float = Field(..., ge=0, le=1, description="Fraction of requests to profile")
+    interval_ms: float | None = Field(None, ge=1, le=1000, description="Milliseconds between stack samples")
+
 # ============================================================================
-# HARDCODED PROBLEM DATA
+# PROBLEM BANK
 # ============================================================================
 
-HARDCODED_PROBLEM = Problem(
-    id="sliding_window_1",
-    title="Maximum Sum Subarray of Size K",
-    description="Given an array of integers and a number k, find the maximum sum of any contiguous subarray of size k.",
-    constraints="1 <= k <= n, -1000 <= array[i] <= 1000, 1 <= n <= 10^5",
-    example="Input: arr = [2, 1, 5, 1, 3, 2], k = 3\nOutput: 9\nExplanation: The subarray [5, 1, 3] has the maximum sum of 9.",
-    topic="sliding_window",
-    function_signature="def maxSumSubarray(arr, k):\n    \"\"\"\n    Find the maximum sum of a subarray of size k.\n    \n    Args:\n        arr (list[int]): List of integers\n        k (int): Size of the subarray\n    \n    Returns:\n        int: Maximum sum\n    \"\"\"\n    pass"
+# The always-available fallback problem is read from the bundled problem bank file, so its
+# test cases live in one place; it is loaded directly so it survives a broken PROBLEMS_DIR
+BUILTIN_PROBLEM_FILE = Path(__file__).parent / "problems" / "sliding_window.json"
+HARDCODED_PROBLEM = Problem.model_validate(json.loads(BUILTIN_PROBLEM_FILE.read_text(encoding="utf-8"))[0])
+
+# Problems loaded from PROBLEMS_DIR by the warm-up; the hardcoded problem is always available
+problem_store = ProblemStore(
+    PROBLEMS_DIR,
+    parse=Problem.model_validate,
+    topics=ALLOWED_TOPICS,
+    builtin=[HARDCODED_PROBLEM],
+    # Encoded once per reload; the problem endpoints serve these bytes as-is
+    serialize=dumps
 )
 
+@app.on_event("startup")
+async def start_problem_watcher():
+    """Hot-reload the problem bank when files in PROBLEMS_DIR change."""
+    if PROBLEMS_RELOAD_INTERVAL > 0:
+        app.state.problem_watcher = asyncio.create_task(problem_store.watch(PROBLEMS_RELOAD_INTERVAL))
+
+# Pre-forked, resource-limited workers that run submissions against test cases
+judge_pool = JudgePool(
+    workers=JUDGE_WORKERS,
+    cpu_seconds=JUDGE_CPU_SECONDS,
+    memory_mb=JUDGE_MEMORY_MB,
+    wall_seconds=JUDGE_WALL_SECONDS,
+    require_isolation=JUDGE_REQUIRE_ISOLATION
+) if JUDGE_ENABLED and JUDGE_WORKERS > 0 else None
+
+@app.on_event("startup")
+async def start_judge_pool():
+    """Fork judge workers up front so no submission pays process startup."""
+    if judge_pool is not None:
+        await judge_pool.start()
+
+@app.on_event("shutdown")
+async def stop_judge_pool():
+    """Terminate judge workers."""
+    if judge_pool is not None:
+        await judge_pool.close()
+
+@app.on_event("startup")
+async def start_warmup():
+    """Warm up in the background, so the process answers liveness checks at once; /ready waits for it."""
+    app.state.warmup = asyncio.create_task(warm_up_app())
+
+@app.on_event("shutdown")
+async def stop_warmup():
+    """Report not ready while shutting down and stop a warm-up still in progress."""
+    readiness.drain()
+    warmup = getattr(app.state, "warmup", None)
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+
+async def warm_upstream_connections():
+    """Open model API connections before serving, so early requests skip TCP/TLS setup."""
+    global http_warmup
+    if http_client is None or LLM_WARMUP_CONNECTIONS <= 0:
+        return
+    urls = [LLM_BASE_URL, *(backend.base_url for backend in LLM_MODELS if backend.base_url)]
+    http_warmup = await warm_up(http_client, urls, LLM_WARMUP_CONNECTIONS, LLM_WARMUP_TIMEOUT)
+    logger.info(
+        "Warmed %d/%d upstream connections in %.0fms",
+        http_warmup.established, http_warmup.requested, http_warmup.duration_ms
+    )
+
+@app.on_event("shutdown")
+async def close_upstream_connections():
+    """Close pooled model API connections."""
+    if http_client is not None:
+        await http_client.aclose()
+
+@app.on_event("startup")
+async def start_rate_limit_sync():
+    """Settle rate-limit spending with a shared store in the background."""
+    if isinstance(limiter.store, SharedTokenBuckets):
+        await limiter.store.start()
+
+@app.on_event("shutdown")
+async def stop_rate_limit_sync():
+    """Settle rate-limit spending not yet synced before exiting."""
+    if isinstance(limiter.store, SharedTokenBuckets):
+        await limiter.store.close()
+
+@app.on_event("startup")
+async def start_feedback_cache_writer():
+    """Write cached feedback to the persistent tier in the background."""
+    await feedback_cache.start()
+
+@app.on_event("shutdown")
+async def stop_feedback_cache_writer():
+    """Store cached feedback still pending before exiting."""
+    await feedback_cache.close()
+
+@app.on_event("startup")
+async def start_attempt_writer():
+    """Write recorded attempts to the database in the background."""
+    await attempt_store.start()
+
+@app.on_event("shutdown")
+async def stop_attempt_writer():
+    """Write attempts still pending before exiting."""
+    await attempt_store.close()
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Process queued analysis jobs in this process unless a separate worker does."""
+    if job_workers is not None:
+        job_workers.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    """Stop taking jobs; unfinished ones are retried once their lease expires."""
+    if job_workers is not None:
+        await job_workers.stop()
+
+@app.on_event("shutdown")
+async def stop_profiler():
+    """Stop the sampling thread if the profiler was switched on."""
+    profiler.stop()
+
 # ============================================================================
 # ROUTES
 # ============================================================================
@@ -190,195 +773,1267 @@ HARDCODED_PROBLEM = Problem(
 async def health_check():
     """Health check endpoint with detailed status."""
     logger.info("Health check requested")
+    # Store stats take the stores' locks (job counts are a SQLite query), so keep them off the event loop
+    attempts, jobs = await asyncio.gather(
+        asyncio.to_thread(attempt_store.stats),
+        asyncio.to_thread(job_queue.stats)
+    )
     return {
         "status": "ok",
         "message": "interview-flow-AI2026 API is running",
         "version": "0.1.0",
         "ai_configured": client is not None,
+        "upstream": upstream_limiter.stats(),
+        "circuit_breaker": {name: caller.stats() for name, caller in upstream_callers.items()},
+        "model_router": model_router.stats(),
+        "tracing": tracer.stats(),
+        "http_pool": {
+            **http_pool_settings._asdict(),
+            "warmup": http_warmup._asdict() if http_warmup else None,
+        },
+        "feedback_cache": feedback_cache.stats(),
+        "near_duplicates": near_duplicates.stats() if near_duplicates is not None else None,
+        "coalescing": analysis_flights.stats(),
+        "problem_bank": problem_store.stats(),
+        "judge": judge_pool.stats() if judge_pool is not None else None,
+        "attempts": attempts,
+        "live_sessions": live_sessions.stats(),
+        "jobs": {
+            **jobs,
+            "workers": job_workers.stats() if job_workers is not None else None,
+        },
         "timestamp": datetime.now().isoformat()
     }
 
-# Cache for problem endpoint (simple in-memory cache)
-@lru_cache(maxsize=1)
-def get_cached_problem():
-    """Get cached problem to reduce processing time."""
-    logger.info("Fetching problem (cached)")
-    return HARDCODED_PROBLEM
+@app.get("/ready", tags=["health"])
+async def readiness_check():
+    """
+    Readiness probe: 200 once the startup warm-up has finished, 503 before and while shutting down.
+    
+    Unlike GET /, which only says the process is alive, this tells a load
+    balancer whether requests will be served without warm-up delays.
+    """
+    return json_response(readiness.stats(), status_code=200 if readiness.ready else 503)
+
+def normalize_topic_filter(topic: str | None) -> str | None:
+    """Validate an optional topic query parameter against ALLOWED_TOPICS."""
+    if topic is None:
+        return None
+    topic = topic.strip().lower()
+    if topic not in ALLOWED_TOPICS:
+        raise HTTPException(status_code=400, detail=f"Unknown topic '{topic}'")
+    return topic
+
+metrics.gauge(
+    "upstream_in_flight", "Model calls currently running",
+    lambda: {(): upstream_limiter.in_flight}
+)
+metrics.gauge(
+    "upstream_queue_depth", "Requests waiting for a model call slot",
+    lambda: {(): upstream_limiter.queue_depth}
+)
+metrics.gauge(
+    "upstream_circuit_open", "1 while a backend's circuit breaker rejects calls",
+    lambda: {(name,): int(caller.breaker.is_open) for name, caller in upstream_callers.items()},
+    labels=("model",)
+)
+metrics.gauge(
+    "feedback_cache_entries", "Feedback entries held in memory",
+    lambda: {(): feedback_cache.stats()["entries"]}
+)
+
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+async def metrics_endpoint():
+    """Expose request, upstream and parser metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+def require_admin(authorization: str | None = Header(None)) -> None:
+    """Allow only requests with `Authorization: Bearer <ADMIN_TOKEN>`; without ADMIN_TOKEN the admin routes are hidden."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/admin/profiler", tags=["admin"], dependencies=[Depends(require_admin)])
+async def get_profiler():
+    """Sampling profiler state and sample counts."""
+    return profiler.stats()
+
+@app.put("/admin/profiler", tags=["admin"], dependencies=[Depends(require_admin)])
+async def configure_profiler(settings: ProfilerSettings):
+    """
+    Switch the sampling profiler on for a fraction of requests, or off with sample_rate 0.
+    
+    Takes effect immediately in this worker process; samples collected so far are kept.
+    """
+    interval = settings.interval_ms / 1000 if settings.interval_ms is not None else None
+    profiler.configure(settings.sample_rate, interval)
+    logger.warning("Sampling profiler set to %.1f%% of requests", settings.sample_rate * 100)
+    return profiler.stats()
+
+@app.get("/admin/profiler/flamegraph", tags=["admin"], dependencies=[Depends(require_admin)])
+async def get_flamegraph(reset: bool = False):
+    """
+    Samples collected so far as folded stacks, one "route;frame;... count" line each.
+    
+    Feed the text to flamegraph.pl, speedscope or inferno to draw the flame
+    graph. With reset=true the samples are cleared after being returned.
+    """
+    folded = profiler.folded()
+    if reset:
+        profiler.reset()
+    return PlainTextResponse(folded)
 
 @app.get("/problem", response_model=Problem, tags=["problems"])
 @limiter.limit("30/minute")  # Rate limit: 30 requests per minute
-async def get_problem(request: Request):
+async def get_problem(
+    request: Request,
+    topic: str | None = Query(None, max_length=100),
+    difficulty: str | None = Query(None, max_length=20)
+):
     """
     Get a DSA problem.
-    Currently returns a hardcoded Sliding Window problem.
-    Response is cached for performance.
+    Without filters, returns the default problem. With a topic and/or
+    difficulty, returns a random matching problem from the problem bank.
+    Responses carry an ETag; a matching If-None-Match gets an empty 304.
     """
     logger.info("GET /problem - Problem requested")
+    topic = normalize_topic_filter(topic)
     try:
-        problem = get_cached_problem()
-        logger.info(f"Returning problem: {problem.id}")
-        return problem
+        if topic is None and difficulty is None:
+            problem = problem_store.get(DEFAULT_PROBLEM_ID) or HARDCODED_PROBLEM
+        else:
+            problem = problem_store.random(topic=topic, difficulty=difficulty)
     except Exception as e:
-        logger.error(f"Error fetching problem: {str(e)}")
+        logger.error("Error fetching problem: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to fetch problem. Please try again later."
         )
+    
+    if problem is None:
+        raise HTTPException(status_code=404, detail="No problem matches the requested filters")
+    logger.info("Returning problem: %s", problem.id)
+    # A filtered request may pick a different problem next time, so clients must revalidate it
+    return problem_response(request, problem, reusable=topic is None and difficulty is None)
+
+@app.get("/problem/{problem_id}", response_model=Problem, tags=["problems"])
+@limiter.limit("30/minute")
+async def get_problem_by_id(problem_id: str, request: Request):
+    """Get a specific problem from the problem bank by id, with an ETag for conditional requests."""
+    problem = problem_store.get(problem_id)
+    if problem is None:
+        raise HTTPException(status_code=404, detail=f"Problem '{problem_id}' not found")
+    return problem_response(request, problem)
+
+@app.get("/problems", response_model=ProblemPage, tags=["problems"])
+@limiter.limit("30/minute")
+async def list_problems(
+    request: Request,
+    topic: str | None = Query(None, max_length=100),
+    difficulty: str | None = Query(None, max_length=20),
+    cursor: str | None = Query(None, max_length=512),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """
+    List problems in id order with cursor pagination.
+    Pass the returned next_cursor to fetch the following page.
+    """
+    topic = normalize_topic_filter(topic)
+    try:
+        problems, next_cursor = problem_store.page(
+            topic=topic,
+            difficulty=difficulty,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Splice the pre-encoded problems into the page instead of serializing them again
+    body = b"".join((
+        b'{"problems":[',
+        b",".join(problem_payload(problem).body for problem in problems),
+        b'],"next_cursor":',
+        dumps(next_cursor),
+        b"}"
+    ))
+    return cached_json_response(request, body, etag_for(body), problem_cache_control())
+
+@app.post("/judge", response_model=JudgeResult, tags=["analysis"])
+@limiter.limit("60/minute")  # Local execution is cheap compared with a model call
+async def judge_code(data: JudgeRequest, request: Request):
+    """
+    Run submitted code against a problem's test cases in the local judge.
+    
+    Args:
+        data: JudgeRequest with validated code and the problem id
+        request: FastAPI Request object for rate limiting
+    
+    Returns:
+        JudgeResult with the overall verdict and pass/fail per case
+    """
+    logger.info("POST /judge - Judging submission for problem %s", data.problem_id)
+    if judge_pool is None:
+        raise HTTPException(status_code=503, detail="The local judge is disabled on this server.")
+    
+    problem = problem_store.get(data.problem_id)
+    if problem is None:
+        raise HTTPException(status_code=404, detail=f"Problem '{data.problem_id}' not found")
+    if not problem.test_cases:
+        raise HTTPException(status_code=400, detail=f"Problem '{data.problem_id}' has no test cases")
+    
+    result = await judge_submission(problem, data.code)
+    if result is None:
+        raise HTTPException(status_code=500, detail="Failed to judge submission. Please try again later.")
+    return result
 
 @app.post("/analyze", response_model=AnalysisResponse, tags=["analysis"])
-@limiter.limit("10/minute")  # Rate limit: 10 analysis requests per minute
+@limiter.limit(analysis_limit)  # 10 analysis requests per minute per IP, or the API key's quota
 async def analyze_code(data: AnalysisRequest, request: Request):
     """
     Analyze user's code and provide AI-generated feedback.
+    Identical resubmissions (ignoring comments, docstrings and formatting) are served from cache,
+    and so are near-duplicates of an analyzed submission on the same topic (X-Cache: SIMILAR).
     
     Args:
         data: AnalysisRequest with validated code and topic
         request: FastAPI Request object for logging
     
     Returns:
-        AnalysisResponse with feedback from GitHub Models API
+        AnalysisResponse with feedback from GitHub Models API, with an X-Cache
+        header (HIT, SIMILAR or MISS) unless the static fast mode was used
     """
+    started = time.perf_counter()
     client_ip = request.client.host if request.client else "unknown"
-    logger.info(f"POST /analyze - Code analysis requested from {client_ip}")
-    logger.info(f"Topic: {data.topic}, Code length: {len(data.code)} chars")
+    logger.info("POST /analyze - Code analysis requested from %s", client_ip)
+    logger.info("Topic: %s, Code length: %d chars", data.topic, len(data.code))
+    
+    # Judge test cases locally while the model works
+    judge_task = start_judge_task(data)
+    
+    if data.mode == "fast":
+        result = AnalysisResponse(
+            success=True,
+            feedback=static_feedback(data.code),
+            judge=await judge_task if judge_task else None
+        )
+        record_attempt(data, result, started)
+        return json_response(result)
+    
+    # Serve repeated and near-duplicate submissions from cache
+    with span("cache_lookup") as lookup:
+        key = cache_key(data.topic, data.code)
+        cached, cache_status = await cached_feedback(data.topic, data.code, key)
+        lookup.set(cache=cache_status)
+    if cached is not None:
+        logger.info("Returning cached feedback (%s)", cache_status)
+        result = AnalysisResponse(
+            success=True,
+            feedback=Feedback(**cached),
+            judge=await judge_task if judge_task else None
+        )
+        record_attempt(data, result, started, cached=True)
+        return json_response(result, headers={"X-Cache": cache_status})
     
     # Check if GitHub Models is configured
-    if not client:
+    if not await model_configured():
         logger.error("Analysis requested but GitHub Models client not configured")
+        if judge_task:
+            judge_task.cancel()
         raise HTTPException(
             status_code=503,
             detail="AI service is not configured. Please contact the administrator or set GITHUB_TOKEN environment variable."
         )
     
     try:
-        # Build prompt
-        prompt = DSA_FEEDBACK_PROMPT.format(
-            topic=data.topic,
-            code=data.code
-        )
-        
-        logger.info("Calling GitHub Models API for code analysis")
-        
-        # Call GitHub Models API
-        response = client.chat.completions.create(
-            model="gpt-4o",  # GitHub Models provides GPT-4o
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert DSA interview coach. Provide clear, actionable feedback."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=1000
+        # Identical submissions already in flight share one upstream call
+        feedback = await analysis_flights.do(
+            key, lambda: request_feedback(data.topic, data.code, key, "analyze", data.detail)
         )
         
-        feedback_text = response.choices[0].message.content
-        logger.info(f"Received feedback from AI (length: {len(feedback_text)} chars)")
-        
-        # Parse feedback into structured format
-        feedback = parse_feedback(feedback_text)
-        
         logger.info("Successfully analyzed code and generated feedback")
         
-        return AnalysisResponse(
+        result = AnalysisResponse(
             success=True,
-            feedback=feedback
+            feedback=feedback,
+            judge=await judge_task if judge_task else None
         )
+        record_attempt(data, result, started)
+        return json_response(result, headers={"X-Cache": "MISS"})
     
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except UpstreamBusyError as e:
+        logger.warning("Rejecting analysis, upstream saturated: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail=UPSTREAM_BUSY_MESSAGE,
+            headers={"Retry-After": "5"}
+        )
+    except UpstreamUnavailableError as e:
+        logger.warning("Rejecting analysis, upstream circuit open: %s", e)
+        raise upstream_http_error(e)
     except Exception as e:
         # Log detailed error and return user-friendly message
-        logger.error(f"Error analyzing code: {type(e).__name__}: {str(e)}", exc_info=True)
-        
-        # Provide specific error messages based on error type
-        if "timeout" in str(e).lower():
-            error_msg = "The AI service timed out. Please try again with a shorter code snippet."
-        elif "rate" in str(e).lower() or "quota" in str(e).lower():
-            error_msg = "Too many requests. Please wait a moment and try again."
-        elif "authentication" in str(e).lower() or "unauthorized" in str(e).lower():
-            error_msg = "AI service authentication failed. Please contact the administrator."
-        else:
-            error_msg = f"Failed to analyze code: {str(e)}"
-        
+        logger.error("Error analyzing code: %s: %s", type(e).__name__, e, exc_info=True)
+        raise upstream_http_error(e)
+    finally:
+        if judge_task and not judge_task.done():
+            judge_task.cancel()
+
+@app.post("/analyze/stream", tags=["analysis"])
+@limiter.limit(analysis_limit)  # Shares the /analyze budget per client
+async def analyze_code_stream(data: AnalysisRequest, request: Request):
+    """
+    Stream AI feedback over Server-Sent Events.
+    
+    Events:
+        token: {"text": ...} for each chunk of model output
+        section: {"field": ..., "value": ...} as soon as a Feedback section is complete
+        judge: the JudgeResult, as soon as it is ready (only when problem_id is set)
+        done: the final AnalysisResponse
+        error: {"detail": ...} if the analysis fails mid-stream
+    
+    Args:
+        data: AnalysisRequest with validated code and topic
+        request: FastAPI Request object for logging
+    
+    Returns:
+        StreamingResponse with media type text/event-stream
+    """
+    started = time.perf_counter()
+    client_ip = request.client.host if request.client else "unknown"
+    logger.info("POST /analyze/stream - Streaming analysis requested from %s", client_ip)
+    
+    fast = data.mode == "fast"
+    key = cache_key(data.topic, data.code)
+    if fast:
+        cached, cache_status = static_feedback(data.code).model_dump(), "MISS"
+    else:
+        cached, cache_status = await cached_feedback(data.topic, data.code, key)
+    judge_task = None
+    
+    if cached is None:
+        if not await model_configured():
+            logger.error("Streaming analysis requested but GitHub Models client not configured")
+            raise HTTPException(
+                status_code=503,
+                detail="AI service is not configured. Please contact the administrator or set GITHUB_TOKEN environment variable."
+            )
+        if upstream_limiter.saturated:
+            raise HTTPException(
+                status_code=503,
+                detail=UPSTREAM_BUSY_MESSAGE,
+                headers={"Retry-After": "5"}
+            )
+        # The router avoids open circuits, so this one is open only if every usable backend's is
+        backend = model_router.choose("stream", len(data.code), data.topic, data.detail)
+        breaker = upstream_callers[backend.name].breaker
+        if breaker.is_open:
+            raise upstream_http_error(UpstreamUnavailableError(breaker.retry_after()))
+    
+    judge_task = start_judge_task(data)
+    
+    async def judge_events():
+        result = await judge_task if judge_task else None
+        if result is not None:
+            yield sse_event("judge", result.model_dump())
+    
+    async def cached_events():
+        judge = None
+        async for event in judge_events():
+            judge = judge_task.result()
+            yield event
+        for field, value in cached.items():
+            yield sse_event("section", {"field": field, "value": value})
+        result = AnalysisResponse(success=True, feedback=Feedback(**cached), judge=judge)
+        record_attempt(data, result, started, cached=not fast)
+        yield sse_event("done", result.model_dump())
+    
+    async def model_events():
+        parser = IncrementalFeedbackParser()
+        judge_sent = judge_task is None
+        try:
+            plan = plan_prompt(data.topic, data.code)
+            async with upstream_limiter:
+                call_started = time.perf_counter()
+                outcome, usage, error = "error", None, None
+                try:
+                    # The deadline and breaker cover the whole stream; only opening it is retried
+                    stream = upstream_callers[backend.name].stream(lambda: backend_client(backend).chat.completions.create(
+                        model=backend.model,
+                        messages=plan.messages,
+                        temperature=LLM_TEMPERATURE,
+                        max_tokens=plan.max_tokens,
+                        stream=True,
+                        # The final chunk then reports token usage
+                        stream_options={"include_usage": True}
+                    ))
+                    async for chunk in stream:
+                        usage = getattr(chunk, "usage", None) or usage
+                        text = chunk.choices[0].delta.content if chunk.choices else None
+                        if not text:
+                            continue
+                        if not judge_sent and judge_task.done():
+                            judge_sent = True
+                            async for event in judge_events():
+                                yield event
+                        yield sse_event("token", {"text": text})
+                        for field, value in parser.feed(text):
+                            yield sse_event("section", {"field": field, "value": value})
+                    outcome = "ok"
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    record_upstream_call(backend, call_started, outcome, usage, plan, error)
+            
+            for field, value in parser.finish():
+                yield sse_event("section", {"field": field, "value": value})
+            if not judge_sent:
+                async for event in judge_events():
+                    yield event
+            
+            feedback = parse_feedback(parser.text)
+            feedback_cache.set(key, feedback.model_dump())
+            remember_submission(data.topic, data.code, key)
+            logger.info("Streamed feedback from AI (length: %d chars)", len(parser.text))
+            judge = judge_task.result() if judge_task else None
+            result = AnalysisResponse(success=True, feedback=feedback, judge=judge)
+            record_attempt(data, result, started)
+            yield sse_event("done", result.model_dump())
+        except UpstreamBusyError as e:
+            logger.warning("Rejecting streaming analysis, upstream saturated: %s", e)
+            yield sse_event("error", {"detail": UPSTREAM_BUSY_MESSAGE})
+        except Exception as e:
+            logger.error("Error streaming analysis: %s: %s", type(e).__name__, e, exc_info=True)
+            yield sse_event("error", {"detail": friendly_error_message(e)})
+        finally:
+            if judge_task and not judge_task.done():
+                judge_task.cancel()
+    
+    return StreamingResponse(
+        cached_events() if cached is not None else model_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Cache": cache_status
+        }
+    )
+
+@app.post("/analyze/batch", tags=["analysis"])
+@limiter.limit("5/minute")  # Each batch may fan out to many model calls
+async def analyze_batch(data: BatchAnalysisRequest, request: Request):
+    """
+    Grade many submissions at once, streaming results as NDJSON.
+    
+    Identical submissions (same topic, mode, problem and normalized code) are
+    analyzed once, and each unique submission is charged to the client's
+    analysis quota (the batch is refused with 429 if the quota cannot cover
+    it). At most BATCH_CONCURRENCY unique submissions are analyzed at
+    a time, and each result line is written as soon as it is ready, so lines
+    arrive in completion order rather than request order. A failed item is
+    reported on its own line with success=false and does not fail the batch.
+    
+    Args:
+        data: BatchAnalysisRequest with uniquely tagged submissions
+        request: FastAPI Request object for logging
+    
+    Returns:
+        StreamingResponse of application/x-ndjson, one AnalysisResponse plus "id" per item
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    
+    started = time.perf_counter()
+    
+    # Normalizing code is CPU-bound, so large batches are grouped off the event loop
+    groups = await asyncio.to_thread(group_batch_items, data.items)
+    logger.info(
+        "POST /analyze/batch - %d submissions (%d unique) from %s", len(data.items), len(groups), client_ip
+    )
+    if not take_analysis_quota(client_key(request), "batch", cost=len(groups)):
+        rate_limit_rejections.inc("/analyze/batch")
         raise HTTPException(
-            status_code=500,
-            detail=error_msg
+            status_code=429,
+            detail=f"This batch needs {len(groups)} analyses, more than your analysis rate limit allows right now."
+        )
+    
+    async def grade(group: tuple) -> AnalysisResponse:
+        return await analyze_submission(groups[group][0], "batch")
+    
+    async def results():
+        failed = 0
+        async for group, result, error in map_unordered(grade, list(groups), BATCH_CONCURRENCY):
+            if error is not None:
+                failed += len(groups[group])
+                logger.error("Batch item failed: %s: %s", type(error).__name__, error)
+                result = AnalysisResponse(success=False, error=batch_error_message(error))
+            payload = result.model_dump(mode="json")
+            for item in groups[group]:
+                if error is None:
+                    record_attempt(item, result, started)
+                yield dumps({"id": item.id, **payload}) + b"\n"
+        logger.info("Batch complete: %d/%d succeeded", len(data.items) - failed, len(data.items))
+    
+    return StreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Unique": str(len(groups))}
+    )
+
+@app.post("/jobs", response_model=JobStatus, status_code=202, tags=["analysis"])
+@limiter.limit(analysis_limit)  # Shares the /analyze budget per client
+async def submit_job(
+    data: JobRequest,
+    request: Request,
+    idempotency_key: str | None = Header(None, max_length=128)
+):
+    """
+    Queue an analysis and return at once; the result is fetched from /jobs/{id}.
+    
+    Jobs persist in SQLite and are run by the job workers, highest priority
+    first, with transient model failures retried. Sending the same
+    Idempotency-Key again (e.g. a client retry after a dropped response)
+    returns the existing job instead of queueing the work twice.
+    
+    Args:
+        data: JobRequest with the submission and an optional priority
+        request: FastAPI Request object for rate limiting
+        idempotency_key: Client-chosen key, unique per submission
+    
+    Returns:
+        JobStatus with 202 for a new job, or 200 with the existing job for a
+        repeated Idempotency-Key; 409 if that key was used for different data
+    """
+    if idempotency_key is not None:
+        idempotency_key = scoped_idempotency_key(data.user_id or client_key(request), idempotency_key)
+    payload = data.model_dump(exclude={"priority"})
+    try:
+        job, created = await asyncio.to_thread(job_queue.submit, payload, data.priority, idempotency_key)
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if created:
+        logger.info("POST /jobs - queued job %s (topic %s, priority %d)", job.id, data.topic, data.priority)
+        if job_workers is not None:
+            job_workers.notify()
+    return json_response(
+        job_status(job),
+        status_code=202 if created else 200,
+        headers={"Location": f"/jobs/{job.id}"}
+    )
+
+@app.get("/jobs/{job_id}", response_model=JobStatus, tags=["analysis"])
+@limiter.limit("120/minute")  # Clients poll this while a job runs
+async def get_job(job_id: str, request: Request):
+    """Current state of a job, including its result once done."""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return json_response(job_status(job))
+
+@app.websocket("/jobs/{job_id}/ws")
+async def watch_job(websocket: WebSocket, job_id: str):
+    """
+    Push a job's JobStatus whenever its status changes, closing once it finished.
+    
+    Saves clients from polling /jobs/{id}; an unknown job closes with code 4404.
+    """
+    await websocket.accept()
+    last_status = None
+    try:
+        while True:
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            if job is None:
+                await websocket.close(code=4404, reason="Job not found")
+                return
+            if job.status != last_status:
+                last_status = job.status
+                await websocket.send_text(dumps(job_status(job)).decode())
+            if job.status in FINISHED:
+                await websocket.close()
+                return
+            await asyncio.sleep(JOB_WATCH_INTERVAL)
+    except WebSocketDisconnect:
+        logger.info("Job watcher for %s disconnected", job_id)
+
+@app.websocket("/session")
+async def live_interview_session(
+    websocket: WebSocket,
+    topic: str = Query(..., min_length=1, max_length=100),
+    problem_id: str | None = Query(None, max_length=100),
+    user_id: str | None = Query(None, max_length=64, pattern=r"^[A-Za-z0-9_-]+$")
+):
+    """
+    Live interview session: local checks while the candidate types, model feedback on submit.
+    
+    The client sends JSON messages {"type": "snapshot" | "submit", "code": ...},
+    snapshots debounced as the candidate types. Each snapshot is answered with
+    a "checks" message (syntax, static complexity per function, which
+    functions changed) and, when a function changed and problem_id has test
+    cases, a "judge" message. The model is only called for a "submit", or
+    in the background when the code changed structurally since the model last
+    saw it; both are answered with a "feedback" message. Each of those model
+    calls is charged to the client's analysis quota (per IP or API key), and
+    calls over the quota are answered with an "error" instead. Problems, such
+    as frames that are not JSON, are reported as "error" messages without
+    closing the session.
+    
+    Closes with code 1013 when LIVE_MAX_SESSIONS sessions are already open.
+    """
+    await websocket.accept()
+    session = live_sessions.open(topic.strip().lower(), problem_id, user_id)
+    if session is None:
+        await websocket.close(code=1013, reason="Too many live sessions, try again later")
+        return
+    problem = problem_store.get(problem_id) if problem_id else None
+    quota_key = client_key(websocket)
+    feedback_task: asyncio.Task | None = None
+    
+    async def start_feedback(code: str, reason: str) -> asyncio.Task | None:
+        if not take_analysis_quota(quota_key, "live_session"):
+            rate_limit_rejections.inc("/session")
+            await websocket.send_json({"type": "error", "reason": reason, "detail": RATE_LIMITED_MESSAGE})
+            return None
+        return asyncio.create_task(send_live_feedback(websocket, session, code, reason))
+    
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except (ValueError, KeyError):  # Not JSON, or a binary frame
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON text"})
+                continue
+            kind = message.get("type") if isinstance(message, dict) else None
+            if kind not in ("snapshot", "submit"):
+                await websocket.send_json({"type": "error", "detail": "Message type must be snapshot or submit"})
+                continue
+            try:
+                code = CodeSubmission(code=message.get("code")).code
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "detail": e.errors()[0]["msg"]})
+                continue
+            
+            if kind == "submit":
+                # One model call per session at a time; a submit supersedes background feedback
+                if feedback_task is not None and not feedback_task.done():
+                    feedback_task.cancel()
+                feedback_task = await start_feedback(code, "submit")
+                continue
+            
+            snapshot = live_sessions.snapshot(session, code)
+            await websocket.send_text(dumps(live_checks(snapshot)).decode())
+            if snapshot.structural and (feedback_task is None or feedback_task.done()):
+                feedback_task = await start_feedback(code, "structural_change")
+            if snapshot.rejudge and problem is not None and problem.test_cases:
+                judge = await judge_submission(problem, code)
+                if judge is not None:
+                    await websocket.send_text(dumps({"type": "judge", **judge.model_dump(mode="json")}).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if feedback_task is not None and not feedback_task.done():
+            feedback_task.cancel()
+        live_sessions.close(session)
+
+@app.get("/dashboard", response_model=DashboardResponse, tags=["progress"])
+@limiter.limit("30/minute")
+async def get_dashboard(
+    request: Request,
+    user_id: str | None = Query(None, max_length=64, pattern=r"^[A-Za-z0-9_-]+$")
+):
+    """
+    Progress summary built from recorded attempts.
+    
+    Reads the incrementally maintained aggregates, so the cost does not grow
+    with the number of attempts. Attempts are written in batches, so the
+    newest ones may take up to ATTEMPTS_FLUSH_INTERVAL seconds to appear.
+    
+    Args:
+        request: FastAPI Request object for rate limiting
+        user_id: Client-chosen user id; omit for totals across all users
+    
+    Returns:
+        DashboardResponse with totals, per-topic counters and weak topics
+    """
+    summary = await asyncio.to_thread(attempt_store.summary, user_id)
+    topics = [
+        TopicProgress(
+            **topic,
+            acceptance_rate=topic["accepted"] / topic["judged"] if topic["judged"] else None
         )
+        for topic in summary["topics"]
+    ]
+    return DashboardResponse(
+        user_id=user_id,
+        total_attempts=summary["attempts"],
+        problems_solved=summary["solved"],
+        readiness=readiness_level(summary["solved"]),
+        weak_topics=weak_topics(topics),
+        topics=topics,
+        last_attempt_at=summary["last_attempt_at"]
+    )
 
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def parse_feedback(feedback_text: str) -> Feedback:
+def record_attempt(data: AnalysisRequest, result: AnalysisResponse, started: float, cached: bool = False) -> None:
+    """Queue a completed analysis for the attempt history (written in the background)."""
+    attempt_store.record(
+        data.user_id,
+        data.topic,
+        data.code,
+        problem_id=data.problem_id,
+        mode=data.mode,
+        cached=cached,
+        verdict=result.judge.verdict if result.judge else None,
+        feedback=result.feedback.model_dump() if result.feedback else None,
+        duration_ms=(time.perf_counter() - started) * 1000
+    )
+
+def readiness_level(solved: int) -> str:
+    """Coarse readiness label shown on the dashboard."""
+    if solved >= 20:
+        return "Interview Ready"
+    if solved >= 5:
+        return "Intermediate"
+    return "Beginner"
+
+def weak_topics(topics: list[TopicProgress], limit: int = 3) -> list[str]:
+    """Judged topics with the lowest acceptance rate, below 50%."""
+    weak = [t for t in topics if t.acceptance_rate is not None and t.acceptance_rate < 0.5]
+    weak.sort(key=lambda t: (t.acceptance_rate, -t.attempts))
+    return [t.topic for t in weak[:limit]]
+
+def parse_feedback(feedback_text: str, structured: bool = False) -> Feedback:
     """
     Parse AI-generated feedback text into structured Feedback model.
     
     Args:
         feedback_text: Raw feedback text from Azure OpenAI
+        structured: The model was asked for JSON (STRUCTURED_OUTPUT); decode that
+            first and use the text parser only if it does not match the schema
+    
+    Returns:
+        Feedback: Structured feedback object
+    """
+    started = time.perf_counter()
+    feedback = decode_structured_feedback(feedback_text) if structured else None
+    if feedback is None:
+        sections = parse_sections(feedback_text)
+        for field in fallback_fields(sections):
+            parse_fallbacks.inc(field)
+        feedback = Feedback(**sections)
+    parse_latency.observe(time.perf_counter() - started)
+    parse_count.inc()
+    return feedback
+
+def decode_structured_feedback(feedback_text: str) -> Feedback | None:
+    """Validate a JSON completion against Feedback in one pass, or return None and count a fallback."""
+    try:
+        feedback = Feedback.model_validate_json(strip_code_fence(feedback_text))
+    except ValidationError as e:
+        structured_decodes.inc("fallback")
+        logger.warning(
+            "Structured feedback did not match the schema (%d errors); using the text parser", e.error_count()
+        )
+        return None
+    structured_decodes.inc("ok")
+    return feedback
+
+def record_upstream_call(backend: Backend, started: float, outcome: str, usage: Any = None,
+                         plan: PromptPlan | None = None, error: Exception | None = None) -> None:
+    """
+    Record model call latency and, when the API reports it, token usage against the local estimate.
+    
+    The outcome also feeds the router's EWMAs for the backend, except for
+    errors that say nothing about its health (e.g. a 400, the client going
+    away mid-stream, or the breaker rejecting the call without trying it).
+    """
+    latency = time.perf_counter() - started
+    upstream_latency.observe(latency, backend.name, outcome)
+    if outcome == "ok" or (error is not None and not isinstance(error, UpstreamUnavailableError)
+                           and is_upstream_failure(error)):
+        model_router.record(backend, latency, ok=outcome == "ok")
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    upstream_tokens.inc(backend.name, "prompt", amount=prompt_tokens)
+    upstream_tokens.inc(backend.name, "completion", amount=completion_tokens)
+    if plan is not None:
+        logger.info(
+            "Token usage: prompt %d (estimated %d), completion %d (max_tokens %d)",
+            prompt_tokens, plan.estimated_tokens, completion_tokens, plan.max_tokens,
+            extra={
+                "prompt_tokens": prompt_tokens,
+                "estimated_prompt_tokens": plan.estimated_tokens,
+                "completion_tokens": completion_tokens,
+                "max_tokens": plan.max_tokens,
+            }
+        )
+
+async def request_feedback(topic: str, code: str, key: str, route: str = "analyze",
+                           detail: str = "standard") -> Feedback:
+    """
+    Call the model for a submission, parse the result and cache it.
+    
+    Args:
+        topic: Validated DSA topic
+        code: Submitted code
+        key: Cache key for the (topic, code) pair
+        route: Calling route, for per-route model overrides
+        detail: Requested detail level (brief, standard or deep)
     
     Returns:
         Feedback: Structured feedback object
     """
+    backend = model_router.choose(route, len(code), topic, detail)
+    logger.info(
+        "Calling %s for code analysis (queue depth: %d)", backend.name, upstream_limiter.queue_depth
+    )
     
-    # For MVP: Simple parsing. In production, use regex or more robust parsing.
-    # This is a basic implementation that extracts sections.
+    # Call GitHub Models API without blocking the event loop
+    with span("prompt") as prompt_span:
+        plan = plan_prompt(topic, code, structured=STRUCTURED_OUTPUT)
+        prompt_span.set(estimated_tokens=plan.estimated_tokens, max_tokens=plan.max_tokens)
+    output_format = {"response_format": FEEDBACK_RESPONSE_FORMAT} if STRUCTURED_OUTPUT else {}
+    with span("model", backend=backend.name, model=backend.model) as model_span:
+        # Continue the trace upstream when this request is traced
+        traceparent = current_traceparent()
+        trace_headers = {"extra_headers": {"traceparent": traceparent}} if traceparent else {}
+        waiting = time.perf_counter()
+        async with upstream_limiter:
+            started = time.perf_counter()
+            model_span.set(queue_wait_ms=round((started - waiting) * 1000, 3))
+            try:
+                # A hedged duplicate takes a limiter slot of its own, if one is free
+                completion = await upstream_callers[backend.name].call(lambda: backend_client(backend).chat.completions.create(
+                    model=backend.model,
+                    messages=plan.messages,
+                    temperature=LLM_TEMPERATURE,
+                    max_tokens=plan.max_tokens,
+                    **output_format,
+                    **trace_headers
+                ))
+            except Exception as e:
+                record_upstream_call(backend, started, "error", error=e)
+                raise
+        record_upstream_call(backend, started, "ok", getattr(completion, "usage", None), plan)
+        usage = getattr(completion, "usage", None)
+        model_span.set(
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None)
+        )
     
-    sections = {
-        "time_complexity": extract_section(feedback_text, "Time Complexity"),
-        "space_complexity": extract_section(feedback_text, "Space Complexity"),
-        "edge_cases": extract_section(feedback_text, "Edge Cases"),
-        "code_quality": extract_section(feedback_text, "Code Quality"),
-        "improvement_plan": extract_improvement_plan(feedback_text)
-    }
+    choice = completion.choices[0]
+    if getattr(choice, "finish_reason", None) == "length":
+        logger.warning("Completion hit max_tokens=%d; feedback may be truncated", plan.max_tokens)
+    feedback_text = choice.message.content
+    logger.info("Received feedback from AI (length: %d chars)", len(feedback_text))
     
-    return Feedback(**sections)
-
-def extract_section(text: str, section_name: str) -> str:
-    """Extract a section from feedback text."""
-    import re
-    # Match the section header and capture everything after it until the next section or end
-    # Look for next bold section header or numbered list item
-    pattern = rf"\*?\*?{section_name}\*?\*?:\s*(.*?)(?=\n+\*\*|\n+\d+\.|\Z)"
-    match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-    if match:
-        result = match.group(1).strip()
-        return result
-    return f"No {section_name} analysis provided."
-
-def extract_improvement_plan(text: str) -> list[str]:
-    """Extract improvement plan steps from feedback text."""
-    import re
-    plan_section = re.search(r"(?:3\.\s*)?(?:3-Step\s+)?Improvement Plan:?\s*(.*?)(?=\n\n|\Z)", text, re.IGNORECASE | re.DOTALL)
-    
-    if plan_section:
-        plan_text = plan_section.group(1)
-        # Extract lines that look like steps
-        steps = []
-        
-        # Try to find numbered steps first (Step 1:, Step 2:, etc.)
-        numbered_steps = re.findall(r"(?:Step\s+\d+:|[-•]\s*Step\s+\d+:)\s*(.+?)(?=\n\s*(?:Step\s+\d+:|[-•])|$)", plan_text, re.IGNORECASE | re.DOTALL)
-        if numbered_steps:
-            steps = [step.strip() for step in numbered_steps if step.strip()]
+    # Parse feedback into structured format
+    with span("parse_feedback", chars=len(feedback_text)):
+        feedback = parse_feedback(feedback_text, structured=STRUCTURED_OUTPUT)
+    feedback_cache.set(key, feedback.model_dump())
+    remember_submission(topic, code, key)
+    return feedback
+
+async def model_configured() -> bool:
+    """Whether a model client is set, waiting for the warm-up if it is still building one."""
+    if client is None and model_clients_build is not None and not model_clients_build.done():
+        await asyncio.shield(model_clients_build)
+    return client is not None
+
+def backend_client(backend: Backend) -> "AsyncOpenAI":
+    """Client for a backend: its own endpoint's, or the default one."""
+    return backend_clients.get(backend.name, client)
+
+async def cached_feedback(topic: str, code: str, key: str) -> tuple[dict | None, str]:
+    """
+    Look up feedback for a submission: first by exact cache key, then by near-duplicate fingerprint.
+    
+    Returns:
+        tuple: (feedback dict or None, X-Cache status: HIT, SIMILAR or MISS)
+    """
+    cached = await feedback_cache.lookup(key)
+    if cached is not None:
+        return cached, "HIT"
+    if near_duplicates is not None:
+        match = near_duplicates.find(topic, fingerprint(code))
+        # The matched entry may have been evicted from the feedback cache since
+        cached = await feedback_cache.lookup(match[0]) if match else None
+        if cached is not None:
+            logger.info("Reusing feedback from a near-duplicate submission (similarity %.3f)", match[1])
+            return cached, "SIMILAR"
+    return None, "MISS"
+
+def remember_submission(topic: str, code: str, key: str) -> None:
+    """Index an analyzed submission so near-duplicates can reuse its cached feedback."""
+    if near_duplicates is not None:
+        near_duplicates.add(topic, fingerprint(code), key)
+
+async def analyze_submission(data: AnalysisRequest, route: str) -> AnalysisResponse:
+    """
+    Analyze one submission the way /analyze does, raising instead of returning HTTP errors.
+    
+    Used by bulk grading, jobs and live sessions (`route`), where each
+    submission succeeds or fails independently.
+    """
+    judge_task = start_judge_task(data)
+    try:
+        if data.mode == "fast":
+            feedback = static_feedback(data.code)
         else:
-            # Fall back to bullet points
-            bullet_steps = re.findall(r"[-•]\s*(.+?)(?=\n\s*[-•]|\n\n|$)", plan_text, re.DOTALL)
-            steps = [step.strip() for step in bullet_steps if step.strip()]
-        
-        if steps:
-            return steps
+            key = cache_key(data.topic, data.code)
+            cached, _ = await cached_feedback(data.topic, data.code, key)
+            if cached is not None:
+                feedback = Feedback(**cached)
+            elif not await model_configured():
+                raise HTTPException(status_code=503, detail="AI service is not configured.")
+            else:
+                feedback = await analysis_flights.do(
+                    key, lambda: request_feedback(data.topic, data.code, key, route, data.detail)
+                )
+        return AnalysisResponse(
+            success=True,
+            feedback=feedback,
+            judge=await judge_task if judge_task else None
+        )
+    finally:
+        if judge_task and not judge_task.done():
+            judge_task.cancel()
+
+async def run_analysis_job(payload: dict) -> dict:
+    """Job handler: analyze a queued submission and record the attempt."""
+    started = time.perf_counter()
+    data = AnalysisRequest.model_validate(payload)
+    result = await analyze_submission(data, "jobs")
+    record_attempt(data, result, started)
+    return result.model_dump(mode="json", exclude_none=True)
+
+def job_retry_delay(error: Exception) -> float | None:
+    """Seconds before retrying a failed job, or None when retrying would not help."""
+    if isinstance(error, UpstreamUnavailableError):
+        return max(1.0, error.retry_after)
+    if isinstance(error, UpstreamBusyError):
+        return 5.0
+    if is_retryable(error):
+        return 10.0
+    return None
+
+def job_status(job: Job) -> JobStatus:
+    """API view of a queued job."""
+    return JobStatus(
+        id=job.id,
+        status=job.status,
+        priority=job.priority,
+        attempts=job.attempts,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        result=job.result,
+        error=job.error
+    )
+
+def live_checks(snapshot: Snapshot) -> dict:
+    """The "checks" message for a live session snapshot."""
+    if snapshot.syntax_error is not None:
+        error = snapshot.syntax_error
+        return {
+            "type": "checks",
+            "syntax": {"ok": False, "line": error.lineno, "column": error.offset, "message": error.msg},
+            "functions": [],
+            "removed": [],
+        }
+    return {
+        "type": "checks",
+        "syntax": {"ok": True},
+        "functions": [
+            {
+                "name": check.name,
+                "changed": check.changed,
+                "time_complexity": check.estimate.time if check.estimate else None,
+                "space_complexity": check.estimate.space if check.estimate else None,
+                "notes": check.estimate.notes if check.estimate else [],
+            }
+            for check in snapshot.functions
+        ],
+        "removed": snapshot.removed,
+    }
+
+async def send_live_feedback(websocket: WebSocket, session: LiveSession, code: str, reason: str) -> None:
+    """
+    Analyze a live session's code and send the "feedback" message.
+    
+    Submits are judged and recorded like /analyze; structural changes only
+    refresh the model feedback.
+    """
+    started = time.perf_counter()
+    submitted = reason == "submit"
+    data = AnalysisRequest(
+        code=code,
+        topic=session.topic,
+        problem_id=session.problem_id if submitted else None,
+        user_id=session.user_id
+    )
+    try:
+        result = await analyze_submission(data, "live")
+    except Exception as e:
+        logger.warning("Live session feedback failed: %s: %s", type(e).__name__, e)
+        await websocket.send_json({"type": "error", "reason": reason, "detail": batch_error_message(e)})
+        return
+    live_sessions.analyzed(session, fingerprint(code))
+    if submitted:
+        record_attempt(data, result, started)
+    await websocket.send_text(dumps({"type": "feedback", "reason": reason, **result.model_dump(mode="json")}).decode())
+
+def group_batch_items(items: list[BatchItem]) -> dict[tuple, list[BatchItem]]:
+    """Group batch items that would get identical analyses, in first-seen order."""
+    keys = {}
+    groups: dict[tuple, list[BatchItem]] = {}
+    for item in items:
+        # Exact resubmissions skip re-normalizing the code
+        text_key = (item.topic, item.code)
+        if text_key not in keys:
+            keys[text_key] = cache_key(item.topic, item.code)
+        groups.setdefault((item.mode, item.detail, item.problem_id, keys[text_key]), []).append(item)
+    return groups
+
+def batch_error_message(error: Exception) -> str:
+    """User-facing message for a failed bulk grading item."""
+    if isinstance(error, HTTPException):
+        return error.detail
+    if isinstance(error, UpstreamBusyError):
+        return UPSTREAM_BUSY_MESSAGE
+    return friendly_error_message(error)
+
+async def judge_submission(problem: Problem, code: str) -> JudgeResult | None:
+    """
+    Run code against a problem's test cases in the judge pool.
+    
+    Returns:
+        JudgeResult, or None if the judge is disabled, the problem has no tests, or judging failed
+    """
+    entry_point = entry_point_from_signature(problem.function_signature)
+    if judge_pool is None or not problem.test_cases or not entry_point:
+        return None
+    try:
+        with span("judge", problem_id=problem.id):
+            result = await judge_pool.run(
+                code,
+                entry_point,
+                [case.model_dump() for case in problem.test_cases]
+            )
+    except Exception as e:
+        logger.error("Judge failed for problem %s: %s: %s", problem.id, type(e).__name__, e)
+        return None
+    logger.info("Judged %s: %s (%d/%d)", problem.id, result['verdict'], result['passed'], result['total'])
+    return JudgeResult(**result)
+
+def start_judge_task(data: AnalysisRequest) -> asyncio.Task | None:
+    """Start judging an analysis request in the background if it names a known problem."""
+    if not data.problem_id or judge_pool is None:
+        return None
+    problem = problem_store.get(data.problem_id)
+    if problem is None or not problem.test_cases:
+        return None
+    return asyncio.create_task(judge_submission(problem, data.code))
+
+def static_feedback(code: str) -> Feedback:
+    """
+    Build feedback from static analysis alone, for fast mode.
+    
+    Only the complexity fields are answered; the model-only sections say so.
+    """
+    estimate = estimate_complexity(code)
+    if estimate is None:
+        unavailable = "Could not estimate: the code does not parse as Python."
+        return Feedback(
+            time_complexity=unavailable,
+            space_complexity=unavailable,
+            edge_cases=FAST_MODE_SKIPPED,
+            code_quality=FAST_MODE_SKIPPED,
+            improvement_plan=["Fix the syntax errors so the code can be analyzed"]
+        )
+    return Feedback(
+        time_complexity=f"{estimate.time} (static estimate)",
+        space_complexity=f"{estimate.space} (static estimate)",
+        edge_cases=FAST_MODE_SKIPPED,
+        code_quality=FAST_MODE_SKIPPED,
+        improvement_plan=[note[0].upper() + note[1:] for note in estimate.notes] or list(DEFAULT_IMPROVEMENT_PLAN)
+    )
+
+def complexity_hint(code: str) -> str:
+    """Static complexity estimate formatted for the prompt, or "" if unavailable."""
+    estimate = estimate_complexity(code) if COMPLEXITY_HINTS else None
+    if estimate is None:
+        return ""
+    notes = "".join(f"\n- {note}" for note in estimate.notes)
+    return COMPLEXITY_HINT_TEMPLATE.format(time=estimate.time, space=estimate.space, notes=notes)
+
+def plan_prompt(topic: str, code: str, structured: bool = False) -> PromptPlan:
+    """
+    Build the chat messages for a code analysis and size its completion budget.
     
+    Args:
+        topic: Validated DSA topic
+        code: Submitted code
+        structured: Ask for JSON matching the Feedback schema instead of the text format
+    
+    Returns:
+        PromptPlan with the messages, estimated prompt tokens and max_tokens
+    """
+    compact = compact_code(code) if PROMPT_COMPACTION else CompactCode(code)
+    max_tokens = choose_max_tokens(estimate_tokens(compact.text), topic, LLM_MIN_TOKENS, LLM_MAX_TOKENS)
+    messages = build_chat_messages(topic, code, compact, max_tokens, structured)
+    # Each chat message carries a few tokens of framing on top of its content
+    estimated = sum(estimate_tokens(message["content"]) + 4 for message in messages)
+    return PromptPlan(messages, estimated, max_tokens)
+
+def build_chat_messages(topic: str, code: str, compact: CompactCode, max_tokens: int,
+                        structured: bool = False) -> list[dict]:
+    """Build the chat messages sent to the model for a code analysis."""
+    code_note = ""
+    if compact.changed:
+        code_note = COMPACTED_CODE_NOTE.format(removed=compact.describe_removed())
+    template = DSA_FEEDBACK_JSON_PROMPT if structured else DSA_FEEDBACK_PROMPT
+    prompt = template.format(
+        topic=topic.replace("_", " "),
+        code=compact.text,
+        code_note=code_note,
+        complexity_hint=complexity_hint(code),
+        # Leave headroom so the answer is not cut off at max_tokens
+        target_tokens=max_tokens * 3 // 4
+    )
     return [
-        "Review the code for any inefficiencies",
-        "Test with edge cases",
-        "Optimize for better time/space complexity"
+        {
+            "role": "system",
+            "content": "You are an expert DSA interview coach. Provide clear, actionable feedback."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
     ]
 
+def friendly_error_message(error: Exception) -> str:
+    """Map an upstream exception to a user-facing error message."""
+    if isinstance(error, UpstreamUnavailableError):
+        return UPSTREAM_UNAVAILABLE_MESSAGE
+    if isinstance(error, UpstreamTimeoutError):
+        return UPSTREAM_TIMEOUT_MESSAGE
+    openai = loaded_openai()
+    if openai is not None:
+        if isinstance(error, openai.APITimeoutError):
+            return UPSTREAM_TIMEOUT_MESSAGE
+        if isinstance(error, openai.RateLimitError):
+            return "Too many requests. Please wait a moment and try again."
+        if isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError)):
+            return "AI service authentication failed. Please contact the administrator."
+        if isinstance(error, openai.APIConnectionError):
+            return "Could not reach the AI service. Please try again shortly."
+        if isinstance(error, openai.APIStatusError):
+            return f"The AI service returned an error (HTTP {error.status_code}). Please try again."
+    # Errors from other clients (e.g. test doubles) only have their message to go on
+    message = str(error).lower()
+    if "timeout" in message:
+        return "The AI service timed out. Please try again with a shorter code snippet."
+    if "rate" in message or "quota" in message:
+        return "Too many requests. Please wait a moment and try again."
+    if "authentication" in message or "unauthorized" in message:
+        return "AI service authentication failed. Please contact the administrator."
+    return f"Failed to analyze code: {str(error)}"
+
+def upstream_http_error(error: Exception) -> HTTPException:
+    """
+    HTTP error for a failed model call.
+    
+    Upstream outages map to 503 (circuit open, rate limited) or 504 (timed
+    out) with Retry-After where known, other API errors to 502, and anything
+    unrecognised to 500.
+    """
+    detail = friendly_error_message(error)
+    if isinstance(error, UpstreamUnavailableError):
+        return HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(max(1, round(error.retry_after)))})
+    if isinstance(error, UpstreamTimeoutError):
+        return HTTPException(status_code=504, detail=detail)
+    openai = loaded_openai()
+    if openai is not None:
+        if isinstance(error, openai.APITimeoutError):
+            return HTTPException(status_code=504, detail=detail)
+        if isinstance(error, openai.RateLimitError):
+            return HTTPException(status_code=503, detail=detail, headers={"Retry-After": "10"})
+        if isinstance(error, (openai.APIStatusError, openai.APIConnectionError)):
+            return HTTPException(status_code=502, detail=detail)
+    return HTTPException(status_code=500, detail=detail)
+
+async def warm_up_app() -> None:
+    """
+    Run the startup warm-up phases tracked by `readiness`.
+    
+    The model clients are built in a thread while the problem bank loads and
+    the parsers warm up, since importing the openai SDK dominates startup.
+    """
+    global model_clients_build
+    readiness.begin()
+    model_clients_build = asyncio.create_task(
+        readiness.run("model_clients", lambda: asyncio.to_thread(build_model_clients))
+    )
+    await readiness.run("problems", problem_store.refresh)
+    await readiness.run("parsers", warm_parsers)
+    await model_clients_build
+    await readiness.run("upstream_connections", warm_upstream_connections)
+
+def warm_parsers() -> None:
+    """
+    Run the feedback parsers, prompt templates and static estimator once.
+    
+    Their first call builds validators and loads lazily imported code; doing
+    it here keeps that off the first request. Nothing is cached or counted.
+    """
+    code = WARMUP_SOLUTION
+    for structured in (False, True):
+        plan_prompt(HARDCODED_PROBLEM.topic, code, structured)
+    feedback = Feedback(**parse_sections(WARMUP_FEEDBACK))
+    IncrementalFeedbackParser().feed(WARMUP_FEEDBACK)
+    Feedback.model_validate_json(dumps(feedback))
+    dumps(AnalysisResponse(success=True, feedback=static_feedback(code)))
+    for problem in problem_store.page(limit=1)[0]:
+        problem_payload(problem)
+
+def sse_event(event: str, data) -> str:
+    """Format a single Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+def problem_payload(problem: Problem) -> Payload:
+    """The problem's pre-encoded payload, encoding it now if the bank was reloaded in between."""
+    payload = problem_store.payload(problem.id)
+    if payload is None:
+        body = dumps(problem)
+        payload = Payload(body, etag_for(body))
+    return payload
+
+def problem_cache_control(reusable: bool = True) -> str:
+    """Cache-Control for problem responses; non-reusable ones must always be revalidated."""
+    return f"public, max-age={PROBLEM_CACHE_MAX_AGE}" if reusable else "no-cache"
+
+def problem_response(request: Request, problem: Problem, reusable: bool = True) -> Response:
+    """Serve a problem's pre-encoded bytes with its ETag, or an empty 304 if the client has them."""
+    payload = problem_payload(problem)
+    return cached_json_response(request, payload.body, payload.etag, problem_cache_control(reusable))
+
+# In-process job workers, created here because they run the helpers above
+job_workers = JobWorkers(
+    job_queue,
+    run_analysis_job,
+    concurrency=JOB_WORKERS,
+    retry_delay=job_retry_delay,
+    describe_error=batch_error_message
+) if JOB_WORKERS > 0 else None
+
 # ============================================================================
 # MAIN
 # ============================================================================
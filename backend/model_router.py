@@ -0,0 +1,210 @@
+"""
+Routing of analysis calls across model backends.
+
+Backends are grouped into quality tiers (1 = fastest and cheapest). Each call
+needs a minimum tier, decided by the submission's size and topic and the
+detail level the client asked for: most submissions are short and go to the
+cheapest tier, while long solutions, hard topics and "deep" requests go up.
+Within a tier the router prefers the backend with the lowest latency EWMA,
+penalized by its error EWMA, and skips backends whose error rate marks them
+unhealthy (probing them again after a cool-down), as well as backends the
+caller reports unavailable (e.g. because their circuit breaker is open). If no
+backend in or above the needed tier is healthy, a lower tier answers rather
+than none.
+
+Routes (analyze, stream, batch, ...) can be pinned to a backend by name.
+"""
+
+import logging
+import time
+from typing import Callable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Topics whose analyses benefit from the stronger tier even for short code
+DEFAULT_HARD_TOPICS = frozenset({"dynamic_programming", "graph"})
+
+
+class Backend(NamedTuple):
+    """A model on an OpenAI-compatible endpoint (None: the default endpoint)."""
+    name: str
+    model: str
+    tier: int
+    base_url: str | None = None
+
+
+def parse_backends(spec: str) -> list[Backend]:
+    """
+    Parse "[name=]model:tier[@base_url]" entries separated by commas.
+
+    For example "gpt-4o-mini:1,gpt-4o:2" or "local=llama3:1@http://127.0.0.1:8080/v1".
+    The name defaults to the model and must be unique.
+
+    Raises:
+        ValueError: If an entry is malformed or a name is repeated
+    """
+    backends = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        entry, _, base_url = part.partition("@")
+        name, _, model_tier = entry.rpartition("=")
+        model, _, tier = model_tier.partition(":")
+        if not model.strip() or not tier.strip().isdigit() or int(tier) < 1:
+            raise ValueError(f"Invalid model entry {part!r} (expected [name=]model:tier[@base_url])")
+        backends.append(Backend(name.strip() or model.strip(), model.strip(), int(tier), base_url.strip() or None))
+    names = [backend.name for backend in backends]
+    if len(set(names)) != len(names):
+        raise ValueError("Model backend names must be unique")
+    return backends
+
+
+def parse_routes(spec: str) -> dict[str, str]:
+    """
+    Parse "route=backend" pairs separated by commas, e.g. "stream=gpt-4o,batch=gpt-4o-mini".
+
+    Raises:
+        ValueError: If an entry has no route or backend
+    """
+    routes = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        route, _, name = part.partition("=")
+        if not route.strip() or not name.strip():
+            raise ValueError("Invalid model route entry (expected route=backend)")
+        routes[route.strip()] = name.strip()
+    return routes
+
+
+class BackendHealth:
+    """Online latency and error EWMAs for one backend."""
+
+    __slots__ = ("latency", "errors", "calls", "failures", "last_failure")
+
+    def __init__(self):
+        self.latency: float | None = None
+        self.errors = 0.0
+        self.calls = self.failures = 0
+        self.last_failure: float | None = None
+
+
+class ModelRouter:
+    """
+    Chooses a backend per model call and learns from how calls went.
+
+    Args:
+        backends: Configured backends, at least one
+        routes: Route name -> backend name overrides
+        small_code_chars: Submissions up to this size (outside hard topics) use the lowest tier
+        hard_topics: Topics that always use the second tier
+        alpha: Weight of the newest observation in the EWMAs
+        unhealthy_error_rate: Error EWMA at or above which a backend is avoided
+        probe_interval: Seconds after its last failure before an unhealthy backend is tried again
+        available: Backend name -> False while calls to it would be rejected outright
+    """
+
+    def __init__(
+        self,
+        backends: list[Backend],
+        routes: dict[str, str] | None = None,
+        small_code_chars: int = 1500,
+        hard_topics: frozenset[str] = DEFAULT_HARD_TOPICS,
+        alpha: float = 0.2,
+        unhealthy_error_rate: float = 0.5,
+        probe_interval: float = 30.0,
+        available: Callable[[str], bool] | None = None
+    ):
+        if not backends:
+            raise ValueError("At least one model backend is required")
+        self.backends = {backend.name: backend for backend in backends}
+        self.routes = routes or {}
+        unknown = set(self.routes.values()) - set(self.backends)
+        if unknown:
+            raise ValueError(f"Model routes name unknown backends: {', '.join(sorted(unknown))}")
+        self.tiers = sorted({backend.tier for backend in backends})
+        self.small_code_chars = small_code_chars
+        self.hard_topics = hard_topics
+        self.alpha = alpha
+        self.unhealthy_error_rate = unhealthy_error_rate
+        self.probe_interval = probe_interval
+        self.available = available
+        self.reset()
+
+    def required_tier(self, code_chars: int, topic: str, detail: str = "standard") -> int:
+        """Lowest tier good enough for this submission."""
+        if detail == "brief":
+            return self.tiers[0]
+        if detail == "deep":
+            return self.tiers[-1]
+        if code_chars <= self.small_code_chars and topic.replace(" ", "_") not in self.hard_topics:
+            return self.tiers[0]
+        return self.tiers[min(1, len(self.tiers) - 1)]
+
+    def choose(self, route: str, code_chars: int, topic: str, detail: str = "standard") -> Backend:
+        """Backend for one model call on `route`."""
+        pinned = self.routes.get(route)
+        if pinned is not None:
+            return self.backends[pinned]
+        tier = self.required_tier(code_chars, topic, detail)
+        healthy = [backend for backend in self.backends.values() if self.healthy(backend)]
+        if not healthy:
+            # Everything is failing: probe whichever usable backend failed longest ago
+            candidates = [backend for backend in self.backends.values() if self.usable(backend)]
+            return min(candidates or self.backends.values(), key=lambda b: self.health[b.name].last_failure or 0.0)
+        # The needed tier or the nearest one above it, else the best tier below
+        eligible = [backend for backend in healthy if backend.tier >= tier]
+        if eligible:
+            best_tier = min(backend.tier for backend in eligible)
+        else:
+            best_tier = max(backend.tier for backend in healthy)
+        return min((backend for backend in healthy if backend.tier == best_tier), key=self.score)
+
+    def score(self, backend: Backend) -> float:
+        """Expected latency penalized by the error rate; untried backends score 0 so they get tried."""
+        health = self.health[backend.name]
+        if health.latency is None:
+            return 0.0
+        return health.latency * (1 + health.errors)
+
+    def usable(self, backend: Backend) -> bool:
+        return self.available is None or self.available(backend.name)
+
+    def healthy(self, backend: Backend) -> bool:
+        if not self.usable(backend):
+            return False
+        health = self.health[backend.name]
+        if health.errors < self.unhealthy_error_rate:
+            return True
+        return time.monotonic() - health.last_failure >= self.probe_interval
+
+    def record(self, backend: Backend, latency: float, ok: bool) -> None:
+        """Fold one call's outcome into the backend's EWMAs."""
+        health = self.health[backend.name]
+        health.calls += 1
+        health.errors += self.alpha * ((0.0 if ok else 1.0) - health.errors)
+        if ok:
+            health.latency = latency if health.latency is None else health.latency + self.alpha * (latency - health.latency)
+        else:
+            health.failures += 1
+            health.last_failure = time.monotonic()
+            if health.errors >= self.unhealthy_error_rate:
+                logger.warning("Model backend %s marked unhealthy (error EWMA %.2f)", backend.name, health.errors)
+
+    def reset(self) -> None:
+        """Forget all observations."""
+        self.health = {name: BackendHealth() for name in self.backends}
+
+    def stats(self) -> dict:
+        """Per-backend tier, EWMAs and health for health endpoints."""
+        return {
+            "routes": self.routes,
+            "backends": {
+                backend.name: {
+                    "model": backend.model,
+                    "tier": backend.tier,
+                    "healthy": self.healthy(backend),
+                    "latency_ewma_ms": round(health.latency * 1000, 1) if health.latency is not None else None,
+                    "error_ewma": round(health.errors, 3),
+                    "calls": health.calls,
+                    "failures": health.failures,
+                }
+                for backend, health in zip(self.backends.values(), self.health.values())
+            },
+        }
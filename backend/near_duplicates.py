@@ -0,0 +1,261 @@
+"""
+Near-duplicate index for submitted code.
+
+Code is reduced to a token stream in which local names are renamed in order of
+first use, so the same solution with different variable names, comments or
+formatting produces the same tokens. Overlapping token shingles are hashed and
+folded into a 64-bit SimHash, where similar token sets give fingerprints that
+differ in few bits.
+
+Lookups use the block trick from Manku et al., "Detecting Near-Duplicates for
+Web Crawling": the fingerprint is split into four 16-bit blocks, and any two
+fingerprints within 3 bits of each other agree exactly on at least one block.
+Each block has a 65536-bucket table, so a lookup only compares the entries in
+four buckets. Entries live in flat arrays (about 60 bytes each), with buckets
+chained through per-block "next" arrays, so a million submissions fit in
+tens of megabytes.
+"""
+
+import builtins
+import hashlib
+import keyword
+import logging
+import re
+import struct
+from array import array
+from functools import lru_cache
+
+from feedback_cache import normalize_code
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+BLOCKS = 4
+BLOCK_BITS = FINGERPRINT_BITS // BLOCKS
+# Fingerprints this close are guaranteed to share a block
+MAX_DISTANCE = BLOCKS - 1
+SHINGLE_SIZE = 4
+
+_MASK = (1 << FINGERPRINT_BITS) - 1
+_BLOCK_MASK = (1 << BLOCK_BITS) - 1
+_SHINGLE_PRIME = 0x100000001B3  # Keeps shingles order-sensitive before mixing
+_KEY_BYTES = 32  # sha256 cache keys, stored as raw bytes
+
+# Names kept as-is: renaming them would hide real differences between solutions
+_RESERVED = frozenset(keyword.kwlist) | frozenset(keyword.softkwlist) | frozenset(dir(builtins))
+
+# Quoted strings as one token, then names, numbers and single punctuation characters
+_TOKEN_RE = re.compile(r"'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\"|[A-Za-z_]\w*|\d+(?:\.\d+)?|\S")
+
+# For each bit position, a byte translation table mapping a byte to that bit's value
+_BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+
+def code_tokens(code: str) -> list[str]:
+    """
+    Tokenize code for fingerprinting.
+
+    Comments, docstrings and formatting are dropped by normalize_code. Local
+    names become v0, v1, ... in order of first use, while keywords, builtins
+    and attribute names (e.g. ".append") are kept. String literals collapse to
+    a single token.
+    """
+    names: dict[str, str] = {}
+    tokens = []
+    after_dot = False
+    for token in _TOKEN_RE.findall(normalize_code(code)):
+        first = token[0]
+        if first in "'\"":
+            token = "STR"
+        elif (first.isalpha() or first == "_") and not after_dot and token not in _RESERVED:
+            token = names.setdefault(token, f"v{len(names)}")
+        after_dot = token == "."
+        tokens.append(token)
+    return tokens
+
+
+@lru_cache(maxsize=4096)
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mix(value: int) -> int:
+    """splitmix64 finalizer: spreads every input bit over the whole word."""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK
+    return value ^ (value >> 31)
+
+
+def simhash(hashes: list[int]) -> int:
+    """
+    Fold 64-bit feature hashes into a SimHash: bit i is set if most hashes have it set.
+
+    The per-bit counts are taken with bytes.translate/count over the packed
+    hashes, so the work done in Python is constant rather than per hash.
+    """
+    if not hashes:
+        return 0
+    packed = struct.pack(f"<{len(hashes)}Q", *hashes)
+    half = len(hashes) / 2
+    result = 0
+    for byte in range(8):
+        column = packed[byte::8]
+        for bit in range(8):
+            if column.translate(_BIT_TABLES[bit]).count(1) > half:
+                result |= 1 << (byte * 8 + bit)
+    return result
+
+
+@lru_cache(maxsize=256)
+def fingerprint(code: str) -> int:
+    """64-bit SimHash of the code's overlapping SHINGLE_SIZE-token shingles."""
+    token_hashes = [_token_hash(token) for token in code_tokens(code)]
+    shingles = []
+    for start in range(max(1, len(token_hashes) - SHINGLE_SIZE + 1)):
+        value = 0
+        for token_hash in token_hashes[start:start + SHINGLE_SIZE]:
+            value = (value * _SHINGLE_PRIME + token_hash) & _MASK
+        shingles.append(_mix(value))
+    return simhash(shingles)
+
+
+def similarity(a: int, b: int) -> float:
+    """Fraction of fingerprint bits two fingerprints agree on."""
+    return 1 - (a ^ b).bit_count() / FINGERPRINT_BITS
+
+
+def _scope_hash(scope: str) -> int:
+    return _token_hash("\x00scope:" + scope)
+
+
+class _Table:
+    """Append-only block index over a fixed number of entries."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.fingerprints = array("Q")
+        self.scopes = array("Q")
+        self.keys = bytearray()
+        self.heads = [array("i", [-1]) * (1 << BLOCK_BITS) for _ in range(BLOCKS)]
+        self.nexts = [array("i") for _ in range(BLOCKS)]
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.fingerprints, self.scopes, *self.heads, *self.nexts]
+        return sum(a.itemsize * len(a) for a in arrays) + len(self.keys)
+
+    @staticmethod
+    def buckets(scope_hash: int, value: int) -> list[int]:
+        # Mixing in the scope keeps each topic's entries in their own chains
+        mixed = value ^ scope_hash
+        return [(mixed >> (block * BLOCK_BITS)) & _BLOCK_MASK for block in range(BLOCKS)]
+
+    def add(self, scope_hash: int, value: int, key: bytes) -> None:
+        entry = len(self.fingerprints)
+        self.fingerprints.append(value)
+        self.scopes.append(scope_hash)
+        self.keys += key
+        for heads, nexts, bucket in zip(self.heads, self.nexts, self.buckets(scope_hash, value)):
+            nexts.append(heads[bucket])
+            heads[bucket] = entry
+
+    def find(self, scope_hash: int, value: int, max_distance: int, max_probes: int) -> tuple[int, int] | None:
+        """Most recently added entry within max_distance bits, as (entry, distance)."""
+        best = None
+        fingerprints, scopes = self.fingerprints, self.scopes
+        for heads, nexts, bucket in zip(self.heads, self.nexts, self.buckets(scope_hash, value)):
+            entry, probes = heads[bucket], 0
+            while entry >= 0 and probes < max_probes:
+                if scopes[entry] == scope_hash:
+                    distance = (fingerprints[entry] ^ value).bit_count()
+                    if distance <= max_distance and (best is None or entry > best[0]):
+                        best = (entry, distance)
+                        break  # Chains run newest first
+                entry = nexts[entry]
+                probes += 1
+        return best
+
+    def key(self, entry: int) -> str:
+        return self.keys[entry * _KEY_BYTES:(entry + 1) * _KEY_BYTES].hex()
+
+
+class NearDuplicateIndex:
+    """
+    Maps (scope, code fingerprint) to the cache key of a similar analyzed submission.
+
+    `threshold` is the minimum similarity() for a match; it must allow at most
+    MAX_DISTANCE differing bits (be above 0.9375) so every match is found.
+    Entries are kept in two generations of max_entries / 2: when the current
+    one fills up, the older one is dropped, so memory stays bounded and recent
+    submissions are always searchable.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1_000_000, max_probes: int = 256):
+        max_distance = int((1 - threshold) * FINGERPRINT_BITS + 1e-9)
+        if not 0 <= max_distance <= MAX_DISTANCE or threshold > 1:
+            raise ValueError(
+                f"threshold must be above {1 - (MAX_DISTANCE + 1) / FINGERPRINT_BITS} and at most 1, got {threshold}"
+            )
+        self.threshold = threshold
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.max_probes = max_probes
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._current) + (len(self._previous) if self._previous else 0)
+
+    def add(self, scope: str, code_fingerprint: int, key: str) -> None:
+        """Index an analyzed submission under its feedback cache key (a sha256 hex digest)."""
+        if len(self._current) >= self._current.capacity:
+            self._previous, self._current = self._current, _Table(self._current.capacity)
+            self.rotations += 1
+            logger.info("Near-duplicate index rotated; keeping the newest %d submissions", len(self._previous))
+        self._current.add(_scope_hash(scope), code_fingerprint, bytes.fromhex(key))
+
+    def find(self, scope: str, code_fingerprint: int) -> tuple[str, float] | None:
+        """
+        Find an indexed submission similar to this fingerprint.
+
+        Returns:
+            tuple: (cache key, similarity) of the newest match, or None
+        """
+        scope_hash = _scope_hash(scope)
+        for table in (self._current, self._previous):
+            if table is None:
+                continue
+            match = table.find(scope_hash, code_fingerprint, self.max_distance, self.max_probes)
+            if match is not None:
+                self.hits += 1
+                entry, distance = match
+                return table.key(entry), 1 - distance / FINGERPRINT_BITS
+        self.misses += 1
+        return None
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index arrays."""
+        return self._current.nbytes + (self._previous.nbytes if self._previous else 0)
+
+    def clear(self) -> None:
+        """Drop every entry and reset counters."""
+        self._current = _Table(max(1, self.max_entries // 2))
+        self._previous: _Table | None = None
+        self.hits = self.misses = self.rotations = 0
+
+    def stats(self) -> dict:
+        """Snapshot of index size and hit rate for health endpoints."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "memory_mb": round(self.nbytes / 1e6, 1),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "rotations": self.rotations,
+        }
@@ -0,0 +1,229 @@
+"""
+Problem bank loaded from a directory of JSON/YAML files.
+Problems are indexed in memory by id, topic and difficulty and hot-reloaded when files change.
+Each problem can also be pre-encoded once per reload so endpoints serve its bytes without re-serializing.
+"""
+
+import asyncio
+import base64
+import bisect
+import json
+import logging
+import os
+import random
+from pathlib import Path
+from typing import Any, Callable, Iterable, NamedTuple
+
+from fast_json import etag_for
+
+try:
+    import yaml
+except ImportError:  # YAML problem files are optional
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+PROBLEM_FILE_SUFFIXES = (".json", ".yaml", ".yml")
+_READ_ERRORS = (OSError, ValueError) + ((yaml.YAMLError,) if yaml is not None else ())
+
+
+def encode_cursor(problem_id: str) -> str:
+    """Encode the last returned id as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(problem_id.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    """Decode a pagination cursor back into a problem id."""
+    try:
+        return base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor") from None
+
+
+class Payload(NamedTuple):
+    """A problem encoded for the wire, with its strong ETag."""
+    body: bytes
+    etag: str
+
+
+class _ProblemIndex:
+    """Immutable snapshot of the loaded problems, their secondary indexes and encoded payloads."""
+
+    def __init__(self, problems: Iterable[Any], serialize: Callable[[Any], bytes] | None = None):
+        self.by_id = {}
+        for problem in problems:
+            self.by_id[problem.id] = problem
+
+        self.payloads: dict[str, Payload] = {}
+        if serialize is not None:
+            for problem_id, problem in self.by_id.items():
+                body = serialize(problem)
+                self.payloads[problem_id] = Payload(body, etag_for(body))
+
+        # (topic, difficulty) -> sorted ids; None acts as a wildcard
+        self.sorted_ids: dict[tuple, list[str]] = {(None, None): sorted(self.by_id)}
+        for problem_id in self.sorted_ids[(None, None)]:
+            problem = self.by_id[problem_id]
+            difficulty = getattr(problem, "difficulty", None)
+            for key in ((problem.topic, None), (None, difficulty), (problem.topic, difficulty)):
+                self.sorted_ids.setdefault(key, []).append(problem_id)
+
+
+class ProblemStore:
+    """
+    In-memory problem index backed by a directory of problem files.
+
+    Each file holds one problem object or a list of them. Files are parsed with
+    `parse` (typically a pydantic model's model_validate), so invalid entries
+    are skipped with a warning instead of breaking the whole bank. Reloads only
+    re-read files whose mtime or size changed and swap in a new index
+    atomically, so readers never see a half-built index.
+
+    If `serialize` is given, every problem is encoded with it when the index is
+    built and payload() returns the bytes, so serving a problem costs no
+    serialization at all until the bank changes.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None,
+        parse: Callable[[dict], Any],
+        topics: Iterable[str] | None = None,
+        builtin: Iterable[Any] = (),
+        serialize: Callable[[Any], bytes] | None = None,
+    ):
+        self.directory = Path(directory) if directory else None
+        self.parse = parse
+        self.topics = set(topics) if topics is not None else None
+        self.builtin = list(builtin)
+        self.serialize = serialize
+        self._files: dict[str, tuple[tuple[int, int], list]] = {}
+        self._index = _ProblemIndex(self.builtin, serialize)
+        self.reload_count = 0
+
+    def __len__(self) -> int:
+        return len(self._index.by_id)
+
+    def get(self, problem_id: str):
+        """Return the problem with this id, or None."""
+        return self._index.by_id.get(problem_id)
+
+    def payload(self, problem_id: str) -> Payload | None:
+        """Return the pre-encoded problem and its ETag, or None if unknown or serialize is unset."""
+        return self._index.payloads.get(problem_id)
+
+    def page(
+        self,
+        topic: str | None = None,
+        difficulty: str | None = None,
+        cursor: str | None = None,
+        limit: int = 50,
+    ) -> tuple[list, str | None]:
+        """
+        Page through problems in id order.
+
+        Args:
+            topic: Only include problems with this topic
+            difficulty: Only include problems with this difficulty
+            cursor: Cursor returned by the previous page
+            limit: Maximum number of problems to return
+
+        Returns:
+            tuple: (problems, next_cursor), where next_cursor is None on the last page
+        """
+        index = self._index
+        ids = index.sorted_ids.get((topic, difficulty), [])
+        start = bisect.bisect_right(ids, decode_cursor(cursor)) if cursor else 0
+        page_ids = ids[start:start + limit]
+        next_cursor = encode_cursor(page_ids[-1]) if start + limit < len(ids) and page_ids else None
+        return [index.by_id[problem_id] for problem_id in page_ids], next_cursor
+
+    def random(self, topic: str | None = None, difficulty: str | None = None):
+        """Pick a random problem matching the filters, or None if there is none."""
+        index = self._index
+        ids = index.sorted_ids.get((topic, difficulty))
+        if not ids:
+            return None
+        return index.by_id[random.choice(ids)]
+
+    def stats(self) -> dict:
+        """Snapshot of the problem bank for health/metrics endpoints."""
+        return {
+            "problems": len(self._index.by_id),
+            "files": len(self._files),
+            "reloads": self.reload_count,
+        }
+
+    def refresh(self) -> bool:
+        """
+        Re-scan the directory and rebuild the index if any file changed.
+
+        Returns:
+            bool: True if the index was rebuilt
+        """
+        if self.directory is None or not self.directory.is_dir():
+            return False
+
+        seen = {}
+        changed = False
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.endswith(PROBLEM_FILE_SUFFIXES):
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+                cached = self._files.get(entry.path)
+                if cached is not None and cached[0] == signature:
+                    seen[entry.path] = cached
+                else:
+                    seen[entry.path] = (signature, self._load_file(entry.path))
+                    changed = True
+
+        if not changed and seen.keys() == self._files.keys():
+            return False
+
+        self._files = seen
+        problems = list(self.builtin)
+        for path in sorted(seen):
+            problems.extend(seen[path][1])
+        self._index = _ProblemIndex(problems, self.serialize)
+        self.reload_count += 1
+        logger.info("Problem bank loaded: %d problems from %d files", len(self._index.by_id), len(seen))
+        return True
+
+    async def watch(self, interval: float) -> None:
+        """Poll the directory forever, reloading in a worker thread when files change."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error("Problem bank reload failed: %s", e)
+
+    def _load_file(self, path: str) -> list:
+        """Parse one problem file, skipping entries that fail validation."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                if path.endswith(".json"):
+                    raw = json.load(f)
+                elif yaml is not None:
+                    raw = yaml.safe_load(f)
+                else:
+                    logger.warning("Skipping %s: PyYAML is not installed", path)
+                    return []
+        except _READ_ERRORS as e:
+            logger.warning("Skipping unreadable problem file %s: %s", path, e)
+            return []
+
+        problems = []
+        for item in raw if isinstance(raw, list) else [raw]:
+            try:
+                problem = self.parse(item)
+            except Exception as e:
+                logger.warning("Skipping invalid problem in %s: %s", path, e)
+                continue
+            if self.topics is not None and problem.topic not in self.topics:
+                logger.warning("Skipping problem %s in %s: unknown topic '%s'", problem.id, path, problem.topic)
+                continue
+            problems.append(problem)
+        return problems
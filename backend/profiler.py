@@ -0,0 +1,168 @@
+"""
+Opt-in sampling profiler for a fraction of requests.
+
+While switched on, ProfilingMiddleware picks requests with probability
+`sample_rate` and a background thread samples the stacks of the other threads
+every `interval` seconds. A sample is counted for a profiled request only when
+that request's middleware frame is on a stack, i.e. when the event loop is
+running that request's code rather than another one's, and only the frames
+above it are kept. Samples are aggregated per route as folded stacks
+("route;frame;... count" lines), the input format of flamegraph.pl,
+speedscope and inferno.
+
+Sampling measures on-CPU time in the request's own task; time spent waiting
+(on the model, say) shows up in the tracing spans instead. Work the request
+hands to other tasks or processes (such as judging) is not attributed to it.
+"""
+
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Stack sampler for the requests registered with track().
+
+    Args:
+        interval: Seconds between samples
+        max_depth: Frames kept per sample, innermost first
+        max_stacks: Distinct stacks kept; further new stacks are counted as dropped
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64, max_stacks: int = 20000):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.sample_rate = 0.0
+        self.stacks: Counter[str] = Counter()
+        # Middleware frame of each profiled request in flight -> its ASGI scope
+        self._active: dict[int, dict] = {}
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.requests = self.samples = self.dropped = 0
+        self.enabled_at: float | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def configure(self, sample_rate: float, interval: float | None = None) -> None:
+        """Profile this fraction of requests from now on; 0 switches the profiler off."""
+        if interval is not None:
+            self.interval = interval
+        self.sample_rate = sample_rate
+        if sample_rate > 0:
+            self.start()
+        else:
+            self.stop()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        self.enabled_at = time.time()
+        logger.info("Sampling profiler on for %.1f%% of requests every %.1fms",
+                    self.sample_rate * 100, self.interval * 1000)
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.enabled_at = None
+        logger.info("Sampling profiler off")
+
+    def should_profile(self) -> bool:
+        return self.running and self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def track(self, frame, scope: dict) -> None:
+        """Attribute samples taken while `frame` is on a stack to the request in `scope`."""
+        self.requests += 1
+        self._active[id(frame)] = scope
+
+    def untrack(self, frame) -> None:
+        self._active.pop(id(frame), None)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self._active:
+                self._sample()
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own:
+                self._sample_stack(frame)
+
+    def _sample_stack(self, frame) -> None:
+        labels = []
+        while frame is not None:
+            scope = self._active.get(id(frame))
+            if scope is not None:
+                # The route template is known once the router has matched the request
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                stack = ";".join([f"{scope['method']} {route}", *reversed(labels[:self.max_depth])])
+                if stack in self.stacks or len(self.stacks) < self.max_stacks:
+                    self.stacks[stack] += 1
+                    self.samples += 1
+                else:
+                    self.dropped += 1
+                return
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+
+    def folded(self) -> str:
+        """Samples as folded stacks, heaviest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def reset(self) -> None:
+        self.stacks.clear()
+        self.samples = self.dropped = self.requests = 0
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "sample_rate": self.sample_rate,
+            "interval_ms": round(self.interval * 1000, 3),
+            "enabled_at": self.enabled_at,
+            "profiled_requests": self.requests,
+            "in_flight": len(self._active),
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "dropped": self.dropped,
+        }
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles a sample of HTTP requests while the profiler is on."""
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_profile():
+            await self.app(scope, receive, send)
+            return
+        # This coroutine's frame is on the event loop's stack exactly while this request runs
+        frame = sys._getframe()
+        self.profiler.track(frame, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.untrack(frame)
@@ -0,0 +1,140 @@
+"""
+Prompt compaction and token budgeting for model calls.
+
+Submitted code is minified with an AST round-trip (dropping comments,
+docstrings and blank lines) before it is inlined into the prompt, prompt
+tokens are estimated locally, and the completion budget is sized from the
+code and topic instead of always asking for the maximum.
+"""
+
+import ast
+import io
+import re
+import tokenize
+from functools import lru_cache
+from typing import NamedTuple
+
+# Topics whose feedback usually needs more room (recurrences, traversal orders, ...)
+TOPIC_EXTRA_TOKENS = {
+    "dynamic_programming": 150,
+    "graph": 150,
+    "tree": 100,
+    "linked_list": 50,
+}
+
+# Words, digit runs, single punctuation characters and line breaks
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]|\n")
+
+
+class CompactCode(NamedTuple):
+    """Minified code plus what was removed, so the prompt can mention it."""
+    text: str
+    comments: int = 0
+    docstrings: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.comments or self.docstrings)
+
+    def describe_removed(self) -> str:
+        """Human-readable summary such as "5 comments and 1 docstring"."""
+        parts = [
+            f"{count} {name}{'' if count == 1 else 's'}"
+            for count, name in ((self.comments, "comment"), (self.docstrings, "docstring"))
+            if count
+        ]
+        return " and ".join(parts)
+
+
+class PromptPlan(NamedTuple):
+    """Messages for a model call with the estimated prompt size and completion budget."""
+    messages: list[dict]
+    estimated_tokens: int
+    max_tokens: int
+
+
+@lru_cache(maxsize=256)
+def compact_code(code: str) -> CompactCode:
+    """
+    Minify code for the prompt without changing its behavior.
+
+    The AST round-trip drops comments, blank lines and formatting; docstrings
+    are removed as well. Code that does not parse (or nests too deeply for
+    the parser) is sent unchanged so the model can point at the problem.
+
+    Args:
+        code: Submitted source code
+
+    Returns:
+        CompactCode with the minified text and counts of removed comments and docstrings
+    """
+    try:
+        return _compact(code)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return CompactCode(code)
+
+
+def _compact(code: str) -> CompactCode:
+    tree = ast.parse(code)
+    docstrings = 0
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if ast.get_docstring(node, clean=False) is not None:
+                node.body = node.body[1:] or [ast.Pass()]
+                docstrings += 1
+
+    text = ast.unparse(tree)
+    if len(text) >= len(code):
+        return CompactCode(code)
+    return CompactCode(text, count_comments(code), docstrings)
+
+def count_comments(code: str) -> int:
+    """Number of comments in source that already parsed."""
+    try:
+        return sum(
+            1 for token in tokenize.generate_tokens(io.StringIO(code).readline)
+            if token.type == tokenize.COMMENT
+        )
+    except (tokenize.TokenError, SyntaxError):
+        return 0
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the BPE token count of text without a tokenizer.
+
+    Common words are one token, long identifiers split every ~6 letters,
+    numbers every 3 digits, and punctuation and line breaks count one each.
+    It is only meant for budgeting; the estimate is logged next to the
+    usage the API reports so it can be checked against real traffic.
+    """
+    count = 0
+    for match in _TOKEN_RE.finditer(text):
+        piece = match.group()
+        if piece[0].isalpha():
+            count += (len(piece) + 5) // 6
+        elif piece[0].isdigit():
+            count += (len(piece) + 2) // 3
+        else:
+            count += 1
+    return count
+
+
+def choose_max_tokens(code_tokens: int, topic: str, floor: int = 400, ceiling: int = 1000) -> int:
+    """
+    Size the completion budget from the code and topic.
+
+    Larger submissions get more room for edge cases and code quality notes,
+    and topics with involved explanations get a fixed bonus.
+
+    Args:
+        code_tokens: Estimated tokens of the (compacted) code
+        topic: Validated DSA topic
+        floor: Smallest budget ever requested
+        ceiling: Largest budget ever requested
+
+    Returns:
+        int: max_tokens for the completion
+    """
+    budget = floor + code_tokens // 4 + TOPIC_EXTRA_TOKENS.get(topic, 0)
+    return max(floor, min(ceiling, budget))
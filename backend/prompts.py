@@ -2,30 +2,54 @@
 Prompt templates for Azure OpenAI DSA feedback generation.
 """
 
-DSA_FEEDBACK_PROMPT = """You are an expert DSA (Data Structures & Algorithms) interview coach.
-Analyze the following code and provide structured feedback for a student preparing for coding interviews.
-
-Problem Topic: {topic}
-
-User's Code:
+DSA_FEEDBACK_PROMPT = """Review this {topic} solution from a student preparing for coding interviews.
+{code_note}
 ```python
 {code}
 ```
+{complexity_hint}
+Reply in exactly this format:
 
-Please provide feedback in the following format:
+1. **Time Complexity**: Current complexity. Is it optimal? If not, give the optimal approach.
 
-1. **Time Complexity**: Analyze the time complexity of the solution. Is it optimal? If not, suggest the optimal approach.
+2. **Space Complexity**: Current complexity and any room for improvement.
 
-2. **Space Complexity**: Analyze the space complexity. Is there room for improvement?
+3. **Edge Cases**: Inputs the code mishandles (empty, single element, invalid input, boundaries).
 
-3. **Edge Cases**: Identify any edge cases the code might not handle properly (empty input, single element, invalid input, boundary conditions, etc.).
-
-4. **Code Quality**: Comment on code readability, variable naming, comments, and general best practices.
+4. **Code Quality**: Readability, naming, comments and best practices.
 
 5. **3-Step Improvement Plan**:
    - Step 1: [First improvement to focus on]
    - Step 2: [Second improvement to focus on]
    - Step 3: [Third improvement to focus on]
 
-Keep feedback constructive, actionable, and under 500 tokens.
+Be constructive and actionable, and stay under {target_tokens} tokens.
 """
+
+# Used with STRUCTURED_OUTPUT: the same review, returned as JSON matching the Feedback schema
+DSA_FEEDBACK_JSON_PROMPT = """Review this {topic} solution from a student preparing for coding interviews.
+{code_note}
+```python
+{code}
+```
+{complexity_hint}
+Reply with a JSON object with these fields:
+
+- "time_complexity": Current complexity. Is it optimal? If not, give the optimal approach.
+- "space_complexity": Current complexity and any room for improvement.
+- "edge_cases": Inputs the code mishandles (empty, single element, invalid input, boundaries).
+- "code_quality": Readability, naming, comments and best practices.
+- "improvement_plan": Exactly three improvements to focus on, most important first.
+
+Be constructive and actionable, and stay under {target_tokens} tokens.
+"""
+
+# Appended to the prompt when static analysis produced an estimate, so the model
+# confirms it briefly instead of deriving the complexity from scratch
+COMPLEXITY_HINT_TEMPLATE = """
+Static analysis estimate: time {time}, space {space}.{notes}
+Treat this as a starting point: confirm it in one sentence if it is correct, and only explain in detail where it is wrong.
+"""
+
+# Tells the model what prompt compaction removed, so it does not fault missing comments
+COMPACTED_CODE_NOTE = "(Removed from the original code to save space: {removed}.)\n"
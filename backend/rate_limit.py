@@ -0,0 +1,465 @@
+"""
+Token-bucket rate limiting with state shared across worker processes.
+
+slowapi keeps its decorators and 429 handling, but hits are checked against a
+token bucket held in a pluggable store: per-process memory, a SQLite database
+in WAL mode (shared by every worker on one host), or Redis (shared across
+hosts). Clients are identified by API key when they send a known one, and by
+IP address otherwise, so instructors with keys get their own quotas.
+
+slowapi checks limits synchronously on the event loop, so shared stores are
+never queried per request: each worker spends from local buckets and a
+background task settles what it spent with the shared store in one batch,
+taking back the shared levels.
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from limits import RateLimitItem
+from limits.strategies import RateLimiter
+from limits.util import WindowStats
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from starlette.requests import Request
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # Redis is only needed for the redis:// store
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+API_KEY_HEADER = "X-API-Key"
+
+# Buckets idle long enough to have refilled completely carry no state and are
+# pruned after this many takes
+_PRUNE_EVERY = 1024
+
+
+class MemoryTokenBuckets:
+    """Token buckets in a dict; limits are per worker process and reset on restart."""
+
+    def __init__(self):
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: dict[str, list[float]] = {}
+        self._takes = 0
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> tuple[bool, float]:
+        """Remove `cost` tokens if available. Returns (allowed, tokens left)."""
+        now = time.time()
+        bucket = self._buckets.get(key)
+        tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = [tokens, now, now + (capacity - tokens) / rate]
+
+        self._takes += 1
+        if self._takes % _PRUNE_EVERY == 0:
+            self._buckets = {k: b for k, b in self._buckets.items() if b[2] > now}
+        return allowed, tokens
+
+    def peek(self, key: str, capacity: float, rate: float) -> float:
+        """Tokens currently available, without consuming any."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return capacity
+        return min(capacity, bucket[0] + (time.time() - bucket[1]) * rate)
+
+    def put(self, key: str, tokens: float, capacity: float, rate: float) -> None:
+        """Set a bucket's level, e.g. to the level a shared store reported."""
+        now = time.time()
+        self._buckets[key] = [tokens, now, now + (capacity - tokens) / rate]
+
+    def clear(self, key: str) -> None:
+        self._buckets.pop(key, None)
+
+    def reset(self) -> None:
+        self._buckets.clear()
+
+    def check(self) -> bool:
+        return True
+
+
+class SQLiteTokenBuckets:
+    """
+    Token buckets in a SQLite database shared by every worker on the host.
+
+    Each take is one UPSERT ... RETURNING statement, so the refill, the check
+    and the decrement happen atomically inside a single implicit transaction.
+    WAL mode with synchronous=NORMAL keeps writers from blocking readers and
+    avoids an fsync per request.
+    """
+
+    _TAKE = """
+        INSERT INTO token_buckets (key, tokens, updated_at, full_at, allowed)
+        VALUES (
+            :key,
+            CASE WHEN :capacity >= :cost THEN :capacity - :cost ELSE :capacity END,
+            :now,
+            CASE WHEN :capacity >= :cost THEN :now + :cost / :rate ELSE :now END,
+            :capacity >= :cost
+        )
+        ON CONFLICT(key) DO UPDATE SET
+            tokens = min(:capacity, tokens + (:now - updated_at) * :rate)
+                - CASE WHEN min(:capacity, tokens + (:now - updated_at) * :rate) >= :cost THEN :cost ELSE 0 END,
+            full_at = :now + (:capacity - min(:capacity, tokens + (:now - updated_at) * :rate)
+                + CASE WHEN min(:capacity, tokens + (:now - updated_at) * :rate) >= :cost THEN :cost ELSE 0 END) / :rate,
+            allowed = min(:capacity, tokens + (:now - updated_at) * :rate) >= :cost,
+            updated_at = :now
+        RETURNING allowed, tokens
+    """
+
+    # Spending already allowed locally is taken unconditionally; overspending
+    # between settlements leaves the bucket in debt (at most one bucketful)
+    _SETTLE = """
+        INSERT INTO token_buckets (key, tokens, updated_at, full_at, allowed)
+        VALUES (:key, max(-:capacity, :capacity - :cost), :now, :now + min(2 * :capacity, :cost) / :rate, 1)
+        ON CONFLICT(key) DO UPDATE SET
+            tokens = max(-:capacity, min(:capacity, tokens + (:now - updated_at) * :rate) - :cost),
+            full_at = :now + (:capacity - max(-:capacity, min(:capacity, tokens + (:now - updated_at) * :rate) - :cost)) / :rate,
+            updated_at = :now
+        RETURNING tokens
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit: every statement is its own transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=1.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "full_at REAL NOT NULL, allowed INTEGER NOT NULL)"
+        )
+        self._takes = 0
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> tuple[bool, float]:
+        """Remove `cost` tokens if available. Returns (allowed, tokens left)."""
+        now = time.time()
+        params = {"key": key, "capacity": float(capacity), "rate": float(rate), "cost": float(cost), "now": now}
+        with self._lock:
+            allowed, tokens = self._conn.execute(self._TAKE, params).fetchone()
+            self._takes += 1
+            if self._takes % _PRUNE_EVERY == 0:
+                self._conn.execute("DELETE FROM token_buckets WHERE full_at <= ?", (now,))
+        return bool(allowed), tokens
+
+    async def settle(self, spent: list[tuple[str, float, float, float]]) -> list[float]:
+        """Take (key, capacity, rate, cost) spending in one transaction, in a worker thread. Returns the levels left."""
+        return await asyncio.to_thread(self._settle, spent)
+
+    def _settle(self, spent: list[tuple[str, float, float, float]]) -> list[float]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                levels = [
+                    self._conn.execute(self._SETTLE, {
+                        "key": key, "capacity": float(capacity), "rate": float(rate), "cost": float(cost), "now": now
+                    }).fetchall()[0][0]
+                    for key, capacity, rate, cost in spent
+                ]
+                self._takes += 1
+                if self._takes % _PRUNE_EVERY == 0:
+                    self._conn.execute("DELETE FROM token_buckets WHERE full_at <= ?", (now,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return levels
+
+    def peek(self, key: str, capacity: float, rate: float) -> float:
+        """Tokens currently available, without consuming any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tokens, updated_at FROM token_buckets WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return capacity
+        return min(capacity, row[0] + (time.time() - row[1]) * rate)
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM token_buckets WHERE key = ?", (key,))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM token_buckets")
+
+    async def purge(self) -> None:
+        """reset() in a worker thread."""
+        await asyncio.to_thread(self.reset)
+
+    def check(self) -> bool:
+        try:
+            with self._lock:
+                self._conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+
+class RedisTokenBuckets:
+    """Token buckets in Redis (or any server speaking its protocol), shared across hosts."""
+
+    # Same arithmetic as SQLiteTokenBuckets._SETTLE, for every key in one round trip
+    _SETTLE = """
+        local now = tonumber(ARGV[1])
+        local levels = {}
+        for i, key in ipairs(KEYS) do
+            local capacity, rate, cost = tonumber(ARGV[3 * i - 1]), tonumber(ARGV[3 * i]), tonumber(ARGV[3 * i + 1])
+            local state = redis.call('HMGET', key, 'tokens', 'ts')
+            local tokens = tonumber(state[1]) or capacity
+            local ts = tonumber(state[2]) or now
+            tokens = math.max(-capacity, math.min(capacity, tokens + math.max(0, now - ts) * rate) - cost)
+            if cost > 0 or state[1] then
+                redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+                redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate * 1000) + 1000)
+            end
+            levels[i] = tostring(tokens)
+        end
+        return levels
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        if aioredis is None:
+            raise RuntimeError("The redis package is required for a redis:// rate limit store")
+        self.prefix = prefix
+        self._client = aioredis.Redis.from_url(url)
+        self._settle = self._client.register_script(self._SETTLE)
+
+    async def settle(self, spent: list[tuple[str, float, float, float]]) -> list[float]:
+        """Take (key, capacity, rate, cost) spending in one script call. Returns the levels left."""
+        args = [time.time()]
+        for _, capacity, rate, cost in spent:
+            args += [capacity, rate, cost]
+        levels = await self._settle(keys=[self.prefix + key for key, *_ in spent], args=args)
+        return [float(level) for level in levels]
+
+    async def purge(self) -> None:
+        """Delete every bucket under the prefix."""
+        keys = [key async for key in self._client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self._client.delete(*keys)
+
+
+class SharedTokenBuckets:
+    """
+    Local token buckets kept in step with a shared store (SQLite or Redis).
+
+    Takes are decided against this worker's copy of each bucket, so the request
+    path never waits on the store. Every `sync_interval` seconds the spending
+    since the last sync is settled with the shared store in one batch and the
+    local copies are set to the shared levels. Workers together can overspend
+    a bucket by what they allow within one interval; the shared bucket carries
+    that as debt, which the refill pays back before more is allowed.
+    """
+
+    def __init__(self, shared, sync_interval: float = 0.2):
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self.syncs = 0
+        self.sync_failures = 0
+        self._local = MemoryTokenBuckets()
+        # Keys used since the last sync: key -> [capacity, rate, tokens spent]
+        self._spent: dict[str, list[float]] = {}
+        self._reset_pending = False
+        self._healthy = True
+        self._task: asyncio.Task | None = None
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> tuple[bool, float]:
+        """Remove `cost` tokens from the local copy if available. Returns (allowed, tokens left)."""
+        allowed, tokens = self._local.take(key, capacity, rate, cost)
+        entry = self._spent.setdefault(key, [capacity, rate, 0.0])
+        if allowed:
+            entry[2] += cost
+        return allowed, tokens
+
+    def peek(self, key: str, capacity: float, rate: float) -> float:
+        """Tokens available in the local copy, without consuming any."""
+        return self._local.peek(key, capacity, rate)
+
+    def clear(self, key: str) -> None:
+        self._local.clear(key)
+
+    def reset(self) -> None:
+        """Refill every bucket; the shared store is reset on the next sync."""
+        self._local.reset()
+        self._spent.clear()
+        self._reset_pending = True
+
+    def check(self) -> bool:
+        """Whether the last sync reached the shared store."""
+        return self._healthy
+
+    async def start(self) -> None:
+        """Start syncing with the shared store on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop syncing and settle what is still unsynced."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sync()
+
+    async def sync(self) -> int:
+        """Settle spending since the last sync and take back the shared levels. Returns the keys synced."""
+        if self._reset_pending:
+            await self.shared.purge()
+            self._reset_pending = False
+        if not self._spent:
+            return 0
+        spent, self._spent = self._spent, {}
+        batch = [(key, capacity, rate, cost) for key, (capacity, rate, cost) in spent.items()]
+        try:
+            levels = await self.shared.settle(batch)
+        except BaseException:
+            # Keep the spending for the next attempt
+            for key, capacity, rate, cost in batch:
+                self._spent.setdefault(key, [capacity, rate, 0.0])[2] += cost
+            raise
+        for (key, capacity, rate, _), level in zip(batch, levels):
+            # Spending allowed while the settlement was in flight is still local
+            since = self._spent.get(key, (0, 0, 0.0))[2]
+            self._local.put(key, level - since, capacity, rate)
+        self.syncs += 1
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+                self._healthy = True
+            except Exception as e:
+                if self._healthy:
+                    logger.error("Failed to sync rate limits: %s: %s", type(e).__name__, e)
+                self._healthy = False
+                self.sync_failures += 1
+
+
+def store_from_uri(uri: str, sync_interval: float = 0.2):
+    """
+    Build a token bucket store from a URI.
+
+    Supported: memory://, sqlite:///path/to/file.db (or sqlite://relative.db),
+    redis://host:port/db and rediss://... SQLite and Redis are wrapped in
+    SharedTokenBuckets, synced every `sync_interval` seconds.
+
+    Raises:
+        ValueError: If the scheme is not supported
+    """
+    parsed = urlparse(uri)
+    if parsed.scheme == "memory":
+        return MemoryTokenBuckets()
+    if parsed.scheme == "sqlite":
+        path = parsed.netloc + parsed.path
+        if not path:
+            raise ValueError("sqlite:// rate limit store needs a database path")
+        return SharedTokenBuckets(SQLiteTokenBuckets(path), sync_interval)
+    if parsed.scheme in ("redis", "rediss"):
+        return SharedTokenBuckets(RedisTokenBuckets(uri), sync_interval)
+    raise ValueError(f"Unsupported rate limit store '{uri}'")
+
+
+class TokenBucketRateLimiter(RateLimiter):
+    """
+    limits strategy backed by a token bucket store.
+
+    A limit such as "10/minute" becomes a bucket holding 10 tokens that
+    refills at 10 tokens per minute, so clients may burst up to the limit and
+    are then paced at the average rate.
+    """
+
+    def __init__(self, store):
+        # The base class insists on a limits Storage; the store has its own interface
+        self.storage = store
+
+    @staticmethod
+    def _shape(item: RateLimitItem) -> tuple[float, float]:
+        return float(item.amount), item.amount / item.get_expiry()
+
+    def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        capacity, rate = self._shape(item)
+        allowed, _ = self.storage.take(item.key_for(*identifiers), capacity, rate, cost)
+        return allowed
+
+    def test(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        capacity, rate = self._shape(item)
+        return self.storage.peek(item.key_for(*identifiers), capacity, rate) >= cost
+
+    def get_window_stats(self, item: RateLimitItem, *identifiers: str) -> WindowStats:
+        capacity, rate = self._shape(item)
+        tokens = self.storage.peek(item.key_for(*identifiers), capacity, rate)
+        # "Reset" is when the next whole token becomes available
+        wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+        return WindowStats(time.time() + wait, int(tokens))
+
+
+class TokenBucketLimiter(Limiter):
+    """
+    slowapi Limiter that checks limits against a shared token bucket store.
+
+    If the store fails, slowapi falls back to in-process limits until the
+    store recovers.
+    """
+
+    def __init__(self, store, **kwargs):
+        kwargs.setdefault("in_memory_fallback_enabled", True)
+        super().__init__(**kwargs)
+        # slowapi has no public hook for custom strategies; these are the two
+        # attributes it consults for hits, headers, reset() and health checks
+        self._storage = store
+        self._limiter = TokenBucketRateLimiter(store)
+        self.store = store
+
+
+def api_key_id(api_key: str) -> str:
+    """Stable, non-reversible identifier for an API key, used as its bucket key."""
+    return "apikey:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_api_key_quotas(spec: str) -> dict[str, str]:
+    """
+    Parse "key=limit" pairs separated by commas, e.g. "k1=100/minute,k2=20/minute".
+
+    Returns:
+        dict: api_key_id(key) -> limit string
+
+    Raises:
+        ValueError: If an entry has no key or limit
+    """
+    quotas = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, _, limit = part.partition("=")
+        if not key.strip() or not limit.strip():
+            raise ValueError("Invalid API key quota entry (expected key=limit)")
+        quotas[api_key_id(key.strip())] = limit.strip()
+    return quotas
+
+
+def client_key_func(quotas: dict[str, str]):
+    """Rate-limit key function: the API key's id for known keys, else the client IP."""
+    def key_func(request: Request) -> str:
+        api_key = request.headers.get(API_KEY_HEADER)
+        if api_key:
+            key_id = api_key_id(api_key)
+            if key_id in quotas:
+                return key_id
+        return get_remote_address(request)
+    return key_func
@@ -0,0 +1,88 @@
+"""
+Startup warm-up tracking for the readiness probe.
+
+A process answers liveness checks (GET /) as soon as the app is imported, but
+until it has loaded the problem bank, imported the model SDK, built its client,
+opened upstream connections and run the parsers once, early requests would
+pay for all of that. Those steps run as named phases of a background warm-up
+after startup; Readiness times each one and GET /ready reports 503 until
+every phase has finished, so a load balancer only routes traffic to warm
+processes. A phase that fails is recorded but does not hold readiness back:
+the process can still serve what does not depend on it, as it did before.
+"""
+
+import inspect
+import logging
+import time
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Warm-up phases of one process and how long each took."""
+
+    def __init__(self, phases: Iterable[str]):
+        self.phases = list(phases)
+        self.pending = list(self.phases)
+        self.durations: dict[str, float] = {}
+        self.failures: dict[str, str] = {}
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.draining = False
+
+    @property
+    def ready(self) -> bool:
+        return self.started_at is not None and not self.pending and not self.draining
+
+    def begin(self) -> None:
+        """Start (or restart) the warm-up: every phase is pending again."""
+        self.pending = list(self.phases)
+        self.durations.clear()
+        self.failures.clear()
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.draining = False
+
+    async def run(self, phase: str, warm: Callable[[], Any]) -> Any:
+        """
+        Run one phase and mark it done.
+
+        `warm` may be a plain or an async function. Exceptions are logged and
+        recorded rather than raised, so later phases still run.
+        """
+        started = time.perf_counter()
+        try:
+            result = warm()
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except Exception as e:
+            logger.error("Warm-up phase %s failed: %s: %s", phase, type(e).__name__, e)
+            self.failures[phase] = f"{type(e).__name__}: {e}"
+            return None
+        finally:
+            self.durations[phase] = (time.perf_counter() - started) * 1000
+            if phase in self.pending:
+                self.pending.remove(phase)
+            if not self.pending and self.started_at is not None and self.finished_at is None:
+                self.finished_at = time.perf_counter()
+                logger.info("Ready after %.0fms of warm-up", (self.finished_at - self.started_at) * 1000)
+
+    def drain(self) -> None:
+        """Report not ready from now on, so traffic moves away while the process shuts down."""
+        self.draining = True
+
+    def stats(self) -> dict:
+        """Readiness, pending phases and per-phase timings for the readiness endpoint."""
+        warmup_ms = None
+        if self.started_at is not None and self.finished_at is not None:
+            warmup_ms = round((self.finished_at - self.started_at) * 1000, 1)
+        return {
+            "ready": self.ready,
+            "draining": self.draining,
+            "pending": list(self.pending) if self.started_at is not None else list(self.phases),
+            "phases_ms": {phase: round(ms, 1) for phase, ms in self.durations.items()},
+            "failed": dict(self.failures),
+            "warmup_ms": warmup_ms,
+        }
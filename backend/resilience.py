@@ -0,0 +1,405 @@
+"""
+Failure handling for upstream model calls.
+
+ResilientCaller wraps a single model call with an overall deadline, bounded
+retries (exponential backoff with full jitter, retryable errors only), a
+circuit breaker that fails fast while the upstream is unhealthy, and
+optional hedging: when a call runs past a latency percentile, a second
+identical call is started and whichever finishes first wins. Streams get the
+same deadline and breaker accounting from opening to the last chunk.
+"""
+
+import asyncio
+import logging
+import random
+import sys
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+from concurrency import UpstreamLimiter
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Status codes worth retrying: request timeout, conflict, rate limiting and server errors
+_RETRYABLE_STATUS = {408, 409, 429}
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised without calling the upstream while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream circuit is open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class UpstreamTimeoutError(Exception):
+    """Raised when a call does not finish within its deadline."""
+
+
+def loaded_openai():
+    """
+    The openai module if something has imported it, else None.
+
+    The SDK takes about half a second to import, so it is only imported when
+    the model client is built. Its errors cannot exist before that, which lets
+    error classification skip them without forcing the import.
+    """
+    return sys.modules.get("openai")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for transient failures: timeouts, connection errors, 408/409/429 and 5xx."""
+    if isinstance(error, UpstreamTimeoutError):
+        return True
+    openai = loaded_openai()
+    if openai is None:
+        return False
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in _RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    True if the error says something about upstream health.
+
+    Client errors such as 400 or 422 mean our request was bad and do not count
+    against the breaker; everything else does.
+    """
+    openai = loaded_openai()
+    if openai is not None and isinstance(error, openai.APIStatusError):
+        return is_retryable(error) or error.status_code in (401, 403)
+    return True
+
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """The Retry-After header of a failed API response, if it has a numeric one."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are rejected for `reset_timeout` seconds. Then one probe call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.reset()
+
+    def reset(self) -> None:
+        """Close the circuit and clear counters."""
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected without a probe."""
+        return self.state == OPEN
+
+    def before_call(self) -> None:
+        """Admit a call, or raise UpstreamUnavailableError if the circuit is open."""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise UpstreamUnavailableError(self.retry_after())
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed."""
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        if self._state != CLOSED:
+            logger.info("Upstream circuit closed")
+        self._state = CLOSED
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        was_probe = self._probing
+        self._probing = False
+        if was_probe or (self._state == CLOSED and self._failures >= self.failure_threshold):
+            if self._state == CLOSED:
+                self.times_opened += 1
+                logger.warning("Upstream circuit opened after %d consecutive failures", self._failures)
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Forget an admitted call that ended without an outcome (e.g. it was cancelled)."""
+        self._probing = False
+
+    def stats(self) -> dict:
+        """Snapshot of breaker state for health endpoints."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "retry_after": round(self.retry_after(), 1),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class RetryPolicy:
+    """Bounded retries with exponential backoff and full jitter."""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0, rng: random.Random | None = None):
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._random = rng or random.Random()
+
+    def backoff(self, retry: int, error: BaseException | None = None) -> float:
+        """Delay before retry number `retry` (0-based), honouring a Retry-After header."""
+        delay = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        retry_after = retry_after_seconds(error) if error is not None else None
+        return max(delay, retry_after) if retry_after is not None else delay
+
+
+class ResilientCaller:
+    """
+    Runs upstream calls under a deadline, retry policy, circuit breaker and optional hedging.
+
+    Hedging is enabled by `hedge_percentile` (e.g. 95): once `hedge_min_samples`
+    successful latencies are known, a call still running after that percentile
+    gets a duplicate, limited to `hedge_budget` of all calls so hedges cannot
+    double the load during a slowdown. With a `limiter`, a hedge also needs a
+    free slot of its own and is skipped when none is, so hedging never pushes
+    in-flight calls past the limiter's cap. Calls made with hedge=False and
+    streams feed neither the latency percentile nor the budget.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        retry: RetryPolicy,
+        deadline: float = 60.0,
+        attempt_timeout: float | None = None,
+        hedge_percentile: float = 0.0,
+        hedge_min_samples: int = 20,
+        hedge_budget: float = 0.1,
+        latency_window: int = 200,
+        limiter: UpstreamLimiter | None = None
+    ):
+        self.breaker = breaker
+        self.retry = retry
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_budget = hedge_budget
+        self.limiter = limiter
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._hedge_delay: float | None = None
+        self._samples_since_estimate = 0
+        self._hedgeable_calls = 0
+        self.calls = self.retries = self.hedges = self.hedge_wins = self.timeouts = 0
+
+    async def call(self, fn: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+        """
+        Call fn() until it succeeds, fails permanently or the deadline passes.
+
+        Raises:
+            UpstreamUnavailableError: The circuit breaker is open
+            UpstreamTimeoutError: The deadline passed
+            Exception: The last error from fn() when it is not retryable or retries ran out
+        """
+        self.calls += 1
+        if hedge:
+            self._hedgeable_calls += 1
+        return await self._call(fn, asyncio.get_running_loop().time() + self.deadline, hedge)
+
+    async def stream(self, fn: Callable[[], Awaitable[AsyncIterator[T]]]) -> AsyncIterator[T]:
+        """
+        Open a stream with fn() and yield its items, all within one deadline.
+
+        Only opening is retried, since items already yielded cannot be taken
+        back. The breaker records the outcome of the whole stream, so a stream
+        that breaks off or stalls after opening counts as a failure.
+
+        Raises:
+            UpstreamUnavailableError: The circuit breaker is open
+            UpstreamTimeoutError: The stream did not finish within the deadline
+            Exception: An error from opening or reading the stream
+        """
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        items = (await self._call(fn, deadline, hedge=False, settle=False)).__aiter__()
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(items.__anext__(), deadline - loop.time())
+                except StopAsyncIteration:
+                    break
+                yield item
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.breaker.record_failure()
+            raise UpstreamTimeoutError(f"Upstream stream exceeded its {self.deadline:.1f}s deadline") from None
+        except Exception as error:
+            if is_upstream_failure(error):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            # Closed early by the consumer (e.g. the client disconnected)
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+
+    async def _call(self, fn: Callable[[], Awaitable[T]], deadline: float, hedge: bool, settle: bool = True) -> T:
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retry.attempts):
+            remaining = deadline - loop.time()
+            timeout = min(remaining, self.attempt_timeout) if self.attempt_timeout else remaining
+            try:
+                return await self._attempt(fn, timeout, hedge, settle)
+            except Exception as error:
+                if attempt + 1 >= self.retry.attempts or not is_retryable(error):
+                    raise
+                delay = self.retry.backoff(attempt, error)
+                if loop.time() + delay >= deadline:
+                    raise
+                self.retries += 1
+                logger.warning(
+                    "Retrying upstream call in %.2fs after %s (attempt %d of %d)",
+                    delay, type(error).__name__, attempt + 2, self.retry.attempts
+                )
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], timeout: float, hedge: bool, settle: bool) -> T:
+        """One call under the breaker; with settle=False a success is left for the caller to record."""
+        self.breaker.before_call()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self._hedged(fn) if hedge else fn(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.breaker.record_failure()
+            raise UpstreamTimeoutError(f"Upstream call exceeded its {timeout:.1f}s deadline") from None
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as error:
+            if is_upstream_failure(error):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        if settle:
+            self.breaker.record_success()
+        if hedge:
+            self._observe(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]]) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await fn()
+
+        first = asyncio.ensure_future(fn())
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.hedges < self.hedge_budget * self._hedgeable_calls and await self._hedge_slot():
+                self.hedges += 1
+                hedge = asyncio.ensure_future(fn())
+                if self.limiter is not None:
+                    # A done callback also runs if the hedge is cancelled before it starts
+                    hedge.add_done_callback(lambda _: self.limiter.release())
+                tasks.add(hedge)
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _hedge_slot(self) -> bool:
+        return self.limiter is None or await self.limiter.try_acquire()
+
+    def hedge_delay(self) -> float | None:
+        """Latency after which a hedge is sent, or None while hedging is off or still learning."""
+        if not self.hedge_percentile or len(self._latencies) < self.hedge_min_samples:
+            return None
+        if self._hedge_delay is None or self._samples_since_estimate >= 16:
+            ordered = sorted(self._latencies)
+            index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+            self._hedge_delay = ordered[index]
+            self._samples_since_estimate = 0
+        return self._hedge_delay
+
+    def _observe(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._samples_since_estimate += 1
+
+    def reset(self) -> None:
+        """Clear breaker state, latency history and counters."""
+        self.breaker.reset()
+        self._latencies.clear()
+        self._hedge_delay = None
+        self._samples_since_estimate = 0
+        self._hedgeable_calls = 0
+        self.calls = self.retries = self.hedges = self.hedge_wins = self.timeouts = 0
+
+    def stats(self) -> dict:
+        """Breaker state plus retry, timeout and hedging counters for health endpoints."""
+        delay = self.hedge_delay()
+        return {
+            **self.breaker.stats(),
+            "calls": self.calls,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_after_ms": round(delay * 1000, 1) if delay is not None else None,
+        }
@@ -0,0 +1,235 @@
+"""
+Non-blocking structured logging.
+
+Request handlers only put records on an in-memory queue; a background
+QueueListener thread formats them as JSON and writes them to the console and a
+rotating log file. Each record carries the id of the request that produced it,
+and high-volume lines can be sampled before they are ever queued.
+"""
+
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import time
+import uuid
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Id of the request being handled by the current task, if any
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "sample_key"
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", "-")
+        if request_id != "-":
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id while still on the request's task."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of records whose message starts with a configured prefix.
+
+    Sampling is deterministic (every Nth matching record is kept) and lock-free.
+    Warnings and errors are never sampled.
+
+    Prefixes are matched against the message template (record.msg), so the
+    filter never formats a message on the logging thread. A record can supply
+    a different key with extra={"sample_key": ...}; access lines use
+    "METHOD path status".
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rules = [
+            (prefix, max(1, round(1 / rate)) if rate > 0 else 0, itertools.count())
+            for prefix, rate in rates.items()
+        ]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rules:
+            return True
+        key = getattr(record, "sample_key", None) or record.msg
+        if not isinstance(key, str):
+            return True
+        for prefix, every, counter in self.rules:
+            if key.startswith(prefix):
+                return every > 0 and next(counter) % every == 0
+        return True
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """
+    Parse "prefix:rate" pairs separated by commas, e.g. "Health check requested:0.01".
+
+    Raises:
+        ValueError: If a rate is not a number between 0 and 1
+    """
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        prefix, _, rate = part.rpartition(":")
+        value = float(rate)
+        if not prefix or not 0 <= value <= 1:
+            raise ValueError(f"Invalid log sampling rule '{part}'")
+        rates[prefix] = value
+    return rates
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers all formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves this process, so the record does not need to be
+        # pickled: skip QueueHandler's eager formatting on the caller's thread
+        return record
+
+
+class _BackgroundWriter(logging.handlers.QueueListener):
+    """QueueListener whose stop() is safe to call more than once (e.g. again at exit)."""
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+
+def configure_logging(
+    level: str = "INFO",
+    log_file: str | None = "api.log",
+    json_format: bool = True,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    rotate_when: str | None = None,
+    sample_rates: dict[str, float] | None = None,
+) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue drained by a background thread.
+
+    Args:
+        level: Root log level
+        log_file: Log file path, or None/"" to log to the console only
+        json_format: Emit JSON lines instead of plain text
+        max_bytes: Rotate the log file at this size (ignored with rotate_when)
+        backup_count: Rotated files to keep
+        rotate_when: Time-based rotation interval such as "midnight" or "H"
+        sample_rates: Message prefix -> fraction of matching INFO records to keep
+
+    Returns:
+        The started QueueListener; it is stopped (flushing queued records) at exit
+    """
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        if rotate_when:
+            handlers.append(logging.handlers.TimedRotatingFileHandler(
+                log_file, when=rotate_when, backupCount=backup_count, encoding="utf-8"
+            ))
+        else:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    enqueue = _EnqueueHandler(log_queue)
+    enqueue.addFilter(RequestIdFilter())
+    if sample_rates:
+        enqueue.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(enqueue)
+    root.setLevel(level.upper())
+
+    listener = _BackgroundWriter(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware that assigns each request an id and logs its timing.
+
+    The id comes from an incoming X-Request-ID header when present, is echoed
+    back in the response and is attached to every record logged while the
+    request is handled. The access line is logged once the response body has
+    been fully sent, so streamed responses report their full duration.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", ())) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration_ms = round((time.perf_counter() - start) * 1000, 2)
+            logger.info(
+                "%s %s %s %.2fms", scope["method"], scope["path"], status, duration_ms,
+                extra={
+                    "method": scope["method"], "path": scope["path"], "status": status, "duration_ms": duration_ms,
+                    "sample_key": f"{scope['method']} {scope['path']} {status}",
+                },
+            )
+            request_id_var.reset(token)
@@ -0,0 +1,96 @@
+"""
+Shared pytest fixtures for backend tests.
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# Keep attempt history and jobs out of the working directory
+os.environ.setdefault("ATTEMPTS_DB", ":memory:")
+os.environ.setdefault("JOBS_DB", ":memory:")
+# Log to the console only, so test runs leave no log files behind
+os.environ.setdefault("LOG_FILE", "")
+# Tests only judge their own code, so the opt-in judge can run
+os.environ.setdefault("JUDGE_ENABLED", "true")
+
+import main
+
+SAMPLE_FEEDBACK = """1. **Time Complexity**: O(n) - a single pass over the array.
+
+2. **Space Complexity**: O(1) extra space.
+
+3. **Edge Cases**: Empty array and k larger than the array are not handled.
+
+4. **Code Quality**: Clear variable names, consider adding comments.
+
+5. **3-Step Improvement Plan**:
+   - Step 1: Validate k against the array length
+   - Step 2: Handle empty input
+   - Step 3: Add tests for negative numbers
+"""
+
+
+async def _stream_chunks(content: str, chunk_size: int):
+    """Yield content as streamed completion chunks."""
+    for start in range(0, len(content), chunk_size):
+        delta = SimpleNamespace(content=content[start:start + chunk_size])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class FakeCompletions:
+    """Stand-in for client.chat.completions that records calls."""
+
+    def __init__(self, content: str = SAMPLE_FEEDBACK, delay: float = 0.0, error: Exception = None,
+                 chunk_size: int = 7, usage: SimpleNamespace = None):
+        self.content = content
+        self.usage = usage
+        self.delay = delay
+        self.error = error
+        self.chunk_size = chunk_size
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        if kwargs.get("stream"):
+            return _stream_chunks(self.content, self.chunk_size)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=self.usage)
+
+
+class FakeAsyncClient:
+    """Minimal AsyncOpenAI look-alike used to exercise /analyze offline."""
+
+    def __init__(self, **kwargs):
+        self.chat = SimpleNamespace(completions=FakeCompletions(**kwargs))
+
+
+@pytest.fixture(autouse=True)
+def reset_app_state():
+    """Clear rate limits, cached feedback, attempts, jobs, breaker, router and profiler state so tests stay independent."""
+    main.limiter.reset()
+    main.feedback_cache.clear()
+    if main.near_duplicates is not None:
+        main.near_duplicates.clear()
+    main.attempt_store.clear()
+    main.job_queue.clear()
+    for caller in main.upstream_callers.values():
+        caller.reset()
+    main.model_router.reset()
+    main.profiler.configure(0.0)
+    main.profiler.reset()
+    yield
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """Install a fake model client on the app and return it."""
+    fake = FakeAsyncClient()
+    monkeypatch.setattr(main, "client", fake)
+    return fake
@@ -0,0 +1,112 @@
+"""
+Tests for the attempt history and dashboard aggregates.
+Run with: pytest tests/test_attempt_store.py
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from attempt_store import AttemptStore
+from main import app
+
+client = TestClient(app)
+
+CODE = "def f(arr):\n    return sum(arr)\n"
+
+
+def record_and_flush(store: AttemptStore, attempts: list[dict]) -> int:
+    for attempt in attempts:
+        store.record(**attempt)
+    return asyncio.run(store.flush())
+
+
+class TestAttemptStore:
+    """Tests for batching and incremental aggregates."""
+
+    def test_aggregates_per_user_and_topic(self):
+        """Counters are folded in per user and for everyone together."""
+        store = AttemptStore(":memory:", batch_size=2)
+        written = record_and_flush(store, [
+            dict(user_id="u1", topic="array", code=CODE, problem_id="p1", verdict="wrong_answer", duration_ms=10),
+            dict(user_id="u1", topic="array", code=CODE, problem_id="p1", verdict="accepted", duration_ms=30),
+            dict(user_id="u1", topic="graph", code=CODE),
+            dict(user_id="u2", topic="array", code=CODE, problem_id="p1", verdict="accepted"),
+        ])
+        assert written == 4 and store.stats()["pending"] == 0
+
+        u1 = store.summary("u1")
+        assert (u1["attempts"], u1["solved"]) == (3, 1)
+        array = next(t for t in u1["topics"] if t["topic"] == "array")
+        assert (array["attempts"], array["judged"], array["accepted"], array["avg_duration_ms"]) == (2, 2, 1, 20)
+
+        # Across users, "solved" counts distinct problems
+        everyone = store.summary()
+        assert (everyone["attempts"], everyone["solved"]) == (4, 1)
+        assert store.summary("nobody") == {
+            "attempts": 0, "solved": 0, "first_attempt_at": None, "last_attempt_at": None, "topics": []
+        }
+
+    def test_solving_a_problem_again_counts_once(self):
+        """Only the first accepted submission of a problem increases "solved"."""
+        store = AttemptStore(":memory:")
+        accepted = dict(user_id="u1", topic="array", code=CODE, problem_id="p1", verdict="accepted")
+        record_and_flush(store, [accepted])
+        record_and_flush(store, [accepted, accepted])
+        assert store.summary("u1")["solved"] == 1
+        assert store.summary("u1")["attempts"] == 3
+
+    def test_overflow_drops_oldest_pending(self):
+        """A writer that falls behind drops old attempts instead of growing without bound."""
+        store = AttemptStore(":memory:", max_pending=2)
+        written = record_and_flush(store, [dict(user_id="u1", topic="array", code=CODE)] * 3)
+        assert written == 2
+        assert store.stats()["dropped"] == 1
+
+    def test_background_writer_flushes_batches(self):
+        """Once started, pending attempts are written without an explicit flush."""
+        async def run():
+            store = AttemptStore(":memory:", batch_size=2, flush_interval=5)
+            await store.start()
+            store.record("u1", "array", CODE)
+            store.record("u1", "array", CODE)
+            for _ in range(100):
+                if store.stats()["written"] == 2:
+                    break
+                await asyncio.sleep(0.01)
+            await store.close()
+            return store.stats()
+
+        assert asyncio.run(run())["written"] == 2
+
+
+class TestDashboardEndpoint:
+    """Tests for recording from /analyze and reading /dashboard."""
+
+    def test_analysis_is_recorded_for_dashboard(self, fake_client):
+        """Attempts from /analyze show up in the user's dashboard after a flush."""
+        body = {"code": CODE, "topic": "array", "user_id": "student-1"}
+        assert client.post("/analyze", json=body).status_code == 200
+        assert client.post("/analyze", json={**body, "mode": "fast"}).status_code == 200
+        asyncio.run(main.attempt_store.flush())
+
+        data = client.get("/dashboard", params={"user_id": "student-1"}).json()
+        assert data["total_attempts"] == 2
+        assert data["readiness"] == "Beginner"
+        assert [t["topic"] for t in data["topics"]] == ["array"]
+        assert data["topics"][0]["acceptance_rate"] is None
+        assert client.get("/dashboard").json()["total_attempts"] == 2
+
+    def test_weak_topics_have_low_acceptance(self):
+        """Weak topics are judged topics accepted less than half of the time."""
+        store = main.attempt_store
+        record_and_flush(store, [
+            dict(user_id="u1", topic="graph", code=CODE, problem_id="g", verdict="wrong_answer"),
+            dict(user_id="u1", topic="tree", code=CODE, problem_id="t", verdict="accepted"),
+            dict(user_id="u1", topic="array", code=CODE),
+        ])
+        assert client.get("/dashboard", params={"user_id": "u1"}).json()["weak_topics"] == ["graph"]
+
+    def test_invalid_user_id_rejected(self):
+        assert client.get("/dashboard", params={"user_id": "../etc"}).status_code == 422
@@ -0,0 +1,78 @@
+"""
+Tests for the bulk grading endpoint.
+Run with: pytest tests/test_batch.py
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from rate_limit import api_key_id
+from tests.conftest import FakeAsyncClient
+
+client = TestClient(app)
+
+CODE = "def max_sum(arr, k):\n    return max(sum(arr[i:i + k]) for i in range(len(arr) - k + 1))"
+
+
+def item(item_id: str, code: str = CODE, **extra) -> dict:
+    return {"id": item_id, "code": code, "topic": "sliding window", **extra}
+
+
+def read_lines(response) -> dict:
+    """Parse an NDJSON body into a dict keyed by item id."""
+    return {line["id"]: line for line in map(json.loads, response.text.splitlines())}
+
+
+class TestBatchEndpoint:
+    """Tests for POST /analyze/batch."""
+
+    def test_streams_one_line_per_item(self, fake_client):
+        """Every item gets a tagged NDJSON result."""
+        items = [item(f"student-{i}", CODE + f"\n# variant {i}\nx = {i}") for i in range(5)]
+        response = client.post("/analyze/batch", json={"items": items})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        results = read_lines(response)
+        assert set(results) == {f"student-{i}" for i in range(5)}
+        assert all(result["success"] for result in results.values())
+        assert results["student-0"]["feedback"]["time_complexity"].startswith("O(n)")
+
+    def test_duplicates_are_analyzed_once(self, fake_client):
+        """Submissions that differ only in comments share one model call."""
+        items = [item("a"), item("b", CODE + "  # same thing"), item("c", CODE.replace("arr", "nums"))]
+        response = client.post("/analyze/batch", json={"items": items})
+        assert response.headers["X-Batch-Unique"] == "2"
+        assert len(read_lines(response)) == 3
+        assert len(fake_client.chat.completions.calls) == 2
+
+    def test_partial_failures_reported_per_item(self, monkeypatch):
+        """A failing model call fails only its items; fast-mode items still succeed."""
+        monkeypatch.setattr(main, "client", FakeAsyncClient(error=Exception("Request timeout")))
+        response = client.post("/analyze/batch", json={"items": [item("full"), item("fast", mode="fast")]})
+        assert response.status_code == 200
+        results = read_lines(response)
+        assert results["full"]["success"] is False
+        assert "timed out" in results["full"]["error"]
+        assert results["fast"]["success"] is True
+
+    def test_unique_items_are_charged_to_the_analysis_quota(self, fake_client, monkeypatch):
+        """Each unique submission costs one analysis; a batch the quota cannot cover is refused."""
+        items = [item(f"student-{i}", CODE + f"\nx = {i}") for i in range(11)]
+        response = client.post("/analyze/batch", json={"items": items})
+        assert response.status_code == 429
+        assert fake_client.chat.completions.calls == []
+
+        monkeypatch.setitem(main.API_KEY_QUOTAS, api_key_id("instructor"), "20/minute")
+        headers = {"X-API-Key": "instructor"}
+        assert client.post("/analyze/batch", json={"items": items}, headers=headers).status_code == 200
+        assert client.post("/analyze/batch", json={"items": items}, headers=headers).status_code == 429
+
+    def test_rejects_duplicate_ids_and_empty_batches(self):
+        """Ids must be unique and a batch needs at least one item."""
+        response = client.post("/analyze/batch", json={"items": [item("a"), item("a")]})
+        assert response.status_code == 422
+        response = client.post("/analyze/batch", json={"items": []})
+        assert response.status_code == 422
@@ -0,0 +1,130 @@
+"""
+Tests for the static complexity estimator and fast analysis mode.
+Run with: pytest tests/test_complexity.py
+"""
+
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from complexity import estimate_complexity
+from main import app
+
+client = TestClient(app)
+
+NAIVE_WINDOW = """
+def max_sum_subarray(arr, k):
+    best = 0
+    for i in range(len(arr) - k + 1):
+        best = max(best, sum(arr[i:i + k]))
+    return best
+"""
+
+SLIDING_WINDOW = """
+def max_sum_subarray(arr, k):
+    window = sum(arr[:k])
+    best = window
+    for i in range(k, len(arr)):
+        window += arr[i] - arr[i - k]
+        best = max(best, window)
+    return best
+"""
+
+
+class TestEstimateComplexity:
+    """Tests for estimate_complexity."""
+
+    def test_hidden_slice_cost_in_loop(self):
+        """sum() over a slice inside a loop adds a factor of n and is called out."""
+        estimate = estimate_complexity(NAIVE_WINDOW)
+        assert estimate.time == "O(n^2)"
+        assert any("arr[i:i + k]" in note for note in estimate.notes)
+
+    def test_sliding_window_is_linear(self):
+        """A slice consumed once by sum() outside the loop keeps the solution linear."""
+        estimate = estimate_complexity(SLIDING_WINDOW)
+        assert (estimate.time, estimate.space) == ("O(n)", "O(1)")
+
+    def test_loops_and_searches(self):
+        """Nested loops, constant ranges and halving while-loops."""
+        nested = "def f(a):\n    for i in range(len(a)):\n        for j in range(i):\n            pass\n"
+        constant = "def f(a):\n    for d in range(4):\n        for x in a:\n            pass\n"
+        binary = (
+            "def f(a, t):\n    lo, hi = 0, len(a) - 1\n    while lo <= hi:\n"
+            "        mid = (lo + hi) // 2\n        if a[mid] < t:\n            lo = mid + 1\n"
+            "        else:\n            hi = mid - 1\n    return -1\n"
+        )
+        assert estimate_complexity(nested).time == "O(n^2)"
+        assert estimate_complexity(constant).time == "O(n)"
+        assert estimate_complexity(binary).time == "O(log n)"
+
+    def test_recursion(self):
+        """Branching recursion is exponential unless memoized; halving recursion is n log n."""
+        fib = "def fib(n):\n    if n < 2:\n        return n\n    return fib(n - 1) + fib(n - 2)\n"
+        memo = "from functools import cache\n@cache\n" + fib
+        merge = (
+            "def sort(a):\n    if len(a) < 2:\n        return a\n    mid = len(a) // 2\n"
+            "    left, right = sort(a[:mid]), sort(a[mid:])\n    return left + right\n"
+        )
+        assert estimate_complexity(fib).time == "O(2^n)"
+        assert estimate_complexity(fib).space == "O(n)"
+        assert estimate_complexity(memo).time == "O(n)"
+        assert estimate_complexity(merge).time == "O(n log n)"
+
+    def test_container_growth_and_membership(self):
+        """Appending in a loop grows space; list membership is linear, set membership is not."""
+        with_list = "def f(a):\n    seen = []\n    for x in a:\n        if x in seen:\n            return True\n        seen.append(x)\n"
+        with_set = with_list.replace("[]", "set()").replace("append", "add")
+        assert (estimate_complexity(with_list).time, estimate_complexity(with_list).space) == ("O(n^2)", "O(n)")
+        assert (estimate_complexity(with_set).time, estimate_complexity(with_set).space) == ("O(n)", "O(n)")
+
+    def test_solution_class_and_invalid_code(self):
+        """Methods of a Solution class are analyzed; unparsable code gives None."""
+        assert estimate_complexity("class Solution:\n    def f(self, a):\n        return sorted(a)\n").time == "O(n log n)"
+        assert estimate_complexity("def broken(:\n    pass") is None
+
+    def test_deeply_nested_code(self):
+        """Code that exhausts the parser's or analyzer's stack gives None instead of raising."""
+        assert estimate_complexity("a" + ".b" * 4990) is None
+        assert estimate_complexity("-" * 9990 + "1") is None
+
+    def test_is_fast(self):
+        """Estimation stays well under a millisecond per submission."""
+        start = time.perf_counter()
+        for _ in range(200):
+            estimate_complexity(NAIVE_WINDOW)
+        assert (time.perf_counter() - start) / 200 < 0.005
+
+
+class TestComplexityInAnalysis:
+    """Tests for fast mode and prompt hints on /analyze."""
+
+    def test_fast_mode_skips_the_model(self, fake_client):
+        """Fast mode answers the complexity fields without an upstream call."""
+        response = client.post("/analyze", json={"code": NAIVE_WINDOW, "topic": "sliding window", "mode": "fast"})
+        assert response.status_code == 200
+        feedback = response.json()["feedback"]
+        assert feedback["time_complexity"].startswith("O(n^2)")
+        assert feedback["edge_cases"] == main.FAST_MODE_SKIPPED
+        assert fake_client.chat.completions.calls == []
+
+    def test_fast_mode_survives_deeply_nested_code(self, fake_client):
+        """Fast mode reports that it could not estimate instead of failing."""
+        response = client.post("/analyze", json={"code": "-" * 9990 + "1", "topic": "array", "mode": "fast"})
+        assert response.status_code == 200
+        assert response.json()["feedback"]["time_complexity"].startswith("Could not estimate")
+
+    def test_fast_mode_works_without_ai_client(self, monkeypatch):
+        """Fast mode does not need GITHUB_TOKEN."""
+        monkeypatch.setattr(main, "client", None)
+        response = client.post("/analyze", json={"code": SLIDING_WINDOW, "topic": "sliding window", "mode": "fast"})
+        assert response.status_code == 200
+        assert response.json()["feedback"]["space_complexity"].startswith("O(1)")
+
+    def test_full_mode_prompt_includes_hint(self, fake_client):
+        """The static estimate is injected into the model prompt."""
+        response = client.post("/analyze", json={"code": NAIVE_WINDOW, "topic": "sliding window"})
+        assert response.status_code == 200
+        prompt = fake_client.chat.completions.calls[0]["messages"][1]["content"]
+        assert "Static analysis estimate: time O(n^2)" in prompt
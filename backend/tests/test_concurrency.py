@@ -0,0 +1,204 @@
+"""
+Unit tests for the upstream concurrency limiter.
+Run with: pytest tests/test_concurrency.py
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from concurrency import SingleFlight, UpstreamLimiter, UpstreamBusyError, map_unordered
+from main import app
+from tests.conftest import FakeAsyncClient
+
+client = TestClient(app)
+
+
+class TestUpstreamLimiter:
+    """Tests for UpstreamLimiter."""
+
+    def test_caps_in_flight_calls(self):
+        """Never more than max_concurrency calls run at once."""
+        limiter = UpstreamLimiter(max_concurrency=2, max_queue=10)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*(work() for _ in range(6)))
+
+        asyncio.run(run())
+        assert peak == 2
+        assert limiter.in_flight == 0
+        assert limiter.queue_depth == 0
+
+    def test_rejects_when_queue_full(self):
+        """Callers beyond max_queue are rejected immediately."""
+        limiter = UpstreamLimiter(max_concurrency=1, max_queue=1)
+
+        async def run():
+            release = asyncio.Event()
+
+            async def hold():
+                async with limiter:
+                    await release.wait()
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            assert limiter.queue_depth == 1
+
+            with pytest.raises(UpstreamBusyError):
+                await limiter.acquire()
+
+            release.set()
+            await holder
+            await waiter
+            limiter.release()
+
+        asyncio.run(run())
+
+    def test_queue_timeout(self):
+        """A queued caller gives up after queue_timeout."""
+        limiter = UpstreamLimiter(max_concurrency=1, max_queue=5, queue_timeout=0.01)
+
+        async def run():
+            await limiter.acquire()
+            with pytest.raises(UpstreamBusyError):
+                await limiter.acquire()
+            assert limiter.queue_depth == 0
+            limiter.release()
+
+        asyncio.run(run())
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight request coalescing."""
+
+    def test_duplicates_share_one_call(self):
+        """Concurrent callers with the same key run fn once."""
+        flights = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def run():
+            return await asyncio.gather(*(flights.do("k", fetch) for _ in range(5)))
+
+        assert asyncio.run(run()) == ["result"] * 5
+        assert calls == 1
+        assert flights.coalesced == 4
+        assert flights.in_flight == 0
+
+    def test_errors_reach_every_waiter(self):
+        """An upstream failure is raised to all coalesced callers."""
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        async def run():
+            return await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flights.in_flight == 0
+
+    def test_distinct_keys_run_separately(self):
+        """Different keys are not coalesced."""
+        flights = SingleFlight()
+
+        async def run():
+            return await asyncio.gather(
+                flights.do("a", lambda: asyncio.sleep(0, result="a")),
+                flights.do("b", lambda: asyncio.sleep(0, result="b")),
+            )
+
+        assert asyncio.run(run()) == ["a", "b"]
+        assert flights.coalesced == 0
+
+
+class TestMapUnordered:
+    """Tests for map_unordered."""
+
+    def test_bounded_and_completion_ordered(self):
+        """At most `limit` calls run at once and results arrive as they finish."""
+        running = peak = 0
+
+        async def work(delay):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(delay)
+            running -= 1
+            return delay
+
+        async def run():
+            return [item async for item, _, _ in map_unordered(work, [0.05, 0.01, 0.03, 0.02], limit=2)]
+
+        assert asyncio.run(run()) == [0.01, 0.03, 0.05, 0.02]
+        assert peak == 2
+
+    def test_failures_are_reported_per_item(self):
+        """One failing item does not stop the rest."""
+        async def work(n):
+            if n == 2:
+                raise ValueError("bad item")
+            return n * 10
+
+        async def run():
+            return {item: (result, error) async for item, result, error in map_unordered(work, [1, 2, 3], limit=3)}
+
+        results = asyncio.run(run())
+        assert results[1] == (10, None) and results[3] == (30, None)
+        assert isinstance(results[2][1], ValueError)
+
+
+class TestUpstreamStatus:
+    """Tests for upstream status reporting."""
+
+    def test_health_reports_queue_depth(self):
+        """Health check exposes limiter state."""
+        data = client.get("/").json()
+        assert data["upstream"]["queue_depth"] == 0
+        assert data["upstream"]["max_concurrency"] >= 1
+
+    def test_analyze_uses_async_client(self, fake_client):
+        """Analysis awaits the async client and parses the result."""
+        response = client.post("/analyze", json={
+            "code": "def maxSumSubarray(arr, k):\n    return sum(arr[:k])",
+            "topic": "sliding_window"
+        })
+        assert response.status_code == 200
+        assert response.json()["feedback"]["space_complexity"] == "O(1) extra space."
+        assert len(fake_client.chat.completions.calls) == 1
+
+    def test_concurrent_duplicates_are_coalesced(self, monkeypatch):
+        """A burst of identical submissions makes one upstream call."""
+        fake = FakeAsyncClient(delay=0.05)
+        monkeypatch.setattr(main, "client", fake)
+        before = main.analysis_flights.coalesced
+        payload = {"code": "def solution(arr):\n    return max(arr)", "topic": "array"}
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await asyncio.gather(*(http.post("/analyze", json=payload) for _ in range(5)))
+
+        responses = asyncio.run(run())
+        assert [r.status_code for r in responses] == [200] * 5
+        assert len(fake.chat.completions.calls) == 1
+        assert main.analysis_flights.coalesced - before == 4
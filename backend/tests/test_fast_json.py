@@ -0,0 +1,42 @@
+"""
+Tests for JSON encoding and conditional-request helpers.
+Run with: pytest tests/test_fast_json.py
+"""
+
+import json
+
+import fast_json
+from fast_json import dumps, etag_for, etag_matches
+from main import HARDCODED_PROBLEM
+
+
+class TestDumps:
+    """Tests for the fast encoder."""
+
+    def test_models_honour_field_exclusions(self):
+        body = dumps(HARDCODED_PROBLEM)
+        assert json.loads(body) == HARDCODED_PROBLEM.model_dump(mode="json")
+        assert b"test_cases" not in body
+
+    def test_standard_library_fallback(self, monkeypatch):
+        """Without orjson, plain data encodes to the same compact bytes."""
+        data = {"id": "a", "text": "naïve", "items": [1, 2.5, None, True]}
+        fast = dumps(data)
+        monkeypatch.setattr(fast_json, "orjson", None)
+        assert dumps(data) == fast
+
+
+class TestEtags:
+    """Tests for ETag generation and If-None-Match matching."""
+
+    def test_etag_tracks_content(self):
+        assert etag_for(b"{}") == etag_for(b"{}")
+        assert etag_for(b"{}") != etag_for(b"[]")
+
+    def test_if_none_match(self):
+        etag = etag_for(b"{}")
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
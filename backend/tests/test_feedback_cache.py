@@ -0,0 +1,126 @@
+"""
+Unit tests for the content-addressed feedback cache.
+Run with: pytest tests/test_feedback_cache.py
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from feedback_cache import FeedbackCache, cache_key, normalize_code
+from main import app
+
+client = TestClient(app)
+
+SOLUTION = """def maxSumSubarray(arr, k):
+    window_sum = sum(arr[:k])
+    best = window_sum
+    for i in range(k, len(arr)):
+        window_sum += arr[i] - arr[i - k]
+        best = max(best, window_sum)
+    return best
+"""
+
+SOLUTION_REFORMATTED = '''def maxSumSubarray(arr,k):
+    """Sliding window maximum sum."""
+    # first window
+    window_sum=sum(arr[:k])
+
+    best = window_sum
+    for i in range(k, len(arr)):   # slide
+        window_sum += arr[i] - arr[i-k]
+        best = max(best, window_sum)
+    return best
+'''
+
+
+class TestNormalization:
+    """Tests for AST-based code normalization."""
+
+    def test_ignores_comments_docstrings_and_formatting(self):
+        """Cosmetic edits normalize to the same source."""
+        assert normalize_code(SOLUTION) == normalize_code(SOLUTION_REFORMATTED)
+        assert cache_key("sliding_window", SOLUTION) == cache_key("sliding_window", SOLUTION_REFORMATTED)
+
+    def test_semantic_change_changes_key(self):
+        """Different logic produces a different key."""
+        changed = SOLUTION.replace("max(best", "min(best")
+        assert cache_key("sliding_window", SOLUTION) != cache_key("sliding_window", changed)
+
+    def test_topic_is_part_of_key(self):
+        """The same code under another topic is a separate entry."""
+        assert cache_key("sliding_window", SOLUTION) != cache_key("array", SOLUTION)
+
+    def test_unparseable_code_falls_back(self):
+        """Syntax errors still normalize whitespace instead of raising."""
+        assert normalize_code("def f(:\n\n    pass   \n") == "def f(:\n    pass"
+
+    def test_deeply_nested_code_falls_back(self):
+        """Code that exhausts the parser's stack or memory normalizes as text."""
+        for code in ("a" + ".b" * 4990, "-" * 9990 + "1"):
+            assert normalize_code(code) == code
+
+
+class TestFeedbackCache:
+    """Tests for the LRU/TTL and SQLite tiers."""
+
+    def test_lru_eviction(self):
+        """Least recently used entries are evicted first."""
+        cache = FeedbackCache(max_entries=2)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        cache.get("a")
+        cache.set("c", {"v": 3})
+        assert cache.get("b") is None
+        assert cache.get("a") == {"v": 1}
+        assert cache.stats()["misses"] == 1
+
+    def test_ttl_expiry(self):
+        """Expired entries are treated as misses."""
+        cache = FeedbackCache(ttl=0)
+        cache.set("a", {"v": 1})
+        assert cache.get("a") is None
+
+    def test_sqlite_tier_survives_restart(self, tmp_path):
+        """Entries written to SQLite are visible to a fresh cache instance."""
+        db_path = str(tmp_path / "cache.db")
+        cache = FeedbackCache(db_path=db_path)
+        cache.set("a", {"v": 1})
+        asyncio.run(cache.close())
+
+        restarted = FeedbackCache(db_path=db_path)
+        assert restarted.get("a") == {"v": 1}
+        assert restarted.stats()["disk_hits"] == 1
+
+    def test_disk_tier_is_written_behind(self, tmp_path):
+        """set() only queues the SQLite write; lookup() reads pending and stored entries off the loop."""
+        db_path = str(tmp_path / "cache.db")
+        cache = FeedbackCache(max_entries=1, db_path=db_path)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        assert cache.stats()["pending_writes"] == 2
+        assert FeedbackCache(db_path=db_path).get("a") is None
+
+        # "a" was evicted from memory but is still pending
+        assert asyncio.run(cache.lookup("a")) == {"v": 1}
+        assert asyncio.run(cache.flush()) == 2
+        assert cache.stats()["pending_writes"] == 0
+        assert asyncio.run(FeedbackCache(db_path=db_path).lookup("b")) == {"v": 2}
+
+
+class TestAnalyzeCaching:
+    """Tests for cache integration in /analyze."""
+
+    def test_resubmission_is_served_from_cache(self, fake_client):
+        """A cosmetic resubmission skips the model call."""
+        first = client.post("/analyze", json={"code": SOLUTION, "topic": "sliding_window"})
+        second = client.post("/analyze", json={"code": SOLUTION_REFORMATTED, "topic": "sliding_window"})
+
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.json() == first.json()
+        assert len(fake_client.chat.completions.calls) == 1
+
+        stats = client.get("/").json()["feedback_cache"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
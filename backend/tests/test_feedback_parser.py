@@ -0,0 +1,112 @@
+"""
+Unit tests for the single-pass feedback parser.
+Run with: pytest tests/test_feedback_parser.py
+"""
+
+import json
+import time
+
+import main
+from feedback_parser import DEFAULT_IMPROVEMENT_PLAN, extract_section, parse_sections
+from main import parse_feedback
+from tests.conftest import SAMPLE_FEEDBACK
+
+
+class TestParseSections:
+    """Tests for parse_sections."""
+
+    def test_prompt_format(self):
+        """The format requested by DSA_FEEDBACK_PROMPT parses into every field."""
+        sections = parse_sections(SAMPLE_FEEDBACK)
+        assert sections["time_complexity"] == "O(n) - a single pass over the array."
+        assert sections["code_quality"] == "Clear variable names, consider adding comments."
+        assert sections["improvement_plan"] == [
+            "Validate k against the array length",
+            "Handle empty input",
+            "Add tests for negative numbers",
+        ]
+
+    def test_plain_headers_and_multiline_sections(self):
+        """Headers without bold end the previous section; bodies keep their lines."""
+        sections = parse_sections(
+            "Time Complexity: O(n log n)\nbecause of sorting.\n"
+            "Space Complexity: O(n)\n"
+            "### Edge Cases:\n- empty list\n- k = 0\n"
+        )
+        assert sections["time_complexity"] == "O(n log n)\nbecause of sorting."
+        assert sections["space_complexity"] == "O(n)"
+        assert sections["edge_cases"] == "- empty list\n- k = 0"
+
+    def test_numbered_plan_items(self):
+        """Numbered and bulleted plans are split into steps."""
+        sections = parse_sections("**Improvement Plan:**\n1. Use a heap\n2. Add tests\n\nThanks!")
+        assert sections["improvement_plan"] == ["Use a heap", "Add tests"]
+
+    def test_fallbacks(self):
+        """Missing sections get placeholders and the default plan."""
+        sections = parse_sections("Looks good to me.")
+        assert sections["space_complexity"] == "No Space Complexity analysis provided."
+        assert sections["improvement_plan"] == DEFAULT_IMPROVEMENT_PLAN
+
+    def test_first_occurrence_wins(self):
+        """A repeated header does not overwrite the first section."""
+        sections = parse_sections("**Time Complexity**: O(n)\n\n**Time Complexity**: O(n^2)\n")
+        assert sections["time_complexity"] == "O(n)"
+
+    def test_sentence_mentioning_a_title_is_not_a_header(self):
+        """Free-text headers require a colon."""
+        sections = parse_sections("**Code Quality**: Fine.\nTime complexity is linear overall.\n")
+        assert sections["time_complexity"] == "No Time Complexity analysis provided."
+
+    def test_adversarial_input_is_linear(self):
+        """Pathological inputs parse quickly instead of backtracking."""
+        inputs = [
+            "**\n" * 50_000,
+            "Time Complexity: " + "x" * 200_000,
+            "Improvement Plan:" + "\n" * 200_000,
+            "1.\n" * 50_000,
+        ]
+        for text in inputs:
+            start = time.perf_counter()
+            parse_sections(text)
+            assert time.perf_counter() - start < 1.0
+
+    def test_compatibility_helpers(self):
+        """extract_section and parse_feedback still work on full text."""
+        assert extract_section(SAMPLE_FEEDBACK, "Edge Cases").startswith("Empty array")
+        assert parse_feedback(SAMPLE_FEEDBACK).space_complexity == "O(1) extra space."
+
+
+STRUCTURED = {
+    "time_complexity": "O(n)",
+    "space_complexity": "O(1)",
+    "edge_cases": "Empty input",
+    "code_quality": "Readable",
+    "improvement_plan": ["Validate k", "Handle empty input", "Add tests"],
+}
+
+
+class TestStructuredFeedback:
+    """Tests for decoding JSON completions (STRUCTURED_OUTPUT)."""
+
+    def test_json_decoded_in_one_pass(self):
+        """Plain and fenced JSON decode straight into Feedback."""
+        ok_before = main.structured_decodes.value("ok")
+        assert parse_feedback(json.dumps(STRUCTURED), structured=True).model_dump() == STRUCTURED
+        fenced = "```json\n" + json.dumps(STRUCTURED) + "\n```"
+        assert parse_feedback(fenced, structured=True).edge_cases == "Empty input"
+        assert main.structured_decodes.value("ok") == ok_before + 2
+
+    def test_falls_back_to_text_parser(self):
+        """A reply that is not valid Feedback JSON is parsed as text and counted."""
+        fallback_before = main.structured_decodes.value("fallback")
+        feedback = parse_feedback(SAMPLE_FEEDBACK, structured=True)
+        assert feedback.space_complexity == "O(1) extra space."
+        partial = parse_feedback(json.dumps({"time_complexity": "O(n)"}), structured=True)
+        assert partial.improvement_plan == DEFAULT_IMPROVEMENT_PLAN
+        assert main.structured_decodes.value("fallback") == fallback_before + 2
+
+    def test_schema_is_strict(self):
+        schema = main.FEEDBACK_RESPONSE_FORMAT["json_schema"]["schema"]
+        assert schema["additionalProperties"] is False
+        assert sorted(schema["required"]) == sorted(STRUCTURED)
@@ -0,0 +1,110 @@
+"""
+Tests for the model client's connection pool and warm-up.
+Run with: pytest tests/test_http_pool.py
+"""
+
+import asyncio
+import logging
+
+import http_pool
+from http_pool import PoolSettings, build_http_client, warm_up
+
+
+async def start_counting_server():
+    """Minimal keep-alive HTTP/1.1 server that counts accepted connections."""
+    accepted = []
+
+    async def handle(reader, writer):
+        accepted.append(writer)
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if not request:
+                    break
+                await asyncio.sleep(0.02)  # Keep concurrent requests overlapping
+                writer.write(b"HTTP/1.1 401 Unauthorized\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/v1", accepted
+
+
+class TestPoolSettings:
+    """Tests for pool sizing."""
+
+    def test_sized_from_concurrency(self):
+        settings = PoolSettings.for_concurrency(8)
+        assert (settings.max_connections, settings.max_keepalive) == (16, 8)
+
+    def test_overrides_win_and_none_is_ignored(self):
+        settings = PoolSettings.for_concurrency(8, max_connections=40, max_keepalive=None, http2=True)
+        assert (settings.max_connections, settings.max_keepalive, settings.http2) == (40, 8, True)
+
+    def test_http2_falls_back_without_h2(self, monkeypatch, caplog):
+        """Requesting HTTP/2 without h2 installed still builds a working client."""
+        monkeypatch.setattr(http_pool, "h2", None)
+        with caplog.at_level(logging.WARNING, logger="http_pool"):
+            client = build_http_client(PoolSettings.for_concurrency(2, http2=True))
+        assert "h2 package is not installed" in caplog.text
+        asyncio.run(client.aclose())
+
+
+class TestWarmup:
+    """Tests for pre-establishing connections."""
+
+    def test_warm_connections_are_reused(self):
+        """Warm-up opens the requested connections and later requests reuse them."""
+        async def run():
+            server, url, accepted = await start_counting_server()
+            client = build_http_client(PoolSettings.for_concurrency(4))
+            try:
+                result = await warm_up(client, [url], connections=4)
+                warmed = len(accepted)
+                await asyncio.gather(*(client.post(url + "/chat/completions") for _ in range(4)))
+                return result, warmed, len(accepted)
+            finally:
+                await client.aclose()
+                server.close()
+                await server.wait_closed()
+
+        result, warmed, total = asyncio.run(run())
+        assert (result.requested, result.established) == (4, 4)
+        assert warmed == 4
+        assert total == 4
+
+    def test_every_upstream_host_is_warmed(self):
+        """Connections are spread across distinct hosts; URLs on the same host are warmed once."""
+        async def run():
+            (first, url_a, accepted_a), (second, url_b, accepted_b) = (
+                await start_counting_server(), await start_counting_server()
+            )
+            client = build_http_client(PoolSettings.for_concurrency(4))
+            try:
+                result = await warm_up(client, [url_a, url_a.replace("/v1", "/v2"), url_b], connections=4)
+                return result, len(accepted_a), len(accepted_b)
+            finally:
+                await client.aclose()
+                for server in (first, second):
+                    server.close()
+                    await server.wait_closed()
+
+        result, warmed_a, warmed_b = asyncio.run(run())
+        assert (result.requested, result.established) == (4, 4)
+        assert (warmed_a, warmed_b) == (2, 2)
+
+    def test_unreachable_upstream_does_not_raise(self):
+        """A failed warm-up is reported, not raised, so startup continues."""
+        async def run():
+            client = build_http_client(PoolSettings.for_concurrency(2, connect_timeout=0.5))
+            try:
+                return await warm_up(client, ["http://127.0.0.1:9/v1"], connections=2, timeout=2)
+            finally:
+                await client.aclose()
+
+        result = asyncio.run(run())
+        assert result.established == 0
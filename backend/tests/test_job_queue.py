@@ -0,0 +1,183 @@
+"""
+Tests for the background analysis job queue and the /jobs endpoints.
+Run with: pytest tests/test_job_queue.py
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+from job_queue import DONE, FAILED, QUEUED, RUNNING, IdempotencyConflictError, JobQueue, JobWorkers
+from main import app
+from resilience import UpstreamUnavailableError
+from tests.conftest import FakeAsyncClient
+
+client = TestClient(app)
+
+CODE = "def max_sum(arr, k):\n    return max(sum(arr[i:i + k]) for i in range(len(arr) - k + 1))"
+
+
+def submission(**extra) -> dict:
+    return {"code": CODE, "topic": "sliding window", **extra}
+
+
+def run_pending_jobs() -> int:
+    """Run queued jobs with the app's workers until none are ready."""
+    async def drain():
+        count = 0
+        while await main.job_workers.run_once():
+            count += 1
+        return count
+    return asyncio.run(drain())
+
+
+class TestJobQueue:
+    """Tests for the SQLite queue itself."""
+
+    def test_claims_highest_priority_then_oldest(self):
+        queue = JobQueue(":memory:")
+        low, _ = queue.submit({"n": 1}, priority=0)
+        first_high, _ = queue.submit({"n": 2}, priority=5)
+        second_high, _ = queue.submit({"n": 3}, priority=5)
+        claimed = [queue.claim().id for _ in range(3)]
+        assert claimed == [first_high.id, second_high.id, low.id]
+        assert queue.claim() is None
+
+    def test_idempotency_key_replays_existing_job(self):
+        """The same key and payload return the stored job; a different payload is a conflict."""
+        queue = JobQueue(":memory:")
+        job, created = queue.submit({"n": 1}, idempotency_key="k")
+        replay, replay_created = queue.submit({"n": 1}, idempotency_key="k")
+        assert (created, replay_created) == (True, False)
+        assert replay.id == job.id
+        assert queue.stats()[QUEUED] == 1
+        with pytest.raises(IdempotencyConflictError):
+            queue.submit({"n": 2}, idempotency_key="k")
+
+    def test_retries_until_attempts_run_out(self):
+        queue = JobQueue(":memory:", max_attempts=2)
+        job, _ = queue.submit({"n": 1})
+        queue.claim()
+        assert queue.fail(job.id, "busy", retry_in=0) == QUEUED
+        queue.claim()
+        assert queue.fail(job.id, "busy", retry_in=0) == FAILED
+        assert queue.get(job.id).error == "busy"
+
+    def test_retry_waits_for_its_delay(self):
+        queue = JobQueue(":memory:")
+        job, _ = queue.submit({"n": 1})
+        queue.claim()
+        queue.fail(job.id, "busy", retry_in=60)
+        assert queue.claim() is None
+
+    def test_expired_lease_is_requeued(self):
+        """A job whose worker died goes back to the queue."""
+        queue = JobQueue(":memory:", lease_seconds=0.01)
+        job, _ = queue.submit({"n": 1})
+        assert queue.claim().status == RUNNING
+        time.sleep(0.02)
+        assert queue.recover_expired() == 1
+        assert queue.claim().attempts == 2
+
+    def test_prune_drops_old_finished_jobs(self):
+        queue = JobQueue(":memory:", retention=0)
+        done, _ = queue.submit({"n": 1})
+        pending, _ = queue.submit({"n": 2})
+        queue.claim()
+        queue.complete(done.id, {"ok": True})
+        time.sleep(0.01)
+        assert queue.prune() == 1
+        assert queue.get(done.id) is None
+        assert queue.get(pending.id) is not None
+
+    def test_workers_record_results_and_errors(self):
+        async def handler(payload):
+            if payload["n"] < 0:
+                raise ValueError("negative")
+            return {"double": payload["n"] * 2}
+
+        queue = JobQueue(":memory:")
+        ok, _ = queue.submit({"n": 2})
+        bad, _ = queue.submit({"n": -1})
+        workers = JobWorkers(queue, handler, concurrency=1)
+        assert asyncio.run(workers.run_once()) and asyncio.run(workers.run_once())
+        assert queue.get(ok.id).result == {"double": 4}
+        assert (queue.get(bad.id).status, queue.get(bad.id).error) == (FAILED, "negative")
+        assert (workers.processed, workers.failed) == (1, 1)
+
+
+class TestJobEndpoints:
+    """Tests for POST /jobs, GET /jobs/{id} and the status WebSocket."""
+
+    def test_submit_then_poll_result(self, fake_client):
+        response = client.post("/jobs", json=submission())
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "queued"
+        assert response.headers["Location"] == f"/jobs/{job['id']}"
+
+        assert run_pending_jobs() == 1
+        done = client.get(f"/jobs/{job['id']}").json()
+        assert done["status"] == "done"
+        assert done["result"]["feedback"]["time_complexity"].startswith("O(n)")
+
+    def test_idempotent_retry_does_not_queue_twice(self, fake_client):
+        headers = {"Idempotency-Key": "attempt-1"}
+        first = client.post("/jobs", json=submission(), headers=headers)
+        retry = client.post("/jobs", json=submission(), headers=headers)
+        assert (first.status_code, retry.status_code) == (202, 200)
+        assert retry.json()["id"] == first.json()["id"]
+        assert run_pending_jobs() == 1
+        assert len(fake_client.chat.completions.calls) == 1
+
+        conflict = client.post("/jobs", json=submission(topic="array"), headers=headers)
+        assert conflict.status_code == 409
+
+    def test_idempotency_keys_are_scoped_per_user(self, fake_client):
+        headers = {"Idempotency-Key": "same"}
+        alice = client.post("/jobs", json=submission(user_id="alice"), headers=headers)
+        bob = client.post("/jobs", json=submission(user_id="bob"), headers=headers)
+        assert alice.json()["id"] != bob.json()["id"]
+
+    def test_failed_analysis_reports_error(self, monkeypatch):
+        monkeypatch.setattr(main, "client", FakeAsyncClient(error=Exception("boom")))
+        job = client.post("/jobs", json=submission()).json()
+        run_pending_jobs()
+        failed = client.get(f"/jobs/{job['id']}").json()
+        assert failed["status"] == "failed"
+        assert "boom" in failed["error"]
+
+    def test_unknown_job_is_404(self):
+        assert client.get("/jobs/missing").status_code == 404
+
+    def test_websocket_sends_final_status(self, fake_client):
+        job = client.post("/jobs", json=submission()).json()
+        run_pending_jobs()
+        with client.websocket_connect(f"/jobs/{job['id']}/ws") as websocket:
+            status = websocket.receive_json()
+            assert status["status"] == "done"
+            assert status["result"]["success"] is True
+
+    def test_websocket_closes_for_unknown_job(self):
+        with client.websocket_connect("/jobs/missing/ws") as websocket:
+            with pytest.raises(WebSocketDisconnect) as closed:
+                websocket.receive_json()
+        assert closed.value.code == 4404
+
+    def test_started_workers_pick_up_jobs(self, fake_client):
+        """With the app running, a submitted job is processed without any polling delay."""
+        with TestClient(app) as running:
+            job = running.post("/jobs", json=submission()).json()
+            with running.websocket_connect(f"/jobs/{job['id']}/ws") as websocket:
+                statuses = []
+                while not statuses or statuses[-1] not in (DONE, FAILED):
+                    statuses.append(websocket.receive_json()["status"])
+        assert statuses[-1] == DONE
+
+    def test_retry_delay_follows_upstream_hints(self):
+        assert main.job_retry_delay(UpstreamUnavailableError(retry_after=7)) == 7
+        assert main.job_retry_delay(ValueError("bad input")) is None
@@ -0,0 +1,196 @@
+"""
+Tests for the sandboxed local judge.
+Run with: pytest tests/test_judge.py
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from judge import JudgePool, entry_point_from_signature
+from main import app, HARDCODED_PROBLEM
+
+CASES = [
+    {"args": [[2, 1, 5, 1, 3, 2], 3], "expected": 9},
+    {"args": [[5], 1], "expected": 5, "hidden": True},
+]
+
+SOLUTION = """def maxSumSubarray(arr, k):
+    window = sum(arr[:k])
+    best = window
+    for i in range(k, len(arr)):
+        window += arr[i] - arr[i - k]
+        best = max(best, window)
+    return best
+"""
+
+
+def judge(*submissions, **pool_options):
+    """Run submissions through a fresh pool and return their results."""
+    async def run():
+        pool = JudgePool(workers=2, cpu_seconds=0.5, wall_seconds=2, **pool_options)
+        try:
+            return [await pool.run(code, "maxSumSubarray", CASES) for code in submissions], pool.stats()
+        finally:
+            await pool.close()
+
+    return asyncio.run(run())
+
+
+class TestJudgePool:
+    """Tests for JudgePool verdicts and isolation."""
+
+    def test_verdicts(self):
+        """Correct, wrong, broken and LeetCode-style submissions get the right verdicts."""
+        results, _ = judge(
+            SOLUTION,
+            "def maxSumSubarray(arr, k):\n    return 0",
+            "def maxSumSubarray(arr, k:\n    pass",
+            "def maxSumSubarray(arr, k):\n    return arr[99]",
+            "class Solution:\n    def maxSumSubarray(self, arr, k):\n        return max(arr) + 4",
+        )
+        assert [r["verdict"] for r in results] == [
+            "accepted", "wrong_answer", "compile_error", "runtime_error", "wrong_answer"
+        ]
+        assert results[0]["passed"] == results[0]["total"] == 2
+        assert results[4]["cases"][0]["status"] == "passed"
+
+    def test_hidden_cases_do_not_reveal_outputs(self):
+        """Expected/actual values are only reported for visible cases."""
+        results, _ = judge(SOLUTION)
+        visible, hidden = results[0]["cases"]
+        assert visible["expected"] == "9"
+        assert "expected" not in hidden
+
+    def test_sandbox_restrictions(self):
+        """Imports, file access and network are blocked."""
+        results, _ = judge(
+            "import os\ndef maxSumSubarray(arr, k):\n    return 9",
+            "def maxSumSubarray(arr, k):\n    return open('/etc/passwd').read()",
+            "def maxSumSubarray(arr, k):\n    import socket\n    return 9",
+        )
+        assert all(r["verdict"] == "runtime_error" for r in results)
+        assert "not allowed" in results[0]["cases"][0]["error"]
+
+    def test_reflection_is_rejected(self):
+        """The type-hierarchy and frame routes out of the restricted namespace are closed."""
+        results, _ = judge(
+            "def maxSumSubarray(arr, k):\n    return ().__class__.__base__.__subclasses__()",
+            "def maxSumSubarray(arr, k):\n    return (x for x in arr).gi_frame.f_globals",
+            "def maxSumSubarray(arr, k):\n    return getattr((), '__cl' + 'ass__')",
+            "class Solution(object):\n    def maxSumSubarray(self, arr, k):\n        return 9",
+        )
+        assert [r["verdict"] for r in results] == ["compile_error", "compile_error", "runtime_error", "wrong_answer"]
+        assert "is not allowed" in results[0]["cases"][0]["error"]
+        assert "NameError" in results[2]["cases"][0]["error"]
+
+    def test_modules_expose_only_allowlisted_names(self):
+        """Imports hand out stand-ins, so modules the real ones import cannot be reached."""
+        results, _ = judge(
+            "import typing\ndef maxSumSubarray(arr, k):\n    return typing.sys.modules['os'].getcwd()",
+            "import collections\ndef maxSumSubarray(arr, k):\n    return collections._sys",
+            "from collections import abc\ndef maxSumSubarray(arr, k):\n    return 9",
+            "import operator\ndef maxSumSubarray(arr, k):\n    return operator.attrgetter('real')(k)",
+            "from collections import deque\nimport heapq\ndef maxSumSubarray(arr, k):\n"
+            "    return sum(heapq.nlargest(k, deque(arr)))",
+        )
+        assert [r["verdict"] for r in results] == [
+            "runtime_error", "runtime_error", "runtime_error", "runtime_error", "wrong_answer"
+        ]
+        assert "not allowed" in results[0]["cases"][0]["error"]
+        assert results[4]["cases"][0]["actual"] == "10"
+
+    @pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() != 0, reason="needs root to isolate workers")
+    def test_workers_are_isolated(self):
+        """Workers run in their own network namespace and chroot as an unprivileged user."""
+        _, stats = judge(SOLUTION, require_isolation=True)
+        assert stats["isolation"] == ["network", "filesystem", "unprivileged"]
+
+    def test_lost_worker_is_replaced(self):
+        """A job that fails outside the worker protocol does not shrink the pool."""
+        async def run():
+            pool = JudgePool(workers=1, cpu_seconds=0.5, wall_seconds=2)
+            try:
+                with pytest.raises(Exception):
+                    # Cannot be sent to the worker
+                    await pool.run(SOLUTION, "maxSumSubarray", [{"args": [lambda: 0], "expected": 0}])
+                result = await asyncio.wait_for(pool.run(SOLUTION, "maxSumSubarray", CASES), 10)
+                return result, pool.stats()
+            finally:
+                await pool.close()
+
+        result, stats = asyncio.run(run())
+        assert result["verdict"] == "accepted"
+        assert stats["workers_replaced"] == 1
+
+    def test_limits_replace_workers(self):
+        """Runaway CPU, memory and C-level loops are stopped and the worker replaced."""
+        results, stats = judge(
+            "def maxSumSubarray(arr, k):\n    while True:\n        pass",
+            "def maxSumSubarray(arr, k):\n    return [0] * (10 ** 9)",
+            "def maxSumSubarray(arr, k):\n    return sum(range(10 ** 12))",
+            SOLUTION,
+        )
+        assert [r["verdict"] for r in results] == [
+            "time_limit_exceeded", "memory_limit_exceeded", "time_limit_exceeded", "accepted"
+        ]
+        assert stats["workers_replaced"] == 3
+
+    def test_entry_point_from_signature(self):
+        """The function name is read from the problem's signature."""
+        assert entry_point_from_signature(HARDCODED_PROBLEM.function_signature) == "maxSumSubarray"
+        assert entry_point_from_signature("pass") is None
+
+
+class TestJudgeEndpoints:
+    """Tests for /judge and judge results on /analyze."""
+
+    @pytest.fixture
+    def client(self):
+        with TestClient(app) as client:
+            yield client
+
+    def test_judge_endpoint(self, client):
+        """Judging the default problem returns per-case results."""
+        response = client.post("/judge", json={"code": SOLUTION, "problem_id": HARDCODED_PROBLEM.id})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["verdict"] == "accepted"
+        assert data["total"] == len(HARDCODED_PROBLEM.test_cases)
+
+    def test_judge_is_opt_in(self, tmp_path):
+        """Without JUDGE_ENABLED the app starts no judge."""
+        env = {key: value for key, value in os.environ.items() if key != "JUDGE_ENABLED"}
+        env.update(LOG_FILE=str(tmp_path / "api.log"), ATTEMPTS_DB=":memory:", JOBS_DB=":memory:")
+        completed = subprocess.run(
+            [sys.executable, "-c", "import main; print(main.judge_pool is None)"],
+            cwd=Path(__file__).resolve().parent.parent, env=env, capture_output=True, text=True, timeout=60
+        )
+        assert completed.returncode == 0, completed.stderr
+        assert completed.stdout.splitlines()[-1] == "True"
+
+    def test_judge_unknown_problem(self, client):
+        """Unknown problems return 404."""
+        response = client.post("/judge", json={"code": SOLUTION, "problem_id": "nope"})
+        assert response.status_code == 404
+
+    def test_test_cases_are_not_exposed(self, client):
+        """Problem responses never include judge test cases."""
+        assert "test_cases" not in client.get("/problem").json()
+
+    def test_analyze_includes_judge_result(self, client, fake_client):
+        """Analysis with a problem id returns the verdict alongside feedback."""
+        response = client.post("/analyze", json={
+            "code": SOLUTION,
+            "topic": "sliding_window",
+            "problem_id": HARDCODED_PROBLEM.id
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["feedback"] is not None
+        assert data["judge"]["verdict"] == "accepted"
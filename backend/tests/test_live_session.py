@@ -0,0 +1,217 @@
+"""
+Tests for live interview sessions and their incremental checks.
+Run with: pytest tests/test_live_session.py
+"""
+
+import tracemalloc
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+from live_session import MODULE_SCOPE, LiveSessions
+from main import HARDCODED_PROBLEM, app
+
+client = TestClient(app)
+
+SOLUTION = """def maxSumSubarray(arr, k):
+    window = sum(arr[:k])
+    best = window
+    for i in range(k, len(arr)):
+        window += arr[i] - arr[i - k]
+        best = max(best, window)
+    return best
+
+def helper(arr):
+    return len(arr)
+"""
+
+BRUTE_FORCE = """def maxSumSubarray(arr, k):
+    best = float('-inf')
+    for i in range(len(arr) - k + 1):
+        total = 0
+        for j in range(i, i + k):
+            total += arr[j]
+        best = max(best, total)
+    return best
+"""
+
+
+def changed(snapshot) -> dict:
+    return {check.name: check.changed for check in snapshot.functions}
+
+
+class TestLiveSessions:
+    """Tests for incremental snapshot checks."""
+
+    def test_only_edited_functions_are_changed(self):
+        sessions = LiveSessions()
+        session = sessions.open("sliding window")
+        first = sessions.snapshot(session, SOLUTION)
+        assert changed(first) == {"maxSumSubarray": True, "helper": True}
+        assert first.rejudge
+        assert first.functions[0].estimate.time == "O(n)"
+
+        edited = sessions.snapshot(session, SOLUTION.replace("len(arr)\n", "len(arr) + 0\n"))
+        assert changed(edited) == {"maxSumSubarray": False, "helper": True}
+        assert edited.rejudge
+
+    def test_formatting_and_comments_are_not_changes(self):
+        sessions = LiveSessions()
+        session = sessions.open("sliding window")
+        sessions.snapshot(session, SOLUTION)
+        reformatted = sessions.snapshot(session, "# my solution\n" + SOLUTION.replace("best = window", "best=window  # start"))
+        assert not any(changed(reformatted).values())
+        assert not reformatted.rejudge
+
+    def test_syntax_error_keeps_last_good_state(self):
+        sessions = LiveSessions()
+        session = sessions.open("sliding window")
+        sessions.snapshot(session, SOLUTION)
+        broken = sessions.snapshot(session, SOLUTION + "\ndef half(:\n")
+        assert broken.syntax_error.lineno == 12
+        assert not broken.rejudge
+        fixed = sessions.snapshot(session, SOLUTION)
+        assert not any(changed(fixed).values())
+
+    def test_deeply_nested_code_is_a_syntax_error(self):
+        sessions = LiveSessions()
+        session = sessions.open("sliding window")
+        sessions.snapshot(session, SOLUTION)
+        for deep in ("a" + ".b" * 4990, "-" * 9990 + "1"):
+            snapshot = sessions.snapshot(session, deep)
+            assert isinstance(snapshot.syntax_error, SyntaxError)
+            assert not snapshot.rejudge
+        assert sessions.stats()["syntax_errors"] == 2
+
+    def test_removed_functions_and_module_code(self):
+        sessions = LiveSessions()
+        session = sessions.open("array")
+        sessions.snapshot(session, SOLUTION)
+        snapshot = sessions.snapshot(session, "print(sum([1, 2, 3]))")
+        assert snapshot.removed == ["maxSumSubarray", "helper"]
+        assert [check.name for check in snapshot.functions] == [MODULE_SCOPE]
+
+    def test_structural_change_respects_interval(self):
+        sessions = LiveSessions(model_interval=60)
+        session = sessions.open("sliding window")
+        assert not sessions.snapshot(session, SOLUTION).structural
+        rewrite = sessions.snapshot(session, BRUTE_FORCE)
+        assert rewrite.structural
+        sessions.analyzed(session, rewrite.code_fingerprint)
+        # Within the interval a second rewrite waits
+        assert not sessions.snapshot(session, SOLUTION).structural
+
+    def test_max_sessions(self):
+        sessions = LiveSessions(max_sessions=1)
+        session = sessions.open("array")
+        assert sessions.open("array") is None
+        sessions.close(session)
+        assert sessions.open("array") is not None
+        assert sessions.stats()["rejected"] == 1
+
+    def test_idle_sessions_are_compact(self):
+        """A session that has checked a two-function solution holds well under a kilobyte."""
+        sessions = LiveSessions()
+        sessions.snapshot(sessions.open("warm-up"), SOLUTION)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        held = []
+        for _ in range(300):
+            session = sessions.open("sliding window", "sliding_window_1", "user-1")
+            sessions.snapshot(session, SOLUTION)
+            held.append(session)
+        per_session = (tracemalloc.get_traced_memory()[0] - before) / len(held)
+        tracemalloc.stop()
+        assert per_session < 1024
+
+
+class TestSessionEndpoint:
+    """Tests for the /session WebSocket."""
+
+    def test_snapshot_gets_checks(self):
+        with client.websocket_connect("/session?topic=Sliding%20Window") as websocket:
+            websocket.send_json({"type": "snapshot", "code": SOLUTION})
+            checks = websocket.receive_json()
+            assert checks["type"] == "checks"
+            assert checks["syntax"] == {"ok": True}
+            assert checks["functions"][0]["time_complexity"] == "O(n)"
+
+            websocket.send_json({"type": "snapshot", "code": SOLUTION + "\ndef broken(:\n"})
+            checks = websocket.receive_json()
+            assert checks["syntax"]["ok"] is False
+            assert checks["syntax"]["line"] == 12
+
+    def test_invalid_messages_keep_session_open(self):
+        with client.websocket_connect("/session?topic=array") as websocket:
+            websocket.send_json({"type": "chat"})
+            assert websocket.receive_json()["type"] == "error"
+            websocket.send_json({"type": "snapshot", "code": "x"})
+            assert websocket.receive_json()["type"] == "error"
+            websocket.send_text("not json")
+            assert websocket.receive_json()["type"] == "error"
+            websocket.send_json({"type": "snapshot", "code": SOLUTION})
+            assert websocket.receive_json()["type"] == "checks"
+
+    def test_typing_does_not_call_model_until_submit(self, fake_client):
+        with client.websocket_connect("/session?topic=sliding%20window&user_id=live-user") as websocket:
+            for suffix in ("", "\n# thinking", "\n# still thinking"):
+                websocket.send_json({"type": "snapshot", "code": SOLUTION + suffix})
+                websocket.receive_json()
+            assert fake_client.chat.completions.calls == []
+
+            websocket.send_json({"type": "submit", "code": SOLUTION})
+            feedback = websocket.receive_json()
+        assert (feedback["type"], feedback["reason"], feedback["success"]) == ("feedback", "submit", True)
+        assert len(fake_client.chat.completions.calls) == 1
+
+    def test_structural_change_refreshes_feedback(self, fake_client, monkeypatch):
+        monkeypatch.setattr(main.live_sessions, "model_interval", 0)
+        with client.websocket_connect("/session?topic=sliding%20window") as websocket:
+            websocket.send_json({"type": "snapshot", "code": SOLUTION})
+            websocket.receive_json()
+            websocket.send_json({"type": "snapshot", "code": BRUTE_FORCE})
+            messages = [websocket.receive_json(), websocket.receive_json()]
+        assert {message["type"] for message in messages} == {"checks", "feedback"}
+        feedback = next(message for message in messages if message["type"] == "feedback")
+        assert feedback["reason"] == "structural_change"
+
+    def test_submits_are_charged_to_the_analysis_quota(self, fake_client):
+        """Each submit costs one analysis, so a session cannot get around the /analyze limit."""
+        limit = main.parse_limit(main.ANALYSIS_RATE_LIMIT).amount
+        with client.websocket_connect("/session?topic=sliding%20window") as websocket:
+            replies = []
+            for i in range(limit + 2):
+                websocket.send_json({"type": "submit", "code": f"{SOLUTION}\nLIMIT = {i}"})
+                replies.append(websocket.receive_json())
+        assert [reply["type"] for reply in replies] == ["feedback"] * limit + ["error"] * 2
+        assert replies[-1]["reason"] == "submit"
+
+    def test_full_sessions_are_refused(self, monkeypatch):
+        monkeypatch.setattr(main.live_sessions, "max_sessions", 0)
+        with client.websocket_connect("/session?topic=array") as websocket:
+            with pytest.raises(WebSocketDisconnect) as closed:
+                websocket.receive_json()
+        assert closed.value.code == 1013
+
+
+class TestSessionJudge:
+    """Judging live snapshots needs the judge pool started with the app."""
+
+    def test_rejudges_only_after_changes(self):
+        code = SOLUTION
+        with TestClient(app) as running:
+            url = f"/session?topic=sliding%20window&problem_id={HARDCODED_PROBLEM.id}"
+            with running.websocket_connect(url) as websocket:
+                websocket.send_json({"type": "snapshot", "code": code})
+                assert websocket.receive_json()["type"] == "checks"
+                judge = websocket.receive_json()
+                assert (judge["type"], judge["verdict"]) == ("judge", "accepted")
+
+                # Unchanged code is not judged again, so the next message is the edit's checks
+                websocket.send_json({"type": "snapshot", "code": code + "\n"})
+                assert websocket.receive_json()["type"] == "checks"
+                websocket.send_json({"type": "snapshot", "code": code.replace("best = max", "best = min")})
+                assert websocket.receive_json()["type"] == "checks"
+                assert websocket.receive_json()["verdict"] != "accepted"
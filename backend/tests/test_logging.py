@@ -0,0 +1,110 @@
+"""
+Tests for the queue-based structured logging pipeline.
+Run with: pytest tests/test_logging.py
+"""
+
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from structured_logging import (
+    JsonFormatter,
+    SamplingFilter,
+    configure_logging,
+    parse_sample_rates,
+    request_id_var,
+)
+
+client = TestClient(app)
+
+
+def make_record(message: str, level: int = logging.INFO, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("main", level, __file__, 1, message, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture
+def restore_root_logger():
+    """Put the application's logging setup back after a test reconfigures it."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+class TestFormatting:
+    """Tests for JsonFormatter and sampling."""
+
+    def test_json_record_includes_request_id_and_extra(self):
+        """Extra fields and the request id become top-level JSON keys."""
+        record = make_record("GET / 200", request_id="abc123", duration_ms=1.5)
+        entry = json.loads(JsonFormatter().format(record))
+        assert entry["message"] == "GET / 200"
+        assert entry["request_id"] == "abc123"
+        assert entry["duration_ms"] == 1.5
+        assert entry["level"] == "INFO"
+
+    def test_sampling_keeps_every_nth_info_record(self):
+        """Matching INFO lines are sampled; other lines and warnings always pass."""
+        sampler = SamplingFilter({"Health check requested": 0.25})
+        kept = sum(sampler.filter(make_record("Health check requested")) for _ in range(100))
+        assert kept == 25
+        assert sampler.filter(make_record("Returning problem: x"))
+        assert sampler.filter(make_record("Health check requested", level=logging.WARNING))
+
+    def test_sampling_does_not_format_messages(self):
+        """Rules match the template or an explicit sample_key, never the formatted message."""
+
+        class Unformattable:
+            def __str__(self):
+                raise AssertionError("message was formatted")
+
+        sampler = SamplingFilter({"GET / 200": 0, "Loaded": 0})
+        record = logging.LogRecord("main", logging.INFO, __file__, 1, "Loaded %s", (Unformattable(),), None)
+        assert not sampler.filter(record)
+        access = logging.LogRecord("main", logging.INFO, __file__, 1, "%s %s %s", (Unformattable(),) * 3, None)
+        access.sample_key = "GET / 200"
+        assert not sampler.filter(access)
+
+    def test_parse_sample_rates(self):
+        """Rules are prefix:rate pairs; invalid rates are rejected."""
+        assert parse_sample_rates("Health check requested:0.01, GET / 200:0") == {
+            "Health check requested": 0.01,
+            "GET / 200": 0.0,
+        }
+        with pytest.raises(ValueError):
+            parse_sample_rates("Health check requested:2")
+
+
+class TestPipeline:
+    """Tests for the background writer and request context."""
+
+    def test_records_are_written_by_background_thread(self, tmp_path, restore_root_logger):
+        """Records reach the rotating file as JSON once the listener drains the queue."""
+        log_file = tmp_path / "api.log"
+        listener = configure_logging(log_file=str(log_file), sample_rates={"noisy": 0})
+        token = request_id_var.set("req-1")
+        try:
+            logging.getLogger("main").info("Returning problem: %s", "p1")
+            logging.getLogger("main").info("noisy line")
+        finally:
+            request_id_var.reset(token)
+            listener.stop()
+
+        entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert [e["message"] for e in entries] == ["Returning problem: p1"]
+        assert entries[0]["request_id"] == "req-1"
+
+    def test_request_id_header(self):
+        """Responses carry a generated request id, or echo the caller's."""
+        generated = client.get("/").headers["X-Request-ID"]
+        assert len(generated) == 32
+        assert client.get("/", headers={"X-Request-ID": "trace-42"}).headers["X-Request-ID"] == "trace-42"
@@ -0,0 +1,91 @@
+"""
+Tests for the metrics registry and the /metrics endpoint.
+Run with: pytest tests/test_metrics.py
+"""
+
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from metrics import MetricsRegistry
+from tests.conftest import FakeAsyncClient
+
+client = TestClient(app)
+
+CODE = "def max_sum(arr, k):\n    return max(sum(arr[i:i + k]) for i in range(len(arr) - k + 1))"
+
+
+class TestRegistry:
+    """Tests for MetricsRegistry rendering."""
+
+    def test_counter_and_histogram_exposition(self):
+        """Histograms render cumulative buckets, sum and count."""
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests", ["route"])
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        requests.inc("/")
+        requests.inc("/", amount=2)
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value)
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/"} 3' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_sum 5.55" in text
+        assert "latency_seconds_count 3" in text
+
+    def test_label_values_are_escaped(self):
+        """Quotes and newlines in label values cannot break the format."""
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors", ["detail"]).inc('bad "quote"\nline')
+        assert 'errors_total{detail="bad \\"quote\\"\\nline"} 1' in registry.render()
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /metrics and what the app records."""
+
+    def test_requests_counted_per_route_template(self):
+        """Routes are labelled by template, not by raw path."""
+        before = main.http_requests.value("GET", "/problem/{problem_id}", "200")
+        client.get("/problem/sliding_window_1")
+        assert main.http_requests.value("GET", "/problem/{problem_id}", "200") == before + 1
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'http_request_duration_seconds_count{method="GET",route="/problem/{problem_id}"}' in response.text
+
+    def test_upstream_usage_and_parse_metrics(self, monkeypatch):
+        """Token usage from response.usage, model latency and parse counts are recorded."""
+        usage = SimpleNamespace(prompt_tokens=120, completion_tokens=80)
+        monkeypatch.setattr(main, "client", FakeAsyncClient(usage=usage))
+        model = main.model_router.choose("analyze", len(CODE), "sliding_window").name
+        prompt_before = main.upstream_tokens.value(model, "prompt")
+        calls_before = main.upstream_latency.count(model, "ok")
+        parses_before = main.parse_count.value()
+
+        assert client.post("/analyze", json={"code": CODE, "topic": "sliding_window"}).status_code == 200
+        assert main.upstream_tokens.value(model, "prompt") == prompt_before + 120
+        assert main.upstream_latency.count(model, "ok") == calls_before + 1
+        assert main.parse_count.value() == parses_before + 1
+
+    def test_fallback_sections_counted(self, monkeypatch):
+        """Completions without an improvement plan count as a plan fallback."""
+        monkeypatch.setattr(main, "client", FakeAsyncClient(content="**Time Complexity**: O(n)\n"))
+        plan_before = main.parse_fallbacks.value("improvement_plan")
+        time_before = main.parse_fallbacks.value("time_complexity")
+        client.post("/analyze", json={"code": CODE, "topic": "sliding_window"})
+        assert main.parse_fallbacks.value("improvement_plan") == plan_before + 1
+        assert main.parse_fallbacks.value("time_complexity") == time_before
+
+    def test_rate_limit_rejections_counted(self):
+        """429s from slowapi are counted per route."""
+        before = main.rate_limit_rejections.value("/problems")
+        statuses = [client.get("/problems").status_code for _ in range(31)]
+        assert statuses[-1] == 429
+        assert main.rate_limit_rejections.value("/problems") == before + 1
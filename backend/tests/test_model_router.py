@@ -0,0 +1,160 @@
+"""
+Tests for the multi-model router.
+Run with: pytest tests/test_model_router.py
+"""
+
+import openai
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from model_router import Backend, ModelRouter, parse_backends, parse_routes
+
+client = TestClient(app)
+
+CODE = "def max_sum(arr, k):\n    return max(sum(arr[i:i + k]) for i in range(len(arr) - k + 1))"
+
+MINI = Backend("mini", "gpt-4o-mini", 1)
+MINI_B = Backend("mini-b", "gpt-4o-mini", 1, "http://127.0.0.1:9100/v1")
+LARGE = Backend("large", "gpt-4o", 2)
+
+
+def router(*backends, **options) -> ModelRouter:
+    return ModelRouter(list(backends or (MINI, MINI_B, LARGE)), **options)
+
+
+class TestParsing:
+    """Tests for the LLM_MODELS and LLM_ROUTES formats."""
+
+    def test_parse_backends(self):
+        backends = parse_backends("gpt-4o-mini:1, local=llama3:1@http://127.0.0.1:8080/v1 ,gpt-4o:2")
+        assert backends == [
+            Backend("gpt-4o-mini", "gpt-4o-mini", 1),
+            Backend("local", "llama3", 1, "http://127.0.0.1:8080/v1"),
+            Backend("gpt-4o", "gpt-4o", 2),
+        ]
+
+    @pytest.mark.parametrize("spec", ["gpt-4o", "gpt-4o:x", "gpt-4o:0", "gpt-4o:1,gpt-4o:2"])
+    def test_invalid_backends(self, spec):
+        with pytest.raises(ValueError):
+            parse_backends(spec)
+
+    def test_routes_must_name_known_backends(self):
+        assert parse_routes("stream=large, batch=mini") == {"stream": "large", "batch": "mini"}
+        with pytest.raises(ValueError):
+            router(routes={"stream": "missing"})
+
+
+class TestRouting:
+    """Tests for tier selection and health-aware choice."""
+
+    def test_tier_from_size_topic_and_detail(self):
+        r = router()
+        assert r.required_tier(200, "sliding_window") == 1
+        assert r.required_tier(5000, "sliding_window") == 2
+        assert r.required_tier(200, "dynamic programming") == 2
+        assert r.required_tier(5000, "graph", detail="brief") == 1
+        assert r.required_tier(200, "array", detail="deep") == 2
+
+    def test_prefers_lower_latency_within_tier(self):
+        r = router()
+        for _ in range(5):
+            r.record(MINI, 2.0, ok=True)
+            r.record(MINI_B, 0.5, ok=True)
+        assert r.choose("analyze", 200, "array") == MINI_B
+        assert r.choose("analyze", 200, "array", detail="deep") == LARGE
+
+    def test_error_ewma_marks_backend_unhealthy(self):
+        r = router(probe_interval=60)
+        r.record(MINI, 0.5, ok=True)
+        r.record(MINI_B, 1.0, ok=True)
+        for _ in range(4):
+            r.record(MINI, 0.5, ok=False)
+        assert not r.healthy(MINI)
+        assert r.choose("analyze", 200, "array") == MINI_B
+        assert r.stats()["backends"]["mini"]["healthy"] is False
+
+    def test_unhealthy_backend_is_probed_after_interval(self):
+        r = router(MINI, LARGE, probe_interval=0)
+        for _ in range(4):
+            r.record(MINI, 0.5, ok=False)
+        assert r.choose("analyze", 200, "array") == MINI
+
+    def test_falls_back_across_tiers(self):
+        r = router(MINI, LARGE, probe_interval=60)
+        for _ in range(4):
+            r.record(MINI, 0.5, ok=False)
+        assert r.choose("analyze", 200, "array") == LARGE
+        for _ in range(4):
+            r.record(LARGE, 0.5, ok=False)
+        # Nothing healthy: probe the backend that failed longest ago
+        assert r.choose("analyze", 200, "array", detail="deep") == MINI
+
+    def test_skips_unavailable_backends(self):
+        closed = {"mini"}
+        r = router(available=lambda name: name not in closed)
+        assert r.choose("analyze", 200, "array") == MINI_B
+        assert r.stats()["backends"]["mini"]["healthy"] is False
+        closed.add("mini-b")
+        assert r.choose("analyze", 200, "array") == LARGE
+
+    def test_route_override_pins_backend(self):
+        r = router(routes={"stream": "large"})
+        assert r.choose("stream", 10, "array", detail="brief") == LARGE
+        assert r.choose("analyze", 10, "array").tier == 1
+
+
+class TestRoutedAnalysis:
+    """Tests for routing /analyze calls."""
+
+    def test_small_submissions_use_cheapest_tier(self, fake_client):
+        client.post("/analyze", json={"code": CODE, "topic": "sliding_window"})
+        # Feedback is cached per code, so the deep request needs a different submission
+        client.post("/analyze", json={"code": "def f(s):\n    return s[::-1]", "topic": "string", "detail": "deep"})
+        models = [call["model"] for call in fake_client.chat.completions.calls]
+        tiers = {backend.model: backend.tier for backend in main.LLM_MODELS}
+        assert tiers[models[0]] == min(tiers.values())
+        assert tiers[models[1]] == max(tiers.values())
+
+    def test_outcomes_feed_router(self, fake_client):
+        client.post("/analyze", json={"code": CODE, "topic": "sliding_window"})
+        backends = main.model_router.stats()["backends"]
+        assert sum(backend["calls"] for backend in backends.values()) == 1
+        assert any(backend["latency_ewma_ms"] is not None for backend in backends.values())
+
+    def test_failing_backend_fails_over(self, fake_client, monkeypatch):
+        """Once the cheap model's circuit opens, calls go to the other backend instead of failing."""
+        cheap = min(main.LLM_MODELS, key=lambda backend: backend.tier)
+        create = fake_client.chat.completions.create
+
+        async def flaky_create(**kwargs):
+            if kwargs["model"] == cheap.model:
+                fake_client.chat.completions.calls.append(kwargs)
+                raise openai.APIConnectionError(request=None)
+            return await create(**kwargs)
+
+        monkeypatch.setattr(fake_client.chat.completions, "create", flaky_create)
+        for caller in main.upstream_callers.values():
+            monkeypatch.setattr(caller.retry, "base_delay", 0.001)
+
+        statuses = [
+            client.post("/analyze", json={"code": f"def f(a):\n    return a[{i}]", "topic": "array"}).status_code
+            for i in range(6)
+        ]
+        assert statuses[-4:] == [200] * 4
+        models = [call["model"] for call in fake_client.chat.completions.calls]
+        # The cheap model is only called until its breaker opens
+        assert models.count(cheap.model) == main.upstream_callers[cheap.name].breaker.failure_threshold
+        assert main.upstream_callers[cheap.name].breaker.is_open
+        backends = main.model_router.stats()["backends"]
+        # Breaker rejections are not counted against either backend
+        assert backends[cheap.name]["failures"] == 1
+        assert all(
+            backend["failures"] == 0 and backend["healthy"]
+            for name, backend in backends.items() if name != cheap.name
+        )
+
+    def test_rejects_unknown_detail(self):
+        response = client.post("/analyze", json={"code": CODE, "topic": "array", "detail": "verbose"})
+        assert response.status_code == 422
@@ -0,0 +1,136 @@
+"""
+Tests for the near-duplicate submission index and feedback reuse in /analyze.
+Run with: pytest tests/test_near_duplicates.py
+"""
+
+import random
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from near_duplicates import NearDuplicateIndex, fingerprint, similarity
+
+client = TestClient(app)
+
+SOLUTION = '''def max_sum(arr, k):
+    """Largest sum of k consecutive elements."""
+    window = sum(arr[:k])
+    best = window
+    for i in range(k, len(arr)):
+        window += arr[i] - arr[i - k]
+        best = max(best, window)
+    return best
+'''
+
+RENAMED = '''def maximum_window(nums, size):
+    # running sum of the current window
+    total = sum(nums[:size])
+    answer = total
+    for j in range(size, len(nums)):
+        total += nums[j] - nums[j - size]
+        answer = max(answer, total)
+    return answer
+'''
+
+OFF_BY_ONE = SOLUTION.replace("arr[i - k]", "arr[i - k + 1]")
+
+BRUTE_FORCE = '''def max_sum(arr, k):
+    best = float("-inf")
+    for i in range(len(arr) - k + 1):
+        best = max(best, sum(arr[i:i + k]))
+    return best
+'''
+
+
+def key(n: int) -> str:
+    return f"{n:064x}"
+
+
+class TestFingerprint:
+    """Tests for code fingerprints."""
+
+    def test_names_comments_and_formatting_are_ignored(self):
+        assert fingerprint(SOLUTION) == fingerprint(RENAMED)
+
+    def test_different_solutions_are_far_apart(self):
+        assert similarity(fingerprint(SOLUTION), fingerprint(BRUTE_FORCE)) < 0.9
+
+
+class TestNearDuplicateIndex:
+    """Tests for NearDuplicateIndex lookups."""
+
+    def test_finds_close_fingerprints_within_scope(self):
+        index = NearDuplicateIndex(threshold=0.95)
+        index.add("array", 0b1011 << 40, key(1))
+        assert index.find("array", (0b1011 << 40) ^ 0b111) == (key(1), 1 - 3 / 64)
+        assert index.find("array", (0b1011 << 40) ^ 0b1111) is None
+        assert index.find("tree", 0b1011 << 40) is None
+
+    def test_newest_match_wins(self):
+        index = NearDuplicateIndex()
+        index.add("array", 42, key(1))
+        index.add("array", 43, key(2))
+        assert index.find("array", 42)[0] == key(2)
+
+    def test_rotation_bounds_memory(self):
+        """Once a generation fills up, the older one is dropped and recent entries stay searchable."""
+        rng = random.Random(1)
+        values = [rng.getrandbits(64) for _ in range(5)]
+        index = NearDuplicateIndex(max_entries=4)
+        for n, value in enumerate(values):
+            index.add("array", value, key(n))
+        assert len(index) == 3 and index.stats()["rotations"] == 2
+        assert index.find("array", values[4]) == (key(4), 1.0)
+        assert index.find("array", values[2]) == (key(2), 1.0)
+        assert index.find("array", values[1]) is None
+
+    def test_threshold_must_keep_matches_findable(self):
+        with pytest.raises(ValueError):
+            NearDuplicateIndex(threshold=0.9)
+
+    def test_lookups_stay_fast_when_large(self):
+        """100k random entries: lookups scan a handful of short chains."""
+        rng = random.Random(0)
+        index = NearDuplicateIndex(max_entries=200_000)
+        values = [rng.getrandbits(64) for _ in range(100_000)]
+        for n, value in enumerate(values):
+            index.add("array", value, key(n))
+        start = time.perf_counter()
+        for value in values[:1000]:
+            assert index.find("array", value ^ 0b101) is not None
+        assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+class TestFeedbackReuse:
+    """/analyze serves near-duplicates from the feedback cache once enabled."""
+
+    @pytest.fixture(autouse=True)
+    def near_duplicates(self, monkeypatch):
+        monkeypatch.setattr(main, "near_duplicates", NearDuplicateIndex(threshold=0.95))
+
+    def test_renamed_solution_reuses_feedback(self, fake_client):
+        first = client.post("/analyze", json={"code": SOLUTION, "topic": "sliding_window"})
+        second = client.post("/analyze", json={"code": RENAMED, "topic": "sliding_window"})
+        assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "SIMILAR")
+        assert second.json()["feedback"] == first.json()["feedback"]
+        assert len(fake_client.chat.completions.calls) == 1
+
+    def test_other_topics_and_solutions_call_the_model(self, fake_client):
+        client.post("/analyze", json={"code": SOLUTION, "topic": "sliding_window"})
+        assert client.post("/analyze", json={"code": RENAMED, "topic": "array"}).headers["X-Cache"] == "MISS"
+        assert client.post("/analyze", json={"code": BRUTE_FORCE, "topic": "sliding_window"}).headers["X-Cache"] == "MISS"
+        assert len(fake_client.chat.completions.calls) == 3
+
+
+class TestReuseIsOptIn:
+    """Without NEAR_DUPLICATE_THRESHOLD, only exact (normalized) resubmissions are reused."""
+
+    def test_buggy_variant_is_analyzed(self, fake_client):
+        assert main.near_duplicates is None
+        client.post("/analyze", json={"code": SOLUTION, "topic": "sliding_window"})
+        response = client.post("/analyze", json={"code": OFF_BY_ONE, "topic": "sliding_window"})
+        assert response.headers["X-Cache"] == "MISS"
+        assert len(fake_client.chat.completions.calls) == 2
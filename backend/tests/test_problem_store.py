@@ -0,0 +1,183 @@
+"""
+Tests for the indexed problem bank and its endpoints.
+Run with: pytest tests/test_problem_store.py
+"""
+
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fast_json import dumps
+from main import app, Problem, ProblemPage, ALLOWED_TOPICS, HARDCODED_PROBLEM
+from problem_store import ProblemStore
+
+client = TestClient(app)
+
+
+def make_problem(problem_id: str, topic: str = "array", difficulty: str = "easy") -> dict:
+    """Build a minimal valid problem dict."""
+    return {
+        "id": problem_id,
+        "title": f"Problem {problem_id}",
+        "description": "Solve it.",
+        "constraints": "1 <= n <= 10^5",
+        "example": "Input: [1]\nOutput: 1",
+        "topic": topic,
+        "function_signature": "def solve(arr):\n    pass",
+        "difficulty": difficulty,
+    }
+
+
+def make_store(directory) -> ProblemStore:
+    store = ProblemStore(directory, parse=Problem.model_validate, topics=ALLOWED_TOPICS)
+    store.refresh()
+    return store
+
+
+class TestProblemStore:
+    """Tests for ProblemStore loading and indexing."""
+
+    def test_loads_json_and_yaml(self, tmp_path):
+        """Single objects and lists load from both formats."""
+        (tmp_path / "a.json").write_text(json.dumps(make_problem("a1")))
+        (tmp_path / "b.yaml").write_text(
+            "- id: b1\n  title: B\n  description: d\n  constraints: c\n"
+            "  example: e\n  topic: tree\n  function_signature: 'def f(): pass'\n"
+        )
+        store = make_store(tmp_path)
+        assert store.get("a1").topic == "array"
+        assert store.get("b1").difficulty == "medium"
+
+    def test_skips_invalid_entries(self, tmp_path):
+        """Bad files and entries are skipped without dropping good ones."""
+        (tmp_path / "good.json").write_text(json.dumps([make_problem("ok"), {"id": "missing_fields"}]))
+        (tmp_path / "topic.json").write_text(json.dumps(make_problem("bad_topic", topic="astrology")))
+        (tmp_path / "broken.json").write_text("{not json")
+        store = make_store(tmp_path)
+        assert len(store) == 1
+        assert store.get("ok") is not None
+
+    def test_filters_and_cursor_pagination(self, tmp_path):
+        """Pages walk every matching problem exactly once."""
+        problems = [make_problem(f"p{i:03d}", topic="array" if i % 2 else "tree",
+                                 difficulty="hard" if i % 3 == 0 else "easy") for i in range(100)]
+        (tmp_path / "bank.json").write_text(json.dumps(problems))
+        store = make_store(tmp_path)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = store.page(topic="array", cursor=cursor, limit=7)
+            seen.extend(p.id for p in page)
+            if cursor is None:
+                break
+        assert seen == sorted(p["id"] for p in problems if p["topic"] == "array")
+
+        hard_trees, _ = store.page(topic="tree", difficulty="hard", limit=200)
+        assert all(p.topic == "tree" and p.difficulty == "hard" for p in hard_trees)
+        assert store.random(topic="graph") is None
+        assert store.random(topic="tree").topic == "tree"
+
+    def test_hot_reload_picks_up_changes(self, tmp_path):
+        """Edited, added and removed files are reflected after refresh()."""
+        path = tmp_path / "bank.json"
+        path.write_text(json.dumps(make_problem("x")))
+        store = make_store(tmp_path)
+        assert store.refresh() is False
+
+        path.write_text(json.dumps([make_problem("x"), make_problem("y")]))
+        os.utime(path, ns=(0, 1))
+        (tmp_path / "extra.json").write_text(json.dumps(make_problem("z")))
+        assert store.refresh() is True
+        assert {p.id for p in store.page(limit=10)[0]} == {"x", "y", "z"}
+
+        (tmp_path / "extra.json").unlink()
+        assert store.refresh() is True
+        assert store.get("z") is None
+
+    def test_loads_ten_thousand_problems(self, tmp_path):
+        """A large bank spread over many files loads fully."""
+        for f in range(100):
+            batch = [make_problem(f"p{f:03d}_{i:03d}") for i in range(100)]
+            (tmp_path / f"bank_{f:03d}.json").write_text(json.dumps(batch))
+        store = make_store(tmp_path)
+        assert len(store) == 10000
+
+    def test_payloads_are_encoded_once_per_reload(self, tmp_path):
+        """Payloads match the model's JSON and only change when the problem does."""
+        path = tmp_path / "a.json"
+        path.write_text(json.dumps(make_problem("a1")))
+        store = ProblemStore(tmp_path, parse=Problem.model_validate, serialize=dumps)
+        store.refresh()
+        first = store.payload("a1")
+        assert json.loads(first.body) == store.get("a1").model_dump(mode="json")
+        assert store.payload("a1") is first
+
+        path.write_text(json.dumps(make_problem("a1", difficulty="hard")))
+        os.utime(path, ns=(1, 1))
+        store.refresh()
+        assert store.payload("a1").etag != first.etag
+        assert make_store(tmp_path).payload("a1") is None
+
+
+class TestProblemEndpoints:
+    """Tests for problem bank routes."""
+
+    def test_default_problem(self):
+        """Without filters /problem returns the default problem."""
+        assert client.get("/problem").json()["id"] == HARDCODED_PROBLEM.id
+
+    def test_random_by_topic(self):
+        """Filtering by topic returns a matching problem."""
+        response = client.get("/problem", params={"topic": "Sliding_Window"})
+        assert response.status_code == 200
+        assert response.json()["topic"] == "sliding_window"
+
+    def test_unknown_topic_rejected(self):
+        """Topics outside ALLOWED_TOPICS are rejected."""
+        assert client.get("/problem", params={"topic": "astrology"}).status_code == 400
+
+    def test_get_by_id(self):
+        """Problems can be fetched by id."""
+        assert client.get(f"/problem/{HARDCODED_PROBLEM.id}").status_code == 200
+        assert client.get("/problem/does_not_exist").status_code == 404
+
+    def test_list_problems(self):
+        """The list endpoint returns a page and a cursor field."""
+        response = client.get("/problems", params={"topic": "sliding_window", "limit": 1})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["problems"][0]["topic"] == "sliding_window"
+        assert "next_cursor" in data
+
+    @pytest.mark.parametrize("cursor", ["%%%", "not-base64!"])
+    def test_invalid_cursor(self, cursor):
+        """Garbage cursors return 400."""
+        assert client.get("/problems", params={"cursor": cursor}).status_code == 400
+
+    def test_conditional_get(self):
+        """A problem carries a strong ETag; sending it back returns an empty 304."""
+        first = client.get(f"/problem/{HARDCODED_PROBLEM.id}")
+        etag = first.headers["ETag"]
+        assert etag.startswith('"') and first.headers["Cache-Control"].startswith("public, max-age=")
+        assert "test_cases" not in first.json()
+
+        again = client.get(f"/problem/{HARDCODED_PROBLEM.id}", headers={"If-None-Match": f'"stale", W/{etag}'})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["ETag"] == etag
+        assert client.get("/problem", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/problem", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    def test_random_picks_must_revalidate(self):
+        response = client.get("/problem", params={"topic": "sliding_window"})
+        assert response.headers["Cache-Control"] == "no-cache"
+
+    def test_list_page_matches_model_encoding(self):
+        """The spliced page body is the same JSON the ProblemPage model produces."""
+        response = client.get("/problems", params={"limit": 2})
+        page = ProblemPage.model_validate(response.json())
+        assert response.json() == page.model_dump(mode="json")
+        etag = response.headers["ETag"]
+        assert client.get("/problems", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,93 @@
+"""
+Tests for the sampling profiler and its admin switch.
+Run with: pytest tests/test_profiler.py
+"""
+
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from profiler import SamplingProfiler
+
+client = TestClient(app)
+
+ADMIN = {"Authorization": "Bearer s3cret"}
+
+
+def busy_loop(seconds: float) -> int:
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+
+
+class TestSamplingProfiler:
+    """Tests for stack sampling."""
+
+    def test_samples_only_tracked_frames(self):
+        profiler = SamplingProfiler()
+        profiler.configure(1.0, interval=0.001)
+        try:
+            busy_loop(0.05)  # Not tracked: no samples
+            untracked = profiler.samples
+            frame = sys._getframe()
+            profiler.track(frame, {"method": "GET", "path": "/work"})
+            busy_loop(0.2)
+            profiler.untrack(frame)
+        finally:
+            profiler.configure(0.0)
+        assert untracked == 0
+        assert profiler.samples > 0
+        stack, count = profiler.folded().splitlines()[0].rsplit(" ", 1)
+        frames = stack.split(";")
+        assert frames[0] == "GET /work"
+        assert frames[-1].startswith("busy_loop (test_profiler.py:")
+        assert int(count) > 0
+
+    def test_off_by_default(self):
+        profiler = SamplingProfiler()
+        assert not profiler.running
+        assert not profiler.should_profile()
+
+
+class TestAdminProfiler:
+    """Tests for the /admin/profiler routes."""
+
+    def test_hidden_without_admin_token(self):
+        assert client.get("/admin/profiler").status_code == 404
+
+    def test_requires_the_token(self, admin_token):
+        assert client.get("/admin/profiler").status_code == 403
+        assert client.get("/admin/profiler", headers={"Authorization": "Bearer wrong"}).status_code == 403
+        assert client.get("/admin/profiler", headers=ADMIN).json()["running"] is False
+
+    def test_rejects_invalid_settings(self, admin_token):
+        response = client.put("/admin/profiler", json={"sample_rate": 2}, headers=ADMIN)
+        assert response.status_code == 422
+
+    def test_profiles_requests_and_dumps_flamegraph(self, admin_token, monkeypatch):
+        monkeypatch.setattr(main.limiter, "enabled", False)
+        response = client.put("/admin/profiler", json={"sample_rate": 1.0, "interval_ms": 1}, headers=ADMIN)
+        assert response.json()["running"] is True
+
+        deadline = time.monotonic() + 10
+        while main.profiler.samples == 0 and time.monotonic() < deadline:
+            client.post("/analyze", json={"code": "def f(a):\n    return sorted(a)", "topic": "array", "mode": "fast"})
+        assert main.profiler.samples > 0
+
+        folded = client.get("/admin/profiler/flamegraph", params={"reset": True}, headers=ADMIN).text
+        assert any(line.startswith("POST /analyze;") for line in folded.splitlines())
+        assert main.profiler.samples == 0
+
+        response = client.put("/admin/profiler", json={"sample_rate": 0}, headers=ADMIN)
+        assert response.json()["running"] is False
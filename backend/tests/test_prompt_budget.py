@@ -0,0 +1,98 @@
+"""
+Tests for prompt compaction and adaptive token budgeting.
+Run with: pytest tests/test_prompt_budget.py
+"""
+
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from prompt_budget import choose_max_tokens, compact_code, estimate_tokens
+from tests.conftest import FakeAsyncClient
+
+client = TestClient(app)
+
+COMMENTED = '''def max_sum(arr, k):
+    """Maximum sum of a window of size k."""
+    # first window
+
+    window = sum(arr[:k])  # running sum
+    best = window
+    for i in range(k, len(arr)):
+        window += arr[i] - arr[i - k]
+        best = max(best, window)
+    return best
+'''
+
+
+class TestCompaction:
+    """Tests for compact_code and estimate_tokens."""
+
+    def test_strips_comments_docstrings_and_blank_lines(self):
+        """Minified code keeps behavior but drops everything the model does not need."""
+        compact = compact_code(COMMENTED)
+        assert "#" not in compact.text and '"""' not in compact.text and "\n\n" not in compact.text
+        assert (compact.comments, compact.docstrings) == (2, 1)
+        assert compact.describe_removed() == "2 comments and 1 docstring"
+
+        namespace = {}
+        exec(compact.text, namespace)
+        assert namespace["max_sum"]([1, 2, 3, 4], 2) == 7
+
+    def test_unparsable_code_is_sent_unchanged(self):
+        """Syntax errors stay visible to the model."""
+        broken = "def f(:\n    # comment\n    return 1"
+        assert compact_code(broken).text == broken
+        assert not compact_code(broken).changed
+
+    def test_deeply_nested_code_is_sent_unchanged(self):
+        """Code too deep for the parser is passed through instead of failing the request."""
+        for deep in ("a" + ".b" * 4990, "-" * 9990 + "1"):
+            assert compact_code(deep).text == deep
+
+    def test_token_estimate_scales_with_text(self):
+        """Estimates are in the right range and grow with input size."""
+        assert estimate_tokens("") == 0
+        assert 3 <= estimate_tokens("Keep feedback short.") <= 6
+        assert estimate_tokens(COMMENTED * 2) > estimate_tokens(COMMENTED)
+
+    def test_budget_grows_with_code_and_topic(self):
+        """Bigger code and harder topics get more room, within the bounds."""
+        assert choose_max_tokens(0, "array") == 400
+        assert choose_max_tokens(800, "array") > choose_max_tokens(20, "array")
+        assert choose_max_tokens(20, "dynamic_programming") > choose_max_tokens(20, "array")
+        assert choose_max_tokens(100_000, "graph") == 1000
+
+
+class TestPromptPlan:
+    """Tests for how /analyze uses the prompt plan."""
+
+    def test_model_receives_compacted_code_and_adaptive_budget(self, fake_client):
+        """The request carries the minified code and a budget below the old fixed 1000."""
+        response = client.post("/analyze", json={"code": COMMENTED, "topic": "sliding_window"})
+        assert response.status_code == 200
+        call = fake_client.chat.completions.calls[0]
+        prompt = call["messages"][1]["content"]
+        assert "# running sum" not in prompt
+        assert "Removed from the original code to save space: 2 comments and 1 docstring." in prompt
+        assert call["max_tokens"] < 1000
+
+    def test_compaction_can_be_disabled(self, fake_client, monkeypatch):
+        """PROMPT_COMPACTION=false sends the code as submitted."""
+        monkeypatch.setattr(main, "PROMPT_COMPACTION", False)
+        plan = main.plan_prompt("sliding_window", COMMENTED)
+        assert "# running sum" in plan.messages[1]["content"]
+        assert plan.estimated_tokens > main.plan_prompt("sliding_window", "x = 1").estimated_tokens
+
+    def test_usage_logged_against_estimate(self, monkeypatch):
+        """The reported usage is logged next to the local estimate."""
+        usage = SimpleNamespace(prompt_tokens=300, completion_tokens=200)
+        monkeypatch.setattr(main, "client", FakeAsyncClient(usage=usage))
+        logged = []
+        monkeypatch.setattr(main.logger, "info", lambda msg, *args, **kwargs: logged.append((msg, kwargs)))
+        client.post("/analyze", json={"code": COMMENTED, "topic": "sliding_window"})
+        extras = [kwargs["extra"] for msg, kwargs in logged if msg.startswith("Token usage")]
+        assert extras and extras[0]["prompt_tokens"] == 300
+        assert extras[0]["estimated_prompt_tokens"] > 0
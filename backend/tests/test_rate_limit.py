@@ -0,0 +1,152 @@
+"""
+Tests for token-bucket rate limiting and API key quotas.
+Run with: pytest tests/test_rate_limit.py
+"""
+
+import asyncio
+import multiprocessing
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from limits import parse
+
+import main
+from main import app
+from rate_limit import (
+    MemoryTokenBuckets,
+    SharedTokenBuckets,
+    SQLiteTokenBuckets,
+    TokenBucketRateLimiter,
+    api_key_id,
+    parse_api_key_quotas,
+    store_from_uri,
+)
+
+client = TestClient(app)
+
+
+def take_many(path: str, count: int) -> int:
+    """Take `count` tokens from a shared bucket in a separate process; returns how many were allowed."""
+    store = SQLiteTokenBuckets(path)
+    return sum(store.take("shared", 50, 50 / 3600)[0] for _ in range(count))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryTokenBuckets()
+    return SQLiteTokenBuckets(str(tmp_path / "buckets.db"))
+
+
+class TestTokenBuckets:
+    """Tests for the bucket stores."""
+
+    def test_burst_then_refill(self, store, monkeypatch):
+        """A full bucket allows `capacity` hits at once, then refills at `rate`."""
+        now = [1000.0]
+        monkeypatch.setattr("rate_limit.time.time", lambda: now[0])
+        assert [store.take("k", 3, 1.0)[0] for _ in range(4)] == [True, True, True, False]
+        now[0] += 1.5
+        assert store.peek("k", 3, 1.0) == pytest.approx(1.5)
+        assert store.take("k", 3, 1.0) == (True, pytest.approx(0.5))
+        assert store.take("other", 3, 1.0)[0]
+
+    def test_reset_refills_every_bucket(self, store):
+        store.take("k", 1, 0.01)
+        assert not store.take("k", 1, 0.01)[0]
+        store.reset()
+        assert store.take("k", 1, 0.01)[0]
+
+    def test_sqlite_bucket_is_shared_between_processes(self, tmp_path):
+        """Workers sharing the database never hand out more tokens than the bucket holds."""
+        path = str(tmp_path / "buckets.db")
+        SQLiteTokenBuckets(path)
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            allowed = pool.starmap(take_many, [(path, 20)] * 4)
+        assert sum(allowed) == 50
+
+    def test_store_from_uri(self, tmp_path):
+        assert isinstance(store_from_uri("memory://"), MemoryTokenBuckets)
+        shared = store_from_uri(f"sqlite://{tmp_path}/rl.db")
+        assert isinstance(shared, SharedTokenBuckets)
+        assert shared.shared.path == f"{tmp_path}/rl.db"
+        with pytest.raises(ValueError):
+            store_from_uri("memcached://localhost")
+
+    def test_shared_buckets_settle_between_workers(self, tmp_path):
+        """Workers decide locally, and each sync takes both workers' spending from the shared bucket."""
+        path = str(tmp_path / "buckets.db")
+        first, second = SharedTokenBuckets(SQLiteTokenBuckets(path)), SharedTokenBuckets(SQLiteTokenBuckets(path))
+        assert all(first.take("k", 10, 0.001)[0] for _ in range(6))
+        assert all(second.take("k", 10, 0.001)[0] for _ in range(3))
+
+        async def sync_both():
+            await first.sync()
+            await second.sync()
+        asyncio.run(sync_both())
+        assert second.peek("k", 10, 0.001) == pytest.approx(1, abs=0.01)
+        assert second.take("k", 10, 0.001)[0] and not second.take("k", 10, 0.001)[0]
+
+        # Overspending within one interval is carried as debt
+        assert all(first.take("k", 10, 0.001)[0] for _ in range(4))
+        asyncio.run(sync_both())
+        assert second.peek("k", 10, 0.001) == pytest.approx(-4, abs=0.01)
+
+    def test_failed_sync_keeps_spending(self, tmp_path, monkeypatch):
+        """Spending that could not be settled is retried on the next sync."""
+        store = SharedTokenBuckets(SQLiteTokenBuckets(str(tmp_path / "buckets.db")))
+        store.take("k", 5, 0.001, cost=2)
+
+        async def locked(spent):
+            raise sqlite3.OperationalError("database is locked")
+        with monkeypatch.context() as patch:
+            patch.setattr(store.shared, "settle", locked)
+            with pytest.raises(sqlite3.OperationalError):
+                asyncio.run(store.sync())
+        assert asyncio.run(store.sync()) == 1
+        assert store.shared.peek("k", 5, 0.001) == pytest.approx(3, abs=0.01)
+
+    def test_strategy_window_stats(self):
+        """The limits strategy reports whole tokens left and when the next one arrives."""
+        strategy = TokenBucketRateLimiter(MemoryTokenBuckets())
+        item = parse("2/minute")
+        assert strategy.hit(item, "ip") and strategy.hit(item, "ip")
+        assert not strategy.test(item, "ip")
+        reset_at, remaining = strategy.get_window_stats(item, "ip")
+        assert remaining == 0 and reset_at > time.time()
+
+
+class TestApiKeyQuotas:
+    """Tests for per-key quotas on the analysis endpoints."""
+
+    def test_parse_quotas(self):
+        assert parse_api_key_quotas(" k1=100/minute, k2=5/second ") == {
+            api_key_id("k1"): "100/minute",
+            api_key_id("k2"): "5/second",
+        }
+        assert parse_api_key_quotas("") == {}
+        with pytest.raises(ValueError):
+            parse_api_key_quotas("k1")
+
+    def test_known_key_gets_its_own_quota(self, fake_client, monkeypatch):
+        """A listed key is limited by its quota instead of the shared per-IP limit."""
+        monkeypatch.setitem(main.API_KEY_QUOTAS, api_key_id("team-key"), "2/minute")
+        body = {"code": "def f(x):\n    return x", "topic": "array"}
+        statuses = [
+            client.post("/analyze", json=body, headers={"X-API-Key": "team-key"}).status_code
+            for _ in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+        # The IP's own budget is untouched
+        assert client.post("/analyze", json=body).status_code == 200
+
+    def test_unknown_key_falls_back_to_ip(self, fake_client):
+        """Unlisted keys are rate limited per IP like anonymous clients."""
+        body = {"code": "def f(x):\n    return x", "topic": "array"}
+        statuses = [
+            client.post("/analyze", json=body, headers={"X-API-Key": f"guess-{i}"}).status_code
+            for i in range(11)
+        ]
+        assert statuses[-1] == 429
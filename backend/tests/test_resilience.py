@@ -0,0 +1,285 @@
+"""
+Tests for upstream deadlines, retries, circuit breaking and hedging.
+Run with: pytest tests/test_resilience.py
+"""
+
+import asyncio
+import random
+
+import openai
+import pytest
+from fastapi.testclient import TestClient
+
+try:
+    import httpx2 as sdk_httpx  # Newer openai releases ship their own httpx fork
+except ImportError:
+    import httpx as sdk_httpx
+
+import main
+from concurrency import UpstreamLimiter
+from main import app
+from resilience import (
+    CircuitBreaker,
+    ResilientCaller,
+    RetryPolicy,
+    UpstreamTimeoutError,
+    UpstreamUnavailableError,
+    is_retryable,
+)
+from tests.conftest import FakeAsyncClient
+
+client = TestClient(app)
+
+BODY = {"code": "def f(arr):\n    return sum(arr)", "topic": "array"}
+
+
+def api_error(cls, status: int, headers: dict | None = None):
+    """Build an openai API error as the SDK would raise it."""
+    request = sdk_httpx.Request("POST", "http://upstream/v1/chat/completions")
+    response = sdk_httpx.Response(status, headers=headers, request=request)
+    return cls(f"HTTP {status}", response=response, body=None)
+
+
+class Flaky:
+    """Upstream call that fails with the given errors, then succeeds."""
+
+    def __init__(self, *errors, delay: float = 0.0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def caller(**kwargs) -> ResilientCaller:
+    options = {
+        "breaker": CircuitBreaker(failure_threshold=3, reset_timeout=30),
+        "retry": RetryPolicy(attempts=3, base_delay=0.001, rng=random.Random(0)),
+        "deadline": 5,
+    }
+    options.update(kwargs)
+    return ResilientCaller(**options)
+
+
+class TestRetries:
+    """Tests for retry classification and backoff."""
+
+    def test_retries_transient_errors(self):
+        """5xx and 429 are retried until the call succeeds."""
+        fn = Flaky(api_error(openai.InternalServerError, 500), api_error(openai.RateLimitError, 429))
+        resilient = caller()
+        assert asyncio.run(resilient.call(fn)) == "ok"
+        assert fn.calls == 3 and resilient.retries == 2
+
+    def test_client_errors_are_not_retried(self):
+        """A 400 fails immediately and does not count against the breaker."""
+        fn = Flaky(api_error(openai.BadRequestError, 400))
+        resilient = caller()
+        with pytest.raises(openai.BadRequestError):
+            asyncio.run(resilient.call(fn))
+        assert fn.calls == 1
+        assert resilient.breaker.stats()["consecutive_failures"] == 0
+
+    def test_classification(self):
+        assert is_retryable(api_error(openai.InternalServerError, 503))
+        assert is_retryable(UpstreamTimeoutError())
+        assert not is_retryable(api_error(openai.AuthenticationError, 401))
+        assert not is_retryable(ValueError("bad"))
+
+    def test_backoff_is_jittered_and_honours_retry_after(self):
+        policy = RetryPolicy(base_delay=1, max_delay=4, rng=random.Random(1))
+        delays = [policy.backoff(n) for n in range(6)]
+        assert all(0 <= d <= min(4, 2 ** n) for n, d in enumerate(delays))
+        assert len(set(delays)) == len(delays)
+        assert policy.backoff(0, api_error(openai.RateLimitError, 429, {"retry-after": "7"})) == 7
+
+
+class TestDeadlines:
+    """Tests for per-attempt timeouts and the overall deadline."""
+
+    def test_slow_attempts_time_out(self):
+        """Each attempt is cut off, and the caller gives up at the deadline."""
+        fn = Flaky(delay=1)
+        resilient = caller(deadline=0.2, attempt_timeout=0.05)
+        with pytest.raises(UpstreamTimeoutError):
+            asyncio.run(resilient.call(fn))
+        assert fn.calls == 3
+        assert resilient.timeouts == 3
+
+
+class TestStreams:
+    """Tests for the deadline and breaker accounting of streamed calls."""
+
+    @staticmethod
+    def opener(*chunks, stall: float = 0.0, error: Exception | None = None):
+        async def items():
+            for chunk in chunks:
+                yield chunk
+            if stall:
+                await asyncio.sleep(stall)
+            if error is not None:
+                raise error
+
+        async def open_stream():
+            return items()
+        return open_stream
+
+    @staticmethod
+    def consume(resilient: ResilientCaller, open_stream) -> list:
+        async def run():
+            return [chunk async for chunk in resilient.stream(open_stream)]
+        return asyncio.run(run())
+
+    def test_deadline_covers_the_whole_stream(self):
+        """A stream that stalls after opening is cut off at the deadline and counts as a failure."""
+        resilient = caller(deadline=0.1)
+        with pytest.raises(UpstreamTimeoutError):
+            self.consume(resilient, self.opener("a", "b", stall=1))
+        assert resilient.timeouts == 1
+        assert resilient.breaker.stats()["consecutive_failures"] == 1
+
+    def test_breaker_records_the_stream_outcome(self):
+        """Failing mid-stream counts against the breaker; a complete stream resets it."""
+        resilient = caller()
+        with pytest.raises(ConnectionResetError):
+            self.consume(resilient, self.opener("a", error=ConnectionResetError("peer reset")))
+        assert resilient.breaker.stats()["consecutive_failures"] == 1
+        assert self.consume(resilient, self.opener("a", "b")) == ["a", "b"]
+        assert resilient.breaker.stats()["consecutive_failures"] == 0
+
+
+class TestCircuitBreaker:
+    """Tests for opening, failing fast and probing."""
+
+    def test_opens_after_consecutive_failures(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("resilience.time.monotonic", lambda: now[0])
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure()
+        assert breaker.is_open
+        with pytest.raises(UpstreamUnavailableError) as exc:
+            breaker.before_call()
+        assert exc.value.retry_after == 10
+
+        # After the cool-down one probe is admitted; a failed probe re-opens the circuit
+        now[0] += 10
+        breaker.before_call()
+        with pytest.raises(UpstreamUnavailableError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.is_open
+
+        now[0] += 10
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.stats()["times_opened"] == 1
+
+    def test_open_circuit_stops_retries(self):
+        """Once the breaker opens mid-call, remaining retries fail fast."""
+        fn = Flaky(*[api_error(openai.InternalServerError, 500)] * 5)
+        resilient = caller(breaker=CircuitBreaker(failure_threshold=2), retry=RetryPolicy(attempts=5, base_delay=0.001))
+        with pytest.raises(UpstreamUnavailableError):
+            asyncio.run(resilient.call(fn))
+        assert fn.calls == 2
+
+
+class TestHedging:
+    """Tests for hedged requests."""
+
+    def test_hedge_wins_when_first_call_is_slow(self):
+        """A call slower than the learned percentile gets a duplicate, which answers first."""
+        async def run():
+            resilient = caller(hedge_percentile=50, hedge_min_samples=4, hedge_budget=1.0)
+            for _ in range(4):
+                resilient._observe(0.01)
+            delays = iter([1.0, 0.0])
+
+            async def fn():
+                await asyncio.sleep(next(delays))
+                return "ok"
+
+            result = await resilient.call(fn)
+            return result, resilient.stats()
+
+        result, stats = asyncio.run(run())
+        assert result == "ok"
+        assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+
+    def test_hedges_need_a_free_limiter_slot(self):
+        """Hedges take a slot of their own and are skipped while the limiter is full."""
+        async def run(max_concurrency):
+            limiter = UpstreamLimiter(max_concurrency, max_queue=0)
+            resilient = caller(hedge_percentile=50, hedge_min_samples=4, hedge_budget=1.0, limiter=limiter)
+            for _ in range(4):
+                resilient._observe(0.01)
+            delays = iter([0.2, 0.0])
+            peak = 0
+
+            async def fn():
+                nonlocal peak
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(next(delays))
+                return "ok"
+
+            async with limiter:
+                await resilient.call(fn)
+            await asyncio.sleep(0)
+            return resilient.hedges, peak, limiter.in_flight
+
+        assert asyncio.run(run(1)) == (0, 1, 0)
+        assert asyncio.run(run(2)) == (1, 2, 0)
+
+    def test_no_hedging_until_latency_is_known(self):
+        resilient = caller(hedge_percentile=95)
+        assert resilient.hedge_delay() is None
+
+    def test_unhedged_calls_do_not_feed_the_percentile(self):
+        """Stream openings are fast and must not pull the hedge delay down."""
+        resilient = caller(hedge_percentile=95, hedge_min_samples=1)
+
+        async def quick():
+            return "ok"
+
+        async def run():
+            for _ in range(5):
+                await resilient.call(quick, hedge=False)
+
+        asyncio.run(run())
+        assert resilient.hedge_delay() is None
+        assert resilient.stats()["calls"] == 5
+
+
+class TestAnalyzeEndpoint:
+    """Tests for how /analyze reports upstream failures."""
+
+    def test_upstream_errors_map_to_gateway_status(self, monkeypatch):
+        """Exhausted retries on 5xx return 502 instead of a generic 500."""
+        fake = FakeAsyncClient(error=api_error(openai.InternalServerError, 500))
+        monkeypatch.setattr(main, "client", fake)
+        upstream_caller = main.upstream_callers[main.model_router.choose("analyze", len(BODY["code"]), "array").name]
+        monkeypatch.setattr(upstream_caller.retry, "base_delay", 0.001)
+        response = client.post("/analyze", json=BODY)
+        assert response.status_code == 502
+        assert len(fake.chat.completions.calls) == upstream_caller.retry.attempts
+
+    def test_open_circuit_fails_fast(self, fake_client, monkeypatch):
+        """While every backend's circuit is open, /analyze answers 503 without calling the model."""
+        for caller in main.upstream_callers.values():
+            for _ in range(caller.breaker.failure_threshold):
+                caller.breaker.record_failure()
+        response = client.post("/analyze", json=BODY)
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) > 0
+        assert fake_client.chat.completions.calls == []
+        assert client.post("/analyze/stream", json=BODY).status_code == 503
+        breakers = client.get("/").json()["circuit_breaker"]
+        assert {breaker["state"] for breaker in breakers.values()} == {"open"}
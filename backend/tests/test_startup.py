@@ -0,0 +1,125 @@
+"""
+Tests for the startup warm-up and the readiness probe.
+Run with: pytest tests/test_startup.py
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from readiness import Readiness
+from tests.conftest import FakeAsyncClient
+
+client = TestClient(app)
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def wait_until_ready(running: TestClient, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = running.get("/ready")
+        if response.status_code == 200 or time.monotonic() > deadline:
+            return response
+        time.sleep(0.02)
+
+
+class TestReadiness:
+    """Tests for phase tracking."""
+
+    def test_ready_once_every_phase_ran(self):
+        readiness = Readiness(["sync", "async"])
+        assert not readiness.ready
+        readiness.begin()
+
+        async def warm():
+            await asyncio.sleep(0)
+            return "done"
+
+        assert asyncio.run(readiness.run("sync", lambda: 1)) == 1
+        assert not readiness.ready
+        assert asyncio.run(readiness.run("async", warm)) == "done"
+        stats = readiness.stats()
+        assert readiness.ready and stats["pending"] == []
+        assert set(stats["phases_ms"]) == {"sync", "async"}
+        assert stats["warmup_ms"] is not None
+
+    def test_failed_phase_is_recorded_not_raised(self):
+        readiness = Readiness(["broken"])
+        readiness.begin()
+
+        def broken():
+            raise RuntimeError("no SDK")
+
+        assert asyncio.run(readiness.run("broken", broken)) is None
+        assert readiness.ready
+        assert readiness.stats()["failed"] == {"broken": "RuntimeError: no SDK"}
+
+    def test_draining_is_not_ready(self):
+        readiness = Readiness([])
+        readiness.begin()
+        assert readiness.ready
+        readiness.drain()
+        assert not readiness.ready
+
+
+class TestReadyEndpoint:
+    """Tests for GET /ready."""
+
+    def test_not_ready_before_warm_up(self, monkeypatch):
+        monkeypatch.setattr(main, "readiness", Readiness(["problems", "parsers"]))
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["pending"] == ["problems", "parsers"]
+        # Liveness does not depend on the warm-up
+        assert client.get("/").status_code == 200
+
+    def test_ready_after_warm_up_and_not_while_draining(self):
+        with TestClient(app) as running:
+            response = wait_until_ready(running)
+            assert response.status_code == 200
+            body = response.json()
+            assert set(body["phases_ms"]) == set(main.readiness.phases)
+            assert body["failed"] == {}
+        assert main.readiness.stats()["draining"] is True
+        assert client.get("/ready").status_code == 503
+
+    def test_analysis_waits_for_model_clients(self, monkeypatch):
+        fake = FakeAsyncClient()
+        monkeypatch.setattr(main, "client", None)
+
+        def build_slowly():
+            time.sleep(0.2)
+            main.client = fake
+
+        monkeypatch.setattr(main, "build_model_clients", build_slowly)
+        with TestClient(app) as running:
+            response = running.post("/analyze", json={"code": "def f(a):\n    return sorted(a)", "topic": "array"})
+        assert response.status_code == 200
+        assert len(fake.chat.completions.calls) == 1
+
+
+class TestLazyImports:
+    """The model SDK is imported by the warm-up, not by importing the app."""
+
+    def test_importing_main_skips_openai(self, tmp_path):
+        env = {
+            **os.environ,
+            "GITHUB_TOKEN": "test-token",
+            "LOG_FILE": str(tmp_path / "api.log"),
+            "ATTEMPTS_DB": ":memory:",
+            "JOBS_DB": ":memory:",
+        }
+        completed = subprocess.run(
+            [sys.executable, "-c", "import sys, main; print('openai' in sys.modules, 'httpx2' in sys.modules)"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60
+        )
+        assert completed.returncode == 0, completed.stderr
+        assert completed.stdout.splitlines()[-1] == "False False"
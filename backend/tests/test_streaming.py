@@ -0,0 +1,92 @@
+"""
+Tests for streamed analysis and incremental feedback parsing.
+Run with: pytest tests/test_streaming.py
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from feedback_parser import IncrementalFeedbackParser, parse_sections
+from main import app
+from tests.conftest import SAMPLE_FEEDBACK, FakeAsyncClient
+
+client = TestClient(app)
+
+
+def read_events(body: str) -> list[tuple[str, dict]]:
+    """Parse an SSE body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestIncrementalParser:
+    """Tests for IncrementalFeedbackParser."""
+
+    def test_sections_close_before_stream_ends(self):
+        """Sections are emitted as soon as the next header arrives."""
+        parser = IncrementalFeedbackParser()
+        emitted = []
+        for char in SAMPLE_FEEDBACK:
+            emitted.extend(field for field, _ in parser.feed(char))
+            if "**Space Complexity**:" in parser.text:
+                break
+        assert emitted == ["time_complexity"]
+
+    def test_matches_full_parse(self):
+        """Emitted sections equal parsing the whole completion at once."""
+        for chunk_size in (1, 5, 64):
+            parser = IncrementalFeedbackParser()
+            emitted = {}
+            for start in range(0, len(SAMPLE_FEEDBACK), chunk_size):
+                emitted.update(parser.feed(SAMPLE_FEEDBACK[start:start + chunk_size]))
+            emitted.update(parser.finish())
+            assert emitted == parse_sections(SAMPLE_FEEDBACK)
+
+    def test_missing_sections_fall_back_on_finish(self):
+        """Sections never seen get the usual placeholders."""
+        parser = IncrementalFeedbackParser()
+        parser.feed("Looks fine overall.")
+        sections = dict(parser.finish())
+        assert sections["edge_cases"] == "No Edge Cases analysis provided."
+        assert len(sections["improvement_plan"]) == 3
+
+
+class TestStreamEndpoint:
+    """Tests for POST /analyze/stream."""
+
+    def test_streams_tokens_sections_and_done(self, fake_client):
+        """The stream carries tokens, every section and a final response."""
+        response = client.post("/analyze/stream", json={
+            "code": "def maxSumSubarray(arr, k):\n    return sum(arr[:k])",
+            "topic": "sliding_window"
+        })
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = read_events(response.text)
+        tokens = "".join(data["text"] for name, data in events if name == "token")
+        sections = {data["field"] for name, data in events if name == "section"}
+        name, final = events[-1]
+
+        assert tokens == SAMPLE_FEEDBACK
+        assert sections == set(main.Feedback.model_fields)
+        assert name == "done"
+        assert final["feedback"] == parse_sections(SAMPLE_FEEDBACK)
+        assert fake_client.chat.completions.calls[0]["stream"] is True
+
+    def test_upstream_error_is_reported_as_event(self, monkeypatch):
+        """Failures after the stream starts become an error event."""
+        monkeypatch.setattr(main, "client", FakeAsyncClient(error=RuntimeError("Request timeout")))
+
+        response = client.post("/analyze/stream", json={
+            "code": "def solution(arr):\n    return arr",
+            "topic": "array"
+        })
+        name, data = read_events(response.text)[-1]
+        assert name == "error"
+        assert "timed out" in data["detail"]
@@ -0,0 +1,112 @@
+"""
+Tests for the benchmark stub model server, including the full /analyze path
+through the OpenAI SDK.
+Run with: pytest tests/test_stub_llm.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import openai
+from fastapi.testclient import TestClient
+
+try:
+    import httpx2 as sdk_httpx  # Newer openai releases ship their own httpx fork
+except ImportError:
+    import httpx as sdk_httpx
+
+import main
+from main import app
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from load_test import percentile  # noqa: E402
+from stub_llm import StubConfig, create_app  # noqa: E402
+
+client = TestClient(app)
+
+
+def stub_client(config: StubConfig) -> openai.AsyncOpenAI:
+    """SDK client whose requests are served in-process by the stub."""
+    transport = sdk_httpx.ASGITransport(app=create_app(config))
+    return openai.AsyncOpenAI(
+        api_key="stub-token",
+        base_url="http://stub/v1",
+        max_retries=0,
+        http_client=openai.DefaultAsyncHttpxClient(transport=transport)
+    )
+
+
+class TestStubServer:
+    """Tests for the stub's OpenAI compatibility."""
+
+    def test_plain_and_streamed_completions(self):
+        """The SDK parses both response shapes, including streamed usage."""
+        async def run():
+            sdk = stub_client(StubConfig(latency=0, jitter=0, outputs=["canned feedback"]))
+            completion = await sdk.chat.completions.create(
+                model="gpt-4o", messages=[{"role": "user", "content": "hi"}]
+            )
+            stream = await sdk.chat.completions.create(
+                model="gpt-4o", messages=[{"role": "user", "content": "hi"}],
+                stream=True, stream_options={"include_usage": True}
+            )
+            text, usage = "", None
+            async for chunk in stream:
+                usage = chunk.usage or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    text += chunk.choices[0].delta.content
+            return completion, text, usage
+
+        completion, text, usage = asyncio.run(run())
+        assert completion.choices[0].message.content == "canned feedback"
+        assert completion.usage.completion_tokens > 0
+        assert text == "canned feedback" and usage.total_tokens > 0
+
+    def test_error_rate(self):
+        """Simulated failures surface as API errors in the SDK."""
+        async def run():
+            sdk = stub_client(StubConfig(latency=0, jitter=0, error_rate=1.0))
+            await sdk.chat.completions.create(model="gpt-4o", messages=[])
+
+        try:
+            asyncio.run(run())
+        except openai.APIStatusError as e:
+            assert e.status_code in (429, 500, 503)
+        else:
+            raise AssertionError("expected a simulated failure")
+
+    def test_percentile_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        assert (percentile(values, 50), percentile(values, 99), percentile(values, 100)) == (50, 99, 100)
+        assert percentile([], 95) == 0.0
+
+
+class TestRealRequestPath:
+    """/analyze against the stub through the real SDK rather than a fake client."""
+
+    def test_analyze_through_sdk(self, monkeypatch):
+        config = StubConfig(latency=0, jitter=0)
+        monkeypatch.setattr(main, "client", stub_client(config))
+        response = client.post("/analyze", json={
+            "code": "def f(arr):\n    return sum(arr)",
+            "topic": "array"
+        })
+        assert response.status_code == 200
+        assert response.json()["feedback"]["time_complexity"].startswith("O(n")
+        assert config.requests == 1
+
+    def test_structured_output_through_sdk(self, monkeypatch):
+        """With STRUCTURED_OUTPUT the request carries the schema and the JSON reply decodes without fallback."""
+        config = StubConfig(latency=0, jitter=0)
+        monkeypatch.setattr(main, "client", stub_client(config))
+        monkeypatch.setattr(main, "STRUCTURED_OUTPUT", True)
+        fallback_before = main.structured_decodes.value("fallback")
+        response = client.post("/analyze", json={
+            "code": "def g(arr):\n    return max(arr)",
+            "topic": "array"
+        })
+        assert response.status_code == 200
+        assert response.json()["feedback"]["improvement_plan"][0] == "Validate k against the array length"
+        assert main.structured_decodes.value("fallback") == fallback_before
@@ -0,0 +1,150 @@
+"""
+Tests for request tracing spans and their OTLP/JSON export.
+Run with: pytest tests/test_tracing.py
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from tracing import SpanExporter, Trace, parse_traceparent, span
+from tests.conftest import FakeAsyncClient
+
+client = TestClient(app)
+
+CODE = "def max_sum(arr, k):\n    return max(sum(arr[i:i + k]) for i in range(len(arr) - k + 1))"
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    """Export traces to a temporary file; returns a function that flushes and reads the spans."""
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter("test", path=str(path))
+    exporter.start()
+    monkeypatch.setattr(main.tracer, "exporter", exporter)
+    monkeypatch.setattr(main.tracer, "sample_rate", 1.0)
+
+    def read_spans() -> list[dict]:
+        exporter.close()
+        lines = path.read_text().splitlines() if path.exists() else []
+        return [
+            entry
+            for line in lines
+            for resource in json.loads(line)["resourceSpans"]
+            for scope in resource["scopeSpans"]
+            for entry in scope["spans"]
+        ]
+
+    yield read_spans
+    exporter.close()
+
+
+def attributes(entry: dict) -> dict:
+    return {a["key"]: next(iter(a["value"].values())) for a in entry["attributes"]}
+
+
+class TestSpans:
+    """Tests for span bookkeeping outside HTTP."""
+
+    def test_span_is_a_no_op_outside_a_trace(self):
+        with span("anything", size=3) as current:
+            current.set(more=1)
+        assert current.__class__.__name__ == "_NoSpan"
+
+    @pytest.mark.parametrize("header, expected", [
+        (PARENT, (TRACE_ID, "00f067aa0ba902b7", True)),
+        (f"00-{TRACE_ID}-00f067aa0ba902b7-00", (TRACE_ID, "00f067aa0ba902b7", False)),
+        (f"00-{'0' * 32}-00f067aa0ba902b7-01", None),
+        ("not-a-traceparent", None),
+        (None, None),
+    ])
+    def test_parse_traceparent(self, header, expected):
+        assert parse_traceparent(header) == expected
+
+    def test_exporter_posts_to_collector(self):
+        received = []
+
+        class Collector(BaseHTTPRequestHandler):
+            def do_POST(self):
+                received.append((self.path, json.loads(self.rfile.read(int(self.headers["Content-Length"])))))
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("127.0.0.1", 0), Collector)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            exporter = SpanExporter("test", endpoint=f"http://127.0.0.1:{server.server_port}/v1/traces")
+            exporter.start()
+            trace = Trace(TRACE_ID)
+            trace.add("root", None).end()
+            exporter.export(trace)
+            exporter.close()
+        finally:
+            server.shutdown()
+        path, body = received[0]
+        assert path == "/v1/traces"
+        resource = body["resourceSpans"][0]
+        assert resource["resource"]["attributes"][0]["value"] == {"stringValue": "test"}
+        assert resource["scopeSpans"][0]["spans"][0]["traceId"] == TRACE_ID
+        assert exporter.exported == 1
+
+
+class TestRequestTracing:
+    """Tests for TracingMiddleware and the /analyze stages."""
+
+    def test_analyze_records_each_stage(self, trace_file, fake_client):
+        response = client.post("/analyze", json={"code": CODE, "topic": "sliding_window"})
+        assert response.status_code == 200
+        spans = trace_file()
+        by_name = {entry["name"]: entry for entry in spans}
+        assert {"POST /analyze", "validate", "handler", "cache_lookup", "prompt", "model",
+                "parse_feedback", "serialize"} <= set(by_name)
+
+        root = by_name["POST /analyze"]
+        assert {entry["traceId"] for entry in spans} == {root["traceId"]}
+        assert "parentSpanId" not in root
+        assert attributes(root)["request_id"] == response.headers["x-request-id"]
+        assert attributes(root)["http.response.status_code"] == "200"
+        assert response.headers["traceparent"] == f"00-{root['traceId']}-{root['spanId']}-01"
+        # Stages nest under the endpoint, and timestamps are consistent
+        handler = by_name["handler"]
+        assert by_name["model"]["parentSpanId"] == handler["spanId"]
+        assert by_name["validate"]["parentSpanId"] == root["spanId"]
+        for entry in spans:
+            assert int(entry["startTimeUnixNano"]) <= int(entry["endTimeUnixNano"])
+
+    def test_continues_caller_trace_upstream(self, trace_file, fake_client):
+        client.post("/analyze", json={"code": CODE, "topic": "sliding_window"}, headers={"traceparent": PARENT})
+        spans = trace_file()
+        root = next(entry for entry in spans if entry["name"] == "POST /analyze")
+        model = next(entry for entry in spans if entry["name"] == "model")
+        assert root["traceId"] == TRACE_ID
+        assert root["parentSpanId"] == "00f067aa0ba902b7"
+        # The model call carries the model span as its parent
+        sent = fake_client.chat.completions.calls[0]["extra_headers"]["traceparent"]
+        assert sent == f"00-{TRACE_ID}-{model['spanId']}-01"
+
+    def test_failed_model_call_marks_span(self, trace_file, monkeypatch):
+        monkeypatch.setattr(main, "client", FakeAsyncClient(error=RuntimeError("upstream exploded")))
+        response = client.post("/analyze", json={"code": CODE, "topic": "sliding_window"})
+        assert response.status_code == 500
+        spans = {entry["name"]: entry for entry in trace_file()}
+        assert spans["model"]["status"]["message"] == "RuntimeError: upstream exploded"
+        assert spans["POST /analyze"]["status"]["code"] == 2
+
+    def test_unsampled_requests_are_not_traced(self, trace_file, monkeypatch, fake_client):
+        monkeypatch.setattr(main.tracer, "sample_rate", 0.0)
+        response = client.post("/analyze", json={"code": CODE, "topic": "sliding_window"})
+        assert "traceparent" not in response.headers
+        assert "extra_headers" not in fake_client.chat.completions.calls[0]
+        assert trace_file() == []
@@ -0,0 +1,427 @@
+"""
+Per-request tracing spans in the OpenTelemetry (OTLP/JSON) format.
+
+TracingMiddleware opens a root span for each sampled request and continues
+the caller's trace when a W3C `traceparent` header is sent; the response
+carries the request's own `traceparent` and the span is tagged with the
+request id from RequestContextMiddleware. Routes built with TracedRoute get
+"validate" (reading and validating the body), "handler" and "serialize"
+spans, and code on the request path adds its own stages with span(), which
+costs one context variable lookup when the request is not traced.
+
+Finished traces are put on a queue and exported by a background thread, as
+log records are: appended as OTLP/JSON lines to a file (readable by the
+OpenTelemetry Collector's otlpjsonfile receiver) and/or POSTed to an
+OTLP/HTTP collector endpoint such as http://localhost:4318/v1/traces.
+"""
+
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from typing import Any
+
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+STATUS_ERROR = 2
+
+_TRACEPARENT_RE = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+
+class Span:
+    """One timed stage of a request."""
+
+    __slots__ = ("name", "span_id", "parent_id", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: str | None, kind: int = KIND_INTERNAL, start_ns: int | None = None,
+                 attributes: dict | None = None):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes or {}
+        self.error: str | None = None
+
+    def set(self, **attributes) -> None:
+        """Add attributes; None values are skipped."""
+        self.attributes.update((k, v) for k, v in attributes.items() if v is not None)
+
+    def end(self, end_ns: int | None = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+
+class Trace:
+    """Spans recorded for one request."""
+
+    __slots__ = ("trace_id", "spans", "root", "handler_end_ns")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: list[Span] = []
+        self.root: Span | None = None
+        # When the route's endpoint returned, so the middleware can time serialization
+        self.handler_end_ns: int | None = None
+
+    def add(self, name: str, parent_id: str | None, **kwargs) -> Span:
+        span = Span(name, parent_id, **kwargs)
+        self.spans.append(span)
+        return span
+
+    def traceparent(self, span: Span) -> str:
+        return f"00-{self.trace_id}-{span.span_id}-01"
+
+
+# Trace and innermost open span of the current request, if it is traced
+_trace_var: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("trace", default=None)
+_span_var: contextvars.ContextVar[Span | None] = contextvars.ContextVar("span", default=None)
+
+
+class _NoSpan:
+    """Stand-in returned by span() outside a traced request."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def set(self, **attributes) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _OpenSpan:
+    __slots__ = ("trace", "name", "attributes", "span", "token")
+
+    def __init__(self, trace: Trace, name: str, attributes: dict):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        parent = _span_var.get()
+        self.span = self.trace.add(self.name, parent.span_id if parent else None, attributes=self.attributes)
+        self.token = _span_var.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        self.span.end()
+        _span_var.reset(self.token)
+
+
+def span(name: str, **attributes) -> Any:
+    """
+    Context manager timing a stage of the current request as a child of the open span.
+
+    Yields the Span (call .set() to add attributes once they are known), or a
+    no-op stand-in when the request is not traced.
+    """
+    trace = _trace_var.get()
+    if trace is None:
+        return _NO_SPAN
+    return _OpenSpan(trace, name, {k: v for k, v in attributes.items() if v is not None})
+
+
+def current_traceparent() -> str | None:
+    """traceparent header for outgoing calls made from the open span, if the request is traced."""
+    trace = _trace_var.get()
+    current = _span_var.get()
+    if trace is None or current is None:
+        return None
+    return trace.traceparent(current)
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None if it is invalid."""
+    match = _TRACEPARENT_RE.fullmatch((header or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def otlp_spans(trace: Trace) -> list[dict]:
+    """The trace's finished spans as OTLP/JSON span objects."""
+    spans = []
+    for span in trace.spans:
+        if span.end_ns is None:
+            continue
+        entry = {
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [_attribute(k, v) for k, v in span.attributes.items()],
+        }
+        if span.parent_id:
+            entry["parentSpanId"] = span.parent_id
+        if span.error:
+            entry["status"] = {"code": STATUS_ERROR, "message": span.error}
+        spans.append(entry)
+    return spans
+
+
+class SpanExporter:
+    """
+    Writes finished traces from a background thread.
+
+    Traces queued since the last write are sent as one OTLP/JSON
+    ExportTraceServiceRequest: one line appended to `path` and/or one POST to
+    `endpoint`. A full queue drops traces rather than slowing requests down.
+    """
+
+    def __init__(self, service_name: str, path: str | None = None, endpoint: str | None = None,
+                 max_queue: int = 10000, timeout: float = 5.0):
+        self.service_name = service_name
+        self.path = path or None
+        self.endpoint = endpoint or None
+        self.timeout = timeout
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._thread: threading.Thread | None = None
+        self.exported = self.dropped = self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path or self.endpoint)
+
+    def start(self) -> None:
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def export(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Write queued traces and stop the thread; safe to call more than once."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(self.timeout + 1)
+            self._thread = None
+
+    def request_body(self, traces: list[Trace]) -> bytes:
+        return json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [entry for trace in traces for entry in otlp_spans(trace)],
+                }],
+            }]
+        }, separators=(",", ":")).encode()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 512 and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            stop = None in batch
+            traces = [trace for trace in batch if trace is not None]
+            if traces:
+                self._write(traces)
+            if stop:
+                return
+
+    def _write(self, traces: list[Trace]) -> None:
+        body = self.request_body(traces)
+        try:
+            if self.path:
+                with open(self.path, "ab") as f:
+                    f.write(body + b"\n")
+            if self.endpoint:
+                request = urllib.request.Request(
+                    self.endpoint, data=body, method="POST", headers={"Content-Type": "application/json"}
+                )
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    pass
+            self.exported += len(traces)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Exporting %d traces failed: %s: %s", len(traces), type(e).__name__, e)
+
+
+class Tracer:
+    """
+    Decides which requests are traced and hands finished traces to the exporter.
+
+    A request whose caller sent a sampled traceparent is always traced (when
+    exporting is enabled at all); others are traced with probability
+    `sample_rate`.
+    """
+
+    def __init__(self, exporter: SpanExporter, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.started = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter.enabled and self.sample_rate > 0
+
+    def start(self, traceparent: str | None) -> tuple[Trace, str | None] | None:
+        """A new trace and the remote parent span id, or None if this request is not sampled."""
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = secrets.token_hex(16), None, random.random() < self.sample_rate
+        if not sampled:
+            return None
+        self.started += 1
+        return Trace(trace_id), parent_id
+
+    def finish(self, trace: Trace) -> None:
+        self.exporter.export(trace)
+
+    def stats(self) -> dict:
+        """Tracing counters for health endpoints."""
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "traces": self.started,
+            "exported": self.exporter.exported,
+            "dropped": self.exporter.dropped,
+            "export_errors": self.exporter.errors,
+        }
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces sampled HTTP requests.
+
+    Add it inside RequestContextMiddleware so the request id is known. The
+    root span is named after the route template and ends once the response
+    body has been fully sent, so streamed responses report their full duration.
+    """
+
+    def __init__(self, app, tracer: Tracer, request_id: contextvars.ContextVar | None = None):
+        self.app = app
+        self.tracer = tracer
+        self.request_id = request_id
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", ()):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        started = self.tracer.start(traceparent)
+        if started is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace, parent_id = started
+        root = trace.add(f"{scope['method']} {scope['path']}", parent_id, kind=KIND_SERVER, attributes={
+            "http.request.method": scope["method"],
+            "url.path": scope["path"],
+        })
+        if self.request_id is not None and self.request_id.get():
+            root.set(request_id=self.request_id.get())
+        trace.root = root
+        trace_token = _trace_var.set(trace)
+        span_token = _span_var.set(root)
+
+        async def send_traced(message):
+            if message["type"] == "http.response.start":
+                if trace.handler_end_ns is not None:
+                    serialize = trace.add("serialize", root.span_id, start_ns=trace.handler_end_ns)
+                    serialize.end()
+                root.set(**{"http.response.status_code": message["status"]})
+                message["headers"] = list(message.get("headers", ())) + [
+                    (b"traceparent", trace.traceparent(root).encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_traced)
+        except Exception as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                root.name = f"{scope['method']} {route}"
+                root.set(**{"http.route": route})
+            if root.attributes.get("http.response.status_code", 500) >= 500 and root.error is None:
+                root.error = "HTTP 5xx"
+            root.end()
+            _span_var.reset(span_token)
+            _trace_var.reset(trace_token)
+            self.tracer.finish(trace)
+
+
+class TracedRoute(APIRoute):
+    """
+    APIRoute whose async endpoints record "validate" and "handler" spans.
+
+    "validate" runs from the start of the request to the endpoint call, which
+    is mostly reading the body and validating it against the request model;
+    the middleware adds "serialize" from the endpoint's return to the start
+    of the response.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _traced_endpoint(endpoint):
+    @functools.wraps(endpoint)
+    async def traced(*args, **kwargs):
+        trace = _trace_var.get()
+        if trace is None:
+            return await endpoint(*args, **kwargs)
+        root = trace.root
+        validate = trace.add("validate", root.span_id, start_ns=root.start_ns)
+        validate.end()
+        try:
+            with span("handler", **{"code.function": endpoint.__name__}):
+                return await endpoint(*args, **kwargs)
+        finally:
+            trace.handler_end_ns = time.time_ns()
+    return traced
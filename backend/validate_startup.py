@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 """
 Startup validation script for interview-flow-AI2026 backend.
-Checks environment configuration and dependencies before starting the server.
+Checks environment configuration and dependencies before starting the server,
+then imports the app and runs its warm-up once to time a cold start.
 """
 
 import os
 import sys
+import time
+import asyncio
 import importlib.util
 from pathlib import Path
 
@@ -116,6 +119,34 @@ def check_files():
     return True
 
 
+def check_warm_up():
+    """Import the app and run its warm-up phases, reporting how long each took."""
+    started = time.perf_counter()
+    try:
+        import main as app_module
+    except Exception as e:
+        print(f"❌ Importing main failed: {type(e).__name__}: {e}")
+        return False
+    print(f"✅ main imported in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    async def warm_up():
+        try:
+            await app_module.warm_up_app()
+        finally:
+            if app_module.http_client is not None:
+                await app_module.http_client.aclose()
+
+    asyncio.run(warm_up())
+    stats = app_module.readiness.stats()
+    for phase, ms in stats["phases_ms"].items():
+        if phase in stats["failed"]:
+            print(f"❌ {phase}: {stats['failed'][phase]}")
+        else:
+            print(f"✅ {phase} warmed in {ms:.0f}ms")
+    print(f"   Ready {(time.perf_counter() - started) * 1000:.0f}ms after import started")
+    return not stats["failed"]
+
+
 def main():
     """Run all validation checks."""
     print("=" * 60)
@@ -128,6 +159,7 @@ def main():
         ("Required Files", check_files),
         ("Dependencies", check_dependencies),
         ("Environment Variables", check_environment_variables),
+        ("Cold Start", check_warm_up),
     ]
     
     all_passed = True
@@ -7,6 +7,31 @@ const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 const REQUEST_TIMEOUT = 30000; // 30 seconds
 const MAX_RETRIES = 3;
 const RETRY_DELAY = 1000; // 1 second initial delay
+const JOB_POLL_INTERVAL = 1000; // 1 second between status checks without a WebSocket
+const JOB_TIMEOUT = 180000; // 3 minutes, covering the backend's own retries
+
+const USER_ID_KEY = 'interviewFlowUserId';
+
+/**
+ * Anonymous id for this browser, used to group attempts on the dashboard
+ */
+export const getUserId = () => {
+  let userId = localStorage.getItem(USER_ID_KEY);
+  if (!userId) {
+    userId = `u_${Date.now().toString(36)}_${Math.random().toString(36).slice(2, 10)}`;
+    localStorage.setItem(USER_ID_KEY, userId);
+  }
+  return userId;
+};
+
+/**
+ * Unique key for one submission, sent as Idempotency-Key so retries reuse the same job
+ */
+const newIdempotencyKey = () => (
+  window.crypto && window.crypto.randomUUID
+    ? window.crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`
+);
 
 /**
  * Sleep utility for retry delays
@@ -106,26 +131,83 @@ export const fetchProblem = async () => {
   }
 };
 
+const isFinished = (job) => job.status === 'done' || job.status === 'failed';
+
+/**
+ * Poll a job's status until it finishes
+ */
+const pollJob = async (jobId, deadline) => {
+  while (Date.now() < deadline) {
+    const response = await fetchWithRetry(`${API_BASE_URL}/jobs/${jobId}`);
+    const job = await handleResponse(response);
+    if (isFinished(job)) {
+      return job;
+    }
+    await sleep(JOB_POLL_INTERVAL);
+  }
+  throw new Error('Analysis is taking longer than expected - please try again');
+};
+
+/**
+ * Wait for a job to finish, pushed over a WebSocket, falling back to polling
+ */
+const waitForJob = (jobId) => {
+  const deadline = Date.now() + JOB_TIMEOUT;
+  if (typeof WebSocket === 'undefined') {
+    return pollJob(jobId, deadline);
+  }
+  return new Promise((resolve, reject) => {
+    let settled = false;
+    const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/jobs/${jobId}/ws`);
+    const fallBack = () => {
+      if (!settled) {
+        settled = true;
+        pollJob(jobId, deadline).then(resolve, reject);
+      }
+    };
+    socket.onmessage = (event) => {
+      const job = JSON.parse(event.data);
+      if (isFinished(job) && !settled) {
+        settled = true;
+        resolve(job);
+      }
+    };
+    socket.onerror = fallBack;
+    socket.onclose = fallBack;
+  });
+};
+
 /**
  * Submit code for analysis
+ *
+ * The analysis runs as a background job. The Idempotency-Key is created once
+ * per submission, so a retried request gets the same job back instead of
+ * paying for another model call.
  */
 export const analyzeCode = async (code, topic) => {
   try {
     const response = await fetchWithRetry(
-      `${API_BASE_URL}/analyze`,
+      `${API_BASE_URL}/jobs`,
       {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Idempotency-Key': newIdempotencyKey(),
         },
         body: JSON.stringify({
           code,
           topic,
+          user_id: getUserId(),
         }),
       }
     );
 
-    return await handleResponse(response);
+    const submitted = await handleResponse(response);
+    const job = isFinished(submitted) ? submitted : await waitForJob(submitted.id);
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Failed to analyze code. Please try again.');
+    }
+    return job.result;
   } catch (error) {
     console.error('Error analyzing code:', error);
     throw new Error(
@@ -133,3 +215,60 @@ export const analyzeCode = async (code, topic) => {
     );
   }
 };
+
+/**
+ * Open a live interview session for instant checks while typing
+ *
+ * Send debounced snapshots with sendSnapshot(code); the server answers with
+ * "checks" (syntax, per-function complexity), "judge", "feedback" and
+ * "error" messages, passed to onMessage. Returns null where WebSockets are
+ * unavailable, in which case only explicit submits get feedback.
+ */
+export const openLiveSession = ({ topic, problemId, onMessage }) => {
+  if (typeof WebSocket === 'undefined') {
+    return null;
+  }
+  const params = new URLSearchParams({ topic, user_id: getUserId() });
+  if (problemId) {
+    params.set('problem_id', problemId);
+  }
+  const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/session?${params}`);
+  let pending = null;
+
+  socket.onopen = () => {
+    if (pending) {
+      socket.send(pending);
+      pending = null;
+    }
+  };
+  socket.onmessage = (event) => onMessage(JSON.parse(event.data));
+
+  return {
+    sendSnapshot: (code) => {
+      const message = JSON.stringify({ type: 'snapshot', code });
+      if (socket.readyState === WebSocket.OPEN) {
+        socket.send(message);
+      } else {
+        // Only the newest snapshot matters
+        pending = message;
+      }
+    },
+    close: () => socket.close(),
+  };
+};
+
+/**
+ * Fetch progress stats for this browser's attempts
+ */
+export const fetchDashboard = async () => {
+  try {
+    const params = new URLSearchParams({ user_id: getUserId() });
+    const response = await fetchWithRetry(`${API_BASE_URL}/dashboard?${params}`);
+    return await handleResponse(response);
+  } catch (error) {
+    console.error('Error fetching dashboard:', error);
+    throw new Error(
+      error.message || 'Failed to load your progress. Please try again.'
+    );
+  }
+};
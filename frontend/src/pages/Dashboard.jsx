@@ -1,4 +1,5 @@
-import React, { memo } from 'react';
+import React, { useState, useEffect, memo } from 'react';
+import { fetchDashboard } from '../api';
 
 // Memoized components for better performance
 const StatCard = memo(({ title, value }) => (
@@ -12,12 +13,16 @@ const StatCard = memo(({ title, value }) => (
 
 StatCard.displayName = 'StatCard';
 
+const formatTopic = (topic) =>
+  topic.split('_').map(word => word.charAt(0).toUpperCase() + word.slice(1)).join(' ');
+
 const WeakTopics = memo(({ topics }) => (
   <div style={{ marginBottom: '20px' }}>
     <h3>Topics to Focus On</h3>
     <ul style={{ marginLeft: '20px' }}>
+      {topics.length === 0 && <li>Solve a few problems to see where to focus</li>}
       {topics.map((topic, idx) => (
-        <li key={idx} style={{ marginBottom: '8px' }}>{topic}</li>
+        <li key={idx} style={{ marginBottom: '8px' }}>{formatTopic(topic)}</li>
       ))}
     </ul>
   </div>
@@ -39,13 +44,33 @@ const SuccessTips = memo(() => (
 SuccessTips.displayName = 'SuccessTips';
 
 function Dashboard() {
-  // Hardcoded stats for MVP
-  const stats = {
+  const [stats, setStats] = useState({
     problemsSolved: 0,
-    weakTopics: ['Sliding Window', 'Dynamic Programming'],
+    weakTopics: [],
     readinessScore: 'Beginner',
     totalAttempts: 0
-  };
+  });
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    fetchDashboard()
+      .then(data => {
+        if (cancelled) return;
+        setStats({
+          problemsSolved: data.problems_solved,
+          weakTopics: data.weak_topics,
+          readinessScore: data.readiness,
+          totalAttempts: data.total_attempts
+        });
+      })
+      .catch(err => {
+        if (!cancelled) setError(err.message);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, []);
 
   return (
     <div className="container">
@@ -62,6 +87,7 @@ function Dashboard() {
 
       <div className="section">
         <h2>📈 Your Performance</h2>
+        {error && <div className="error">{error}</div>}
         <p style={{ marginBottom: '15px' }}>Keep practicing to improve your interview readiness!</p>
         
         <WeakTopics topics={stats.weakTopics} />
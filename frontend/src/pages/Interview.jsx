@@ -1,6 +1,10 @@
-import React, { useState, useEffect, memo } from 'react';
+import React, { useState, useEffect, useRef, memo } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { fetchProblem, analyzeCode } from '../api';
+import { fetchProblem, analyzeCode, openLiveSession } from '../api';
+import { useDebounce } from '../hooks/useDebounce';
+
+// Wait for a pause in typing before sending the code for live checks
+const LIVE_CHECK_DELAY = 800;
 
 // Memoized components to prevent unnecessary re-renders
 const ProblemDisplay = memo(({ problem }) => (
@@ -48,6 +52,35 @@ const LoadingSkeleton = memo(() => (
 
 LoadingSkeleton.displayName = 'LoadingSkeleton';
 
+const LiveChecks = memo(({ checks, judge }) => {
+  if (!checks) {
+    return null;
+  }
+  return (
+    <div className="feedback-section" style={{ fontSize: '14px' }}>
+      <h3>Live Checks</h3>
+      {checks.syntax.ok ? (
+        <ul>
+          {checks.functions.map((fn) => (
+            <li key={fn.name}>
+              <code>{fn.name}</code>: time {fn.time_complexity || '?'}, space {fn.space_complexity || '?'}
+            </li>
+          ))}
+        </ul>
+      ) : (
+        <p style={{ color: '#c0392b' }}>
+          Syntax error on line {checks.syntax.line}: {checks.syntax.message}
+        </p>
+      )}
+      {judge && (
+        <p>Tests: {judge.passed}/{judge.total} passed ({judge.verdict.replace(/_/g, ' ')})</p>
+      )}
+    </div>
+  );
+});
+
+LiveChecks.displayName = 'LiveChecks';
+
 function Interview() {
   const navigate = useNavigate();
   const [problem, setProblem] = useState(null);
@@ -55,6 +88,10 @@ function Interview() {
   const [loading, setLoading] = useState(true);
   const [submitting, setSubmitting] = useState(false);
   const [error, setError] = useState(null);
+  const [liveChecks, setLiveChecks] = useState(null);
+  const [liveJudge, setLiveJudge] = useState(null);
+  const liveSession = useRef(null);
+  const debouncedCode = useDebounce(code, LIVE_CHECK_DELAY);
 
   // Load problem on mount
   useEffect(() => {
@@ -75,6 +112,37 @@ function Interview() {
     loadProblem();
   }, []);
 
+  // Live session for instant local checks while typing
+  useEffect(() => {
+    if (!problem) {
+      return undefined;
+    }
+    const session = openLiveSession({
+      topic: problem.topic,
+      problemId: problem.id,
+      onMessage: (message) => {
+        if (message.type === 'checks') {
+          setLiveChecks(message);
+        } else if (message.type === 'judge') {
+          setLiveJudge(message);
+        }
+      },
+    });
+    liveSession.current = session;
+    return () => {
+      liveSession.current = null;
+      if (session) {
+        session.close();
+      }
+    };
+  }, [problem]);
+
+  useEffect(() => {
+    if (liveSession.current && debouncedCode.trim().length >= 5) {
+      liveSession.current.sendSnapshot(debouncedCode);
+    }
+  }, [debouncedCode]);
+
   const handleSubmit = async (e) => {
     e.preventDefault();
 
@@ -137,6 +205,7 @@ function Interview() {
             onChange={(e) => setCode(e.target.value)}
             placeholder="Write your Python code here..."
           />
+          <LiveChecks checks={liveChecks} judge={liveJudge} />
         </div>
 
         <div className="section" style={{ textAlign: 'center' }}>